@@ -0,0 +1,426 @@
+"""Startup benchmark of engine pool sizes and ONNX Runtime thread counts.
+
+The best split of a host's cores between concurrent engines and the intra-op
+threads of each engine depends on the CPU, the models and the image sizes,
+so the service can measure a few configurations on synthetic images when it
+starts. The decision is cached per host fingerprint, and later starts on the
+same host and settings apply it without benchmarking again.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from .config import settings
+from .cpu_topology import WorkerPlacement, cpu_placement, pinned
+from .logging_config import LoggingMixin
+
+CACHE_NAME = "autotune.json"
+CACHE_VERSION = 1
+
+# Largest pool size considered when no pool sizes are configured
+MAX_AUTO_POOL_SIZE = 8
+
+
+class TuningCandidate(NamedTuple):
+    """A pool size and the intra-op threads of each of its engines."""
+
+    pool_size: int
+    intra_op_threads: int
+
+
+class TuningMeasurement(NamedTuple):
+    """Throughput and per-image latency of a candidate on the synthetic images."""
+
+    candidate: TuningCandidate
+    images: int
+    throughput: float
+    p50_latency: float
+    p95_latency: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the measurement as a JSON-serializable dictionary."""
+        return {
+            "pool_size": self.candidate.pool_size,
+            "intra_op_threads": self.candidate.intra_op_threads,
+            "images": self.images,
+            "throughput": self.throughput,
+            "p50_latency": self.p50_latency,
+            "p95_latency": self.p95_latency,
+        }
+
+
+def available_cpus() -> int:
+    """Get the number of CPUs engine workers may run on."""
+    return len(cpu_placement.allowed)
+
+
+def _cpu_model() -> str:
+    """Get the CPU model name, falling back to the platform's processor string."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.partition(":")[2].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _memory_total() -> int:
+    """Get the physical memory size in bytes, or 0 when unknown."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def _package_version(name: str) -> str | None:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def host_fingerprint(providers: list[str], **config: Any) -> dict[str, Any]:
+    """
+    Describe the host and engine configuration a tuning decision is valid for.
+
+    Args:
+        providers: Execution providers of the engine
+        **config: Tuning inputs that also invalidate a decision when changed
+
+    Returns:
+        Hardware, library and configuration identity
+    """
+    return {
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "available_cpus": available_cpus(),
+        "memory_total": _memory_total(),
+        "onnxruntime": _package_version("onnxruntime"),
+        "rapidocr": _package_version("rapidocr"),
+        "providers": providers,
+        "cpu_pinning": cpu_placement.enabled,
+        "cores_per_worker": cpu_placement.cores_per_worker,
+        **config,
+    }
+
+
+def fingerprint_key(fingerprint: dict[str, Any]) -> str:
+    """Get the cache key of a host fingerprint."""
+    encoded = json.dumps(fingerprint, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+def candidate_configs(
+    cpus: int, pool_sizes: list[int], thread_counts: list[int]
+) -> list[TuningCandidate]:
+    """
+    Build the configurations to benchmark.
+
+    Without explicit pool sizes, powers of two up to the CPU count are tried.
+    Without explicit thread counts, each engine gets an equal share of the
+    CPUs. Combinations that would run more threads than there are CPUs are
+    skipped, except for a single engine.
+
+    Args:
+        cpus: CPUs available to the process
+        pool_sizes: Pool sizes to try, or empty for automatic
+        thread_counts: Intra-op thread counts to try, or empty for automatic
+
+    Returns:
+        Distinct candidates ordered by pool size, then threads
+    """
+    if not pool_sizes:
+        limit = min(cpus, MAX_AUTO_POOL_SIZE)
+        pool_sizes = [1 << i for i in range(limit.bit_length()) if 1 << i <= limit]
+
+    candidates = set()
+    for pool_size in pool_sizes:
+        if pool_size < 1:
+            continue
+        threads = thread_counts or [max(1, cpus // pool_size)]
+        for thread_count in threads:
+            if thread_count < 1:
+                continue
+            if pool_size > 1 and pool_size * thread_count > cpus:
+                continue
+            candidates.add(TuningCandidate(pool_size, thread_count))
+    return sorted(candidates)
+
+
+def benchmark_candidate(
+    candidate: TuningCandidate,
+    engine_factory: Callable[[int], Any],
+    images: list[np.ndarray],
+    rounds: int,
+    placements: list[WorkerPlacement] | None = None,
+) -> TuningMeasurement:
+    """
+    Measure a candidate by running the images through a temporary pool.
+
+    Every engine is warmed up on the first image before timing starts. Each
+    engine then processes ``rounds`` passes over the images concurrently
+    with the others, as a saturated pool would. With worker placements, the
+    engines are built and run on their workers' core sets, and their threads
+    are capped to them, as in the pool the decision is applied to.
+
+    Args:
+        candidate: Configuration to measure
+        engine_factory: Builds an engine with the given intra-op threads
+        images: Synthetic images
+        rounds: Passes over the images per engine
+        placements: Core sets of the pool's workers, if pinning is enabled
+
+    Returns:
+        The candidate's throughput and latency percentiles
+    """
+    threads = candidate.intra_op_threads
+    core_sets: list[frozenset[int] | None] = [None] * candidate.pool_size
+    if placements:
+        threads = cpu_placement.intra_op_threads(placements, threads)
+        core_sets = [placement.cpus for placement in placements]
+
+    def build(cpus: frozenset[int] | None) -> Any:
+        with pinned(cpus):
+            engine = engine_factory(threads)
+            engine(images[0])
+            return engine
+
+    engines = [build(cpus) for cpus in core_sets]
+
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def work(index: int) -> None:
+        with pinned(core_sets[index]):
+            for _ in range(rounds):
+                for image in images:
+                    start_time = time.perf_counter()
+                    engines[index](image)
+                    elapsed = time.perf_counter() - start_time
+                    with lock:
+                        latencies.append(elapsed)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(engines)) as executor:
+        list(executor.map(work, range(len(engines))))
+    wall_time = time.perf_counter() - start_time
+
+    return TuningMeasurement(
+        candidate=candidate,
+        images=len(latencies),
+        throughput=len(latencies) / wall_time if wall_time > 0 else 0.0,
+        p50_latency=float(np.percentile(latencies, 50)),
+        p95_latency=float(np.percentile(latencies, 95)),
+    )
+
+
+def select_best(
+    measurements: list[TuningMeasurement], latency_target: float
+) -> TuningMeasurement:
+    """
+    Pick the highest-throughput candidate whose p95 latency meets the target.
+
+    When no candidate meets the target the one with the lowest p95 latency
+    wins. A target of 0 disables the latency constraint.
+    """
+    if not measurements:
+        raise ValueError("No tuning measurements to choose from")
+    eligible = [
+        m
+        for m in measurements
+        if latency_target <= 0 or m.p95_latency <= latency_target
+    ]
+    if not eligible:
+        return min(measurements, key=lambda m: m.p95_latency)
+    return max(eligible, key=lambda m: m.throughput)
+
+
+class Autotuner(LoggingMixin):
+    """Benchmarks tuning candidates and caches the decision per host."""
+
+    def __init__(
+        self,
+        cache_path: Path,
+        latency_target: float,
+        pool_sizes: list[int],
+        thread_counts: list[int],
+        image_sizes: list[int],
+        rounds: int,
+        force: bool = False,
+    ) -> None:
+        super().__init__()
+        self.cache_path = Path(cache_path)
+        self.latency_target = latency_target
+        self.pool_sizes = pool_sizes
+        self.thread_counts = thread_counts
+        self.image_sizes = image_sizes
+        self.rounds = max(1, rounds)
+        self.force = force
+        self._decision: dict[str, Any] | None = None
+
+    @property
+    def decision(self) -> dict[str, Any] | None:
+        """The decision applied at startup, if tuning ran."""
+        return self._decision
+
+    def _load_cache(self) -> dict[str, Any]:
+        """Load cached decisions, treating a missing or corrupt file as empty."""
+        try:
+            with open(self.cache_path) as f:
+                cache: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.log_warning("Ignoring unreadable autotune cache", error=str(e))
+            return {}
+        if cache.get("version") != CACHE_VERSION:
+            return {}
+        return cache
+
+    def _save_cache(self, cache: dict[str, Any]) -> None:
+        """Atomically write the cached decisions."""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.cache_path)
+
+    def tune(
+        self,
+        providers: list[str],
+        engine_factory: Callable[[int], Any],
+        make_image: Callable[[int], np.ndarray],
+        **config: Any,
+    ) -> dict[str, Any]:
+        """
+        Get the tuning decision for this host, benchmarking on a cache miss.
+
+        Args:
+            providers: Execution providers of the engine
+            engine_factory: Builds an engine with the given intra-op threads
+            make_image: Creates a synthetic image with the given long side
+            **config: Engine identity that invalidates cached decisions
+
+        Returns:
+            The chosen pool size and threads, and the measurements behind them
+        """
+        fingerprint = host_fingerprint(
+            providers,
+            latency_target=self.latency_target,
+            pool_sizes=self.pool_sizes,
+            thread_counts=self.thread_counts,
+            image_sizes=self.image_sizes,
+            rounds=self.rounds,
+            **config,
+        )
+        key = fingerprint_key(fingerprint)
+        cache = self._load_cache()
+        cached = cache.get("decisions", {}).get(key)
+        if cached is not None and not self.force:
+            self._decision = {**cached, "source": "cache"}
+            self.log_info(
+                "Applying cached autotune decision",
+                key=key,
+                pool_size=cached["pool_size"],
+                intra_op_threads=cached["intra_op_threads"],
+            )
+            return self._decision
+
+        candidates = candidate_configs(
+            fingerprint["available_cpus"], self.pool_sizes, self.thread_counts
+        )
+        if not candidates:
+            raise ValueError("No valid autotune candidates for this host")
+        images = [make_image(size) for size in self.image_sizes]
+
+        self.log_info(
+            "Starting autotune", key=key, candidates=len(candidates), images=len(images)
+        )
+        start_time = time.time()
+        measurements = []
+        for candidate in candidates:
+            measurement = benchmark_candidate(
+                candidate,
+                engine_factory,
+                images,
+                self.rounds,
+                placements=cpu_placement.layout(candidate.pool_size),
+            )
+            self.log_info("Autotune candidate measured", **measurement.to_dict())
+            measurements.append(measurement)
+        best = select_best(measurements, self.latency_target)
+
+        decision = {
+            "key": key,
+            "pool_size": best.candidate.pool_size,
+            "intra_op_threads": best.candidate.intra_op_threads,
+            "meets_target": (
+                self.latency_target <= 0 or best.p95_latency <= self.latency_target
+            ),
+            "latency_target": self.latency_target,
+            "duration": time.time() - start_time,
+            "tuned_at": time.time(),
+            "fingerprint": fingerprint,
+            "measurements": [m.to_dict() for m in measurements],
+        }
+        cache["version"] = CACHE_VERSION
+        cache.setdefault("decisions", {})[key] = decision
+        try:
+            self._save_cache(cache)
+        except OSError as e:
+            self.log_warning("Failed to save autotune decision", error=str(e))
+
+        self._decision = {**decision, "source": "benchmark"}
+        self.log_info(
+            "Autotune completed",
+            key=key,
+            pool_size=decision["pool_size"],
+            intra_op_threads=decision["intra_op_threads"],
+            meets_target=decision["meets_target"],
+            duration=decision["duration"],
+        )
+        return self._decision
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get the applied decision for the stats endpoint."""
+        decision = self._decision
+        if decision is None:
+            return {"applied": False}
+        return {
+            "applied": True,
+            "source": decision["source"],
+            "key": decision["key"],
+            "pool_size": decision["pool_size"],
+            "intra_op_threads": decision["intra_op_threads"],
+            "meets_target": decision["meets_target"],
+            "latency_target": decision["latency_target"],
+            "tuned_at": decision["tuned_at"],
+            "measurements": decision["measurements"],
+        }
+
+
+# Global autotuner instance
+autotuner = Autotuner(
+    cache_path=settings.autotune_cache_path or settings.model_cache_dir / CACHE_NAME,
+    latency_target=settings.autotune_latency_target,
+    pool_sizes=settings.autotune_pool_sizes,
+    thread_counts=settings.autotune_intra_op_threads,
+    image_sizes=settings.autotune_image_sizes,
+    rounds=settings.autotune_rounds,
+    force=settings.autotune_force,
+)
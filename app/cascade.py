@@ -0,0 +1,130 @@
+"""Coarse-to-fine OCR: a low-resolution pass plus full-resolution refinement."""
+
+import time
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from .models import CascadeInfo
+
+# Context kept around a region when it is cropped for re-recognition,
+# as a fraction of the region height
+CROP_PADDING = 0.25
+
+
+def region_height(box: np.ndarray) -> float:
+    """Get the text height of a detected quadrilateral (top-left to bottom-left)."""
+    return float(np.linalg.norm(box[3] - box[0]))
+
+
+def select_refinements(
+    boxes: np.ndarray,
+    scores: list[float],
+    min_score: float,
+    min_text_height: float,
+) -> list[int]:
+    """Get the indices of coarse regions that are low-confidence or undersized."""
+    return [
+        index
+        for index, (box, score) in enumerate(zip(boxes, scores, strict=True))
+        if score < min_score or region_height(box) < min_text_height
+    ]
+
+
+def crop_region(image: Image.Image, box: np.ndarray, scale: float) -> Image.Image:
+    """Crop a coarse-pass region, with some padding, from the full-resolution image."""
+    full_box = box / scale
+    x0, y0 = full_box.min(axis=0)
+    x1, y1 = full_box.max(axis=0)
+    padding = (y1 - y0) * CROP_PADDING
+    return image.crop(
+        (
+            max(0, int(x0 - padding)),
+            max(0, int(y0 - padding)),
+            min(image.width, int(np.ceil(x1 + padding))),
+            min(image.height, int(np.ceil(y1 + padding))),
+        )
+    )
+
+
+def run_cascade(
+    engine: Any,
+    image: Image.Image,
+    engine_kwargs: dict[str, Any],
+    max_side_len: int,
+    min_score: float,
+    min_text_height: float,
+    coarse_box_thresh: float = 0.3,
+) -> tuple[list[str], CascadeInfo]:
+    """
+    Run detection and recognition at reduced scale, then refine hard regions.
+
+    The coarse pass keeps every recognized line regardless of score and uses
+    a lower box threshold, so weak lines and faint small text can still be
+    refined. Low-confidence or undersized regions are cropped from the
+    full-resolution image and recognized again without detection; the better
+    of the two readings is kept. The request's ``text_score`` threshold is
+    applied to the merged result. Text the coarse pass does not detect at
+    all is not recovered, so the coarse size must keep the smallest text
+    of interest detectable.
+
+    Args:
+        engine: RapidOCR engine held by the caller
+        image: Full-resolution image
+        engine_kwargs: RapidOCR call parameters of the request
+        max_side_len: Longest side of the coarse pass image
+        min_score: Refine regions recognized with a lower confidence
+        min_text_height: Refine regions shorter than this in the coarse image
+        coarse_box_thresh: Upper bound of the coarse pass detection box threshold
+
+    Returns:
+        Recognized text lines in reading order, and per-pass statistics
+    """
+    start_time = time.perf_counter()
+    scale = min(1.0, max_side_len / max(image.size))
+    coarse = image
+    if scale < 1.0:
+        coarse = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.Resampling.BILINEAR,
+        )
+
+    box_thresh = min(engine_kwargs.get("box_thresh", 0.5), coarse_box_thresh)
+    result = engine(
+        coarse, **{**engine_kwargs, "text_score": 0.0, "box_thresh": box_thresh}
+    )
+    boxes = getattr(result, "boxes", None)
+    if boxes is None or not result.txts:
+        boxes, txts, scores = np.empty((0, 4, 2)), [], []
+    else:
+        txts = [str(text) for text in result.txts]
+        scores = [float(score) for score in result.scores]
+    coarse_time = time.perf_counter() - start_time
+
+    # At full scale there is no higher resolution to refine with
+    refine = (
+        select_refinements(boxes, scores, min_score, min_text_height)
+        if scale < 1.0
+        else []
+    )
+    refine_start = time.perf_counter()
+    for index in refine:
+        crop = crop_region(image, boxes[index], scale)
+        refined = engine(crop, **{**engine_kwargs, "use_det": False, "text_score": 0.0})
+        if refined.txts and float(refined.scores[0]) > scores[index]:
+            txts[index] = str(refined.txts[0])
+            scores[index] = float(refined.scores[0])
+    refine_time = time.perf_counter() - refine_start
+
+    text_score = engine_kwargs.get("text_score", 0.0)
+    lines = [
+        text for text, score in zip(txts, scores, strict=True) if score >= text_score
+    ]
+    return lines, CascadeInfo(
+        scale=scale,
+        coarse_time=coarse_time,
+        refine_time=refine_time,
+        regions=len(txts),
+        refined_regions=len(refine),
+    )
@@ -0,0 +1,278 @@
+"""Compact binary encodings of OCR responses and their decoders.
+
+Two formats are offered besides JSON:
+
+``application/msgpack``
+    The JSON document as MessagePack: the same field names and nesting,
+    with smaller numbers and no string escaping.
+
+``application/vnd.rapidocr.columnar+msgpack``
+    A MessagePack map laid out by column. Every string is stored once in a
+    string table and referenced by index, and per-line values are packed
+    into flat little-endian arrays, so large responses with line boxes
+    shrink to a fraction of their JSON size and decode with a few array
+    copies. A result's text is not stored again when it is just its lines
+    joined by newlines. Scores and box coordinates are stored as float32,
+    and boxes must be quadrilaterals (four points), as RapidOCR returns
+    them.
+
+Both decode back to an ``OCRResponse`` with :func:`decode_response`.
+"""
+
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+
+from .models import (
+    CascadeInfo,
+    CostInfo,
+    DuplicateInfo,
+    OCRResponse,
+    OCRResult,
+    TextLineResult,
+)
+
+try:
+    import msgpack
+except ImportError:  # Optional "performance" extra
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+COLUMNAR_MEDIA_TYPE = "application/vnd.rapidocr.columnar+msgpack"
+
+# Accepted request media types of each binary format
+MEDIA_TYPE_ALIASES = {
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE: COLUMNAR_MEDIA_TYPE,
+}
+
+COLUMNAR_FORMAT = "rapidocr-columnar"
+COLUMNAR_VERSION = 1
+
+# Points per box in the columnar layout
+BOX_POINTS = 4
+
+# Context index of results whose text is their lines joined by newlines
+JOINED_LINES = 0xFFFFFFFF
+
+INDEX_DTYPE = np.dtype("<u4")
+FLOAT_DTYPE = np.dtype("<f4")
+
+
+def available_media_types() -> list[str]:
+    """Get the supported response media types in server preference order."""
+    if msgpack is None:
+        return [JSON_MEDIA_TYPE]
+    return [COLUMNAR_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, JSON_MEDIA_TYPE]
+
+
+def _require_msgpack() -> None:
+    if msgpack is None:
+        raise RuntimeError("Binary response formats require the msgpack package")
+
+
+class StringTable:
+    """Assigns each distinct string an index in order of first use."""
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._indices: dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        """Get the index of a string, appending it to the table if new."""
+        index = self._indices.get(value)
+        if index is None:
+            index = self._indices[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _pack_array(values: Any, dtype: np.dtype) -> bytes:
+    return np.asarray(values, dtype=dtype).tobytes()
+
+
+def _unpack_array(data: bytes, dtype: np.dtype) -> np.ndarray:
+    return np.frombuffer(data, dtype=dtype)
+
+
+def _pack_row(model: BaseModel | None) -> list[Any] | None:
+    """Get a nested model's values in field order, without the field names."""
+    return None if model is None else list(model.model_dump().values())
+
+
+def _unpack_row[ModelT: BaseModel](
+    model_type: type[ModelT], row: list[Any] | None
+) -> ModelT | None:
+    """Rebuild a nested model from the values stored by ``_pack_row``."""
+    if row is None:
+        return None
+    return model_type(**dict(zip(model_type.model_fields, row, strict=True)))
+
+
+def encode_columnar(response: OCRResponse) -> bytes:
+    """Serialize a response to the columnar MessagePack layout."""
+    _require_msgpack()
+    strings = StringTable()
+    file_names, uuids, contexts = [], [], []
+    line_offsets = [0]
+    has_lines = []
+    line_texts: list[int] = []
+    line_scores: list[float] = []
+    line_boxes: list[list[list[float]]] = []
+
+    for result in response.results:
+        file_names.append(strings.add(result.FileName))
+        uuids.append(strings.add(result.UUID))
+        has_lines.append(result.Lines is not None)
+        if result.Lines and result.Context == "\n".join(
+            line.text for line in result.Lines
+        ):
+            contexts.append(JOINED_LINES)
+        else:
+            contexts.append(strings.add(result.Context))
+        for line in result.Lines or []:
+            if len(line.box) != BOX_POINTS:
+                raise ValueError(
+                    f"Columnar format needs {BOX_POINTS}-point boxes, "
+                    f"got {len(line.box)}"
+                )
+            line_texts.append(strings.add(line.text))
+            line_scores.append(line.score)
+            line_boxes.append(line.box)
+        line_offsets.append(len(line_texts))
+
+    document = {
+        "format": COLUMNAR_FORMAT,
+        "version": COLUMNAR_VERSION,
+        "processing_time": response.processing_time,
+        "gpu_used": response.gpu_used,
+        "model_profile": response.model_profile,
+        "lang": response.lang,
+        "cost_units": response.cost_units,
+        "strings": strings.strings,
+        "results": {
+            "count": len(response.results),
+            "file_name": _pack_array(file_names, INDEX_DTYPE),
+            "uuid": _pack_array(uuids, INDEX_DTYPE),
+            "context": _pack_array(contexts, INDEX_DTYPE),
+            "has_lines": bytes(has_lines),
+            "line_offsets": _pack_array(line_offsets, INDEX_DTYPE),
+            "cascade": [_pack_row(result.Cascade) for result in response.results],
+            "duplicate": [_pack_row(result.Duplicate) for result in response.results],
+            "cost": [_pack_row(result.Cost) for result in response.results],
+        },
+        "lines": {
+            "text": _pack_array(line_texts, INDEX_DTYPE),
+            "score": _pack_array(line_scores, FLOAT_DTYPE),
+            "box": _pack_array(line_boxes, FLOAT_DTYPE),
+        },
+    }
+    return msgpack.packb(document, use_bin_type=True)
+
+
+def decode_columnar(body: bytes) -> OCRResponse:
+    """Rebuild a response from the columnar MessagePack layout."""
+    _require_msgpack()
+    document = msgpack.unpackb(body, raw=False)
+    if document.get("format") != COLUMNAR_FORMAT:
+        raise ValueError("Not a columnar OCR response")
+    if document.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported columnar version: {document.get('version')}")
+
+    strings = document["strings"]
+    columns = document["results"]
+    lines = document["lines"]
+    file_names = _unpack_array(columns["file_name"], INDEX_DTYPE)
+    uuids = _unpack_array(columns["uuid"], INDEX_DTYPE)
+    contexts = _unpack_array(columns["context"], INDEX_DTYPE)
+    offsets = _unpack_array(columns["line_offsets"], INDEX_DTYPE)
+    texts = _unpack_array(lines["text"], INDEX_DTYPE)
+    scores = _unpack_array(lines["score"], FLOAT_DTYPE).tolist()
+    boxes = _unpack_array(lines["box"], FLOAT_DTYPE).reshape(-1, BOX_POINTS, 2)
+
+    # Documents written before cost estimates have no cost column
+    costs = columns.get("cost") or [None] * columns["count"]
+    results = []
+    for index in range(columns["count"]):
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        result_lines = None
+        context = ""
+        if contexts[index] != JOINED_LINES:
+            context = strings[contexts[index]]
+        if columns["has_lines"][index]:
+            result_lines = [
+                TextLineResult(
+                    text=strings[texts[line]],
+                    score=scores[line],
+                    box=boxes[line].tolist(),
+                )
+                for line in range(start, end)
+            ]
+            if contexts[index] == JOINED_LINES:
+                context = "\n".join(line.text for line in result_lines)
+        results.append(
+            OCRResult(
+                FileName=strings[file_names[index]],
+                UUID=strings[uuids[index]],
+                Context=context,
+                Cascade=_unpack_row(CascadeInfo, columns["cascade"][index]),
+                Lines=result_lines,
+                Duplicate=_unpack_row(DuplicateInfo, columns["duplicate"][index]),
+                Cost=_unpack_row(CostInfo, costs[index]),
+            )
+        )
+
+    return OCRResponse(
+        results=results,
+        processing_time=document["processing_time"],
+        gpu_used=document["gpu_used"],
+        model_profile=document["model_profile"],
+        lang=document["lang"],
+        cost_units=document.get("cost_units"),
+    )
+
+
+def encode_response(response: OCRResponse, media_type: str) -> bytes:
+    """
+    Serialize a response in a binary format.
+
+    Args:
+        response: Response to encode
+        media_type: ``MSGPACK_MEDIA_TYPE`` or ``COLUMNAR_MEDIA_TYPE``
+
+    Returns:
+        Encoded body
+    """
+    _require_msgpack()
+    media_type = MEDIA_TYPE_ALIASES.get(media_type, media_type)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(response.model_dump(), use_bin_type=True)
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return encode_columnar(response)
+    raise ValueError(f"Unsupported media type: {media_type}")
+
+
+def decode_response(body: bytes, media_type: str) -> OCRResponse:
+    """
+    Parse a response body of any supported format back into an ``OCRResponse``.
+
+    Args:
+        body: Response body, already decompressed
+        media_type: Content-Type of the response; parameters are ignored
+
+    Returns:
+        The decoded response
+    """
+    media_type = media_type.partition(";")[0].strip().lower()
+    if media_type == JSON_MEDIA_TYPE:
+        return OCRResponse.model_validate_json(body)
+    _require_msgpack()
+    media_type = MEDIA_TYPE_ALIASES.get(media_type, media_type)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return OCRResponse.model_validate(msgpack.unpackb(body, raw=False))
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return decode_columnar(body)
+    raise ValueError(f"Unsupported media type: {media_type}")
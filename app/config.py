@@ -16,6 +16,21 @@ class Settings(BaseSettings):
     # Logging configuration
     log_level: str = Field(default="INFO", description="Logging level")
     log_format: str = Field(default="json", description="Log format: json or text")
+    log_async: bool = Field(
+        default=True,
+        description="Write logs from a background thread through a bounded queue",
+    )
+    log_queue_size: int = Field(
+        default=10000, description="Maximum log records waiting to be written"
+    )
+    log_drop_policy: str = Field(
+        default="drop_newest",
+        description="Record dropped when the log queue is full: drop_newest or drop_oldest",
+    )
+    log_sample_rates: dict[str, float] = Field(
+        default={},
+        description="Fraction of INFO/DEBUG records kept per event message",
+    )
 
     # File management
     temp_dir: Path = Field(
@@ -42,6 +57,380 @@ class Settings(BaseSettings):
         default=["CPUExecutionProvider"], description="ONNX runtime providers"
     )
 
+    # ONNX Runtime session tuning
+    ocr_intra_op_threads: int = Field(
+        default=-1, description="Intra-op threads per ONNX session (-1=ORT default)"
+    )
+    ocr_inter_op_threads: int = Field(
+        default=-1, description="Inter-op threads per ONNX session (-1=ORT default)"
+    )
+    ocr_enable_cpu_mem_arena: bool = Field(
+        default=False, description="Enable the ONNX Runtime CPU memory arena"
+    )
+    ocr_arena_extend_strategy: str = Field(
+        default="kSameAsRequested",
+        description="CPU arena extend strategy: kSameAsRequested or kNextPowerOfTwo",
+    )
+    ocr_cuda_device_id: int = Field(default=0, description="CUDA device to run on")
+    ocr_cuda_arena_extend_strategy: str = Field(
+        default="kNextPowerOfTwo", description="CUDA arena extend strategy"
+    )
+    ocr_cudnn_conv_algo_search: str = Field(
+        default="EXHAUSTIVE",
+        description="cuDNN convolution algorithm search: EXHAUSTIVE, HEURISTIC, DEFAULT",
+    )
+    ocr_graph_optimization_level: str = Field(
+        default="extended",
+        description="Optimization level of cached graphs: disable, basic, extended, all",
+    )
+
+    # Model selection
+    ocr_det_model_type: str | None = Field(
+        default=None, description="Detection model type, e.g. mobile or server"
+    )
+    ocr_det_ocr_version: str | None = Field(
+        default=None, description="Detection model version, e.g. PP-OCRv4"
+    )
+    ocr_det_model_path: Path | None = Field(
+        default=None, description="Custom detection model file"
+    )
+    ocr_cls_model_path: Path | None = Field(
+        default=None, description="Custom angle classification model file"
+    )
+    ocr_rec_model_type: str | None = Field(
+        default=None, description="Recognition model type, e.g. mobile or server"
+    )
+    ocr_rec_ocr_version: str | None = Field(
+        default=None, description="Recognition model version, e.g. PP-OCRv4"
+    )
+    ocr_rec_model_path: Path | None = Field(
+        default=None, description="Custom recognition model file"
+    )
+    ocr_rec_keys_path: Path | None = Field(
+        default=None, description="Character dictionary for a custom recognition model"
+    )
+    ocr_model_profile: str = Field(
+        default="accurate",
+        description="Default model profile: accurate (FP32) or fast (INT8 quantized)",
+    )
+    ocr_lang: str = Field(
+        default="ch", description="Default recognition language, e.g. ch, en, japan"
+    )
+
+    # Coarse-to-fine cascade
+    ocr_cascade_enabled: bool = Field(
+        default=False, description="Run OCR as a low-res pass plus full-res refinement"
+    )
+    ocr_cascade_max_side_len: int = Field(
+        default=1280, description="Longest side in pixels of the coarse pass image"
+    )
+    ocr_cascade_box_thresh: float = Field(
+        default=0.3,
+        description="Box threshold of the coarse pass, so faint small text is kept for refinement",
+    )
+    ocr_cascade_min_score: float = Field(
+        default=0.9,
+        description="Re-recognize coarse regions scoring below this at full resolution",
+    )
+    ocr_cascade_min_text_height: int = Field(
+        default=16,
+        description="Re-recognize coarse regions shorter than this many pixels",
+    )
+
+    # Near-duplicate result cache
+    near_duplicate_enabled: bool = Field(
+        default=False,
+        description="Serve cached results for perceptually similar images",
+    )
+    near_duplicate_max_entries: int = Field(
+        default=100000, description="Maximum cached results (LRU eviction)"
+    )
+    near_duplicate_max_distance: int = Field(
+        default=4, description="Maximum differing bits of the 64-bit image hash"
+    )
+    near_duplicate_verify_max_ratio: float = Field(
+        default=0.1,
+        description="Maximum fraction of differing bits of the 256-bit verification hash",
+    )
+    near_duplicate_aspect_tolerance: float = Field(
+        default=0.02, description="Maximum relative aspect ratio difference"
+    )
+    near_duplicate_ttl: int = Field(
+        default=86400, description="Seconds a cached result may be served"
+    )
+
+    # Response encoding
+    response_compression_enabled: bool = Field(
+        default=True, description="Compress OCR responses the client accepts"
+    )
+    response_compression_min_size: int = Field(
+        default=1024, description="Only compress response bodies of at least N bytes"
+    )
+    response_gzip_level: int = Field(
+        default=1, description="gzip compression level (1-9)"
+    )
+    response_zstd_level: int = Field(
+        default=1, description="zstd compression level (1-22)"
+    )
+
+    # WebSocket sessions
+    ws_max_in_flight: int = Field(
+        default=4,
+        description="Frames a WebSocket connection may have in flight before reads pause",
+    )
+
+    # Frame sequence OCR
+    sequence_max_frames: int = Field(
+        default=300, description="Maximum frames per sequence request"
+    )
+    sequence_pixel_threshold: int = Field(
+        default=24,
+        description="Grayscale difference (0-255) at which a pixel counts as changed",
+    )
+    sequence_full_refresh_ratio: float = Field(
+        default=0.5,
+        description="Run full-frame OCR when more than this fraction of tiles changed",
+    )
+    sequence_keyframe_interval: int = Field(
+        default=30,
+        description="Run full-frame OCR every N frames to bound drift (0=never)",
+    )
+
+    # Engine pool and worker recycling
+    ocr_pool_size: int = Field(
+        default=1, description="Number of OCR engine instances in the pool"
+    )
+    engine_max_images: int = Field(
+        default=10000,
+        description="Recycle an engine after this many images (0=disabled)",
+    )
+    engine_max_rss_growth_mb: int = Field(
+        default=1024,
+        description="Recycle one engine each time process RSS grows this much (0=disabled)",
+    )
+    engine_memory_sample_interval: int = Field(
+        default=60, description="Interval in seconds between RSS trend samples"
+    )
+    engine_memory_budget_mb: int = Field(
+        default=2048,
+        description="Memory for engines of all languages/profiles before LRU eviction (0=unlimited)",
+    )
+
+    # Optimized model cache
+    model_cache_enabled: bool = Field(
+        default=True, description="Persist ONNX Runtime optimized models"
+    )
+    model_cache_dir: Path = Field(
+        default=Path("model_cache"), description="Optimized model cache directory"
+    )
+
+    # Startup warmup
+    warmup_enabled: bool = Field(
+        default=True, description="Warm up every pool engine before reporting ready"
+    )
+    warmup_sizes: list[int] = Field(
+        default=[320, 960, 1920],
+        description="Long-side sizes in pixels of the synthetic warmup images",
+    )
+
+    # Scheduling of engine calls across priority classes and tenants
+    scheduler_enabled: bool = Field(
+        default=True,
+        description="Grant engine slots by priority class and fair share per tenant",
+    )
+    scheduler_concurrency: int = Field(
+        default=0, description="Engine slots per engine pool (0=the pool's size)"
+    )
+    scheduler_priority_header: str = Field(
+        default="X-Priority", description="Request header selecting the priority class"
+    )
+    scheduler_priority_classes: list[str] = Field(
+        default=["interactive", "normal", "bulk"],
+        description="Priority classes from highest to lowest",
+    )
+    scheduler_default_priority: str = Field(
+        default="normal", description="Priority class of requests without the header"
+    )
+    scheduler_tenant_header: str = Field(
+        default="X-API-Key",
+        description="Request header identifying the tenant (client IP if absent)",
+    )
+    scheduler_trusted_proxies: list[str] = Field(
+        default=[],
+        description="Peer IPs (e.g. dispatchers) whose X-Forwarded-For names the client",
+    )
+    scheduler_tenant_weights: dict[str, float] = Field(
+        default={}, description="Fair-share weight per API key (default 1.0)"
+    )
+    scheduler_tenant_max_concurrency: int = Field(
+        default=0, description="Engine slots one tenant may hold (0=unlimited)"
+    )
+
+    # Image cost estimates used for admission and scheduling
+    cost_min_units: float = Field(
+        default=0.1,
+        description="Smallest cost of an image in megapixel units (call overhead)",
+    )
+    cost_max_request_units: float = Field(
+        default=0.0, description="Largest cost of one request (0=unlimited)"
+    )
+    cost_max_in_flight_units: float = Field(
+        default=0.0,
+        description="Cost of admitted unfinished requests before shedding (0=unlimited)",
+    )
+
+    # Per-client rate limits (clients are scheduler tenants)
+    rate_limit_enabled: bool = Field(
+        default=False, description="Enforce per-client token-bucket rate limits"
+    )
+    rate_limit_requests_per_second: float = Field(
+        default=5.0, description="Request refill rate per client (0=unlimited)"
+    )
+    rate_limit_request_burst: float = Field(
+        default=20.0, description="Requests a client may make in a burst"
+    )
+    rate_limit_megapixels_per_second: float = Field(
+        default=20.0, description="Image megapixel refill rate per client (0=unlimited)"
+    )
+    rate_limit_megapixel_burst: float = Field(
+        default=200.0, description="Image megapixels a client may send in a burst"
+    )
+    rate_limit_store: str = Field(
+        default="memory",
+        description="Bucket store: memory (per process) or sqlite (shared by workers)",
+    )
+    rate_limit_sqlite_path: Path = Field(
+        default=Path("rate_limits.sqlite3"),
+        description="SQLite file shared by the workers of a host",
+    )
+    rate_limit_max_clients: int = Field(
+        default=100000, description="Clients kept by the memory store (LRU)"
+    )
+
+    # CPU affinity of engine workers
+    cpu_affinity_enabled: bool = Field(
+        default=False,
+        description="Pin engine workers and their ONNX threads to NUMA-local cores",
+    )
+    cpu_affinity_cpus: list[int] = Field(
+        default=[], description="CPUs engine workers may use (empty=all available)"
+    )
+    cpu_affinity_cores_per_worker: int = Field(
+        default=0, description="Cores per engine worker (0=equal share)"
+    )
+
+    # Startup autotuning of pool size and intra-op threads
+    autotune_enabled: bool = Field(
+        default=False,
+        description="Benchmark pool and thread configurations at startup",
+    )
+    autotune_latency_target: float = Field(
+        default=2.0,
+        description="p95 per-image latency target in seconds (0=no target)",
+    )
+    autotune_pool_sizes: list[int] = Field(
+        default=[], description="Pool sizes to try (empty=powers of two)"
+    )
+    autotune_intra_op_threads: list[int] = Field(
+        default=[], description="Intra-op threads to try (empty=equal CPU share)"
+    )
+    autotune_image_sizes: list[int] = Field(
+        default=[960],
+        description="Long-side sizes in pixels of the synthetic benchmark images",
+    )
+    autotune_rounds: int = Field(
+        default=3, description="Passes over the benchmark images per engine"
+    )
+    autotune_force: bool = Field(
+        default=False, description="Benchmark again even if a decision is cached"
+    )
+    autotune_cache_path: Path | None = Field(
+        default=None,
+        description="Autotune decision cache file (default: in model_cache_dir)",
+    )
+
+    # Request tracing
+    tracing_enabled: bool = Field(
+        default=False, description="Record per-request span trees"
+    )
+    tracing_exporter: str = Field(
+        default="jsonl", description="Span exporter: jsonl or otlp"
+    )
+    tracing_sample_rate: float = Field(
+        default=0.1, description="Fraction of requests whose traces are exported"
+    )
+    tracing_slow_threshold: float = Field(
+        default=5.0,
+        description="Also export traces of requests taking this many seconds (0=off)",
+    )
+    tracing_jsonl_path: Path = Field(
+        default=Path("traces/spans.jsonl"),
+        description="File the jsonl exporter appends to",
+    )
+    tracing_otlp_endpoint: str = Field(
+        default="http://localhost:4318/v1/traces",
+        description="OTLP/HTTP traces endpoint of the collector",
+    )
+    tracing_service_name: str = Field(
+        default="rapidocr-service", description="service.name reported to the collector"
+    )
+    tracing_queue_size: int = Field(
+        default=1000, description="Finished traces waiting for export before dropping"
+    )
+
+    # Administration
+    admin_token: str = Field(
+        default="", description="Token for /admin endpoints (empty disables them)"
+    )
+    profile_max_duration: float = Field(
+        default=60.0, description="Longest profiling session in seconds"
+    )
+    profile_sample_interval: float = Field(
+        default=0.005, description="Stack sampling interval of sampling profiles"
+    )
+
+    # Dispatcher mode: forward /ocr/ work to other service instances
+    dispatcher_enabled: bool = Field(
+        default=False,
+        description="Forward /ocr/ requests to backend instances instead of running OCR",
+    )
+    dispatcher_backends: list[str] = Field(
+        default=[], description="Base URLs of the backend instances"
+    )
+    dispatcher_batch_size: int = Field(
+        default=10, description="Most images sent to one backend per request"
+    )
+    dispatcher_max_files: int = Field(
+        default=100, description="Most images in one request to the dispatcher"
+    )
+    dispatcher_retries: int = Field(
+        default=2, description="Other backends tried after a batch fails"
+    )
+    dispatcher_timeout: float = Field(
+        default=120.0, description="Seconds to wait for a backend's OCR response"
+    )
+    dispatcher_poll_interval: float = Field(
+        default=1.0, description="Seconds between backend readiness checks"
+    )
+
+    # Graceful drain on shutdown
+    drain_on_sigterm: bool = Field(
+        default=True, description="Drain in-flight work on SIGTERM before exiting"
+    )
+    drain_timeout: float = Field(
+        default=30.0, description="Seconds in-flight work may take to finish on drain"
+    )
+    drain_grace_period: float = Field(
+        default=0.0,
+        description="Seconds new work is still admitted after readiness turns false",
+    )
+
+    # Health probes
+    readiness_max_queue_depth: int = Field(
+        default=16,
+        description="Report not-ready while more callers than this wait for an engine",
+    )
+
     # Security
     allowed_extensions: list[str] = Field(
         default=[".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif", ".webp"],
@@ -0,0 +1,155 @@
+"""Engine cost estimates of images from their headers.
+
+Detection and recognition time grow roughly with pixel count, so a 48 MP
+photo costs tens of times a 1 MP receipt. Each image's cost is estimated
+from the dimensions stored in its header, without decoding it, before the
+request is queued. One cost unit is the work of a one-megapixel image after
+``max_side_len`` downscaling, with a floor for the fixed overhead of an
+engine call.
+
+The estimate drives admission (per-request and in-flight cost budgets),
+the scheduler's fair shares and the megapixel rate limits, and is returned
+with each result so clients can plan capacity.
+"""
+
+import threading
+from pathlib import Path
+from typing import IO, Any
+
+from .config import settings
+from .imaging import image_size, open_source
+from .logging_config import LoggingMixin
+from .metrics import metrics
+from .models import CostInfo
+
+
+def cost_units(width: int, height: int, max_side_len: int | None = None) -> float:
+    """
+    Get the cost of an image of the given size.
+
+    Args:
+        width: Stored image width
+        height: Stored image height
+        max_side_len: Longest side the image is downscaled to before OCR
+
+    Returns:
+        Cost in units of one megapixel, at least ``COST_MIN_UNITS``
+    """
+    scale = 1.0
+    if max_side_len is not None and max(width, height) > max_side_len:
+        scale = max_side_len / max(width, height)
+    megapixels = width * height * scale * scale / 1_000_000
+    return max(settings.cost_min_units, megapixels)
+
+
+def estimate_cost(
+    source: Path | bytes | IO[bytes], max_side_len: int | None = None
+) -> CostInfo | None:
+    """
+    Estimate an image's cost from its header.
+
+    Args:
+        source: Image file, encoded content, or a binary stream of it
+        max_side_len: Longest side the image is downscaled to before OCR
+
+    Returns:
+        The image's size and cost, or None if the header is unreadable
+    """
+    stream = open_source(source) if isinstance(source, Path | bytes) else source
+    try:
+        width, height = image_size(stream)
+    except Exception:
+        return None
+    finally:
+        if not isinstance(stream, Path):
+            stream.seek(0)
+    return CostInfo(
+        width=width,
+        height=height,
+        megapixels=width * height / 1_000_000,
+        units=cost_units(width, height, max_side_len),
+    )
+
+
+def total_units(costs: list[CostInfo | None]) -> float:
+    """Get the cost of a request; unreadable images count the minimum cost."""
+    return sum(
+        cost.units if cost is not None else settings.cost_min_units for cost in costs
+    )
+
+
+def total_megapixels(costs: list[CostInfo | None]) -> float:
+    """Get the stored megapixels of a request's readable images."""
+    return sum(cost.megapixels for cost in costs if cost is not None)
+
+
+class CostBudget(LoggingMixin):
+    """Admits requests while the cost of in-flight work stays within a budget."""
+
+    def __init__(self, max_request: float, max_in_flight: float) -> None:
+        super().__init__()
+        self.max_request = max_request
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0.0
+        self._admitted = 0
+        self._rejected = 0
+        self._admitted_units = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> float:
+        """Cost units of admitted requests that have not finished."""
+        return self._in_flight
+
+    def fits_request(self, units: float) -> bool:
+        """Whether a request's cost is within the per-request limit."""
+        return self.max_request <= 0 or units <= self.max_request
+
+    def try_admit(self, units: float) -> bool:
+        """
+        Reserve a request's cost if the in-flight budget has room for it.
+
+        A request is always admitted when nothing is in flight, so requests
+        costlier than the whole budget still run, one at a time.
+        """
+        with self._lock:
+            if (
+                self.max_in_flight > 0
+                and self._in_flight > 0
+                and self._in_flight + units > self.max_in_flight
+            ):
+                self._rejected += 1
+                metrics.increment("cost_rejected")
+                return False
+            self._in_flight += units
+            self._admitted += 1
+            self._admitted_units += units
+        metrics.adjust_gauge("cost_units_in_flight", units)
+        return True
+
+    def release(self, units: float) -> None:
+        """Return a finished request's cost to the budget."""
+        with self._lock:
+            self._in_flight = max(0.0, self._in_flight - units)
+        metrics.adjust_gauge("cost_units_in_flight", -units)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get the budget and its usage for the stats endpoint."""
+        return {
+            "min_units": settings.cost_min_units,
+            "max_request_units": self.max_request,
+            "max_in_flight_units": self.max_in_flight,
+            "in_flight_units": self._in_flight,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "mean_request_units": (
+                self._admitted_units / self._admitted if self._admitted else 0.0
+            ),
+        }
+
+
+# Global cost budget instance
+cost_budget = CostBudget(
+    max_request=settings.cost_max_request_units,
+    max_in_flight=settings.cost_max_in_flight_units,
+)
@@ -0,0 +1,259 @@
+"""CPU and NUMA topology discovery and pinning of engine workers to core sets.
+
+Engine pool members are threads of this process. On Linux a thread's CPU
+affinity is inherited by the threads it creates, so an engine built on a
+pinned thread gets its ONNX Runtime intra-op threads pinned to the same core
+set, and the kernel's first-touch policy places the model weights it loads
+in the memory of that core set's NUMA node. Calls into the engine run pinned
+as well, so the thread driving the inference stays on the worker's cores.
+"""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .config import settings
+from .logging_config import LoggingMixin
+
+NODE_ROOT = Path("/sys/devices/system/node")
+
+
+class NumaNode(NamedTuple):
+    """A NUMA node and the CPUs of it this process may use."""
+
+    node_id: int
+    cpus: tuple[int, ...]
+
+
+class WorkerPlacement(NamedTuple):
+    """The core set a pool worker and its intra-op threads are pinned to."""
+
+    worker_id: int
+    node_id: int
+    cpus: frozenset[int]
+
+
+def affinity_supported() -> bool:
+    """Whether this platform can pin threads to CPUs."""
+    return hasattr(os, "sched_setaffinity")
+
+
+def available_cpus() -> set[int]:
+    """Get the CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(text: str) -> list[int]:
+    """Parse a kernel CPU list such as ``0-3,8-11``."""
+    cpus: list[int] = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def read_numa_nodes(allowed: set[int], root: Path = NODE_ROOT) -> list[NumaNode]:
+    """
+    Read the NUMA nodes from sysfs, keeping only the allowed CPUs.
+
+    Hosts without NUMA information are treated as a single node.
+
+    Args:
+        allowed: CPUs the workers may use
+        root: sysfs node directory
+
+    Returns:
+        Nodes with at least one allowed CPU, ordered by node ID
+    """
+    nodes = []
+    try:
+        node_dirs = sorted(
+            (path for path in root.glob("node[0-9]*") if path.is_dir()),
+            key=lambda path: int(path.name[4:]),
+        )
+        for node_dir in node_dirs:
+            cpus = [
+                cpu
+                for cpu in parse_cpu_list((node_dir / "cpulist").read_text())
+                if cpu in allowed
+            ]
+            if cpus:
+                nodes.append(NumaNode(int(node_dir.name[4:]), tuple(cpus)))
+    except (OSError, ValueError):
+        nodes = []
+
+    # CPUs missing from sysfs still belong somewhere
+    listed = {cpu for node in nodes for cpu in node.cpus}
+    missing = sorted(allowed - listed)
+    if not nodes:
+        return [NumaNode(0, tuple(missing))]
+    if missing:
+        first = nodes[0]
+        nodes[0] = NumaNode(first.node_id, tuple(sorted(first.cpus + tuple(missing))))
+    return nodes
+
+
+def plan_placement(
+    nodes: list[NumaNode], workers: int, cores_per_worker: int = 0
+) -> list[WorkerPlacement]:
+    """
+    Split the CPUs into one core set per worker without crossing NUMA nodes.
+
+    Every worker gets the same number of cores, so intra-op thread counts
+    can match. The count starts from ``cores_per_worker`` (or an equal share
+    of all CPUs) and shrinks until every worker fits inside a single node.
+    Workers are spread across nodes in turn. Only when there are more
+    workers than CPUs do core sets repeat.
+
+    Args:
+        nodes: NUMA nodes with their usable CPUs
+        workers: Number of pool workers
+        cores_per_worker: Cores per worker, or 0 for an equal share
+
+    Returns:
+        One placement per worker
+    """
+    total = sum(len(node.cpus) for node in nodes)
+    if workers < 1 or total < 1:
+        return []
+
+    cores = max(1, total // workers)
+    if cores_per_worker > 0:
+        cores = min(cores, cores_per_worker)
+    while cores > 1 and sum(len(node.cpus) // cores for node in nodes) < workers:
+        cores -= 1
+
+    # Carve each node into whole core sets, then interleave the nodes
+    slots_by_node = [
+        [
+            (node.node_id, frozenset(node.cpus[start : start + cores]))
+            for start in range(0, len(node.cpus) - cores + 1, cores)
+        ]
+        for node in nodes
+    ]
+    slots = []
+    for index in range(max(len(node_slots) for node_slots in slots_by_node)):
+        for node_slots in slots_by_node:
+            if index < len(node_slots):
+                slots.append(node_slots[index])
+
+    return [
+        WorkerPlacement(worker_id, *slots[worker_id % len(slots)])
+        for worker_id in range(workers)
+    ]
+
+
+@contextmanager
+def pinned(cpus: frozenset[int] | None) -> Iterator[None]:
+    """Pin the calling thread to a core set for the duration of the context."""
+    if not cpus or not affinity_supported():
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+class CpuPlacement(LoggingMixin):
+    """Plans the core sets of engine pool workers on this host's topology."""
+
+    def __init__(
+        self, enabled: bool, cpus: list[int], cores_per_worker: int = 0
+    ) -> None:
+        super().__init__()
+        allowed = available_cpus()
+        if cpus:
+            allowed &= set(cpus)
+        self.allowed = allowed
+        self.cores_per_worker = cores_per_worker
+        self.enabled = enabled and affinity_supported() and bool(allowed)
+        self.nodes = read_numa_nodes(allowed)
+        self._placements: dict[str, list[WorkerPlacement]] = {}
+
+        if enabled and not self.enabled:
+            self.log_warning("CPU pinning is not supported on this platform")
+
+    def plan(self, workers: int, name: str = "default") -> list[WorkerPlacement]:
+        """
+        Get the core sets of a pool's workers, or none when pinning is disabled.
+
+        Args:
+            workers: Number of pool workers
+            name: Pool name reported in the stats
+        """
+        placements = self.layout(workers)
+        if not placements:
+            return []
+        self._placements[name] = placements
+        if workers > len(self.allowed):
+            self.log_warning(
+                "More engine workers than CPUs; core sets are shared",
+                workers=workers,
+                cpus=len(self.allowed),
+            )
+        self.log_info(
+            "Planned engine worker CPU placement",
+            pool=name,
+            workers=workers,
+            cores_per_worker=len(placements[0].cpus) if placements else 0,
+            nodes=[placement.node_id for placement in placements],
+        )
+        return placements
+
+    def layout(self, workers: int) -> list[WorkerPlacement]:
+        """Get the core sets a pool would get, without recording or logging them."""
+        if not self.enabled:
+            return []
+        return plan_placement(self.nodes, workers, self.cores_per_worker)
+
+    @staticmethod
+    def intra_op_threads(placements: list[WorkerPlacement], configured: int) -> int:
+        """
+        Get intra-op threads per engine that do not oversubscribe its core set.
+
+        ONNX Runtime pins its own threads across all cores when the thread
+        count is left to its default, so pinned workers always get an explicit
+        count.
+        """
+        cores = min(len(placement.cpus) for placement in placements)
+        return cores if configured <= 0 else min(configured, cores)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get the topology and the worker placement for the stats endpoint."""
+        return {
+            "enabled": self.enabled,
+            "supported": affinity_supported(),
+            "cpu_count": os.cpu_count(),
+            "available_cpus": sorted(self.allowed),
+            "numa_nodes": [
+                {"node": node.node_id, "cpus": list(node.cpus)} for node in self.nodes
+            ],
+            "pools": {
+                name: [
+                    {
+                        "worker_id": placement.worker_id,
+                        "node": placement.node_id,
+                        "cpus": sorted(placement.cpus),
+                    }
+                    for placement in placements
+                ]
+                for name, placements in self._placements.items()
+            },
+        }
+
+
+# Global CPU placement instance
+cpu_placement = CpuPlacement(
+    enabled=settings.cpu_affinity_enabled,
+    cpus=settings.cpu_affinity_cpus,
+    cores_per_worker=settings.cpu_affinity_cores_per_worker,
+)
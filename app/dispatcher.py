@@ -0,0 +1,447 @@
+"""Dispatcher mode: fan ``/ocr/`` work out across several service instances.
+
+With ``DISPATCHER_ENABLED`` the app loads no engines of its own. Each
+request's images are split into batches, and every batch is sent to the
+backend instance with the fewest outstanding images: the images this
+dispatcher has sent it and not yet received back, plus the queue depth the
+backend last reported on its readiness probe. Backends are polled in the
+background, and one that is not ready, draining or unreachable gets no new
+work until it reports ready again. A batch that fails on a backend with a
+connection error or a 5xx response is retried on another backend; client
+errors such as an invalid option are returned as they are.
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, NamedTuple
+
+from .config import settings
+from .logging_config import LoggingMixin
+from .metrics import metrics
+from .models import OCRResponse
+
+try:
+    import httpx
+except ImportError:  # Optional "dispatcher" extra
+    httpx = None  # type: ignore[assignment]
+
+# Backend responses that another backend may succeed with
+RETRYABLE_STATUS = frozenset({500, 502, 503, 504})
+
+# Backend rejection headers passed on to the client
+PASSED_HEADERS = ("retry-after", "x-ratelimit-")
+
+
+class Upload(NamedTuple):
+    """An image received by the dispatcher, forwarded as is."""
+
+    filename: str
+    content: bytes
+    content_type: str
+
+
+class DispatchError(Exception):
+    """A request that no backend could, or should be retried to, complete."""
+
+    def __init__(
+        self, status_code: int, detail: Any, headers: dict[str, str] | None = None
+    ) -> None:
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers or {}
+
+
+class Backend:
+    """A service instance and what is known about its load."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.ready = False
+        self.reason: str | None = "not_checked"
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.outstanding = 0
+        self.requests = 0
+        self.images = 0
+        self.failures = 0
+        self.last_error: str | None = None
+        self.checked_at = 0.0
+
+    @property
+    def load(self) -> int:
+        """Outstanding images: sent and not returned, plus the backend's queue."""
+        return self.outstanding + self.queue_depth
+
+    def mark_unavailable(self, reason: str, error: str | None = None) -> None:
+        """Stop sending work here until the next readiness check passes."""
+        self.ready = False
+        self.reason = reason
+        if error is not None:
+            self.last_error = error
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "ready": self.ready,
+            "reason": self.reason,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "outstanding_images": self.outstanding,
+            "requests": self.requests,
+            "images": self.images,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+        }
+
+
+def split_batch(count: int, backends: int, batch_size: int) -> list[range]:
+    """
+    Split a request's images into batches for the backends.
+
+    Images are spread evenly over the available backends, and no batch
+    holds more than ``batch_size`` images.
+
+    Args:
+        count: Number of images
+        backends: Number of backends able to take work
+        batch_size: Largest batch (a backend's ``MAX_FILES``)
+
+    Returns:
+        Index ranges of the images of each batch, in order
+    """
+    if count <= 0:
+        return []
+    size = math.ceil(count / max(1, backends))
+    if batch_size > 0:
+        size = min(size, batch_size)
+    return [range(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def merge_responses(responses: list[OCRResponse], wall_time: float) -> OCRResponse:
+    """Join the batch responses of one request, keeping the image order."""
+    costs = [response.cost_units for response in responses]
+    return OCRResponse(
+        results=[result for response in responses for result in response.results],
+        processing_time=wall_time,
+        gpu_used=any(response.gpu_used for response in responses),
+        model_profile=responses[0].model_profile if responses else None,
+        lang=responses[0].lang if responses else None,
+        cost_units=(
+            sum(cost for cost in costs if cost is not None)
+            if any(cost is not None for cost in costs)
+            else None
+        ),
+    )
+
+
+class Dispatcher(LoggingMixin):
+    """Forwards OCR batches to the least loaded backend instances."""
+
+    def __init__(
+        self,
+        backends: list[str],
+        batch_size: int,
+        retries: int,
+        timeout: float,
+        poll_interval: float,
+    ) -> None:
+        super().__init__()
+        self.backends = [Backend(url) for url in backends]
+        self.batch_size = batch_size
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._client: httpx.AsyncClient | None = None
+        self._poller: asyncio.Task[None] | None = None
+        self._next = 0
+        self._requests = 0
+        self._batches = 0
+        self._retries = 0
+        self._failed = 0
+
+    @property
+    def ready_backends(self) -> list[Backend]:
+        return [backend for backend in self.backends if backend.ready]
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """HTTP client of the running dispatcher."""
+        if self._client is None:
+            raise RuntimeError("Dispatcher is not started")
+        return self._client
+
+    async def start(self, client: "httpx.AsyncClient | None" = None) -> None:
+        """
+        Check the backends once and keep polling them in the background.
+
+        Args:
+            client: ``httpx.AsyncClient`` to use (default: a new one)
+        """
+        if client is None:
+            if httpx is None:
+                raise RuntimeError("Dispatcher mode requires the httpx package")
+            client = httpx.AsyncClient(timeout=self.timeout)
+        self._client = client
+        await self.poll()
+        self._poller = asyncio.create_task(self._poll_loop())
+        self.log_info(
+            "Dispatcher started",
+            backends=[backend.url for backend in self.backends],
+            ready=len(self.ready_backends),
+        )
+
+    async def stop(self) -> None:
+        """Stop polling and close the HTTP client."""
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                # Keep polling; backends only come back through their reports
+                self.log_error("Backend poll failed", error=str(e))
+
+    async def poll(self) -> None:
+        """Refresh every backend's readiness and queue depth."""
+        await asyncio.gather(*(self._check(backend) for backend in self.backends))
+
+    async def _check(self, backend: Backend) -> None:
+        try:
+            response = await self.client.get(
+                f"{backend.url}/health/ready",
+                timeout=max(self.poll_interval, 1.0),
+            )
+        except Exception as e:
+            if backend.ready:
+                self.log_warning(
+                    "Backend unreachable", backend=backend.url, error=str(e)
+                )
+            backend.mark_unavailable("unreachable", str(e))
+            return
+        finally:
+            backend.checked_at = time.time()
+
+        was_ready = backend.ready
+        try:
+            report = response.json()
+            ready = response.status_code == 200 and bool(report.get("ready"))
+            reason = None if ready else str(report.get("reason") or "not_ready")
+            queue_depth = int(report.get("queue_depth", 0))
+            in_flight = int(report.get("in_flight", 0))
+        except Exception as e:
+            if was_ready:
+                self.log_warning(
+                    "Backend sent an invalid readiness report",
+                    backend=backend.url,
+                    error=str(e),
+                )
+            backend.mark_unavailable("invalid_report", f"{type(e).__name__}: {e}")
+            return
+
+        backend.ready = ready
+        backend.reason = reason
+        backend.queue_depth = queue_depth
+        backend.in_flight = in_flight
+        if backend.ready != was_ready:
+            self.log_info(
+                "Backend readiness changed",
+                backend=backend.url,
+                ready=backend.ready,
+                reason=backend.reason,
+            )
+
+    def choose(
+        self, exclude: set[str] | frozenset[str] = frozenset()
+    ) -> Backend | None:
+        """
+        Pick the ready backend with the fewest outstanding images.
+
+        Ties go to backends in turn, so equal backends share the work.
+        """
+        candidates = [
+            (index, backend)
+            for index, backend in enumerate(self.backends)
+            if backend.ready and backend.url not in exclude
+        ]
+        if not candidates:
+            return None
+        count = len(self.backends)
+        index, backend = min(
+            candidates,
+            key=lambda item: (item[1].load, (item[0] - self._next) % count),
+        )
+        self._next = (index + 1) % count
+        return backend
+
+    async def _send(
+        self,
+        backend: Backend,
+        uploads: list[Upload],
+        form: dict[str, str],
+        headers: dict[str, str],
+    ) -> OCRResponse:
+        """Post one batch to a backend's ``/ocr/`` endpoint."""
+        response = await self.client.post(
+            f"{backend.url}/ocr/",
+            files=[
+                ("files", (upload.filename, upload.content, upload.content_type))
+                for upload in uploads
+            ],
+            data=form,
+            headers={**headers, "Accept": "application/json"},
+        )
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise DispatchError(
+                response.status_code,
+                detail,
+                {
+                    name: value
+                    for name, value in response.headers.items()
+                    if name.lower().startswith(PASSED_HEADERS)
+                },
+            )
+        return OCRResponse.model_validate(response.json())
+
+    async def _dispatch_batch(
+        self,
+        uploads: list[Upload],
+        form: dict[str, str],
+        headers: dict[str, str],
+    ) -> OCRResponse:
+        """Send a batch, retrying on other backends after failures."""
+        tried: set[str] = set()
+        last_error = DispatchError(503, "No backend is ready")
+        for attempt in range(self.retries + 1):
+            backend = self.choose(tried)
+            if backend is None:
+                break
+            if attempt:
+                self._retries += 1
+                metrics.increment("dispatcher_retries")
+            tried.add(backend.url)
+            backend.outstanding += len(uploads)
+            try:
+                result = await self._send(backend, uploads, form, headers)
+            except DispatchError as e:
+                if e.status_code not in RETRYABLE_STATUS:
+                    raise
+                backend.failures += 1
+                backend.last_error = f"HTTP {e.status_code}: {e.detail}"
+                if e.status_code == 503:
+                    # Draining or saturated; wait for its next readiness report
+                    backend.mark_unavailable("unavailable")
+                last_error = e
+            except Exception as e:
+                backend.failures += 1
+                backend.mark_unavailable("unreachable", f"{type(e).__name__}: {e}")
+                last_error = DispatchError(502, f"Backend {backend.url} failed: {e}")
+            else:
+                backend.requests += 1
+                backend.images += len(uploads)
+                return result
+            finally:
+                backend.outstanding -= len(uploads)
+
+            self.log_warning(
+                "Backend batch failed",
+                backend=backend.url,
+                images=len(uploads),
+                attempt=attempt + 1,
+                error=str(last_error),
+            )
+        raise last_error
+
+    async def dispatch(
+        self,
+        uploads: list[Upload],
+        form: dict[str, str],
+        headers: dict[str, str],
+    ) -> OCRResponse:
+        """
+        Run a request's images on the backends and join their results.
+
+        Args:
+            uploads: Images of the request, in order
+            form: OCR form fields to forward
+            headers: Request headers to forward (priority and tenant)
+
+        Returns:
+            One response with the results in upload order
+
+        Raises:
+            DispatchError: If a batch failed on every backend tried, or a
+                backend rejected it as invalid
+        """
+        if self._client is None:
+            raise DispatchError(503, "Dispatcher is not started")
+        start_time = time.perf_counter()
+        batches = split_batch(len(uploads), len(self.ready_backends), self.batch_size)
+        self._requests += 1
+        self._batches += len(batches)
+
+        outcomes = await asyncio.gather(
+            *(
+                self._dispatch_batch([uploads[i] for i in batch], form, headers)
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+        responses = []
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                self._failed += 1
+                metrics.increment("dispatcher_failed")
+                raise outcome
+            responses.append(outcome)
+        return merge_responses(responses, time.perf_counter() - start_time)
+
+    def get_load(self) -> dict[str, Any]:
+        """Get backend availability in the shape of the engine load report."""
+        ready = self.ready_backends
+        return {
+            "engine_initialized": bool(self.backends),
+            "available_workers": len(ready),
+            "in_use": sum(backend.outstanding for backend in self.backends),
+            "queue_depth": sum(backend.queue_depth for backend in ready),
+        }
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get request counters and the state of every backend."""
+        return {
+            "enabled": settings.dispatcher_enabled,
+            "batch_size": self.batch_size,
+            "retries": self.retries,
+            "requests": self._requests,
+            "batches": self._batches,
+            "retried_batches": self._retries,
+            "failed_requests": self._failed,
+            "backends": [backend.get_stats() for backend in self.backends],
+        }
+
+
+# Global dispatcher instance; started by the app in dispatcher mode
+dispatcher = Dispatcher(
+    backends=settings.dispatcher_backends,
+    batch_size=settings.dispatcher_batch_size,
+    retries=settings.dispatcher_retries,
+    timeout=settings.dispatcher_timeout,
+    poll_interval=settings.dispatcher_poll_interval,
+)
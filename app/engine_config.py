@@ -0,0 +1,160 @@
+"""Mapping of service settings onto RapidOCR and ONNX Runtime engine parameters."""
+
+from enum import Enum
+from typing import Any
+
+import onnxruntime as ort
+from rapidocr.utils.typings import LangRec, ModelType, OCRVersion
+
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CPU_PROVIDER = "CPUExecutionProvider"
+CUDA_PROVIDER = "CUDAExecutionProvider"
+
+# Execution providers RapidOCR can select, and the engine flag that enables each
+PROVIDER_FLAGS = {
+    CUDA_PROVIDER: "use_cuda",
+    "DmlExecutionProvider": "use_dml",
+    "CANNExecutionProvider": "use_cann",
+}
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+ORT_PREFIX = "EngineConfig.onnxruntime"
+INTRA_OP_THREADS_KEY = f"{ORT_PREFIX}.intra_op_num_threads"
+
+# Model profiles: full-precision models, or dynamically INT8-quantized copies
+ACCURATE_PROFILE = "accurate"
+FAST_PROFILE = "fast"
+MODEL_PROFILES = (ACCURATE_PROFILE, FAST_PROFILE)
+
+# Recognition languages RapidOCR can route to a model
+SUPPORTED_LANGUAGES = tuple(lang.value for lang in LangRec)
+
+
+def resolve_providers(gpu_config: dict[str, Any]) -> list[str]:
+    """
+    Decide the execution providers for the engine, in priority order.
+
+    Explicitly configured ``ocr_providers`` win; otherwise the GPU detector's
+    choice is used. Providers this ONNX Runtime build or RapidOCR cannot use
+    are dropped, and the CPU provider is always kept as the final fallback.
+    """
+    if settings.ocr_use_gpu is False or gpu_config.get("use_cpu", True):
+        requested = [CPU_PROVIDER]
+    else:
+        requested = list(gpu_config.get("providers", [CPU_PROVIDER]))
+
+    if (
+        "ocr_providers" in settings.model_fields_set
+        and settings.ocr_use_gpu is not False
+    ):
+        requested = list(settings.ocr_providers)
+
+    available = set(ort.get_available_providers())
+    providers = [
+        provider
+        for provider in requested
+        if provider in available
+        and (provider in PROVIDER_FLAGS or provider == CPU_PROVIDER)
+    ]
+
+    dropped = [provider for provider in requested if provider not in providers]
+    if dropped:
+        logger.warning(
+            "Ignoring unavailable execution providers",
+            dropped=dropped,
+            available=sorted(available),
+        )
+
+    if CPU_PROVIDER not in providers:
+        providers.append(CPU_PROVIDER)
+    return providers
+
+
+def build_engine_params(providers: list[str]) -> dict[str, Any]:
+    """Build RapidOCR ``params`` for the given providers from the settings."""
+    params: dict[str, Any] = {
+        INTRA_OP_THREADS_KEY: settings.ocr_intra_op_threads,
+        f"{ORT_PREFIX}.inter_op_num_threads": settings.ocr_inter_op_threads,
+        f"{ORT_PREFIX}.enable_cpu_mem_arena": settings.ocr_enable_cpu_mem_arena,
+        f"{ORT_PREFIX}.cpu_ep_cfg.arena_extend_strategy": (
+            settings.ocr_arena_extend_strategy
+        ),
+    }
+
+    # Per-provider session tuning for the primary accelerator
+    primary = providers[0]
+    if primary in PROVIDER_FLAGS:
+        params[f"{ORT_PREFIX}.{PROVIDER_FLAGS[primary]}"] = True
+    if primary == CUDA_PROVIDER:
+        params.update(
+            {
+                f"{ORT_PREFIX}.cuda_ep_cfg.device_id": settings.ocr_cuda_device_id,
+                f"{ORT_PREFIX}.cuda_ep_cfg.arena_extend_strategy": (
+                    settings.ocr_cuda_arena_extend_strategy
+                ),
+                f"{ORT_PREFIX}.cuda_ep_cfg.cudnn_conv_algo_search": (
+                    settings.ocr_cudnn_conv_algo_search
+                ),
+            }
+        )
+
+    params.update(_model_selection_params())
+    return params
+
+
+def _model_selection_params() -> dict[str, Any]:
+    """Get det/cls/rec model selection parameters that were configured."""
+    params: dict[str, Any] = {}
+
+    for section, prefix in (("Det", "ocr_det"), ("Rec", "ocr_rec")):
+        model_type = getattr(settings, f"{prefix}_model_type")
+        if model_type:
+            params[f"{section}.model_type"] = ModelType(model_type)
+        ocr_version = getattr(settings, f"{prefix}_ocr_version")
+        if ocr_version:
+            params[f"{section}.ocr_version"] = OCRVersion(ocr_version)
+
+    for section, prefix in (("Det", "ocr_det"), ("Cls", "ocr_cls"), ("Rec", "ocr_rec")):
+        model_path = getattr(settings, f"{prefix}_model_path")
+        if model_path:
+            params[f"{section}.model_path"] = str(model_path)
+
+    if settings.ocr_rec_keys_path:
+        params["Rec.rec_keys_path"] = str(settings.ocr_rec_keys_path)
+
+    return params
+
+
+def language_params(lang: str) -> dict[str, Any]:
+    """Build RapidOCR ``params`` selecting the recognition model for a language."""
+    return {"Rec.lang_type": LangRec(lang)}
+
+
+def describe_params(params: dict[str, Any]) -> dict[str, Any]:
+    """Get a JSON-friendly copy of engine parameters for reporting."""
+    return {
+        key: value.value if isinstance(value, Enum) else value
+        for key, value in params.items()
+    }
+
+
+def session_providers(engine: Any) -> dict[str, list[str]]:
+    """Get the providers each loaded ONNX session of an engine actually runs on."""
+    providers: dict[str, list[str]] = {}
+    for task in ("det", "cls", "rec"):
+        stage = getattr(engine, f"text_{task}", None)
+        infer_session = getattr(stage, "session", None)
+        ort_session = getattr(infer_session, "session", None)
+        if ort_session is not None and hasattr(ort_session, "get_providers"):
+            providers[task] = list(ort_session.get_providers())
+    return providers
@@ -0,0 +1,325 @@
+"""OCR engine pool with per-worker resource tracking and recycling."""
+
+import asyncio
+import os
+import resource
+import sys
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, TypeVar
+
+from .config import settings
+from .cpu_topology import WorkerPlacement, pinned
+from .logging_config import LoggingMixin
+from .profiling import profiler
+
+T = TypeVar("T")
+
+# Number of recycle events and memory samples kept for the stats endpoint
+MAX_RECYCLE_EVENTS = 50
+MAX_MEMORY_SAMPLES = 120
+
+
+def get_process_rss() -> int:
+    """Get the current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs: fall back to peak RSS (bytes on macOS, kilobytes elsewhere)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class EngineWorker:
+    """A single OCR engine instance and its lifetime counters."""
+
+    def __init__(
+        self,
+        worker_id: int,
+        factory: Callable[[], Any],
+        placement: WorkerPlacement | None = None,
+    ) -> None:
+        self.worker_id = worker_id
+        self._factory = factory
+        self.placement = placement
+        self.cpus = placement.cpus if placement is not None else None
+        self.engine: Any = self._build()
+        self.generation = 1
+        self.images_processed = 0
+        self.created_at = time.time()
+
+    def rebuild(self) -> None:
+        """Replace the engine with a fresh instance and reset counters."""
+        # Build the replacement first so a failed rebuild keeps the old engine
+        new_engine = self._build()
+        self.engine = new_engine
+        self.generation += 1
+        self.images_processed = 0
+        self.created_at = time.time()
+
+    def _build(self) -> Any:
+        """Build an engine whose session threads inherit the worker's core set."""
+        with pinned(self.cpus):
+            return self._factory()
+
+    def call(self, func: Callable[[Any], T]) -> T:
+        """Run ``func(engine)`` on the calling thread, pinned to the worker's cores."""
+        with pinned(self.cpus):
+            return func(self.engine)
+
+    def recycle_reason(self) -> str | None:
+        """Return why this worker should be recycled, or None if it is healthy."""
+        if (
+            settings.engine_max_images > 0
+            and self.images_processed >= settings.engine_max_images
+        ):
+            return "max_images"
+        return None
+
+    def get_info(self) -> dict[str, Any]:
+        """Get worker counters for the stats endpoint."""
+        return {
+            "worker_id": self.worker_id,
+            "numa_node": self.placement.node_id if self.placement else None,
+            "cpus": sorted(self.cpus) if self.cpus else None,
+            "generation": self.generation,
+            "images_processed": self.images_processed,
+            "age_seconds": time.time() - self.created_at,
+        }
+
+
+class EnginePool(LoggingMixin):
+    """Fixed-size pool of OCR engines that recycles workers past their limits.
+
+    Each request holds a worker exclusively. When a released worker has
+    processed too many images, it is kept out of rotation and rebuilt in a
+    background thread. The other workers keep serving, so no request is
+    dropped.
+
+    RSS is process-wide and cannot be attributed to one worker, so memory
+    growth is measured against a pool baseline. Each time growth crosses the
+    threshold, one worker is recycled: the one that processed the most images
+    since it was built (the oldest on ties), when it is next released. The
+    baseline is then reset, so the workers are not all recycled in turn for
+    the same growth.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        factory: Callable[[], Any],
+        warmup: Callable[[Any], None] | None = None,
+        placements: list[WorkerPlacement] | None = None,
+        name: str = "default",
+    ) -> None:
+        super().__init__()
+        self.name = name
+        self._warmup = warmup
+        self._workers = [
+            EngineWorker(i, factory, placements[i] if placements else None)
+            for i in range(max(1, size))
+        ]
+        self._idle: asyncio.Queue[EngineWorker] = asyncio.Queue()
+        for worker in self._workers:
+            self._idle.put_nowait(worker)
+
+        self._waiting = 0
+        self._recycling: set[int] = set()
+        self._recycle_tasks: set[asyncio.Task[None]] = set()
+        self._recycle_count = 0
+        self._recycle_events: deque[dict[str, Any]] = deque(maxlen=MAX_RECYCLE_EVENTS)
+        self._memory_samples: deque[dict[str, float]] = deque(maxlen=MAX_MEMORY_SAMPLES)
+        self._last_sample_time = 0.0
+        self._rss_baseline = get_process_rss()
+        self._rss_target: int | None = None
+        self._sample_memory(self._rss_baseline, force=True)
+
+    @property
+    def size(self) -> int:
+        """Number of workers in the pool."""
+        return len(self._workers)
+
+    @property
+    def workers(self) -> list[EngineWorker]:
+        """All workers in the pool, whether idle or in use."""
+        return list(self._workers)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a worker."""
+        return self._waiting
+
+    @property
+    def in_use(self) -> int:
+        """Number of workers currently held by callers."""
+        return self.size - self._idle.qsize() - len(self._recycling)
+
+    @property
+    def available(self) -> int:
+        """Number of workers that are not being recycled."""
+        return self.size - len(self._recycling)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[EngineWorker]:
+        """Hold a worker exclusively for the duration of the context."""
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        try:
+            yield worker
+        finally:
+            self._release(worker)
+
+    async def run(self, func: Callable[[Any], T]) -> T:
+        """Run ``func(engine)`` on a pooled engine in a worker thread."""
+        async with self.acquire() as worker:
+            result = await asyncio.to_thread(profiler.call, worker.call, func)
+            worker.images_processed += 1
+            return result
+
+    async def run_on_all(self, func: Callable[[Any], None]) -> None:
+        """Run ``func(engine)`` concurrently on every worker in the pool."""
+        async with AsyncExitStack() as stack:
+            workers = [
+                await stack.enter_async_context(self.acquire())
+                for _ in range(self.size)
+            ]
+            await asyncio.gather(
+                *(asyncio.to_thread(worker.call, func) for worker in workers)
+            )
+
+    def shift_rss_baseline(self, delta: int) -> None:
+        """Move the pool's RSS baseline, e.g. after another pool was loaded."""
+        self._rss_baseline += delta
+
+    def _choose_rss_target(self) -> int:
+        """Pick the worker to recycle for RSS growth: busiest, then oldest."""
+        candidates = [
+            worker
+            for worker in self._workers
+            if worker.worker_id not in self._recycling
+        ] or self._workers
+        target = max(
+            candidates, key=lambda worker: (worker.images_processed, -worker.created_at)
+        )
+        return target.worker_id
+
+    def _release(self, worker: EngineWorker) -> None:
+        """Return a worker to the pool, recycling it first if needed."""
+        rss = get_process_rss()
+        self._sample_memory(rss)
+
+        max_growth = settings.engine_max_rss_growth_mb * 1024 * 1024
+        if (
+            self._rss_target is None
+            and max_growth > 0
+            and rss - self._rss_baseline >= max_growth
+        ):
+            self._rss_target = self._choose_rss_target()
+
+        reason = worker.recycle_reason()
+        if reason is None and worker.worker_id == self._rss_target:
+            reason = "rss_growth"
+        if reason is None:
+            self._idle.put_nowait(worker)
+            return
+
+        self._recycling.add(worker.worker_id)
+        task = asyncio.create_task(self._recycle(worker, reason, rss))
+        self._recycle_tasks.add(task)
+        task.add_done_callback(self._recycle_tasks.discard)
+
+    async def _recycle(self, worker: EngineWorker, reason: str, rss: int) -> None:
+        """Rebuild a drained worker off the event loop and return it to the pool."""
+        start_time = time.time()
+        images_processed = worker.images_processed
+        rss_growth = rss - self._rss_baseline
+
+        self.log_info(
+            "Recycling OCR engine worker",
+            worker_id=worker.worker_id,
+            reason=reason,
+            images_processed=images_processed,
+            rss_growth_mb=rss_growth / (1024 * 1024),
+        )
+
+        try:
+            await asyncio.to_thread(worker.rebuild)
+            if self._warmup is not None:
+                # Warm the fresh engine before it takes traffic again
+                await asyncio.to_thread(worker.call, self._warmup)
+        except Exception as e:
+            self.log_error(
+                "Failed to recycle OCR engine worker",
+                worker_id=worker.worker_id,
+                error=str(e),
+            )
+        else:
+            self._recycle_count += 1
+            rss_after = get_process_rss()
+            self._recycle_events.append(
+                {
+                    "timestamp": time.time(),
+                    "worker_id": worker.worker_id,
+                    "generation": worker.generation,
+                    "reason": reason,
+                    "images_processed": images_processed,
+                    "rss_before_mb": rss / (1024 * 1024),
+                    "rss_after_mb": rss_after / (1024 * 1024),
+                    "duration": time.time() - start_time,
+                }
+            )
+            self.log_info(
+                "OCR engine worker recycled",
+                worker_id=worker.worker_id,
+                generation=worker.generation,
+                rss_after_mb=rss_after / (1024 * 1024),
+                duration=time.time() - start_time,
+            )
+        finally:
+            if worker.worker_id == self._rss_target:
+                # Measure further growth from after this recycle
+                self._rss_target = None
+                self._rss_baseline = get_process_rss()
+            self._recycling.discard(worker.worker_id)
+            self._idle.put_nowait(worker)
+
+    def _sample_memory(self, rss: int, force: bool = False) -> None:
+        """Record an RSS sample at most once per sampling interval."""
+        now = time.time()
+        if (
+            not force
+            and now - self._last_sample_time < settings.engine_memory_sample_interval
+        ):
+            return
+        self._last_sample_time = now
+        self._memory_samples.append({"timestamp": now, "rss_mb": rss / (1024 * 1024)})
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get pool, recycling and memory trend statistics."""
+        rss = get_process_rss()
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "in_use": self.in_use,
+            "queue_depth": self.queue_depth,
+            "recycling": sorted(self._recycling),
+            "recycle_count": self._recycle_count,
+            "thresholds": {
+                "max_images": settings.engine_max_images,
+                "max_rss_growth_mb": settings.engine_max_rss_growth_mb,
+            },
+            "rss_mb": rss / (1024 * 1024),
+            "rss_baseline_mb": self._rss_baseline / (1024 * 1024),
+            "rss_growth_mb": (rss - self._rss_baseline) / (1024 * 1024),
+            "rss_recycle_target": self._rss_target,
+            "workers": [worker.get_info() for worker in self._workers],
+            "recycle_events": list(self._recycle_events),
+            "memory_trend": list(self._memory_samples),
+        }
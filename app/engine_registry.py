@@ -0,0 +1,230 @@
+"""LRU registry of OCR engine pools keyed by language and model profile."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .engine_pool import EnginePool, get_process_rss
+from .logging_config import LoggingMixin
+from .metrics import metrics
+
+# (recognition language, model profile)
+EngineKey = tuple[str, str]
+
+EngineLoader = Callable[[EngineKey], Awaitable[tuple[EnginePool, dict[str, Any]]]]
+
+
+class RegistryEntry:
+    """A loaded engine pool and its load cost and usage counters."""
+
+    def __init__(
+        self,
+        key: EngineKey,
+        pool: EnginePool,
+        memory_bytes: int,
+        load_duration: float,
+        info: dict[str, Any],
+        pinned: bool = False,
+    ) -> None:
+        self.key = key
+        self.pool = pool
+        self.memory_bytes = memory_bytes
+        self.load_duration = load_duration
+        self.info = info
+        self.pinned = pinned
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+    @property
+    def busy(self) -> bool:
+        """Whether any caller holds or waits for one of the pool's engines."""
+        return self.pool.in_use > 0 or self.pool.queue_depth > 0
+
+    def get_info(self) -> dict[str, Any]:
+        """Get entry details for the stats endpoint."""
+        lang, profile = self.key
+        return {
+            "lang": lang,
+            "profile": profile,
+            "pinned": self.pinned,
+            "memory_mb": self.memory_bytes / (1024 * 1024),
+            "load_duration": self.load_duration,
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "uses": self.uses,
+            "pool_size": self.pool.size,
+            "in_use": self.pool.in_use,
+            "queue_depth": self.pool.queue_depth,
+            **self.info,
+        }
+
+
+class EngineRegistry(LoggingMixin):
+    """Lazily loads engine pools per key and evicts the least recently used.
+
+    The memory an entry takes is measured as the process RSS growth while it
+    loads. Before and after each load, idle unpinned entries are evicted in
+    LRU order until the estimated total fits the memory budget. Loads are
+    serialized so the RSS measurement of one load is not polluted by another.
+    An evicted pool that a request already obtained keeps working until that
+    request finishes; it is released with its last reference.
+    """
+
+    def __init__(self, loader: EngineLoader, memory_budget_mb: int = 0) -> None:
+        super().__init__()
+        self._loader = loader
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._entries: OrderedDict[EngineKey, RegistryEntry] = OrderedDict()
+        # Last measured footprint per key, used to make room before a reload
+        self._memory_estimates: dict[EngineKey, int] = {}
+        self._load_lock = asyncio.Lock()
+        self._evictions = 0
+
+    @property
+    def pools(self) -> list[EnginePool]:
+        """Pools of every loaded entry."""
+        return [entry.pool for entry in self._entries.values()]
+
+    @property
+    def total_memory(self) -> int:
+        """Estimated memory held by all loaded entries in bytes."""
+        return sum(entry.memory_bytes for entry in self._entries.values())
+
+    def __contains__(self, key: EngineKey) -> bool:
+        return key in self._entries
+
+    def register(
+        self,
+        key: EngineKey,
+        pool: EnginePool,
+        memory_bytes: int = 0,
+        load_duration: float = 0.0,
+        info: dict[str, Any] | None = None,
+        pinned: bool = False,
+    ) -> None:
+        """Add an already loaded pool, e.g. the default engine built at startup."""
+        self._entries[key] = RegistryEntry(
+            key, pool, memory_bytes, load_duration, info or {}, pinned
+        )
+        self._memory_estimates[key] = memory_bytes
+
+    def get_memory(self, key: EngineKey) -> int:
+        """Get the measured footprint of an entry, or 0 if it is not loaded."""
+        entry = self._entries.get(key)
+        return entry.memory_bytes if entry is not None else 0
+
+    def set_memory(self, key: EngineKey, memory_bytes: int) -> None:
+        """Update the measured footprint of an entry."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.memory_bytes = max(0, memory_bytes)
+            self._memory_estimates[key] = entry.memory_bytes
+
+    async def get(self, key: EngineKey) -> EnginePool:
+        """Get the pool for a key, loading it (and evicting others) on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            async with self._load_lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    metrics.increment("engine_registry_misses")
+                    entry = await self._load(key)
+                else:
+                    metrics.increment("engine_registry_hits")
+        else:
+            metrics.increment("engine_registry_hits")
+
+        self._entries.move_to_end(key)
+        entry.last_used = time.time()
+        entry.uses += 1
+        return entry.pool
+
+    async def _load(self, key: EngineKey) -> RegistryEntry:
+        """Load a pool for a key, keeping the registry within its budget."""
+        # Make room for the expected footprint before loading
+        expected = self._memory_estimates.get(key, self._average_memory())
+        self._evict(reserve=expected)
+
+        lang, profile = key
+        self.log_info("Loading OCR engine", lang=lang, profile=profile)
+        rss_before = get_process_rss()
+        start_time = time.time()
+        try:
+            pool, info = await self._loader(key)
+        except Exception as e:
+            metrics.increment("engine_registry_load_failures")
+            self.log_error(
+                "Failed to load OCR engine", lang=lang, profile=profile, error=str(e)
+            )
+            raise
+        load_duration = time.time() - start_time
+        memory_bytes = max(0, get_process_rss() - rss_before)
+
+        # The growth belongs to the new entry, not to the workers already loaded
+        for other in self._entries.values():
+            other.pool.shift_rss_baseline(memory_bytes)
+
+        entry = RegistryEntry(key, pool, memory_bytes, load_duration, info)
+        self._entries[key] = entry
+        self._memory_estimates[key] = memory_bytes
+        metrics.observe("engine_load", load_duration)
+        self.log_info(
+            "Loaded OCR engine",
+            lang=lang,
+            profile=profile,
+            memory_mb=memory_bytes / (1024 * 1024),
+            load_duration=load_duration,
+        )
+
+        self._evict(keep=key)
+        return entry
+
+    def _average_memory(self) -> int:
+        """Get the mean footprint of loaded entries as a guess for a new one."""
+        measured = [e.memory_bytes for e in self._entries.values() if e.memory_bytes]
+        return sum(measured) // len(measured) if measured else 0
+
+    def _evict(self, reserve: int = 0, keep: EngineKey | None = None) -> None:
+        """Evict idle unpinned entries in LRU order until the budget is met."""
+        if self.memory_budget <= 0:
+            return
+
+        while self.total_memory + reserve > self.memory_budget:
+            victim = next(
+                (
+                    entry
+                    for entry in self._entries.values()
+                    if not entry.pinned and entry.key != keep and not entry.busy
+                ),
+                None,
+            )
+            if victim is None:
+                self.log_warning(
+                    "OCR engines exceed the memory budget",
+                    total_memory_mb=self.total_memory / (1024 * 1024),
+                    memory_budget_mb=self.memory_budget / (1024 * 1024),
+                )
+                return
+
+            del self._entries[victim.key]
+            self._evictions += 1
+            metrics.increment("engine_registry_evictions")
+            self.log_info(
+                "Evicted OCR engine",
+                lang=victim.key[0],
+                profile=victim.key[1],
+                memory_mb=victim.memory_bytes / (1024 * 1024),
+                idle_seconds=time.time() - victim.last_used,
+            )
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get loaded entries in LRU order (least recent first) and budget usage."""
+        return {
+            "memory_budget_mb": self.memory_budget / (1024 * 1024),
+            "total_memory_mb": self.total_memory / (1024 * 1024),
+            "evictions": self._evictions,
+            "entries": [entry.get_info() for entry in self._entries.values()],
+        }
@@ -1,6 +1,7 @@
 """File management utilities for handling uploads and temporary files."""
 
 import asyncio
+import heapq
 import time
 from pathlib import Path
 from typing import Any
@@ -11,10 +12,20 @@ from fastapi import UploadFile
 
 from .config import settings
 from .logging_config import LoggingMixin
+from .tracing import tracer
+
+# Uploads are spread over subdirectories named by the first UUID hex characters
+SHARD_PREFIX_LENGTH = 2
 
 
 class FileManager(LoggingMixin):
-    """Manages temporary file storage, cleanup, and UUID tracking."""
+    """Manages temporary file storage, cleanup, and UUID tracking.
+
+    Every tracked file is indexed in memory with its size and deletion time.
+    A min-heap keyed by deletion time lets cleanup touch only expired entries,
+    and file count and total size are kept in O(1) without directory scans.
+    The index is rebuilt from disk once, at startup.
+    """
 
     def __init__(self) -> None:
         super().__init__()
@@ -22,6 +33,92 @@ class FileManager(LoggingMixin):
         self.temp_dir.mkdir(exist_ok=True)
         self._cleanup_task: asyncio.Task[None] | None = None
 
+        # Expiry index: path -> (size, deletion time), plus a heap over it
+        self._tracked: dict[Path, tuple[int, float]] = {}
+        self._expiry_heap: list[tuple[float, Path]] = []
+        self._total_size = 0
+        self._known_shards: set[Path] = set()
+        self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """Index files left over from a previous run (once, at startup)."""
+        try:
+            entries = list(self.temp_dir.iterdir())
+        except OSError as e:
+            self.log_error("Error indexing temp dir", error=str(e))
+            entries = []
+
+        # Entries may vanish mid-scan; skip them and keep indexing the rest
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    self._known_shards.add(entry)
+                    for file_path in entry.iterdir():
+                        if file_path.is_file():
+                            self._index_existing_file(file_path)
+                elif entry.is_file():
+                    # Files saved before sharding live at the top level
+                    self._index_existing_file(entry)
+            except OSError as e:
+                self.log_warning(
+                    "Error indexing temp dir entry", path=str(entry), error=str(e)
+                )
+
+        heapq.heapify(self._expiry_heap)
+        self.log_info(
+            "Indexed temp dir",
+            file_count=len(self._tracked),
+            total_size_bytes=self._total_size,
+        )
+
+    def _index_existing_file(self, file_path: Path) -> None:
+        """Add an on-disk file to the index using its modification time."""
+        try:
+            stat = file_path.stat()
+        except OSError as e:
+            self.log_warning(
+                "Error indexing temp file", file_path=str(file_path), error=str(e)
+            )
+            return
+        expires_at = stat.st_mtime + settings.file_retention
+        self._tracked[file_path] = (stat.st_size, expires_at)
+        self._expiry_heap.append((expires_at, file_path))
+        self._total_size += stat.st_size
+
+    def _track_file(self, file_path: Path, size: int) -> None:
+        """Add a newly saved file to the expiry index."""
+        expires_at = time.time() + settings.file_retention
+        self._tracked[file_path] = (size, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, file_path))
+        self._total_size += size
+
+    def _untrack_file(self, file_path: Path) -> None:
+        """Remove a file from the index; its heap entry is discarded lazily."""
+        entry = self._tracked.pop(file_path, None)
+        if entry is not None:
+            self._total_size -= entry[0]
+
+        # Compact once stale heap entries clearly outnumber live ones
+        if len(self._expiry_heap) > 2 * len(self._tracked) + 1024:
+            self._expiry_heap = [
+                (expires_at, path) for path, (_, expires_at) in self._tracked.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    def _shard_dir(self, file_uuid: str) -> Path:
+        """Get (and create on first use) the shard directory for a UUID."""
+        shard = self.temp_dir / file_uuid[:SHARD_PREFIX_LENGTH]
+        if shard not in self._known_shards:
+            shard.mkdir(parents=True, exist_ok=True)
+            self._known_shards.add(shard)
+        return shard
+
+    @staticmethod
+    async def _write_file(file_path: Path, content: bytes) -> None:
+        """Write a file's content without blocking the event loop."""
+        async with aiofiles.open(file_path, "wb") as f:
+            await f.write(content)
+
     async def start_cleanup_task(self) -> None:
         """Start the background cleanup task."""
         if self._cleanup_task is None or self._cleanup_task.done():
@@ -58,14 +155,24 @@ class FileManager(LoggingMixin):
         if not file_ext:
             file_ext = ".bin"  # Default extension
 
-        # Create file path with UUID
-        file_path = self.temp_dir / f"{file_uuid}{file_ext}"
+        # Create file path with UUID inside its shard
+        file_path = self._shard_dir(file_uuid) / f"{file_uuid}{file_ext}"
 
         try:
             # Save file content
-            async with aiofiles.open(file_path, "wb") as f:
+            with tracer.span("upload.save", filename=original_name) as span:
                 content = await upload_file.read()
-                await f.write(content)
+                try:
+                    await self._write_file(file_path, content)
+                except FileNotFoundError:
+                    # The shard was removed externally, e.g. by a tmp cleaner
+                    self._known_shards.discard(file_path.parent)
+                    self._shard_dir(file_uuid)
+                    await self._write_file(file_path, content)
+                if span is not None:
+                    span.set_attribute("bytes", len(content))
+
+            self._track_file(file_path, len(content))
 
             # Reset file pointer for potential re-reading
             await upload_file.seek(0)
@@ -133,10 +240,12 @@ class FileManager(LoggingMixin):
             bool: True if file was removed, False otherwise
         """
         try:
-            if file_path.exists():
-                file_path.unlink()
-                self.log_debug("Cleaned up file", file_path=str(file_path))
-                return True
+            file_path.unlink()
+            self._untrack_file(file_path)
+            self.log_debug("Cleaned up file", file_path=str(file_path))
+            return True
+        except FileNotFoundError:
+            self._untrack_file(file_path)
         except Exception as e:
             self.log_warning(
                 "Failed to cleanup file", file_path=str(file_path), error=str(e)
@@ -147,28 +256,37 @@ class FileManager(LoggingMixin):
         """
         Clean up files older than the retention time.
 
+        Only expired entries are popped from the expiry heap; entries for files
+        that were already removed are skipped without touching the disk.
+
         Returns:
             int: Number of files cleaned up
         """
-        if not self.temp_dir.exists():
-            return 0
-
         current_time = time.time()
-        retention_seconds = settings.file_retention
         cleanup_count = 0
+        retry_paths: list[Path] = []
 
         try:
-            for file_path in self.temp_dir.iterdir():
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-
-                    if file_age > retention_seconds:
-                        if self.cleanup_file(file_path):
-                            cleanup_count += 1
+            while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+                expires_at, file_path = heapq.heappop(self._expiry_heap)
+                entry = self._tracked.get(file_path)
+                if entry is None or entry[1] != expires_at:
+                    continue  # Stale heap entry
+                if self.cleanup_file(file_path):
+                    cleanup_count += 1
+                elif file_path in self._tracked:
+                    retry_paths.append(file_path)
 
         except Exception as e:
             self.log_error("Error during file cleanup", error=str(e))
 
+        # Files that could not be removed are retried on the next cleanup pass
+        for file_path in retry_paths:
+            size, _ = self._tracked[file_path]
+            expires_at = current_time + settings.cleanup_interval
+            self._tracked[file_path] = (size, expires_at)
+            heapq.heappush(self._expiry_heap, (expires_at, file_path))
+
         if cleanup_count > 0:
             self.log_info("Cleaned up old files", cleanup_count=cleanup_count)
 
@@ -188,28 +306,16 @@ class FileManager(LoggingMixin):
                 # Continue running despite errors
 
     def get_temp_dir_info(self) -> dict[str, Any]:
-        """Get information about the temporary directory."""
-        try:
-            if not self.temp_dir.exists():
-                return {"exists": False}
-
-            files = list(self.temp_dir.iterdir())
-            file_count = len([f for f in files if f.is_file()])
-
-            # Calculate total size
-            total_size = sum(f.stat().st_size for f in files if f.is_file())
-
-            return {
-                "exists": True,
-                "path": str(self.temp_dir),
-                "file_count": file_count,
-                "total_size_bytes": total_size,
-                "cleanup_active": self._cleanup_task is not None
-                and not self._cleanup_task.done(),
-            }
-        except Exception as e:
-            self.log_error("Error getting temp dir info", error=str(e))
-            return {"error": str(e)}
+        """Get information about the temporary directory from tracked counters."""
+        return {
+            "path": str(self.temp_dir),
+            "file_count": len(self._tracked),
+            "total_size_bytes": self._total_size,
+            "shard_count": len(self._known_shards),
+            "expiry_index_size": len(self._expiry_heap),
+            "cleanup_active": self._cleanup_task is not None
+            and not self._cleanup_task.done(),
+        }
 
 
 # Global file manager instance
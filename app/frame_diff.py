@@ -0,0 +1,389 @@
+"""Frame differencing for OCR of video and image sequences."""
+
+from collections import Counter
+from typing import Any, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+# Longest side of the grayscale image successive frames are compared at
+DIFF_SIDE = 256
+# Side of a comparison tile, in pixels of the comparison image
+TILE_SIZE = 16
+# Fraction of a tile's pixels that must change for the tile to count as changed
+TILE_MIN_CHANGED = 0.01
+# RapidOCR's detector upscales images whose shorter side is below this, so
+# small crops are padded up to it instead of being enlarged many times over
+DET_MIN_SIDE = 736
+# A region no taller than this many times the one line it covers is an
+# in-place edit of that line and is recognized without detection
+IN_PLACE_MAX_HEIGHT = 1.5
+
+# (left, top, right, bottom)
+Box = tuple[int, int, int, int]
+
+
+class TextLine(NamedTuple):
+    """A recognized line and its axis-aligned box in frame coordinates."""
+
+    box: Box
+    text: str
+    score: float
+
+
+class Region(NamedTuple):
+    """A changed part of a frame to recognize again."""
+
+    box: Box
+    # Holds a single edited line, so recognition without detection suffices
+    in_place: bool
+
+
+class FramePlan(NamedTuple):
+    """What has to be recognized again for a frame."""
+
+    mode: str  # "full", "partial" or "unchanged"
+    changed_ratio: float
+    comparison: np.ndarray
+    regions: list[Region]
+
+
+def comparison_image(image: Image.Image) -> np.ndarray:
+    """Get the small grayscale version of a frame used for differencing."""
+    gray = image.convert("L")
+    scale = min(1.0, DIFF_SIDE / max(image.size))
+    if scale < 1.0:
+        gray = gray.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.Resampling.BOX,
+        )
+    return np.array(gray, dtype=np.int16)
+
+
+def changed_tiles(changed: np.ndarray) -> np.ndarray:
+    """Get a boolean grid marking the tiles that contain enough changed pixels."""
+    height, width = changed.shape
+    rows = -(-height // TILE_SIZE)
+    cols = -(-width // TILE_SIZE)
+    padded = np.zeros((rows * TILE_SIZE, cols * TILE_SIZE), dtype=bool)
+    padded[:height, :width] = changed
+    fraction = padded.reshape(rows, TILE_SIZE, cols, TILE_SIZE).mean(axis=(1, 3))
+    return fraction > TILE_MIN_CHANGED
+
+
+def changed_boxes(changed: np.ndarray, mask: np.ndarray) -> list[Box]:
+    """Get the bounding boxes of changed pixels per group of changed tiles."""
+    boxes = []
+    for left, top, right, bottom in tile_regions(mask):
+        x0, y0 = left * TILE_SIZE, top * TILE_SIZE
+        ys, xs = np.nonzero(changed[y0 : bottom * TILE_SIZE, x0 : right * TILE_SIZE])
+        boxes.append(
+            (
+                x0 + int(xs.min()),
+                y0 + int(ys.min()),
+                x0 + int(xs.max()) + 1,
+                y0 + int(ys.max()) + 1,
+            )
+        )
+    return boxes
+
+
+def tile_regions(mask: np.ndarray) -> list[Box]:
+    """Get the bounding boxes, in tiles, of connected groups of marked tiles."""
+    seen = np.zeros_like(mask)
+    regions = []
+    for row, col in zip(*np.nonzero(mask), strict=True):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        stack = [(int(row), int(col))]
+        top, left, bottom, right = int(row), int(col), int(row), int(col)
+        while stack:
+            y, x = stack.pop()
+            top, bottom = min(top, y), max(bottom, y)
+            left, right = min(left, x), max(right, x)
+            for ny in (y - 1, y, y + 1):
+                for nx in (x - 1, x, x + 1):
+                    if (
+                        0 <= ny < mask.shape[0]
+                        and 0 <= nx < mask.shape[1]
+                        and mask[ny, nx]
+                        and not seen[ny, nx]
+                    ):
+                        seen[ny, nx] = True
+                        stack.append((ny, nx))
+        regions.append((left, top, right + 1, bottom + 1))
+    return regions
+
+
+def overlaps(a: Box, b: Box) -> bool:
+    """Check whether two boxes intersect."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def union(a: Box, b: Box) -> Box:
+    """Get the smallest box containing both boxes."""
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def expand_regions(regions: list[Box], lines: list[TextLine]) -> list[Box]:
+    """
+    Grow changed regions over the lines they touch and merge overlapping ones.
+
+    A line only partly inside a changed region would otherwise be recognized
+    from a cut-off crop while its old reading is dropped.
+    """
+    expanding = True
+    while expanding:
+        expanding = False
+        merged: list[Box] = []
+        for region in regions:
+            for line in lines:
+                if overlaps(region, line.box) and union(region, line.box) != region:
+                    region = union(region, line.box)
+                    expanding = True
+            for index, other in enumerate(merged):
+                if overlaps(region, other):
+                    merged[index] = union(region, other)
+                    expanding = True
+                    break
+            else:
+                merged.append(region)
+        regions = merged
+    return regions
+
+
+def classify_region(box: Box, lines: list[TextLine]) -> Region:
+    """Mark a region as an in-place edit when it is confined to one line."""
+    touched = [line for line in lines if overlaps(box, line.box)]
+    if len(touched) == 1:
+        line_height = touched[0].box[3] - touched[0].box[1]
+        if box[3] - box[1] <= line_height * IN_PLACE_MAX_HEIGHT:
+            return Region(box, in_place=True)
+    return Region(box, in_place=False)
+
+
+def pad_for_detection(image: Image.Image) -> Image.Image:
+    """Place a small crop on a background-coloured canvas of detector size."""
+    if min(image.size) >= DET_MIN_SIDE:
+        return image
+    pixels = np.asarray(image)
+    border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    background = tuple(int(value) for value in np.median(border, axis=0))
+    canvas = Image.new(
+        image.mode,
+        (max(image.width, DET_MIN_SIDE), max(image.height, DET_MIN_SIDE)),
+        background,
+    )
+    canvas.paste(image)
+    return canvas
+
+
+def recognize_line(
+    engine: Any, image: Image.Image, engine_kwargs: dict[str, Any], box: Box
+) -> list[TextLine]:
+    """Recognize a single-line crop without detection."""
+    result = engine(image, **{**engine_kwargs, "use_det": False})
+    if not result.txts:
+        return []
+    score = float(result.scores[0])
+    if score < engine_kwargs.get("text_score", 0.0):
+        return []
+    return [TextLine(box, str(result.txts[0]), score)]
+
+
+def recognize_lines(
+    engine: Any,
+    image: Image.Image,
+    engine_kwargs: dict[str, Any],
+    offset: tuple[int, int] = (0, 0),
+) -> list[TextLine]:
+    """Run detection and recognition and map the boxes into frame coordinates."""
+    result = engine(image, **engine_kwargs)
+    boxes = getattr(result, "boxes", None)
+    if boxes is None or not result.txts:
+        return []
+
+    x_offset, y_offset = offset
+    lines = []
+    for box, text, score in zip(boxes, result.txts, result.scores, strict=True):
+        points = np.asarray(box, dtype=float)
+        x0, y0 = points.min(axis=0)
+        x1, y1 = np.ceil(points.max(axis=0))
+        lines.append(
+            TextLine(
+                (
+                    int(x0) + x_offset,
+                    int(y0) + y_offset,
+                    int(x1) + x_offset,
+                    int(y1) + y_offset,
+                ),
+                str(text),
+                float(score),
+            )
+        )
+    return lines
+
+
+def text_delta(
+    before: list[TextLine], after: list[TextLine]
+) -> tuple[list[str], list[str]]:
+    """Get the lines added and removed between two readings, in reading order."""
+    added_counts = Counter(line.text for line in after)
+    added_counts.subtract(line.text for line in before)
+    removed_counts = Counter({text: -count for text, count in added_counts.items()})
+
+    def pick(lines: list[TextLine], counts: Counter[str]) -> list[str]:
+        picked = []
+        for line in lines:
+            if counts[line.text] > 0:
+                picked.append(line.text)
+                counts[line.text] -= 1
+        return picked
+
+    return pick(after, added_counts), pick(before, removed_counts)
+
+
+class FrameSequence:
+    """OCR state carried between successive frames of one sequence.
+
+    Each frame is compared with a reference at reduced resolution in
+    ``TILE_SIZE`` tiles. The changed pixels of each group of changed tiles,
+    grown over the lines they touch, form a region that is cropped from the
+    frame and recognized again; lines elsewhere are reused from earlier
+    frames. A region confined to one known line (a counter, a clock, a
+    typed line) is recognized without detection, which is an order of
+    magnitude cheaper; other regions run detection on a padded crop. The
+    reference is only updated
+    where text was recognized again, so slow changes accumulate until they
+    cross the threshold instead of going unnoticed. The first frame, frames
+    whose size changed, frames where more than ``full_refresh_ratio`` of the
+    tiles changed and every ``keyframe_interval``-th frame are recognized in
+    full.
+    """
+
+    def __init__(
+        self,
+        pixel_threshold: int = 24,
+        full_refresh_ratio: float = 0.5,
+        keyframe_interval: int = 30,
+    ) -> None:
+        self.pixel_threshold = pixel_threshold
+        self.full_refresh_ratio = full_refresh_ratio
+        self.keyframe_interval = keyframe_interval
+        self._reference: np.ndarray | None = None
+        self._size: tuple[int, int] | None = None
+        self._lines: list[TextLine] = []
+        self._since_keyframe = 0
+
+    @property
+    def lines(self) -> list[TextLine]:
+        """Lines of the latest frame in reading order."""
+        return list(self._lines)
+
+    def plan(self, image: Image.Image) -> FramePlan:
+        """Decide which parts of a frame need to be recognized again."""
+        comparison = comparison_image(image)
+        if (
+            self._reference is None
+            or image.size != self._size
+            or (
+                self.keyframe_interval > 0
+                and self._since_keyframe >= self.keyframe_interval
+            )
+        ):
+            return FramePlan("full", 1.0, comparison, [])
+
+        changed = np.abs(comparison - self._reference) > self.pixel_threshold
+        mask = changed_tiles(changed)
+        changed_ratio = float(mask.mean())
+        if not mask.any():
+            return FramePlan("unchanged", 0.0, comparison, [])
+        if changed_ratio > self.full_refresh_ratio:
+            return FramePlan("full", changed_ratio, comparison, [])
+
+        # Map to frame coordinates with one comparison pixel of margin
+        x_scale = image.width / comparison.shape[1]
+        y_scale = image.height / comparison.shape[0]
+        boxes = [
+            (
+                max(0, int((left - 1) * x_scale)),
+                max(0, int((top - 1) * y_scale)),
+                min(image.width, int(np.ceil((right + 1) * x_scale))),
+                min(image.height, int(np.ceil((bottom + 1) * y_scale))),
+            )
+            for left, top, right, bottom in changed_boxes(changed, mask)
+        ]
+        regions = [
+            classify_region(box, self._lines)
+            for box in expand_regions(boxes, self._lines)
+        ]
+        return FramePlan("partial", changed_ratio, comparison, regions)
+
+    def apply(
+        self,
+        engine: Any,
+        image: Image.Image,
+        plan: FramePlan,
+        engine_kwargs: dict[str, Any],
+    ) -> tuple[list[str], list[str]]:
+        """
+        Recognize the planned parts of a frame and update the sequence state.
+
+        Args:
+            engine: RapidOCR engine held by the caller (unused when unchanged)
+            image: The frame
+            plan: Result of ``plan`` for this frame
+            engine_kwargs: RapidOCR call parameters of the request
+
+        Returns:
+            Lines added and lines removed compared with the previous frame
+        """
+        if plan.mode == "full":
+            lines = recognize_lines(engine, image, engine_kwargs)
+            self._reference = plan.comparison
+            self._size = image.size
+            self._since_keyframe = 0
+        elif plan.mode == "partial":
+            lines = [
+                line
+                for line in self._lines
+                if not any(overlaps(line.box, region.box) for region in plan.regions)
+            ]
+            for region in plan.regions:
+                crop = image.crop(region.box)
+                if region.in_place:
+                    lines.extend(
+                        recognize_line(engine, crop, engine_kwargs, region.box)
+                    )
+                else:
+                    lines.extend(
+                        recognize_lines(
+                            engine,
+                            pad_for_detection(crop),
+                            engine_kwargs,
+                            region.box[:2],
+                        )
+                    )
+                self._refresh_reference(plan.comparison, region.box, image.size)
+        else:
+            lines = self._lines
+        self._since_keyframe += 1
+
+        lines = sorted(lines, key=lambda line: (line.box[1], line.box[0]))
+        added, removed = text_delta(self._lines, lines)
+        self._lines = lines
+        return added, removed
+
+    def _refresh_reference(
+        self, comparison: np.ndarray, region: Box, size: tuple[int, int]
+    ) -> None:
+        """Copy a re-recognized region of the frame into the reference."""
+        if self._reference is None:
+            return
+        x_scale = comparison.shape[1] / size[0]
+        y_scale = comparison.shape[0] / size[1]
+        left, top, right, bottom = region
+        rows = slice(int(top * y_scale), int(np.ceil(bottom * y_scale)))
+        cols = slice(int(left * x_scale), int(np.ceil(right * x_scale)))
+        self._reference[rows, cols] = comparison[rows, cols]
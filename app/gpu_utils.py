@@ -135,6 +135,10 @@ class GPUDetector(LoggingMixin):
 
         return config
 
+    def is_gpu_available(self) -> bool:
+        """Get the cached detection result without running detection."""
+        return self._gpu_available or False
+
     def get_gpu_info(self) -> dict[str, Any]:
         """Get GPU information for health checks."""
         self.detect_gpu()  # Ensure detection has run
@@ -0,0 +1,40 @@
+"""Image loading helpers for the OCR pipeline."""
+
+import io
+from pathlib import Path
+from typing import IO
+
+from PIL import Image, ImageOps
+
+
+def open_source(source: Path | bytes) -> Path | IO[bytes]:
+    """Get something ``Image.open`` reads from a path or encoded image content."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def image_size(path: Path | IO[bytes]) -> tuple[int, int]:
+    """Get an image's stored width and height from its header."""
+    with Image.open(path) as opened:
+        return opened.size
+
+
+def load_image(path: Path | IO[bytes], max_side_len: int | None = None) -> Image.Image:
+    """
+    Load an image upright and, if requested, bound its longest side.
+
+    Args:
+        path: Image file, or a binary stream of its content, to load
+        max_side_len: Downscale so that neither side exceeds this (None=keep size)
+
+    Returns:
+        Image.Image: RGB image ready to pass to RapidOCR
+    """
+    with Image.open(path) as opened:
+        if max_side_len is not None:
+            # Let JPEG decoding downscale by a power of two while decoding
+            opened.draft("RGB", (max_side_len, max_side_len))
+        image = ImageOps.exif_transpose(opened).convert("RGB")
+
+    if max_side_len is not None and max(image.size) > max_side_len:
+        image.thumbnail((max_side_len, max_side_len), Image.Resampling.LANCZOS)
+    return image
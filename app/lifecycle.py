@@ -0,0 +1,243 @@
+"""Service lifecycle state used for readiness gating and graceful drain.
+
+Draining takes an instance out of rotation without losing requests: the
+readiness probe turns false at once, new OCR work is refused with 503 once
+the grace period for load balancers to notice has passed, and work already
+admitted runs to completion until the drain deadline. A drain starts on
+SIGTERM, before the server's own shutdown handling runs, or from the admin
+endpoint.
+"""
+
+import asyncio
+import signal
+import threading
+import time
+from types import FrameType
+from typing import Any
+
+from .logging_config import LoggingMixin
+
+# Interval at which a drain checks for remaining in-flight work
+DRAIN_POLL_INTERVAL = 0.05
+
+
+class ServiceLifecycle(LoggingMixin):
+    """Tracks whether the service has finished warming up and can take traffic."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._warmup_state = "pending"
+        self._warmup_info: dict[str, Any] = {}
+        self._in_flight = 0
+        self._drain_state = "serving"
+        self._drain_info: dict[str, Any] = {}
+        self._admit_until = 0.0
+        self._previous_handler: Any = None
+        self._signal_installed = False
+        self._drain_task: asyncio.Task[Any] | None = None
+
+    @property
+    def warmup_complete(self) -> bool:
+        """Whether startup warmup has finished successfully (or was skipped)."""
+        return self._warmup_state in ("complete", "skipped")
+
+    def mark_warmup_complete(self, **info: Any) -> None:
+        """Record a successful warmup and open the readiness gate."""
+        self._warmup_state = "complete"
+        self._warmup_info = {"completed_at": time.time(), **info}
+
+    def mark_warmup_skipped(self) -> None:
+        """Open the readiness gate without warming up."""
+        self._warmup_state = "skipped"
+        self._warmup_info = {}
+
+    def mark_warmup_failed(self, error: str) -> None:
+        """Record a failed warmup; the instance stays not-ready."""
+        self._warmup_state = "failed"
+        self._warmup_info = {"error": error}
+
+    @property
+    def draining(self) -> bool:
+        """Whether a drain has started; the instance is out of rotation."""
+        return self._drain_state != "serving"
+
+    @property
+    def in_flight(self) -> int:
+        """Admitted units of OCR work that have not finished."""
+        return self._in_flight
+
+    def admits_work(self) -> bool:
+        """
+        Whether new OCR work may start.
+
+        Work is still admitted during the drain grace period. Refusals are
+        counted in the drain report.
+        """
+        if not self.draining or time.time() < self._admit_until:
+            return True
+        self._drain_info["rejected"] += 1
+        return False
+
+    def work_started(self) -> None:
+        """Record admitted OCR work so a drain waits for it."""
+        self._in_flight += 1
+
+    def work_finished(self) -> None:
+        """Record finished OCR work."""
+        self._in_flight -= 1
+        if self.draining:
+            self._drain_info["completed"] += 1
+
+    def begin_drain(self, reason: str, grace_period: float = 0.0) -> bool:
+        """
+        Take the instance out of rotation.
+
+        Args:
+            reason: What started the drain, for logs and stats
+            grace_period: Seconds new work is still admitted so that load
+                balancers can notice the failing readiness probe first
+
+        Returns:
+            False if a drain was already in progress or finished
+        """
+        if self.draining:
+            return False
+        now = time.time()
+        self._drain_state = "draining"
+        self._admit_until = now + grace_period
+        self._drain_info = {
+            "reason": reason,
+            "started_at": now,
+            "in_flight_at_start": self._in_flight,
+            "completed": 0,
+            "rejected": 0,
+            "abandoned": 0,
+        }
+        self.log_info(
+            "Draining service",
+            reason=reason,
+            in_flight=self._in_flight,
+            grace_period=grace_period,
+        )
+        return True
+
+    async def drain(
+        self, timeout: float, reason: str, grace_period: float = 0.0
+    ) -> dict[str, Any]:
+        """
+        Drain the service and wait for in-flight work to finish.
+
+        Work still running at the deadline is reported as abandoned; it
+        keeps running until the server stops it.
+
+        Args:
+            timeout: Seconds to wait for in-flight work after the grace period
+            reason: What started the drain
+            grace_period: Seconds new work is still admitted
+
+        Returns:
+            The drain report
+        """
+        self.begin_drain(reason, grace_period)
+        # Work admitted during the grace period is waited for as well
+        while time.time() < self._admit_until:
+            await asyncio.sleep(DRAIN_POLL_INTERVAL)
+        deadline = self._admit_until + timeout
+        while self._in_flight > 0 and time.time() < deadline:
+            await asyncio.sleep(DRAIN_POLL_INTERVAL)
+
+        if self._drain_state == "draining":
+            self._drain_state = "drained"
+            self._drain_info["abandoned"] = self._in_flight
+            self._drain_info["duration"] = time.time() - self._drain_info["started_at"]
+            self.log_info("Service drained", **self._drain_info)
+        return self.get_drain_info()
+
+    def start_drain(
+        self, timeout: float, reason: str, grace_period: float = 0.0
+    ) -> None:
+        """Drain without waiting, finishing the report in the background."""
+        self.begin_drain(reason, grace_period)
+        self._drain_task = asyncio.get_running_loop().create_task(
+            self.drain(timeout, reason, grace_period)
+        )
+
+    def resume(self) -> None:
+        """Put a drained instance back into rotation."""
+        if self.draining:
+            self.log_info("Resuming service after drain", **self._drain_info)
+        self._drain_state = "serving"
+        self._admit_until = 0.0
+
+    def install_signal_handler(self, timeout: float, grace_period: float) -> bool:
+        """
+        Drain on SIGTERM before handing the signal to the server.
+
+        The handler in place when this is called, normally the server's own,
+        is restored and the signal raised again once the drain finishes, so
+        the server shuts down as it would have. A second SIGTERM during the
+        drain is passed on at once.
+
+        Returns:
+            False where signal handlers cannot be installed (off the main thread)
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        loop = asyncio.get_running_loop()
+        self._previous_handler = signal.getsignal(signal.SIGTERM)
+        received = False
+
+        async def drain_then_exit() -> None:
+            try:
+                await self.drain(timeout, "sigterm", grace_period)
+            finally:
+                self.restore_signal_handler()
+                signal.raise_signal(signal.SIGTERM)
+
+        def schedule_drain() -> None:
+            self._drain_task = loop.create_task(drain_then_exit())
+
+        def handle(signum: int, frame: FrameType | None) -> None:
+            nonlocal received
+            if received:
+                self.restore_signal_handler()
+                signal.raise_signal(signal.SIGTERM)
+                return
+            received = True
+            loop.call_soon_threadsafe(schedule_drain)
+
+        signal.signal(signal.SIGTERM, handle)
+        self._signal_installed = True
+        return True
+
+    def restore_signal_handler(self) -> None:
+        """Put back the SIGTERM handler replaced by the drain handler."""
+        if self._signal_installed:
+            signal.signal(signal.SIGTERM, self._previous_handler)
+            self._signal_installed = False
+
+    def get_drain_info(self) -> dict[str, Any]:
+        """Get drain state and counts for health and admin endpoints."""
+        return {
+            "state": self._drain_state,
+            "in_flight": self._in_flight,
+            **(self._drain_info if self.draining else {}),
+        }
+
+    def get_readiness(self) -> tuple[bool, str | None]:
+        """Get whether the service is ready and, if not, why."""
+        if self.draining:
+            return False, "draining"
+        if self._warmup_state == "pending":
+            return False, "warming_up"
+        if self._warmup_state == "failed":
+            return False, "warmup_failed"
+        return True, None
+
+    def get_warmup_info(self) -> dict[str, Any]:
+        """Get warmup state for health endpoints."""
+        return {"state": self._warmup_state, **self._warmup_info}
+
+
+# Global service lifecycle instance
+service_lifecycle = ServiceLifecycle()
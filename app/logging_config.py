@@ -1,8 +1,14 @@
 """Logging configuration and utilities."""
 
 import logging
+import queue
+import random
 import sys
+import threading
+from collections import Counter
+from collections.abc import MutableMapping
 from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 from uuid import uuid4
 
@@ -14,13 +20,115 @@ from .config import settings
 # Context variable for request tracking
 request_id_ctx: ContextVar[str | None] = ContextVar("request_id", default=None)
 
+# Levels subject to per-event sampling; warnings and errors are always kept
+SAMPLED_LEVELS = frozenset({"debug", "info"})
+
+
+class EventSampler:
+    """structlog processor keeping a configured fraction of chosen events.
+
+    Rates are keyed by event message, so chatty per-file events such as
+    ``"OCR processing completed"`` can be thinned at high request rates
+    while request summaries stay complete.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        self.rates = rates
+        self._sampled_out: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: MutableMapping[str, Any]
+    ) -> MutableMapping[str, Any]:
+        event = event_dict.get("event")
+        if method_name in SAMPLED_LEVELS and isinstance(event, str):
+            rate = self.rates.get(event)
+            if rate is not None and random.random() >= rate:
+                with self._lock:
+                    self._sampled_out[event] += 1
+                raise structlog.DropEvent
+        return event_dict
+
+    def get_stats(self) -> dict[str, int]:
+        """Get the number of records sampled out per event."""
+        with self._lock:
+            return dict(self._sampled_out)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler that never blocks the logging caller.
+
+    When the queue is full the ``drop_newest`` policy discards the new
+    record and ``drop_oldest`` evicts the oldest queued one to make room.
+    Records at WARNING and above always evict an older record, so a burst
+    of INFO lines cannot push errors out.
+    """
+
+    def __init__(self, log_queue: queue.Queue[Any], drop_policy: str) -> None:
+        super().__init__(log_queue)
+        self.drop_policy = drop_policy
+        self._dropped: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping one if the queue is full."""
+        log_queue: queue.Queue[Any] = self.queue  # type: ignore[assignment]
+        try:
+            log_queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.drop_policy == "drop_oldest" or record.levelno >= logging.WARNING:
+            try:
+                oldest = log_queue.get_nowait()
+                log_queue.task_done()
+                self._count_drop(oldest)
+                log_queue.put_nowait(record)
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self._count_drop(record)
+
+    def _count_drop(self, record: logging.LogRecord) -> None:
+        with self._lock:
+            self._dropped[record.levelname] += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get queue usage and dropped records per level."""
+        log_queue: queue.Queue[Any] = self.queue  # type: ignore[assignment]
+        with self._lock:
+            dropped = dict(self._dropped)
+        return {
+            "queue_depth": log_queue.qsize(),
+            "queue_size": log_queue.maxsize,
+            "drop_policy": self.drop_policy,
+            "dropped": sum(dropped.values()),
+            "dropped_by_level": dropped,
+        }
+
+
+_sampler = EventSampler({})
+_queue_handler: BoundedQueueHandler | None = None
+_listener: QueueListener | None = None
+_listener_running = False
+
 
 def configure_logging() -> None:
-    """Configure structured logging for the application."""
+    """Configure structured logging for the application.
+
+    With ``LOG_ASYNC`` enabled, records are rendered on the calling thread
+    but written to stdout by a background listener thread through a bounded
+    queue, so a slow log consumer cannot stall request handling.
+    """
+    global _sampler, _queue_handler, _listener
+
+    _sampler = EventSampler(dict(settings.log_sample_rates))
 
     # Configure structlog
     structlog.configure(
         processors=[
+            _sampler,
             structlog.contextvars.merge_contextvars,
             structlog.processors.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
@@ -37,11 +145,49 @@ def configure_logging() -> None:
     )
 
     # Configure standard logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.log_level.upper()),
+    level = getattr(logging, settings.log_level.upper())
+    if not settings.log_async:
+        logging.basicConfig(format="%(message)s", stream=sys.stdout, level=level)
+        return
+
+    shutdown_logging()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _queue_handler = BoundedQueueHandler(
+        queue.Queue(maxsize=settings.log_queue_size), settings.log_drop_policy
     )
+    _listener = QueueListener(_queue_handler.queue, stream_handler)
+    start_logging()
+    logging.basicConfig(format="%(message)s", handlers=[_queue_handler], level=level)
+
+
+def start_logging() -> None:
+    """Start the background log writer if it is configured and not running."""
+    global _listener_running
+    if _listener is not None and not _listener_running:
+        _listener.start()
+        _listener_running = True
+
+
+def shutdown_logging() -> None:
+    """Stop the background log writer after flushing queued records."""
+    global _listener_running
+    if _listener is not None and _listener_running:
+        _listener.stop()
+        _listener_running = False
+
+
+def get_logging_stats() -> dict[str, Any]:
+    """Get log pipeline settings and drop and sampling counters for the stats endpoint."""
+    stats: dict[str, Any] = {
+        "async": _listener is not None,
+        "writer_running": _listener_running,
+        "sample_rates": _sampler.rates,
+        "sampled_out": _sampler.get_stats(),
+    }
+    if _queue_handler is not None:
+        stats.update(_queue_handler.get_stats())
+    return stats
 
 
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
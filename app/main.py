@@ -10,26 +10,58 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from .config import settings
+from .dispatcher import dispatcher
 from .file_manager import file_manager
 from .gpu_utils import gpu_detector
+from .lifecycle import service_lifecycle
 from .logging_config import (
     configure_logging,
     generate_request_id,
     get_logger,
     set_request_context,
+    shutdown_logging,
+    start_logging,
 )
 from .models import ErrorResponse
-from .routers import health, ocr
+from .ocr_service import ocr_service
+from .routers import admin, dispatch, health, ocr
+from .tracing import tracer
 
 # Configure logging
 configure_logging()
 logger = get_logger(__name__)
 
 
+async def start_engines() -> None:
+    """Tune, warm up and persist the OCR engines of this instance."""
+    # Size the engine pool and its threads for this host
+    if settings.autotune_enabled:
+        try:
+            await ocr_service.autotune()
+        except Exception as e:
+            logger.error("OCR engine autotune failed", error=str(e))
+
+    # Warm up OCR engines before reporting ready
+    warmup_duration = 0.0
+    if settings.warmup_enabled:
+        try:
+            warmup_duration = await ocr_service.warmup()
+            service_lifecycle.mark_warmup_complete(duration=warmup_duration)
+        except Exception as e:
+            logger.error("OCR engine warmup failed", error=str(e))
+            service_lifecycle.mark_warmup_failed(str(e))
+    else:
+        service_lifecycle.mark_warmup_skipped()
+
+    # Persist optimized models and report startup timings
+    ocr_service.complete_startup(warmup_duration)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     """Application lifespan management."""
     # Startup
+    start_logging()
     logger.info("Starting RapidOCR service", version=settings.api_version)
 
     # Start file cleanup task
@@ -38,6 +70,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     # Initialize GPU detection
     gpu_detector.detect_gpu()
 
+    # A dispatcher loads no engines; it forwards OCR work to its backends
+    if settings.dispatcher_enabled:
+        await dispatcher.start()
+        service_lifecycle.mark_warmup_skipped()
+    else:
+        await start_engines()
+
+    # Drain in-flight work when the orchestrator stops the instance
+    if settings.drain_on_sigterm:
+        service_lifecycle.install_signal_handler(
+            settings.drain_timeout, settings.drain_grace_period
+        )
+
     logger.info("RapidOCR service started successfully")
 
     yield
@@ -45,11 +90,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     # Shutdown
     logger.info("Shutting down RapidOCR service")
 
+    # Shutdown reaches here after any SIGTERM drain has finished
+    service_lifecycle.restore_signal_handler()
+
+    # Stop polling backends
+    if settings.dispatcher_enabled:
+        await dispatcher.stop()
+
     # Stop file cleanup task
     await file_manager.stop_cleanup_task()
 
     logger.info("RapidOCR service shutdown complete")
 
+    # Export pending traces, then flush queued log records
+    tracer.shutdown()
+    shutdown_logging()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -83,8 +139,17 @@ async def logging_middleware(request: Request, call_next: Any) -> Response:
         client_ip=request.client.host if request.client else None,
     )
 
+    # Trace the request under its request ID
+    with tracer.start_trace(
+        f"{request.method} {request.url.path}",
+        request_id.replace("-", ""),
+        **{"http.method": request.method, "http.target": request.url.path},
+    ) as span:
+        response = await call_next(request)
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+
     # Add request ID to response headers
-    response = await call_next(request)
     response.headers["X-Request-ID"] = request_id
 
     # Log request completion
@@ -141,7 +206,8 @@ async def root() -> dict[str, Any]:
 
 # Include routers
 app.include_router(health.router)
-app.include_router(ocr.router)
+app.include_router(dispatch.router if settings.dispatcher_enabled else ocr.router)
+app.include_router(admin.router)
 
 # Development server
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+"""Incrementally maintained service metrics for the stats endpoint."""
+
+import time
+from collections import defaultdict, deque
+from typing import Any
+
+# Number of recent observations kept per timing for percentile estimates
+TIMING_WINDOW = 1024
+
+
+class TimingStats:
+    """Running count/sum/max of a timing plus a window of recent values."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=TIMING_WINDOW)
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._recent.append(value)
+
+    def snapshot(self) -> dict[str, float]:
+        """Get aggregate values and recent percentiles."""
+        recent = sorted(self._recent)
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": _percentile(recent, 0.50),
+            "p99": _percentile(recent, 0.99),
+        }
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Get a nearest-rank percentile from an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class ServiceMetrics:
+    """Counters, gauges and timings updated on the request path.
+
+    Every update is O(1) so the stats endpoint never has to scan files or
+    walk engine state to report request activity.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self._counters: defaultdict[str, int] = defaultdict(int)
+        self._gauges: defaultdict[str, float] = defaultdict(float)
+        self._timings: defaultdict[str, TimingStats] = defaultdict(TimingStats)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increase a counter."""
+        self._counters[name] += value
+
+    def adjust_gauge(self, name: str, delta: float) -> None:
+        """Move a gauge up or down."""
+        self._gauges[name] += delta
+
+    def get_gauge(self, name: str) -> float:
+        """Get the current value of a gauge."""
+        return self._gauges.get(name, 0.0)
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a timing observation in seconds."""
+        self._timings[name].observe(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get all metrics for the stats endpoint."""
+        return {
+            "counters": dict(self._counters),
+            "gauges": dict(self._gauges),
+            "timings": {
+                name: timing.snapshot() for name, timing in self._timings.items()
+            },
+        }
+
+
+# Global metrics instance
+metrics = ServiceMetrics()
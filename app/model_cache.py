@@ -0,0 +1,225 @@
+"""Persisted cache of ONNX Runtime optimized models for fast cold starts."""
+
+import hashlib
+import importlib.util
+import json
+import platform
+import time
+from pathlib import Path
+from typing import Any
+
+import onnxruntime as ort
+
+from .logging_config import LoggingMixin
+
+# RapidOCR pipeline stages and the config sections that hold their model paths
+TASK_SECTIONS = {"det": "Det", "cls": "Cls", "rec": "Rec"}
+
+# Extended optimizations are hardware independent, so cached graphs stay valid
+# across hosts with the same provider and ORT version
+DEFAULT_OPTIMIZATION_LEVEL = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+
+MANIFEST_NAME = "manifest.json"
+
+
+def quantization_available() -> bool:
+    """Check whether INT8 quantization (the optional ``onnx`` package) is installed."""
+    return importlib.util.find_spec("onnx") is not None
+
+
+def quantize_model(source: Path, destination: Path) -> None:
+    """
+    Write a dynamically INT8-quantized copy of an ONNX model.
+
+    Weights are stored as unsigned 8-bit integers and activations are
+    quantized at run time, so no calibration data is needed. Requires the
+    optional ``onnx`` package (the ``quantization`` extra).
+    """
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise RuntimeError(
+            "INT8 quantization requires the 'onnx' package "
+            "(install the 'quantization' extra)"
+        ) from e
+
+    tmp_path = destination.with_suffix(".tmp")
+    quantize_dynamic(str(source), str(tmp_path), weight_type=QuantType.QUInt8)
+    tmp_path.replace(destination)
+
+
+def hash_file(path: Path) -> str:
+    """Get the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def loaded_model_paths(engine: Any) -> dict[str, Path]:
+    """Get the model file behind each loaded ONNX session of a RapidOCR engine."""
+    paths: dict[str, Path] = {}
+    for task in TASK_SECTIONS:
+        # RapidOCR engine -> TextDetector etc. -> OrtInferSession -> InferenceSession
+        stage = getattr(engine, f"text_{task}", None)
+        infer_session = getattr(stage, "session", None)
+        ort_session = getattr(infer_session, "session", None)
+        model_path = getattr(ort_session, "_model_path", None)
+        if model_path:
+            paths[task] = Path(model_path)
+    return paths
+
+
+class ModelCache(LoggingMixin):
+    """Stores optimized det/cls/rec graphs keyed by model hash, provider and ORT version.
+
+    A manifest maps each engine configuration to the optimized files that were
+    produced for it, together with the source model hashes and the cold start
+    time measured when the cache entry was written.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        optimization_level: ort.GraphOptimizationLevel = DEFAULT_OPTIMIZATION_LEVEL,
+    ) -> None:
+        super().__init__()
+        self.optimization_level = optimization_level
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self.cache_dir / MANIFEST_NAME
+        self._manifest: dict[str, Any] = self._load_manifest()
+
+    def _load_manifest(self) -> dict[str, Any]:
+        """Load the manifest, treating a missing or corrupt file as empty."""
+        try:
+            with open(self._manifest_path) as f:
+                manifest: dict[str, Any] = json.load(f)
+                return manifest
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.log_warning("Ignoring unreadable model cache manifest", error=str(e))
+            return {}
+
+    def _save_manifest(self) -> None:
+        """Atomically write the manifest."""
+        tmp_path = self._manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        tmp_path.replace(self._manifest_path)
+
+    def config_key(self, params: dict[str, Any], provider: str) -> str:
+        """Get the manifest key for an engine configuration.
+
+        Session thread counts do not change the optimized graphs, so they are
+        left out and a retuned engine keeps using the same cache entry.
+        """
+        identity = {
+            "params": {
+                name: value
+                for name, value in params.items()
+                if not name.endswith("_num_threads")
+            },
+            "provider": provider,
+            "ort_version": ort.__version__,
+            "machine": platform.machine(),
+            "optimization_level": str(self.optimization_level),
+        }
+        encoded = json.dumps(identity, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+    def lookup(self, key: str) -> dict[str, str] | None:
+        """
+        Get RapidOCR model path parameters for a cached configuration.
+
+        Returns:
+            Parameters such as ``{"Det.model_path": ...}``, or None on a miss
+            or when a source model has changed since it was cached
+        """
+        entry = self._manifest.get(key)
+        if not entry:
+            return None
+
+        params: dict[str, str] = {}
+        for task, model in entry["models"].items():
+            optimized = self.cache_dir / model["optimized"]
+            source = Path(model["source"])
+            if not optimized.exists() or not source.exists():
+                return None
+            if hash_file(source) != model["sha256"]:
+                self.log_info("Cached model is stale", task=task, source=str(source))
+                return None
+            params[f"{TASK_SECTIONS[task]}.model_path"] = str(optimized)
+
+        return params
+
+    def populate(
+        self,
+        key: str,
+        model_paths: dict[str, Path],
+        provider: str,
+        quantize: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Optimize each source model for the provider and record it under key.
+
+        With ``quantize`` the models are INT8-quantized instead; the quantized
+        graphs are provider independent and optimized again when loaded.
+        """
+        models: dict[str, Any] = {}
+        for task, source in model_paths.items():
+            sha256 = hash_file(source)
+            if quantize:
+                name = f"{task}-{sha256[:16]}-int8-ort{ort.__version__}.onnx"
+            else:
+                level = int(self.optimization_level)
+                name = f"{task}-{sha256[:16]}-{provider}-ort{ort.__version__}-O{level}.onnx"
+            optimized = self.cache_dir / name
+
+            if not optimized.exists():
+                start_time = time.time()
+                if quantize:
+                    quantize_model(source, optimized)
+                else:
+                    sess_options = ort.SessionOptions()
+                    sess_options.graph_optimization_level = self.optimization_level
+                    sess_options.optimized_model_filepath = str(optimized)
+                    ort.InferenceSession(
+                        str(source), sess_options=sess_options, providers=[provider]
+                    )
+                self.log_info(
+                    "Saved quantized model" if quantize else "Saved optimized model",
+                    task=task,
+                    source=str(source),
+                    optimized=str(optimized),
+                    duration=time.time() - start_time,
+                )
+
+            models[task] = {
+                "source": str(source),
+                "sha256": sha256,
+                "optimized": name,
+            }
+
+        entry = {
+            "models": models,
+            "provider": provider,
+            "quantized": quantize,
+            "created_at": time.time(),
+        }
+        self._manifest[key] = entry
+        self._save_manifest()
+        return entry
+
+    def record_cold_start(self, key: str, duration: float) -> None:
+        """Store the uncached startup time for later before/after comparison."""
+        if key in self._manifest:
+            self._manifest[key]["cold_start_duration"] = duration
+            self._save_manifest()
+
+    def get_cold_start(self, key: str) -> float | None:
+        """Get the recorded uncached startup time for a configuration."""
+        duration = self._manifest.get(key, {}).get("cold_start_duration")
+        return float(duration) if duration is not None else None
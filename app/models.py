@@ -1,14 +1,168 @@
 """Data models for the RapidOCR service."""
 
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 
+class OCROptions(BaseModel):
+    """Per-request RapidOCR pipeline options.
+
+    Defaults match RapidOCR's own configuration. Every value is passed to the
+    engine on each call because RapidOCR keeps call parameters between calls.
+    """
+
+    use_cls: bool = Field(default=True, description="Run text angle classification")
+    text_score: float = Field(
+        default=0.5, ge=0.0, le=1.0, description="Minimum recognition confidence"
+    )
+    box_thresh: float = Field(
+        default=0.5, ge=0.0, le=1.0, description="Minimum detection box score"
+    )
+    unclip_ratio: float = Field(
+        default=1.6,
+        gt=0.0,
+        le=4.0,
+        description="Expansion ratio of detected text boxes",
+    )
+    max_side_len: int | None = Field(
+        default=None,
+        ge=32,
+        le=8192,
+        description="Downscale images whose longest side exceeds this before OCR",
+    )
+    cascade: bool | None = Field(
+        default=None,
+        description="Use coarse-to-fine cascade OCR (None=configured default)",
+    )
+    dedup: bool | None = Field(
+        default=None,
+        description="Allow near-duplicate cached results (None=configured default)",
+    )
+    include_lines: bool = Field(
+        default=False,
+        description="Return each line's text, confidence and box (not in cascade mode)",
+    )
+
+    def engine_kwargs(self) -> dict[str, Any]:
+        """Get the RapidOCR call parameters for these options."""
+        return {
+            "use_det": True,
+            "use_rec": True,
+            "use_cls": self.use_cls,
+            "text_score": self.text_score,
+            "box_thresh": self.box_thresh,
+            "unclip_ratio": self.unclip_ratio,
+        }
+
+
+class CascadeInfo(BaseModel):
+    """Per-pass statistics of a coarse-to-fine cascade run."""
+
+    scale: float = Field(..., description="Scale of the coarse pass image")
+    coarse_time: float = Field(..., description="Coarse pass duration in seconds")
+    refine_time: float = Field(..., description="Refinement pass duration in seconds")
+    regions: int = Field(..., description="Text regions found by the coarse pass")
+    refined_regions: int = Field(
+        ..., description="Regions re-recognized at full resolution"
+    )
+
+
+class DuplicateInfo(BaseModel):
+    """Provenance of a result served from the near-duplicate cache."""
+
+    source_uuid: str = Field(..., description="UUID of the request that was OCRed")
+    distance: int = Field(..., description="Differing bits of the 64-bit image hash")
+    similarity: float = Field(..., description="Hash similarity from 0 to 1")
+
+
+class CostInfo(BaseModel):
+    """Estimated engine cost of an image, from the size in its header."""
+
+    width: int = Field(..., description="Stored image width in pixels")
+    height: int = Field(..., description="Stored image height in pixels")
+    megapixels: float = Field(..., description="Stored size in megapixels")
+    units: float = Field(
+        ..., description="Cost in megapixels after downscaling, with a per-call floor"
+    )
+
+
+class TextLineResult(BaseModel):
+    """A recognized text line with its confidence and location."""
+
+    text: str = Field(..., description="Recognized text of the line")
+    score: float = Field(..., description="Recognition confidence from 0 to 1")
+    box: list[list[float]] = Field(
+        ...,
+        description="Corner points [x, y] clockwise from top-left, in image pixels",
+    )
+
+
 class OCRResult(BaseModel):
     """OCR processing result for a single file."""
 
     FileName: str = Field(..., description="Original filename of the processed image")
     UUID: str = Field(..., description="Unique identifier for the processing session")
     Context: str = Field(..., description="Extracted text content from the image")
+    Cascade: CascadeInfo | None = Field(
+        default=None, description="Cascade pass statistics when cascade mode was used"
+    )
+    Lines: list[TextLineResult] | None = Field(
+        default=None, description="Per-line details when include_lines was requested"
+    )
+    Duplicate: DuplicateInfo | None = Field(
+        default=None,
+        description="Set when the result was served from the near-duplicate cache",
+    )
+    Cost: CostInfo | None = Field(
+        default=None, description="Estimated cost (None if the header is unreadable)"
+    )
+
+
+class FrameDelta(BaseModel):
+    """Text changes of one frame of a sequence."""
+
+    frame: int = Field(..., description="Index of the frame in the sequence")
+    FileName: str = Field(..., description="Original filename of the frame")
+    mode: str = Field(
+        ..., description="full, partial, unchanged or error: what was recognized"
+    )
+    changed_ratio: float = Field(
+        ..., description="Fraction of comparison tiles that changed"
+    )
+    regions: int = Field(..., description="Changed regions recognized again")
+    added: list[str] = Field(..., description="Lines that appeared in this frame")
+    removed: list[str] = Field(..., description="Lines that disappeared in this frame")
+    line_count: int = Field(..., description="Lines on the frame after the update")
+    processing_time: float = Field(..., description="Frame processing time in seconds")
+    error: str | None = Field(
+        default=None, description="Why the frame could not be processed"
+    )
+
+
+class StreamSession(BaseModel):
+    """First message of an OCR WebSocket session."""
+
+    session: str = Field(..., description="Session identifier used in logs")
+    max_in_flight: int = Field(
+        ..., description="Frames processed concurrently before reads pause"
+    )
+    max_frame_bytes: int = Field(..., description="Largest accepted image in bytes")
+    model_profile: str = Field(..., description="Model profile of the session")
+    lang: str = Field(..., description="Recognition language of the session")
+
+
+class StreamResult(BaseModel):
+    """Result for one frame received over an OCR WebSocket session."""
+
+    id: int | None = Field(
+        default=None, description="Frame id from the frame header (None if unreadable)"
+    )
+    result: OCRResult | None = Field(
+        default=None, description="OCR result of the frame"
+    )
+    processing_time: float = Field(..., description="Frame processing time in seconds")
+    error: str | None = Field(default=None, description="Why the frame was rejected")
 
 
 class OCRResponse(BaseModel):
@@ -17,6 +171,13 @@ class OCRResponse(BaseModel):
     results: list[OCRResult] = Field(..., description="List of OCR results")
     processing_time: float = Field(..., description="Total processing time in seconds")
     gpu_used: bool = Field(..., description="Whether GPU acceleration was used")
+    model_profile: str | None = Field(
+        None, description="Model profile used: accurate or fast"
+    )
+    lang: str | None = Field(None, description="Recognition language used")
+    cost_units: float | None = Field(
+        None, description="Estimated cost of all images in megapixel units"
+    )
 
 
 class HealthResponse(BaseModel):
@@ -28,6 +189,23 @@ class HealthResponse(BaseModel):
     uptime: float = Field(..., description="Service uptime in seconds")
 
 
+class LivenessResponse(BaseModel):
+    """Liveness probe response model."""
+
+    status: str = Field(..., description="Process status")
+    uptime: float = Field(..., description="Service uptime in seconds")
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response model."""
+
+    ready: bool = Field(..., description="Whether the service can take traffic")
+    reason: str | None = Field(None, description="Why the service is not ready")
+    queue_depth: int = Field(..., description="Requests waiting for an OCR engine")
+    in_flight: int = Field(..., description="OCR engines currently in use")
+    warmup: dict[str, Any] = Field(..., description="Startup warmup state")
+
+
 class ErrorResponse(BaseModel):
     """Error response model."""
 
@@ -0,0 +1,258 @@
+"""Perceptual-hash cache that serves OCR results for near-duplicate images."""
+
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Any, NamedTuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from .logging_config import LoggingMixin
+from .metrics import metrics
+
+# Bits of the index hash (8x8 difference hash)
+HASH_BITS = 64
+# Side of the larger difference hash used to verify candidates (256 bits)
+VERIFY_HASH_SIZE = 16
+
+
+class Fingerprint(NamedTuple):
+    """Perceptual signature of an image."""
+
+    hash: int
+    verify_hash: int
+    aspect_ratio: float
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash of an image.
+
+    The grayscale image is shrunk to ``hash_size + 1`` by ``hash_size``
+    pixels and each bit records whether a pixel is brighter than its right
+    neighbour, which is stable under re-encoding, rescaling and small
+    brightness changes.
+    """
+    pixels = np.asarray(
+        image.resize((hash_size + 1, hash_size), Image.Resampling.BOX), dtype=np.int16
+    )
+    bits = (pixels[:, :-1] > pixels[:, 1:]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def image_fingerprint(path: Path | IO[bytes]) -> Fingerprint:
+    """Compute the index and verification hashes of an image file or stream."""
+    with Image.open(path) as opened:
+        # Hashes only need a few pixels, so let JPEG decoding skip most of them
+        opened.draft("L", (VERIFY_HASH_SIZE * 8, VERIFY_HASH_SIZE * 8))
+        image = ImageOps.exif_transpose(opened).convert("L")
+    image = ImageOps.autocontrast(image)
+    return Fingerprint(
+        hash=dhash(image),
+        verify_hash=dhash(image, VERIFY_HASH_SIZE),
+        aspect_ratio=image.width / image.height,
+    )
+
+
+class MultiIndexHashIndex:
+    """Hamming-radius search over 64-bit hashes using multi-index hashing.
+
+    Each hash is split into ``max_distance + 1`` disjoint substrings with one
+    exact-match table per substring. By the pigeonhole principle any hash
+    within ``max_distance`` bits of a query agrees with it exactly on at least
+    one substring, so only entries sharing a bucket are compared. Buckets
+    keep each entry's hash so the distance check needs no entry lookup.
+    """
+
+    def __init__(self, max_distance: int, bits: int = HASH_BITS) -> None:
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        bounds = [round(i * bits / chunks) for i in range(chunks + 1)]
+        # (shift, mask) of each substring
+        self._chunks = [
+            (bits - end, (1 << (end - start)) - 1)
+            for start, end in zip(bounds, bounds[1:], strict=False)
+        ]
+        self._tables: list[dict[int, dict[int, int]]] = [{} for _ in self._chunks]
+
+    def _keys(self, value: int) -> list[int]:
+        return [(value >> shift) & mask for shift, mask in self._chunks]
+
+    def add(self, entry_id: int, value: int) -> None:
+        """Index an entry's hash."""
+        for table, key in zip(self._tables, self._keys(value), strict=True):
+            table.setdefault(key, {})[entry_id] = value
+
+    def remove(self, entry_id: int, value: int) -> None:
+        """Remove an entry's hash from the index."""
+        for table, key in zip(self._tables, self._keys(value), strict=True):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.pop(entry_id, None)
+                if not bucket:
+                    del table[key]
+
+    def candidates(self, value: int) -> set[int]:
+        """Get entries sharing at least one substring with the hash."""
+        found: set[int] = set()
+        for table, key in zip(self._tables, self._keys(value), strict=True):
+            bucket = table.get(key)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def search(self, value: int) -> dict[int, int]:
+        """Get the entries within ``max_distance`` bits mapped to their distance."""
+        found: dict[int, int] = {}
+        for table, key in zip(self._tables, self._keys(value), strict=True):
+            bucket = table.get(key)
+            if not bucket:
+                continue
+            for entry_id, other in bucket.items():
+                distance = (other ^ value).bit_count()
+                if distance <= self.max_distance:
+                    found[entry_id] = distance
+        return found
+
+
+class CachedResult:
+    """A cached OCR result and the fingerprint of the image it came from."""
+
+    __slots__ = ("namespace", "fingerprint", "text", "source_uuid", "created_at")
+
+    def __init__(
+        self, namespace: str, fingerprint: Fingerprint, text: str, source_uuid: str
+    ) -> None:
+        self.namespace = namespace
+        self.fingerprint = fingerprint
+        self.text = text
+        self.source_uuid = source_uuid
+        self.created_at = time.time()
+
+
+class NearDuplicateCache(LoggingMixin):
+    """LRU cache of OCR results looked up by perceptual similarity.
+
+    A hit requires the same namespace (language, profile and pipeline
+    options), an index hash within ``max_distance`` bits, a 256-bit
+    verification hash differing in at most ``verify_max_ratio`` of its bits,
+    an aspect ratio within ``aspect_tolerance`` and an entry younger than
+    ``ttl`` seconds. Perceptual hashes cannot see small content edits such as
+    a changed digit on the same form, so callers that OCR many variants of
+    one template should opt out per request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_distance: int,
+        verify_max_ratio: float,
+        aspect_tolerance: float,
+        ttl: float,
+    ) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.verify_max_ratio = verify_max_ratio
+        self.aspect_tolerance = aspect_tolerance
+        self.ttl = ttl
+        self._index = MultiIndexHashIndex(max_distance)
+        self._entries: OrderedDict[int, CachedResult] = OrderedDict()
+        self._next_id = 0
+        self._lookups = 0
+        self._hits = 0
+        self._rejected = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(
+        self, namespace: str, fingerprint: Fingerprint
+    ) -> tuple[CachedResult, int] | None:
+        """
+        Find a cached result for a near-duplicate image.
+
+        Returns:
+            The closest verified entry and its index hash distance, or None
+        """
+        start_time = time.perf_counter()
+        self._lookups += 1
+        now = time.time()
+        best: tuple[CachedResult, int] | None = None
+        best_id = -1
+        rejected = False
+
+        for entry_id, distance in self._index.search(fingerprint.hash).items():
+            entry = self._entries[entry_id]
+            if now - entry.created_at > self.ttl:
+                self._remove(entry_id)
+                continue
+            if entry.namespace != namespace:
+                continue
+            if not self._verify(entry.fingerprint, fingerprint):
+                rejected = True
+                continue
+            if best is None or distance < best[1]:
+                best = (entry, distance)
+                best_id = entry_id
+
+        if best is not None:
+            self._hits += 1
+            self._entries.move_to_end(best_id)
+        elif rejected:
+            self._rejected += 1
+            metrics.increment("near_duplicate_rejected")
+
+        metrics.observe("near_duplicate_lookup", time.perf_counter() - start_time)
+        return best
+
+    def _verify(self, cached: Fingerprint, query: Fingerprint) -> bool:
+        """Apply the false-match safeguards to an index hash match."""
+        if abs(cached.aspect_ratio - query.aspect_ratio) > (
+            self.aspect_tolerance * cached.aspect_ratio
+        ):
+            return False
+        verify_bits = VERIFY_HASH_SIZE * VERIFY_HASH_SIZE
+        verify_distance = (cached.verify_hash ^ query.verify_hash).bit_count()
+        return verify_distance <= self.verify_max_ratio * verify_bits
+
+    def insert(
+        self, namespace: str, fingerprint: Fingerprint, text: str, source_uuid: str
+    ) -> None:
+        """Cache an OCR result, evicting the least recently used entries."""
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = CachedResult(
+            namespace, fingerprint, text, source_uuid
+        )
+        self._index.add(entry_id, fingerprint.hash)
+
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self._evictions += 1
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry from the LRU order and the index."""
+        entry = self._entries.pop(entry_id)
+        self._index.remove(entry_id, entry.fingerprint.hash)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get hit rate and safeguard counters for the stats endpoint."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "lookups": self._lookups,
+            "hits": self._hits,
+            "hit_rate": self._hits / self._lookups if self._lookups else 0.0,
+            "rejected": self._rejected,
+            "evictions": self._evictions,
+            "thresholds": {
+                "max_distance": self.max_distance,
+                "verify_max_ratio": self.verify_max_ratio,
+                "aspect_tolerance": self.aspect_tolerance,
+                "ttl": self.ttl,
+            },
+        }
@@ -1,15 +1,50 @@
 """OCR processing service using RapidOCR."""
 
+import asyncio
 import time
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
 from rapidocr import RapidOCR
 
+from .autotune import autotuner
+from .cascade import run_cascade
 from .config import settings
+from .cost import cost_units, estimate_cost
+from .cpu_topology import cpu_placement
+from .engine_config import (
+    CPU_PROVIDER,
+    FAST_PROFILE,
+    GRAPH_OPTIMIZATION_LEVELS,
+    INTRA_OP_THREADS_KEY,
+    MODEL_PROFILES,
+    SUPPORTED_LANGUAGES,
+    build_engine_params,
+    describe_params,
+    language_params,
+    resolve_providers,
+    session_providers,
+)
+from .engine_pool import EnginePool, get_process_rss
+from .engine_registry import EngineKey, EngineRegistry
+from .frame_diff import FrameSequence
 from .gpu_utils import gpu_detector
+from .imaging import image_size, load_image, open_source
 from .logging_config import LoggingMixin
-from .models import OCRResult
+from .metrics import metrics
+from .model_cache import ModelCache, loaded_model_paths, quantization_available
+from .models import (
+    DuplicateInfo,
+    FrameDelta,
+    OCROptions,
+    OCRResult,
+    TextLineResult,
+)
+from .near_duplicate import HASH_BITS, NearDuplicateCache, image_fingerprint
+from .scheduler import scheduler
+from .tracing import record_stage_spans, tracer
+from .warmup import make_synthetic_image, make_warmup_images, warm_engine
 
 
 class OCRService(LoggingMixin):
@@ -17,9 +52,34 @@ class OCRService(LoggingMixin):
 
     def __init__(self) -> None:
         super().__init__()
-        self._ocr_engine: RapidOCR | None = None
+        self._pool: EnginePool | None = None
+        self._default_profile = settings.ocr_model_profile
+        self._default_lang = settings.ocr_lang
+        self._registry = EngineRegistry(
+            self._load_engine, settings.engine_memory_budget_mb
+        )
         self._gpu_config: dict[str, Any] = {}
-        self._initialize_engine()
+        self._providers: list[str] = [CPU_PROVIDER]
+        self._engine_params: dict[str, Any] = {}
+        self._pool_size = settings.ocr_pool_size
+        self._model_cache: ModelCache | None = None
+        self._model_cache_info: dict[str, Any] = {"status": "disabled", "key": None}
+        self._build_duration = 0.0
+        self._rss_before_build = 0
+        self._startup_info: dict[str, Any] = {}
+        self._warmup_images = make_warmup_images(settings.warmup_sizes)
+        self._near_duplicates: NearDuplicateCache | None = None
+        if settings.near_duplicate_enabled:
+            self._near_duplicates = NearDuplicateCache(
+                max_entries=settings.near_duplicate_max_entries,
+                max_distance=settings.near_duplicate_max_distance,
+                verify_max_ratio=settings.near_duplicate_verify_max_ratio,
+                aspect_tolerance=settings.near_duplicate_aspect_tolerance,
+                ttl=settings.near_duplicate_ttl,
+            )
+        # Dispatcher mode forwards OCR work to backends and runs no engines
+        if not settings.dispatcher_enabled:
+            self._initialize_engine()
 
     def _initialize_engine(self) -> None:
         """Initialize the RapidOCR engine with GPU configuration."""
@@ -27,9 +87,6 @@ class OCRService(LoggingMixin):
             # Get GPU configuration
             self._gpu_config = gpu_detector.configure_for_gpu()
 
-            # Configure RapidOCR parameters
-            ocr_config: dict[str, Any] = {}
-
             # Force GPU usage if specified in settings
             if settings.ocr_use_gpu is not None:
                 if settings.ocr_use_gpu and not gpu_detector.detect_gpu():
@@ -43,106 +100,617 @@ class OCRService(LoggingMixin):
                     # Override GPU detection
                     self._gpu_config = {"use_cpu": True}
 
-            # Initialize RapidOCR engine
-            self._ocr_engine = RapidOCR(**ocr_config)
+            if self._default_profile not in MODEL_PROFILES:
+                raise ValueError(
+                    f"Unknown model profile: {self._default_profile}. "
+                    f"Available profiles: {', '.join(MODEL_PROFILES)}"
+                )
+            if self._default_lang not in SUPPORTED_LANGUAGES:
+                raise ValueError(
+                    f"Unsupported recognition language: {self._default_lang}"
+                )
+
+            # Map settings and GPU configuration onto RapidOCR parameters
+            self._providers = resolve_providers(self._gpu_config)
+            self._engine_params = build_engine_params(self._providers)
+
+            # Initialize the pool of RapidOCR engines for the default language
+            # and profile; it stays loaded while other engines come and go
+            self._rss_before_build = get_process_rss()
+            start_time = time.time()
+            self._pool, self._model_cache_info = self._create_pool(self.default_key)
+            self._build_duration = time.time() - start_time
+            self._registry.register(
+                self.default_key,
+                self._pool,
+                load_duration=self._build_duration,
+                info={"model_cache": self._model_cache_info},
+                pinned=True,
+            )
+            self._size_scheduler(self._pool)
 
             self.log_info(
                 "OCR engine initialized",
                 gpu_config=self._gpu_config,
-                providers=settings.ocr_providers,
+                providers=self._providers,
+                lang=self._default_lang,
+                model_profile=self._default_profile,
+                pool_size=self._pool.size,
+                build_duration=self._build_duration,
+                model_cache=self._model_cache_info["status"],
             )
 
         except Exception as e:
             self.log_error("Failed to initialize OCR engine", error=str(e))
             raise
 
-    def is_gpu_enabled(self) -> bool:
-        """Check if GPU acceleration is enabled."""
-        return self._gpu_config.get("use_cuda", False) or self._gpu_config.get(
-            "use_opencl", False
+    def _create_pool(self, key: EngineKey) -> tuple[EnginePool, dict[str, Any]]:
+        """
+        Create a pool of RapidOCR engines for a language and model profile.
+
+        Returns:
+            The pool, and how the model cache served its models
+        """
+        ocr_params, cache_info = self._pool_params(key)
+        name = ":".join(key)
+        placements = cpu_placement.plan(self._pool_size, name=name)
+        if placements:
+            # Size each engine's intra-op threads to its worker's core set
+            ocr_params[INTRA_OP_THREADS_KEY] = cpu_placement.intra_op_threads(
+                placements, ocr_params[INTRA_OP_THREADS_KEY]
+            )
+        pool = EnginePool(
+            self._pool_size,
+            lambda: RapidOCR(params=ocr_params),
+            warmup=self._warm_engine if settings.warmup_enabled else None,
+            placements=placements,
+            name=name,
         )
+        return pool, cache_info
+
+    def _pool_params(self, key: EngineKey) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Get RapidOCR parameters for a language and model profile."""
+        lang, profile = key
+        base_params = {**self._engine_params, **language_params(lang)}
+        if profile == FAST_PROFILE:
+            cached, cache_info = self._quantized_model_params(base_params)
+        else:
+            # Load optimized models from the persisted cache when available
+            cached, cache_info = self._resolve_cached_models(base_params)
+        return {**base_params, **cached}, cache_info
+
+    async def _load_engine(self, key: EngineKey) -> tuple[EnginePool, dict[str, Any]]:
+        """Build and warm a pool on demand for the engine registry."""
+        pool, cache_info = await asyncio.to_thread(self._create_pool, key)
+        self._size_scheduler(pool)
+        if settings.warmup_enabled:
+            await pool.run_on_all(self._warm_engine)
+        if cache_info["status"] == "miss":
+            await asyncio.to_thread(self._populate_model_cache, pool, cache_info)
+        return pool, {"model_cache": cache_info}
+
+    def _get_model_cache(self) -> ModelCache:
+        """Get the model cache, opening its directory on first use."""
+        if self._model_cache is None:
+            self._model_cache = ModelCache(
+                settings.model_cache_dir,
+                GRAPH_OPTIMIZATION_LEVELS[settings.ocr_graph_optimization_level],
+            )
+        return self._model_cache
 
-    async def process_image(
-        self, file_path: Path, file_uuid: str, original_filename: str
-    ) -> OCRResult:
+    def _resolve_cached_models(
+        self, ocr_params: dict[str, Any]
+    ) -> tuple[dict[str, str], dict[str, Any]]:
+        """Look up optimized model paths for this configuration in the model cache."""
+        if not settings.model_cache_enabled:
+            return {}, {"status": "disabled", "key": None}
+
+        try:
+            cache = self._get_model_cache()
+            key = cache.config_key(ocr_params, self._providers[0])
+            cached = cache.lookup(key)
+        except Exception as e:
+            self.log_warning("Model cache unavailable", error=str(e))
+            self._model_cache = None
+            return {}, {"status": "disabled", "key": None}
+
+        return cached or {}, {"status": "hit" if cached else "miss", "key": key}
+
+    def _populate_model_cache(
+        self, pool: EnginePool, cache_info: dict[str, Any]
+    ) -> bool:
+        """Persist the optimized models a pool loaded after a cache miss."""
+        if self._model_cache is None or cache_info["key"] is None:
+            return False
+        try:
+            model_paths = loaded_model_paths(pool.workers[0].engine)
+            if model_paths:
+                self._model_cache.populate(
+                    cache_info["key"], model_paths, self._providers[0]
+                )
+                return True
+        except Exception as e:
+            self.log_warning("Failed to populate model cache", error=str(e))
+        return False
+
+    def _quantized_model_params(
+        self, ocr_params: dict[str, Any]
+    ) -> tuple[dict[str, str], dict[str, Any]]:
         """
-        Process a single image file and extract text.
+        Get model path parameters of INT8-quantized copies of the configured models.
+
+        Quantized models are kept in the model cache directory. On a miss the
+        full-precision models are loaded once to find the files RapidOCR
+        resolved for this configuration, and each one is quantized.
+        """
+        if not quantization_available():
+            raise RuntimeError(
+                "The fast model profile requires the 'onnx' package "
+                "(install the 'quantization' extra)"
+            )
+        if self.is_gpu_enabled():
+            self.log_warning(
+                "INT8 models target CPU inference and may run slower on GPU providers",
+                providers=self._providers,
+            )
+
+        cache = self._get_model_cache()
+        key = cache.config_key(
+            {**ocr_params, "profile": FAST_PROFILE}, self._providers[0]
+        )
+        cached = cache.lookup(key)
+        status = "hit"
+
+        if cached is None:
+            start_time = time.time()
+            probe = RapidOCR(params=ocr_params)
+            warm_engine(probe, [make_synthetic_image(320)])
+            cache.populate(
+                key, loaded_model_paths(probe), self._providers[0], quantize=True
+            )
+            cached = cache.lookup(key) or {}
+            status = "quantized"
+            self.log_info(
+                "Quantized models for the fast profile",
+                models=cached,
+                duration=time.time() - start_time,
+            )
+
+        return cached, {"status": status, "key": key, "quantized": True}
+
+    @property
+    def default_profile(self) -> str:
+        """Model profile used when a request does not select one."""
+        return self._default_profile
+
+    @property
+    def default_lang(self) -> str:
+        """Recognition language used when a request does not select one."""
+        return self._default_lang
+
+    @property
+    def default_key(self) -> EngineKey:
+        """Registry key of the engine loaded at startup."""
+        return (self._default_lang, self._default_profile)
+
+    def get_available_profiles(self) -> list[str]:
+        """Get the model profiles that can be selected in this deployment."""
+        return [
+            profile
+            for profile in MODEL_PROFILES
+            if profile != FAST_PROFILE or quantization_available()
+        ]
+
+    def get_supported_languages(self) -> list[str]:
+        """Get the recognition languages requests can select."""
+        return list(SUPPORTED_LANGUAGES)
+
+    async def _get_pool(
+        self, lang: str | None = None, profile: str | None = None
+    ) -> EnginePool:
+        """Get the engine pool for a language and profile, loading it on demand."""
+        if self._pool is None:
+            raise RuntimeError("OCR engine not initialized")
+
+        key = (lang or self._default_lang, profile or self._default_profile)
+        if key[0] not in SUPPORTED_LANGUAGES:
+            raise ValueError(f"Unsupported recognition language: {key[0]}")
+        if key[1] not in MODEL_PROFILES:
+            raise ValueError(f"Unknown model profile: {key[1]}")
+        return await self._registry.get(key)
+
+    async def _run_engine[T](
+        self, pool: EnginePool, func: Callable[[Any], T], cost: float = 1.0
+    ) -> T:
+        """
+        Run ``func(engine)`` on a pool once the scheduler grants a slot.
+
+        ``cost`` is the call's estimated cost in megapixel units, which the
+        scheduler charges to the tenant's fair share. Each pool has its own
+        slots, so calls to other languages and profiles do not compete with
+        the default engine for them.
+        """
+        if not settings.scheduler_enabled:
+            return await pool.run(func)
+        async with scheduler.slot(cost=cost, pool=pool.name):
+            return await pool.run(func)
+
+    def _size_scheduler(self, pool: EnginePool) -> None:
+        """Give the scheduler one slot per engine of a pool unless configured."""
+        if not settings.scheduler_concurrency:
+            scheduler.resize(pool.size, pool=pool.name)
+
+    def complete_startup(self, warmup_duration: float) -> None:
+        """
+        Persist optimized models after a cache miss and report startup timings.
 
         Args:
-            file_path: Path to the image file
-            file_uuid: UUID assigned to this file
-            original_filename: Original filename of the uploaded file
+            warmup_duration: Time spent warming up the pool engines
+        """
+        startup_duration = self._build_duration + warmup_duration
+        cold_start_duration = None
+
+        # Models load lazily, so the default engine's footprint is known only now
+        self._registry.set_memory(
+            self.default_key, get_process_rss() - self._rss_before_build
+        )
+
+        cache, key = self._model_cache, self._model_cache_info["key"]
+        if cache is not None and key is not None and self._pool is not None:
+            if self._model_cache_info["status"] == "miss":
+                if self._populate_model_cache(self._pool, self._model_cache_info):
+                    cache.record_cold_start(key, startup_duration)
+            cold_start_duration = cache.get_cold_start(key)
+
+        self._startup_info = {
+            "startup_duration": startup_duration,
+            "build_duration": self._build_duration,
+            "warmup_duration": warmup_duration,
+            "cold_start_duration": cold_start_duration,
+        }
+        self.log_info(
+            "OCR engine startup completed",
+            model_cache=self._model_cache_info["status"],
+            **self._startup_info,
+        )
+
+    async def autotune(self) -> dict[str, Any]:
+        """
+        Rebuild the default pool with the host's best pool size and threads.
+
+        The decision comes from the autotune cache, or from benchmarking the
+        candidates on synthetic images on the first start with this host and
+        configuration. Pools loaded later use the same pool size and threads.
 
         Returns:
-            OCRResult: Contains extracted text and metadata
+            The tuning decision
         """
-        start_time = time.time()
+        if self._pool is None:
+            raise RuntimeError("OCR engine not initialized")
+
+        ocr_params, _ = self._pool_params(self.default_key)
+        # The tuned setting itself must not change which decision applies
+        identity = {
+            name: value
+            for name, value in self._engine_params.items()
+            if name != INTRA_OP_THREADS_KEY
+        }
 
-        try:
+        def engine_factory(threads: int) -> Any:
+            return RapidOCR(params={**ocr_params, INTRA_OP_THREADS_KEY: threads})
+
+        decision = await asyncio.to_thread(
+            autotuner.tune,
+            self._providers,
+            engine_factory,
+            make_synthetic_image,
+            engine_params=describe_params(identity),
+            lang=self._default_lang,
+            model_profile=self._default_profile,
+        )
+
+        if (
+            decision["pool_size"] != self._pool.size
+            or decision["intra_op_threads"] != self._engine_params[INTRA_OP_THREADS_KEY]
+        ):
+            self._pool_size = decision["pool_size"]
+            self._engine_params[INTRA_OP_THREADS_KEY] = decision["intra_op_threads"]
+            # Measure only the rebuilt pool, not the benchmark engines before it
+            self._rss_before_build = get_process_rss()
+            start_time = time.time()
+            pool, self._model_cache_info = await asyncio.to_thread(
+                self._create_pool, self.default_key
+            )
+            self._pool = pool
+            self._build_duration += time.time() - start_time
+            self._registry.register(
+                self.default_key,
+                pool,
+                load_duration=self._build_duration,
+                info={"model_cache": self._model_cache_info},
+                pinned=True,
+            )
+            self._size_scheduler(pool)
             self.log_info(
-                "Starting OCR processing",
-                file_uuid=file_uuid,
-                filename=original_filename,
-                file_path=str(file_path),
+                "OCR engine pool rebuilt with autotune decision",
+                pool_size=pool.size,
+                intra_op_threads=decision["intra_op_threads"],
             )
+        return decision
 
-            # Perform OCR
-            if self._ocr_engine is None:
-                raise RuntimeError("OCR engine not initialized")
-            result = self._ocr_engine(str(file_path))
+    def _warm_engine(self, engine: Any) -> None:
+        """Run the synthetic warmup images through a single engine."""
+        warm_engine(engine, self._warmup_images)
 
-            # Extract text from result
-            # RapidOCR now returns a RapidOCROutput object with txts attribute
-            extracted_text = ""
+    async def warmup(self) -> float:
+        """
+        Prime every pool engine with synthetic images at representative sizes.
 
-            if result and hasattr(result, 'txts') and result.txts:
-                # result.txts contains the extracted text lines as tuple
-                text_lines = [str(text).strip() for text in result.txts if text]
-                extracted_text = "\n".join(text_lines)
+        Pays for ONNX graph optimization, memory arena growth and kernel
+        selection up front instead of on the first real requests.
 
-            processing_time = time.time() - start_time
+        Returns:
+            float: Warmup duration in seconds
+        """
+        if self._pool is None:
+            raise RuntimeError("OCR engine not initialized")
 
-            self.log_info(
-                "OCR processing completed",
-                file_uuid=file_uuid,
-                filename=original_filename,
-                processing_time=processing_time,
-                text_length=len(extracted_text),
-                gpu_used=self.is_gpu_enabled(),
-            )
+        start_time = time.time()
+        self.log_info(
+            "Starting OCR engine warmup",
+            pool_size=self._pool.size,
+            sizes=settings.warmup_sizes,
+        )
 
-            return OCRResult(
-                FileName=original_filename,
-                UUID=file_uuid,
-                Context=extracted_text or "No text detected",
-            )
+        await self._pool.run_on_all(self._warm_engine)
 
-        except Exception as e:
-            processing_time = time.time() - start_time
-
-            self.log_error(
-                "OCR processing failed",
-                file_uuid=file_uuid,
-                filename=original_filename,
-                processing_time=processing_time,
-                error=str(e),
-            )
+        duration = time.time() - start_time
+        self.log_info("OCR engine warmup completed", duration=duration)
+        return duration
 
-            # Return error result instead of raising
-            return OCRResult(
-                FileName=original_filename,
-                UUID=file_uuid,
-                Context=f"OCR processing failed: {str(e)}",
+    def is_gpu_enabled(self) -> bool:
+        """Check if the engine runs on a GPU execution provider."""
+        return self._providers[0] != CPU_PROVIDER
+
+    async def process_image(
+        self,
+        source: Path | bytes,
+        file_uuid: str,
+        original_filename: str,
+        profile: str | None = None,
+        lang: str | None = None,
+        options: OCROptions | None = None,
+    ) -> OCRResult:
+        """
+        Process a single image file and extract text.
+
+        Args:
+            source: Path to the image file, or its encoded content
+            file_uuid: UUID assigned to this file
+            original_filename: Original filename of the uploaded file
+            profile: Model profile to use (None=configured default)
+            lang: Recognition language to use (None=configured default)
+            options: Pipeline options (None=RapidOCR defaults)
+
+        Returns:
+            OCRResult: Contains extracted text and metadata
+        """
+        with tracer.span(
+            "ocr.image", file_uuid=file_uuid, filename=original_filename
+        ) as span:
+            start_time = time.time()
+            cost = None
+
+            try:
+                self.log_info(
+                    "Starting OCR processing",
+                    file_uuid=file_uuid,
+                    filename=original_filename,
+                    source=str(source) if isinstance(source, Path) else len(source),
+                    lang=lang or self._default_lang,
+                    model_profile=profile or self._default_profile,
+                )
+
+                options = options or OCROptions()
+                cost = estimate_cost(source, options.max_side_len)
+                units = cost.units if cost is not None else 1.0
+
+                # Serve re-scans of recently processed images from the cache; it
+                # only keeps text, so requests for line details bypass it
+                near_duplicates = (
+                    self._near_duplicates
+                    if options.dedup is not False and not options.include_lines
+                    else None
+                )
+                fingerprint = None
+                namespace = "|".join(
+                    (
+                        lang or self._default_lang,
+                        profile or self._default_profile,
+                        options.model_dump_json(exclude={"dedup"}),
+                    )
+                )
+                if near_duplicates is not None:
+                    try:
+                        with tracer.span("near_duplicate.fingerprint"):
+                            fingerprint = await asyncio.to_thread(
+                                image_fingerprint, open_source(source)
+                            )
+                    except Exception as e:
+                        self.log_warning(
+                            "Failed to fingerprint image",
+                            file_uuid=file_uuid,
+                            error=str(e),
+                        )
+                    else:
+                        match = near_duplicates.lookup(namespace, fingerprint)
+                        if match is not None:
+                            cached, distance = match
+                            metrics.increment("near_duplicate_hits")
+                            self.log_info(
+                                "Served near-duplicate OCR result",
+                                file_uuid=file_uuid,
+                                filename=original_filename,
+                                source_uuid=cached.source_uuid,
+                                distance=distance,
+                            )
+                            return OCRResult(
+                                FileName=original_filename,
+                                UUID=file_uuid,
+                                Context=cached.text,
+                                Duplicate=DuplicateInfo(
+                                    source_uuid=cached.source_uuid,
+                                    distance=distance,
+                                    similarity=1 - distance / HASH_BITS,
+                                ),
+                                Cost=cost,
+                            )
+
+                # Perform OCR
+                pool = await self._get_pool(lang, profile)
+                engine_kwargs = options.engine_kwargs()
+
+                use_cascade = (
+                    settings.ocr_cascade_enabled
+                    if options.cascade is None
+                    else options.cascade
+                )
+                cascade_info = None
+                line_results = None
+
+                if use_cascade:
+                    with tracer.span("ocr.cascade"):
+                        lines, cascade_info = await self._run_engine(
+                            pool,
+                            lambda engine: run_cascade(
+                                engine,
+                                load_image(open_source(source), options.max_side_len),
+                                engine_kwargs,
+                                settings.ocr_cascade_max_side_len,
+                                settings.ocr_cascade_min_score,
+                                settings.ocr_cascade_min_text_height,
+                                settings.ocr_cascade_box_thresh,
+                            ),
+                            units,
+                        )
+                    metrics.observe("cascade_coarse", cascade_info.coarse_time)
+                    metrics.observe("cascade_refine", cascade_info.refine_time)
+                    metrics.increment("cascade_regions", cascade_info.regions)
+                    metrics.increment(
+                        "cascade_regions_refined", cascade_info.refined_regions
+                    )
+                else:
+
+                    def recognize(engine: Any) -> tuple[Any, float]:
+                        tracer.record_span("engine.wait", queued_at, time.time_ns())
+                        # RapidOCR decodes paths and encoded bytes itself
+                        image: Any = (
+                            source if isinstance(source, bytes) else str(source)
+                        )
+                        scale = 1.0
+                        if options.max_side_len is not None:
+                            with tracer.span("image.decode"):
+                                image = load_image(
+                                    open_source(source), options.max_side_len
+                                )
+                                # Report boxes in the coordinates of the upload
+                                original = image_size(open_source(source))
+                                scale = max(original) / max(image.size)
+                        with tracer.span("ocr.engine"):
+                            result = engine(image, **engine_kwargs)
+                            record_stage_spans(result)
+                        return result, scale
+
+                    queued_at = time.time_ns()
+                    result, scale = await self._run_engine(pool, recognize, units)
+
+                    # RapidOCR returns a RapidOCROutput object with txts attribute
+                    lines = []
+                    if result and hasattr(result, "txts") and result.txts:
+                        lines = [str(text) for text in result.txts]
+                    if options.include_lines:
+                        line_results = self._line_results(result, scale)
+
+                # Extract text from the recognized lines
+                text_lines = [line.strip() for line in lines if line]
+                extracted_text = "\n".join(text_lines)
+
+                processing_time = time.time() - start_time
+
+                self.log_info(
+                    "OCR processing completed",
+                    file_uuid=file_uuid,
+                    filename=original_filename,
+                    processing_time=processing_time,
+                    text_length=len(extracted_text),
+                    gpu_used=self.is_gpu_enabled(),
+                    cascade=cascade_info.model_dump() if cascade_info else None,
+                )
+
+                context = extracted_text or "No text detected"
+                if near_duplicates is not None and fingerprint is not None:
+                    near_duplicates.insert(namespace, fingerprint, context, file_uuid)
+
+                return OCRResult(
+                    FileName=original_filename,
+                    UUID=file_uuid,
+                    Context=context,
+                    Cascade=cascade_info,
+                    Lines=line_results,
+                    Cost=cost,
+                )
+
+            except Exception as e:
+                processing_time = time.time() - start_time
+                if span is not None:
+                    span.error = f"{type(e).__name__}: {e}"
+
+                self.log_error(
+                    "OCR processing failed",
+                    file_uuid=file_uuid,
+                    filename=original_filename,
+                    processing_time=processing_time,
+                    error=str(e),
+                )
+
+                # Return error result instead of raising
+                return OCRResult(
+                    FileName=original_filename,
+                    UUID=file_uuid,
+                    Context=f"OCR processing failed: {str(e)}",
+                    Cost=cost,
+                )
+
+    @staticmethod
+    def _line_results(result: Any, scale: float) -> list[TextLineResult]:
+        """Get per-line text, confidence and box from a RapidOCR result."""
+        boxes = getattr(result, "boxes", None)
+        if boxes is None or not result.txts:
+            return []
+        return [
+            TextLineResult(
+                text=str(text),
+                score=float(score),
+                box=[[float(x) * scale, float(y) * scale] for x, y in box],
             )
+            for box, text, score in zip(boxes, result.txts, result.scores, strict=True)
+        ]
 
     async def process_multiple_images(
-        self, file_info_list: list[tuple[str, Path, str]]
+        self,
+        file_info_list: list[tuple[str, Path, str]],
+        profile: str | None = None,
+        lang: str | None = None,
+        options: OCROptions | None = None,
     ) -> list[OCRResult]:
         """
         Process multiple image files.
 
         Args:
             file_info_list: List of (uuid, file_path, original_filename) tuples
+            profile: Model profile to use (None=configured default)
+            lang: Recognition language to use (None=configured default)
+            options: Pipeline options (None=RapidOCR defaults)
 
         Returns:
             List[OCRResult]: Results for all processed images
@@ -157,7 +725,9 @@ class OCRService(LoggingMixin):
         )
 
         for file_uuid, file_path, original_filename in file_info_list:
-            result = await self.process_image(file_path, file_uuid, original_filename)
+            result = await self.process_image(
+                file_path, file_uuid, original_filename, profile, lang, options
+            )
             results.append(result)
 
         total_time = time.time() - start_time
@@ -171,13 +741,177 @@ class OCRService(LoggingMixin):
 
         return results
 
+    def create_sequence(self) -> FrameSequence:
+        """Create the state for a new frame sequence with the configured thresholds."""
+        return FrameSequence(
+            pixel_threshold=settings.sequence_pixel_threshold,
+            full_refresh_ratio=settings.sequence_full_refresh_ratio,
+            keyframe_interval=settings.sequence_keyframe_interval,
+        )
+
+    async def process_frame(
+        self,
+        sequence: FrameSequence,
+        frame: int,
+        content: bytes,
+        original_filename: str,
+        profile: str | None = None,
+        lang: str | None = None,
+        options: OCROptions | None = None,
+    ) -> FrameDelta:
+        """
+        Process the next frame of a sequence, recognizing only what changed.
+
+        Args:
+            sequence: State carried over from the previous frames
+            frame: Index of the frame in the sequence
+            content: Encoded image of the frame
+            original_filename: Original filename of the frame
+            profile: Model profile to use (None=configured default)
+            lang: Recognition language to use (None=configured default)
+            options: Pipeline options (None=RapidOCR defaults)
+
+        Returns:
+            FrameDelta: Lines added and removed since the previous frame
+        """
+        with tracer.span("ocr.frame", frame=frame, filename=original_filename) as span:
+            start_time = time.time()
+            options = options or OCROptions()
+            engine_kwargs = options.engine_kwargs()
+
+            try:
+                with tracer.span("image.decode"):
+                    image = await asyncio.to_thread(
+                        load_image, open_source(content), options.max_side_len
+                    )
+                plan = await asyncio.to_thread(sequence.plan, image)
+
+                if plan.mode == "unchanged":
+                    added, removed = sequence.apply(None, image, plan, engine_kwargs)
+                else:
+                    pool = await self._get_pool(lang, profile)
+                    cost = cost_units(*image.size)
+                    if plan.mode == "partial":
+                        # Only the changed regions are recognized again
+                        cost = max(settings.cost_min_units, cost * plan.changed_ratio)
+
+                    def recognize(engine: Any) -> tuple[list[str], list[str]]:
+                        tracer.record_span("engine.wait", queued_at, time.time_ns())
+                        with tracer.span("ocr.engine"):
+                            return sequence.apply(engine, image, plan, engine_kwargs)
+
+                    queued_at = time.time_ns()
+                    added, removed = await self._run_engine(pool, recognize, cost)
+
+                processing_time = time.time() - start_time
+                if span is not None:
+                    span.set_attribute("mode", plan.mode)
+                metrics.increment(f"sequence_frames_{plan.mode}")
+                metrics.observe("sequence_frame", processing_time)
+
+                self.log_debug(
+                    "Sequence frame processed",
+                    frame=frame,
+                    filename=original_filename,
+                    mode=plan.mode,
+                    changed_ratio=plan.changed_ratio,
+                    regions=len(plan.regions),
+                    processing_time=processing_time,
+                )
+
+                return FrameDelta(
+                    frame=frame,
+                    FileName=original_filename,
+                    mode=plan.mode,
+                    changed_ratio=plan.changed_ratio,
+                    regions=len(plan.regions),
+                    added=added,
+                    removed=removed,
+                    line_count=len(sequence.lines),
+                    processing_time=processing_time,
+                )
+
+            except Exception as e:
+                processing_time = time.time() - start_time
+                if span is not None:
+                    span.error = f"{type(e).__name__}: {e}"
+                metrics.increment("sequence_frames_error")
+
+                self.log_error(
+                    "Sequence frame processing failed",
+                    frame=frame,
+                    filename=original_filename,
+                    processing_time=processing_time,
+                    error=str(e),
+                )
+
+                return FrameDelta(
+                    frame=frame,
+                    FileName=original_filename,
+                    mode="error",
+                    changed_ratio=0.0,
+                    regions=0,
+                    added=[],
+                    removed=[],
+                    line_count=len(sequence.lines),
+                    processing_time=processing_time,
+                    error=str(e),
+                )
+
+    def get_load(self) -> dict[str, Any]:
+        """Get constant-time engine availability and queue depth for probes."""
+        if self._pool is None:
+            return {
+                "engine_initialized": False,
+                "available_workers": 0,
+                "in_use": 0,
+                "queue_depth": 0,
+            }
+        pools = self._registry.pools
+        return {
+            "engine_initialized": True,
+            "available_workers": sum(pool.available for pool in pools),
+            "in_use": sum(pool.in_use for pool in pools),
+            "queue_depth": (
+                sum(pool.queue_depth for pool in pools) + scheduler.queue_depth
+            ),
+        }
+
     def get_engine_info(self) -> dict[str, Any]:
         """Get information about the OCR engine for health checks."""
         return {
-            "engine_initialized": self._ocr_engine is not None,
+            "engine_initialized": self._pool is not None,
             "gpu_config": self._gpu_config,
             "gpu_enabled": self.is_gpu_enabled(),
-            "providers": settings.ocr_providers,
+            "providers": self._providers,
+            "engine_config": {
+                "params": describe_params(self._engine_params),
+                "session_providers": (
+                    session_providers(self._pool.workers[0].engine)
+                    if self._pool is not None
+                    else {}
+                ),
+            },
+            "pool": self._pool.get_stats() if self._pool is not None else None,
+            "profiles": {
+                "default": self._default_profile,
+                "available": self.get_available_profiles(),
+            },
+            "languages": {
+                "default": self._default_lang,
+                "supported": self.get_supported_languages(),
+            },
+            "registry": self._registry.get_stats(),
+            "near_duplicate_cache": (
+                self._near_duplicates.get_stats()
+                if self._near_duplicates is not None
+                else None
+            ),
+            "model_cache": {
+                **self._model_cache_info,
+                "path": str(settings.model_cache_dir),
+            },
+            "startup": self._startup_info,
         }
 
 
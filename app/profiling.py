@@ -0,0 +1,301 @@
+"""On-demand profiling of the OCR engine hot path in the live process."""
+
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import FrameType
+from typing import Any, TypeVar
+
+from .logging_config import LoggingMixin
+
+T = TypeVar("T")
+
+# How often a running session checks whether it is complete
+POLL_INTERVAL = 0.05
+
+# Functions listed in text reports of cProfile sessions
+TEXT_REPORT_LIMIT = 60
+
+
+def frame_label(frame: FrameType) -> str:
+    """Get a collapsed-stack label for a frame: ``qualname (file:line)``."""
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: FrameType | None) -> str:
+    """Get a stack as ``root;...;leaf`` for flamegraph tools."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession(ABC):
+    """A bounded recording; subclasses wrap each hot-path call."""
+
+    mode = ""
+    formats: tuple[str, ...] = ()
+
+    def __init__(self, duration: float, max_calls: int | None) -> None:
+        self.duration = duration
+        self.max_calls = max_calls
+        self.calls = 0
+        self.started_at = time.time()
+        self.stopped_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        """Whether the duration or call budget is used up."""
+        if self.max_calls is not None and self.calls >= self.max_calls:
+            return True
+        return time.time() - self.started_at >= self.duration
+
+    def start(self) -> None:  # noqa: B027 - optional hook
+        """Begin recording; a no-op for sessions that record only in calls."""
+
+    def stop(self) -> None:
+        """End recording."""
+        self.stopped_at = time.time()
+
+    @abstractmethod
+    def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a hot-path call while recording it."""
+
+    def _count_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    @abstractmethod
+    def render(self, output_format: str) -> tuple[bytes, str]:
+        """Get the recorded profile and its media type."""
+
+
+class CProfileSession(ProfileSession):
+    """Deterministic profile of hot-path calls across threads.
+
+    cProfile runs on ``sys.monitoring``, which allows one profiler per
+    interpreter and records every thread. The session therefore shares one
+    profiler, enabled while at least one hot-path call runs and disabled
+    when the last of them returns. Calls that cannot enable it because
+    another profiling tool is active run unprofiled.
+    """
+
+    mode = "cprofile"
+    formats = ("pstats", "text")
+
+    def __init__(self, duration: float, max_calls: int | None) -> None:
+        super().__init__(duration, max_calls)
+        self.unprofiled_calls = 0
+        self._profiler = cProfile.Profile()
+        self._running = 0
+
+    def stop(self) -> None:
+        """End recording, even if hot-path calls are still running."""
+        with self._lock:
+            super().stop()
+            if self._running:
+                self._profiler.disable()
+
+    def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a call with the session's profiler enabled."""
+        if not self._enter():
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            self._exit()
+
+    def _enter(self) -> bool:
+        """Enable the profiler for a call; False if the call runs unprofiled."""
+        with self._lock:
+            if self.stopped_at is not None:
+                return False
+            if self._running == 0:
+                try:
+                    self._profiler.enable()
+                except ValueError:
+                    # Another profiler or debugger owns the profiling slot
+                    self.unprofiled_calls += 1
+                    return False
+            self._running += 1
+            return True
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._running -= 1
+            if self.stopped_at is None:
+                self.calls += 1
+                if self._running == 0:
+                    self._profiler.disable()
+
+    def render(self, output_format: str) -> tuple[bytes, str]:
+        """Get the profile as a ``pstats`` dump or a text report."""
+        with self._lock:
+            stats = pstats.Stats(self._profiler) if self.calls else None
+        if output_format == "pstats":
+            # Same layout as Stats.dump_stats, loadable with pstats/snakeviz
+            data = stats.stats if stats is not None else {}  # type: ignore[attr-defined]
+            return marshal.dumps(data), "application/octet-stream"
+
+        report = io.StringIO()
+        if self.unprofiled_calls:
+            report.write(
+                f"{self.unprofiled_calls} calls ran unprofiled because another "
+                "profiling tool was active\n"
+            )
+        if stats is None:
+            report.write("No calls were profiled\n")
+        else:
+            stats.stream = report  # type: ignore[attr-defined]
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TEXT_REPORT_LIMIT)
+        return report.getvalue().encode(), "text/plain; charset=utf-8"
+
+
+class SamplingSession(ProfileSession):
+    """Statistical profile from periodic stack samples of hot-path threads.
+
+    A sampler thread reads the stacks of threads that are inside a hot-path
+    call every ``interval`` seconds, so the overhead does not depend on how
+    many Python calls the OCR pipeline makes.
+    """
+
+    mode = "sampling"
+    formats = ("collapsed",)
+
+    def __init__(self, duration: float, max_calls: int | None, interval: float) -> None:
+        super().__init__(duration, max_calls)
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._active: dict[int, str] = {}
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the sampler thread."""
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="profile-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampler thread."""
+        super().stop()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a call with its thread registered for sampling."""
+        thread = threading.current_thread()
+        self._active[thread.ident or 0] = thread.name
+        try:
+            return func(*args)
+        finally:
+            self._active.pop(thread.ident or 0, None)
+            self._count_call()
+
+    def _sample_loop(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, name in active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self._stacks[f"{name};{collapse_stack(frame)}"] += 1
+                        self.samples += 1
+
+    def render(self, output_format: str) -> tuple[bytes, str]:
+        """Get the samples as collapsed stacks (``stack count`` per line)."""
+        with self._lock:
+            lines = [f"{stack} {count}\n" for stack, count in self._stacks.items()]
+        return "".join(sorted(lines)).encode(), "text/plain; charset=utf-8"
+
+
+class Profiler(LoggingMixin):
+    """Runs at most one profiling session over the OCR engine hot path.
+
+    Engine pools pass every call through :meth:`call`. While no session is
+    active this costs a single attribute check, so the hooks can stay in
+    place in production.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._session: ProfileSession | None = None
+        self._sessions = 0
+
+    @property
+    def active(self) -> bool:
+        """Whether a session is recording."""
+        return self._session is not None
+
+    def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a hot-path call, recording it if a session is active."""
+        session = self._session
+        if session is None:
+            return func(*args)
+        return session.call(func, *args)
+
+    async def record(self, session: ProfileSession) -> ProfileSession:
+        """
+        Record a session until its duration or call budget is used up.
+
+        Raises:
+            RuntimeError: If another session is already recording
+        """
+        if self._session is not None:
+            raise RuntimeError("A profiling session is already running")
+
+        self._sessions += 1
+        self.log_info(
+            "Profiling started",
+            mode=session.mode,
+            duration=session.duration,
+            max_calls=session.max_calls,
+        )
+        session.start()
+        self._session = session
+        try:
+            while not session.complete:
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            self._session = None
+            session.stop()
+
+        self.log_info(
+            "Profiling finished",
+            mode=session.mode,
+            calls=session.calls,
+            elapsed=(session.stopped_at or time.time()) - session.started_at,
+        )
+        return session
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get the current session for the stats endpoint."""
+        session = self._session
+        return {
+            "active": session is not None,
+            "mode": session.mode if session else None,
+            "calls": session.calls if session else 0,
+            "sessions": self._sessions,
+        }
+
+
+# Global profiler instance
+profiler = Profiler()
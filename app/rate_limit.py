@@ -0,0 +1,399 @@
+"""Per-client token-bucket rate limits on requests and image megapixels.
+
+Each client, identified like scheduler tenants by API key or client IP, has
+one bucket per limited quantity. A bucket holds up to ``burst`` tokens and
+refills at ``rate`` tokens per second. A request is admitted only if every
+bucket can pay for it. Requests count one token each, and images count
+their megapixels because engine time grows with pixel count.
+
+A request larger than a bucket's burst is admitted once the bucket is full
+and drives it into debt, so the next request waits for the actual cost to
+be paid back instead of the request being rejected forever.
+
+Buckets live in process memory by default. A SQLite store shares them
+between the worker processes of one host, and updates each client's buckets
+in a single write transaction.
+"""
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .config import settings
+from .logging_config import LoggingMixin
+from .metrics import metrics
+
+REQUESTS = "requests"
+MEGAPIXELS = "megapixels"
+
+
+class BucketLimit(NamedTuple):
+    """Refill rate per second and capacity of one kind of bucket."""
+
+    kind: str
+    rate: float
+    burst: float
+
+
+class BucketState(NamedTuple):
+    """Tokens in a bucket when it was last updated."""
+
+    tokens: float
+    updated: float
+
+
+class BucketStatus(NamedTuple):
+    """A bucket after a rate limit check, for response headers."""
+
+    limit: BucketLimit
+    remaining: float
+    reset_after: float
+
+
+class RateLimitDecision(NamedTuple):
+    """Whether a request was admitted and when to retry if not."""
+
+    allowed: bool
+    retry_after: float
+    limited_by: str | None
+    buckets: list[BucketStatus]
+
+
+def refill(state: BucketState | None, limit: BucketLimit, now: float) -> float:
+    """Get the tokens of a bucket at ``now``; new buckets start full."""
+    if state is None:
+        return limit.burst
+    elapsed = max(0.0, now - state.updated)
+    return min(limit.burst, state.tokens + elapsed * limit.rate)
+
+
+def evaluate(
+    states: dict[str, BucketState],
+    limits: list[BucketLimit],
+    costs: dict[str, float],
+    now: float,
+) -> tuple[RateLimitDecision, dict[str, BucketState]]:
+    """
+    Check a request's costs against a client's buckets.
+
+    Args:
+        states: Stored bucket states by kind
+        limits: Enforced buckets
+        costs: Tokens the request takes from each kind of bucket
+        now: Current time
+
+    Returns:
+        The decision, and the bucket states to store
+    """
+    tokens = {
+        limit.kind: refill(states.get(limit.kind), limit, now) for limit in limits
+    }
+
+    retry_after = 0.0
+    limited_by = None
+    for limit in limits:
+        # Costs above the burst are admitted from a full bucket
+        needed = min(costs.get(limit.kind, 0.0), limit.burst)
+        if tokens[limit.kind] < needed:
+            wait = (needed - tokens[limit.kind]) / limit.rate
+            if wait > retry_after:
+                retry_after, limited_by = wait, limit.kind
+
+    allowed = limited_by is None
+    if allowed:
+        for limit in limits:
+            tokens[limit.kind] -= costs.get(limit.kind, 0.0)
+
+    statuses = [
+        BucketStatus(
+            limit,
+            remaining=max(0.0, tokens[limit.kind]),
+            reset_after=(limit.burst - tokens[limit.kind]) / limit.rate,
+        )
+        for limit in limits
+    ]
+    new_states = {kind: BucketState(value, now) for kind, value in tokens.items()}
+    return RateLimitDecision(allowed, retry_after, limited_by, statuses), new_states
+
+
+class BucketStore(ABC):
+    """Keeps bucket states and applies checks to them atomically."""
+
+    name = ""
+
+    @abstractmethod
+    def check(
+        self,
+        client: str,
+        limits: list[BucketLimit],
+        costs: dict[str, float],
+        now: float,
+    ) -> RateLimitDecision:
+        """Check a request and take its tokens if it is admitted."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of clients with buckets."""
+
+
+class MemoryBucketStore(BucketStore):
+    """Buckets of this process, keeping the most recently seen clients."""
+
+    name = "memory"
+
+    def __init__(self, max_clients: int) -> None:
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, dict[str, BucketState]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(
+        self,
+        client: str,
+        limits: list[BucketLimit],
+        costs: dict[str, float],
+        now: float,
+    ) -> RateLimitDecision:
+        with self._lock:
+            decision, states = evaluate(
+                self._buckets.get(client, {}), limits, costs, now
+            )
+            self._buckets[client] = states
+            self._buckets.move_to_end(client)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return decision
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SqliteBucketStore(BucketStore):
+    """Buckets in a SQLite file shared by the worker processes of a host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "client TEXT NOT NULL, kind TEXT NOT NULL, "
+            "tokens REAL NOT NULL, updated REAL NOT NULL, "
+            "PRIMARY KEY (client, kind))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection; sqlite3 connections are per thread."""
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def check(
+        self,
+        client: str,
+        limits: list[BucketLimit],
+        costs: dict[str, float],
+        now: float,
+    ) -> RateLimitDecision:
+        connection = self._connect()
+        # Take the write lock first so concurrent workers see each other's debits
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT kind, tokens, updated FROM buckets WHERE client = ?",
+                (client,),
+            ).fetchall()
+            states = {
+                kind: BucketState(tokens, updated) for kind, tokens, updated in rows
+            }
+            decision, new_states = evaluate(states, limits, costs, now)
+            connection.executemany(
+                "INSERT OR REPLACE INTO buckets (client, kind, tokens, updated) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (client, kind, state.tokens, state.updated)
+                    for kind, state in new_states.items()
+                ],
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return decision
+
+    def prune(self, now: float, limits: list[BucketLimit]) -> int:
+        """
+        Delete buckets that have refilled, and buckets of unenforced kinds.
+
+        A full bucket is indistinguishable from a missing one, while a
+        bucket still in debt must be kept until the debt is paid back.
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = connection.execute(
+                "DELETE FROM buckets WHERE kind NOT IN "
+                f"({', '.join('?' for _ in limits)})",
+                [limit.kind for limit in limits],
+            ).rowcount
+            for limit in limits:
+                deleted += connection.execute(
+                    "DELETE FROM buckets "
+                    "WHERE kind = ? AND tokens + (? - updated) * ? >= ?",
+                    (limit.kind, now, limit.rate, limit.burst),
+                ).rowcount
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return deleted
+
+    def __len__(self) -> int:
+        row = (
+            self._connect()
+            .execute("SELECT COUNT(DISTINCT client) FROM buckets")
+            .fetchone()
+        )
+        return int(row[0])
+
+
+class RateLimiter(LoggingMixin):
+    """Applies the configured request and megapixel limits per client."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        limits: list[BucketLimit],
+        store: BucketStore,
+    ) -> None:
+        super().__init__()
+        # A bucket with a rate of 0 is not enforced
+        self.limits = [limit for limit in limits if limit.rate > 0]
+        self.enabled = enabled and bool(self.limits)
+        self.store = store
+        self._checked = 0
+        self._limited: dict[str, int] = {limit.kind: 0 for limit in self.limits}
+        self._last_prune = time.time()
+
+    async def check(
+        self, client: str, requests: int = 1, megapixels: float = 0.0
+    ) -> RateLimitDecision:
+        """
+        Check a request against a client's buckets and take its tokens.
+
+        Args:
+            client: Client identifier
+            requests: Requests counted by this call
+            megapixels: Total megapixels of the request's images
+
+        Returns:
+            The decision and the state of each bucket
+        """
+        costs = {REQUESTS: float(requests), MEGAPIXELS: megapixels}
+        now = time.time()
+        if isinstance(self.store, SqliteBucketStore):
+            decision = await asyncio.to_thread(
+                self.store.check, client, self.limits, costs, now
+            )
+            await self._maybe_prune(now)
+        else:
+            decision = self.store.check(client, self.limits, costs, now)
+
+        self._checked += 1
+        if not decision.allowed and decision.limited_by is not None:
+            self._limited[decision.limited_by] += 1
+            metrics.increment("rate_limited_requests")
+            self.log_info(
+                "Rate limit exceeded",
+                client=client,
+                limited_by=decision.limited_by,
+                retry_after=decision.retry_after,
+            )
+        return decision
+
+    async def _maybe_prune(self, now: float) -> None:
+        """Occasionally drop refilled buckets from the shared store."""
+        if now - self._last_prune < 60 or not isinstance(self.store, SqliteBucketStore):
+            return
+        self._last_prune = now
+        try:
+            await asyncio.to_thread(self.store.prune, now, self.limits)
+        except sqlite3.Error as e:
+            self.log_warning("Failed to prune rate limit store", error=str(e))
+
+    async def get_stats(self) -> dict[str, Any]:
+        """Get limits and rejection counters for the stats endpoint."""
+        clients = 0
+        if self.enabled:
+            # Counting clients of the shared store is a query; keep it off the loop
+            if isinstance(self.store, SqliteBucketStore):
+                clients = await asyncio.to_thread(len, self.store)
+            else:
+                clients = len(self.store)
+        return {
+            "enabled": self.enabled,
+            "store": self.store.name,
+            "limits": {
+                limit.kind: {"rate": limit.rate, "burst": limit.burst}
+                for limit in self.limits
+            },
+            "clients": clients,
+            "checked": self._checked,
+            "limited": dict(self._limited),
+        }
+
+
+def rate_limit_headers(decision: RateLimitDecision) -> dict[str, str]:
+    """
+    Get response headers describing a client's buckets.
+
+    Each bucket reports its capacity, the tokens left and the seconds until
+    it is full again as ``X-RateLimit-{Limit,Remaining,Reset}-<Kind>``.
+    Rejected requests also get ``Retry-After``, rounded up to whole seconds.
+    """
+    headers = {}
+    for status in decision.buckets:
+        suffix = status.limit.kind.capitalize()
+        headers[f"X-RateLimit-Limit-{suffix}"] = f"{status.limit.burst:g}"
+        headers[f"X-RateLimit-Remaining-{suffix}"] = f"{status.remaining:.3f}"
+        headers[f"X-RateLimit-Reset-{suffix}"] = f"{status.reset_after:.3f}"
+    if not decision.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+    return headers
+
+
+def create_store() -> BucketStore:
+    """Create the configured bucket store."""
+    if settings.rate_limit_store == "sqlite":
+        return SqliteBucketStore(settings.rate_limit_sqlite_path)
+    return MemoryBucketStore(settings.rate_limit_max_clients)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(
+    enabled=settings.rate_limit_enabled,
+    limits=[
+        BucketLimit(
+            REQUESTS,
+            settings.rate_limit_requests_per_second,
+            settings.rate_limit_request_burst,
+        ),
+        BucketLimit(
+            MEGAPIXELS,
+            settings.rate_limit_megapixels_per_second,
+            settings.rate_limit_megapixel_burst,
+        ),
+    ],
+    store=create_store() if settings.rate_limit_enabled else MemoryBucketStore(0),
+)
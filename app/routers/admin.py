@@ -0,0 +1,150 @@
+"""Administrative endpoints protected by the admin token."""
+
+import secrets
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from ..config import settings
+from ..lifecycle import service_lifecycle
+from ..logging_config import get_logger
+from ..profiling import CProfileSession, ProfileSession, SamplingSession, profiler
+
+logger = get_logger(__name__)
+
+
+async def require_admin(
+    authorization: str | None = Header(None),
+    x_admin_token: str | None = Header(None),
+) -> None:
+    """Reject requests without the configured admin token.
+
+    The token is accepted as ``Authorization: Bearer <token>`` or in the
+    ``X-Admin-Token`` header. Admin endpoints are disabled while
+    ``ADMIN_TOKEN`` is empty.
+    """
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them",
+        )
+    token = x_admin_token
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if token is None or not secrets.compare_digest(
+        token.encode(), settings.admin_token.encode()
+    ):
+        logger.warning("Rejected admin request")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+
+@router.post("/profile")
+async def profile(
+    mode: str = "sampling",
+    duration: float = 10.0,
+    requests: int | None = None,
+    format: str | None = None,
+) -> Response:
+    """
+    Profile the OCR engine hot path of the running service.
+
+    Records until ``duration`` seconds have passed or ``requests`` engine
+    calls have completed, whichever comes first, then returns the profile.
+    ``mode=sampling`` samples the stacks of threads running engine calls
+    and returns collapsed stacks for flamegraph tools. ``mode=cprofile``
+    traces every Python call and returns a ``pstats`` dump (``format=pstats``)
+    or a text report sorted by cumulative time (``format=text``). Only one
+    session runs at a time.
+    """
+    if not 0 < duration <= settings.profile_max_duration:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"duration must be in (0, {settings.profile_max_duration}] seconds",
+        )
+    if requests is not None and requests < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="requests must be at least 1",
+        )
+
+    session: ProfileSession
+    if mode == "sampling":
+        session = SamplingSession(duration, requests, settings.profile_sample_interval)
+    elif mode == "cprofile":
+        session = CProfileSession(duration, requests)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mode must be sampling or cprofile",
+        )
+
+    output_format = format or session.formats[-1]
+    if output_format not in session.formats:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{mode} profiles support formats: {', '.join(session.formats)}",
+        )
+
+    try:
+        await profiler.record(session)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+
+    content, media_type = session.render(output_format)
+    headers = {"X-Profile-Calls": str(session.calls)}
+    if isinstance(session, SamplingSession):
+        headers["X-Profile-Samples"] = str(session.samples)
+    if output_format == "pstats":
+        headers["Content-Disposition"] = 'attachment; filename="ocr.pstats"'
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@router.post("/drain")
+async def drain(
+    timeout: float | None = None,
+    grace_period: float | None = None,
+    wait: bool = True,
+) -> dict[str, Any]:
+    """
+    Take this instance out of rotation ahead of a restart.
+
+    The readiness probe fails at once and new OCR work is refused with 503
+    after ``grace_period`` seconds (default ``DRAIN_GRACE_PERIOD``). With
+    ``wait=true`` the call returns once in-flight work has finished or
+    ``timeout`` seconds (default ``DRAIN_TIMEOUT``) have passed, with the
+    numbers of completed, rejected and abandoned units of work; otherwise
+    it returns at once and the drain state is reported by ``GET``.
+    """
+    timeout = settings.drain_timeout if timeout is None else timeout
+    grace_period = settings.drain_grace_period if grace_period is None else grace_period
+    if timeout < 0 or grace_period < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="timeout and grace_period must not be negative",
+        )
+    if not wait:
+        service_lifecycle.start_drain(timeout, "admin", grace_period)
+        return service_lifecycle.get_drain_info()
+    return await service_lifecycle.drain(timeout, "admin", grace_period)
+
+
+@router.get("/drain")
+async def drain_status() -> dict[str, Any]:
+    """Get the drain state and counts of this instance."""
+    return service_lifecycle.get_drain_info()
+
+
+@router.delete("/drain")
+async def resume() -> dict[str, Any]:
+    """Cancel a drain and put the instance back into rotation."""
+    service_lifecycle.resume()
+    return service_lifecycle.get_drain_info()
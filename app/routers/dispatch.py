@@ -0,0 +1,128 @@
+"""OCR endpoint of dispatcher mode, forwarding work to backend instances."""
+
+import time
+from typing import Any
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, Response, UploadFile
+
+from ..config import settings
+from ..dispatcher import DispatchError, Upload, dispatcher
+from ..lifecycle import service_lifecycle
+from ..logging_config import get_logger
+from ..metrics import metrics
+from ..models import OCRResponse
+from ..serialization import render_response
+from .ocr import check_accepting, check_upload_count, check_upload_sizes
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/ocr", tags=["ocr"])
+
+
+def form_fields(fields: dict[str, Any]) -> dict[str, str]:
+    """Get the form fields a request set, encoded for forwarding."""
+    return {
+        key: str(value).lower() if isinstance(value, bool) else str(value)
+        for key, value in fields.items()
+        if value is not None
+    }
+
+
+@router.post("/", response_model=OCRResponse)
+async def dispatch_ocr(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    profile: str | None = Form(None),
+    lang: str | None = Form(None),
+    use_cls: bool | None = Form(None),
+    text_score: float | None = Form(None),
+    box_thresh: float | None = Form(None),
+    unclip_ratio: float | None = Form(None),
+    max_side_len: int | None = Form(None),
+    cascade: bool | None = Form(None),
+    dedup: bool | None = Form(None),
+    include_lines: bool | None = Form(None),
+) -> Response:
+    """
+    Run OCR on the backend instances and return their joined results.
+
+    Accepts the same fields as the ``/ocr/`` endpoint of a backend and
+    returns the same response, with results in upload order. The images
+    are split into batches spread over the least loaded ready backends;
+    the priority and tenant headers are forwarded with every batch, and the
+    client's IP is appended to ``X-Forwarded-For`` so backends that trust
+    this dispatcher schedule and rate limit keyless clients separately.
+    Rejections such as 429 keep the backend's ``Retry-After`` and rate
+    limit headers.
+    """
+    start_time = time.time()
+    metrics.increment("ocr_requests")
+
+    check_accepting()
+    check_upload_count(files, settings.dispatcher_max_files)
+    check_upload_sizes(files)
+
+    uploads = [
+        Upload(
+            file.filename or "unknown",
+            await file.read(),
+            file.content_type or "application/octet-stream",
+        )
+        for file in files
+    ]
+    form = form_fields(
+        {
+            "profile": profile,
+            "lang": lang,
+            "use_cls": use_cls,
+            "text_score": text_score,
+            "box_thresh": box_thresh,
+            "unclip_ratio": unclip_ratio,
+            "max_side_len": max_side_len,
+            "cascade": cascade,
+            "dedup": dedup,
+            "include_lines": include_lines,
+        }
+    )
+    headers = {
+        name: request.headers[name]
+        for name in (
+            settings.scheduler_priority_header,
+            settings.scheduler_tenant_header,
+        )
+        if name in request.headers
+    }
+    if request.client is not None:
+        forwarded = request.headers.get("X-Forwarded-For")
+        headers["X-Forwarded-For"] = (
+            f"{forwarded}, {request.client.host}" if forwarded else request.client.host
+        )
+
+    service_lifecycle.work_started()
+    metrics.adjust_gauge("ocr_requests_in_flight", 1)
+    try:
+        response = await dispatcher.dispatch(uploads, form, headers)
+    except DispatchError as e:
+        metrics.increment("ocr_errors")
+        logger.error(
+            "Dispatch failed",
+            file_count=len(uploads),
+            status_code=e.status_code,
+            error=str(e),
+        )
+        raise HTTPException(
+            status_code=e.status_code, detail=e.detail, headers=e.headers
+        ) from e
+    finally:
+        metrics.adjust_gauge("ocr_requests_in_flight", -1)
+        service_lifecycle.work_finished()
+
+    processing_time = time.time() - start_time
+    metrics.increment("ocr_images", len(response.results))
+    metrics.observe("ocr_request", processing_time)
+    logger.info(
+        "Dispatched OCR batch completed",
+        file_count=len(response.results),
+        processing_time=processing_time,
+    )
+    return await render_response(request, response)
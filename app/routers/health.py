@@ -3,14 +3,25 @@
 import time
 from typing import Any
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
+from ..autotune import autotuner
 from ..config import settings
+from ..cost import cost_budget
+from ..cpu_topology import cpu_placement
+from ..dispatcher import dispatcher
 from ..file_manager import file_manager
 from ..gpu_utils import gpu_detector
-from ..logging_config import get_logger
-from ..models import HealthResponse
+from ..lifecycle import service_lifecycle
+from ..logging_config import get_logger, get_logging_stats
+from ..metrics import metrics
+from ..models import HealthResponse, LivenessResponse, ReadinessResponse
 from ..ocr_service import ocr_service
+from ..profiling import profiler
+from ..rate_limit import rate_limiter
+from ..scheduler import scheduler
+from ..serialization import get_serialization_info
+from ..tracing import tracer
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/health", tags=["health"])
@@ -21,29 +32,52 @@ startup_time = time.time()
 
 @router.get("/", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
-    """Comprehensive health check endpoint."""
-    # Calculate uptime
+    """Basic health check using only cached state."""
     uptime = time.time() - startup_time
+    gpu_available = gpu_detector.is_gpu_available()
 
-    # Get various service information
-    gpu_info = gpu_detector.get_gpu_info()
-    ocr_info = ocr_service.get_engine_info()
-
-    logger.info(
-        "Health check requested",
-        uptime=uptime,
-        gpu_available=gpu_info["gpu_available"],
-        ocr_engine_ready=ocr_info["engine_initialized"],
-    )
+    logger.debug("Health check requested", uptime=uptime)
 
     return HealthResponse(
         status="healthy",
         version=settings.api_version,
-        gpu_available=gpu_info["gpu_available"],
+        gpu_available=gpu_available,
         uptime=uptime,
     )
 
 
+@router.get("/live", response_model=LivenessResponse)
+async def liveness_check() -> LivenessResponse:
+    """Constant-time liveness probe that touches no engine or file state."""
+    return LivenessResponse(status="alive", uptime=time.time() - startup_time)
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response) -> ReadinessResponse:
+    """Readiness probe based on warmup, engine availability and queue depth."""
+    ready, reason = service_lifecycle.get_readiness()
+    load = (
+        dispatcher.get_load() if settings.dispatcher_enabled else ocr_service.get_load()
+    )
+
+    if ready:
+        if not load["engine_initialized"] or load["available_workers"] == 0:
+            ready, reason = False, "engine_unavailable"
+        elif load["queue_depth"] > settings.readiness_max_queue_depth:
+            ready, reason = False, "queue_full"
+
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return ReadinessResponse(
+        ready=ready,
+        reason=reason,
+        queue_depth=load["queue_depth"],
+        in_flight=load["in_use"],
+        warmup=service_lifecycle.get_warmup_info(),
+    )
+
+
 @router.get("/stats", response_model=dict)
 async def get_stats() -> dict[str, Any]:
     """Get detailed service statistics and information."""
@@ -62,7 +96,20 @@ async def get_stats() -> dict[str, Any]:
         },
         "gpu": gpu_info,
         "ocr_engine": ocr_info,
+        "warmup": service_lifecycle.get_warmup_info(),
+        "drain": service_lifecycle.get_drain_info(),
+        "requests": metrics.snapshot(),
         "file_management": temp_dir_info,
+        "serialization": get_serialization_info(),
+        "logging": get_logging_stats(),
+        "tracing": tracer.get_stats(),
+        "profiling": profiler.get_stats(),
+        "scheduler": scheduler.get_stats(),
+        "rate_limit": await rate_limiter.get_stats(),
+        "cost": cost_budget.get_stats(),
+        "dispatcher": dispatcher.get_stats(),
+        "autotune": autotuner.get_stats(),
+        "cpu_topology": cpu_placement.get_stats(),
         "configuration": {
             "max_file_size": settings.max_file_size,
             "max_files": settings.max_files,
@@ -1,44 +1,274 @@
 """OCR processing endpoints."""
 
+import asyncio
+import struct
 import time
+from collections.abc import AsyncIterator
+from typing import Any
+from uuid import uuid4
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketException,
+    status,
+)
+from fastapi.requests import HTTPConnection
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.types import Receive, Scope, Send
 
 from ..config import settings
+from ..cost import cost_budget, estimate_cost, total_megapixels, total_units
 from ..file_manager import file_manager
-from ..logging_config import get_logger
-from ..models import OCRResponse
+from ..lifecycle import service_lifecycle
+from ..logging_config import generate_request_id, get_logger, set_request_context
+from ..metrics import metrics
+from ..models import (
+    CostInfo,
+    OCROptions,
+    OCRResponse,
+    StreamResult,
+    StreamSession,
+)
 from ..ocr_service import ocr_service
+from ..rate_limit import rate_limit_headers, rate_limiter
+from ..scheduler import ScheduleContext, bind_context, resolve_context
+from ..serialization import render_response
+from ..tracing import tracer
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/ocr", tags=["ocr"])
 
+# Header of a WebSocket frame: big-endian uint32 id echoed back in the result
+FRAME_HEADER = struct.Struct(">I")
 
-@router.post("/", response_model=OCRResponse)
-async def process_ocr(files: list[UploadFile] = File(...)) -> OCRResponse:
+
+def resolve_profile(profile: str | None) -> str:
+    """Validate a requested model profile and fall back to the default."""
+    if profile is not None and profile not in ocr_service.get_available_profiles():
+        metrics.increment("ocr_rejected")
+        logger.warning(
+            "Unsupported model profile",
+            profile=profile,
+            available=ocr_service.get_available_profiles(),
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported model profile: {profile}. Available: {', '.join(ocr_service.get_available_profiles())}",
+        )
+    return profile or ocr_service.default_profile
+
+
+def resolve_lang(lang: str | None) -> str:
+    """Validate a requested recognition language and fall back to the default."""
+    if lang is not None and lang not in ocr_service.get_supported_languages():
+        metrics.increment("ocr_rejected")
+        logger.warning("Unsupported recognition language", lang=lang)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported language: {lang}. Supported: {', '.join(ocr_service.get_supported_languages())}",
+        )
+    return lang or ocr_service.default_lang
+
+
+def check_accepting() -> None:
+    """Refuse new work while the service drains."""
+    if not service_lifecycle.admits_work():
+        metrics.increment("ocr_rejected")
+        logger.info("Rejected request while draining")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is draining. Retry on another instance",
+            headers={"Retry-After": "1", "Connection": "close"},
+        )
+
+
+def resolve_schedule(connection: HTTPConnection) -> ScheduleContext:
+    """Get the priority class and tenant that schedule a request's engine calls."""
+    try:
+        return resolve_context(
+            connection.headers,
+            connection.client.host if connection.client else None,
+        )
+    except ValueError as e:
+        metrics.increment("ocr_rejected")
+        logger.warning("Unsupported priority class", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+
+def check_upload_cost(
+    files: list[UploadFile], options: OCROptions
+) -> list[CostInfo | None]:
     """
-    Process one or more images for OCR text extraction.
+    Estimate the cost of uploaded images from their headers.
 
-    Accepts multiple image files and returns extracted text for each.
-    Each file is assigned a UUID for tracking purposes.
+    Raises:
+        HTTPException: 413 if the request costs more than one request may
     """
-    start_time = time.time()
+    costs = [estimate_cost(file.file, options.max_side_len) for file in files]
+    units = total_units(costs)
+    if not cost_budget.fits_request(units):
+        metrics.increment("ocr_rejected")
+        logger.warning(
+            "Request cost too high", cost_units=units, max_units=cost_budget.max_request
+        )
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=(
+                f"Request cost of {units:.1f} megapixel units exceeds the "
+                f"maximum of {cost_budget.max_request:g}"
+            ),
+        )
+    return costs
 
-    # Validate number of files
-    if len(files) > settings.max_files:
+
+def admit_cost(units: float) -> None:
+    """
+    Reserve a request's cost in the in-flight budget.
+
+    Raises:
+        HTTPException: 503 with ``Retry-After`` if in-flight work costs too much
+    """
+    if not cost_budget.try_admit(units):
+        metrics.increment("ocr_rejected")
+        logger.warning(
+            "In-flight cost budget exhausted",
+            cost_units=units,
+            in_flight_units=cost_budget.in_flight,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is at capacity. Retry later",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def enforce_rate_limit(client: str, megapixels: float) -> dict[str, str]:
+    """
+    Take a request's tokens from its client's rate limit buckets.
+
+    Returns:
+        Rate limit headers for the response
+
+    Raises:
+        HTTPException: 429 with ``Retry-After`` if a bucket cannot pay
+    """
+    if not rate_limiter.enabled:
+        return {}
+    decision = await rate_limiter.check(client, megapixels=megapixels)
+    headers = rate_limit_headers(decision)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=(
+                f"Rate limit exceeded for {decision.limited_by}. "
+                f"Retry after {decision.retry_after:.1f} seconds"
+            ),
+            headers=headers,
+        )
+    return headers
+
+
+async def admit_request(
+    client: str, costs: list[CostInfo | None]
+) -> tuple[float, dict[str, str]]:
+    """
+    Reserve a request's cost, then take its client's rate limit tokens.
+
+    A request refused for lack of capacity takes no tokens, and one refused
+    by the rate limit gives its reservation back.
+
+    Returns:
+        Reserved cost units, and rate limit headers for the response
+    """
+    units = total_units(costs)
+    admit_cost(units)
+    try:
+        headers = await enforce_rate_limit(client, total_megapixels(costs))
+    except BaseException:
+        cost_budget.release(units)
+        raise
+    return units, headers
+
+
+class ReservedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that ends its request's admitted work.
+
+    The body only starts once the response is sent, so the cost reservation
+    and the drain's count of work in flight are released here rather than in
+    the body; a client that disconnects before the first chunk would
+    otherwise hold them forever. The request's trace is
+    likewise kept open until the body is sent, so it includes the work done
+    while streaming.
+    """
+
+    def __init__(
+        self, content: AsyncIterator[str], units: float, **kwargs: Any
+    ) -> None:
+        super().__init__(content, **kwargs)
+        self.units = units
+        self._end_trace = tracer.hold_trace()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            cost_budget.release(self.units)
+            service_lifecycle.work_finished()
+            if self._end_trace is not None:
+                self._end_trace()
+
+
+def parse_options(requested_options: dict[str, Any]) -> OCROptions:
+    """Build pipeline options from the fields a request set."""
+    try:
+        return OCROptions(
+            **{
+                key: value
+                for key, value in requested_options.items()
+                if value is not None
+            }
+        )
+    except ValidationError as e:
+        metrics.increment("ocr_rejected")
+        errors = "; ".join(f"{err['loc'][0]}: {err['msg']}" for err in e.errors())
+        logger.warning("Invalid OCR options", errors=errors)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid OCR options: {errors}",
+        ) from e
+
+
+def check_upload_count(files: list[UploadFile], max_files: int) -> None:
+    """Reject requests with more files than allowed."""
+    if len(files) > max_files:
+        metrics.increment("ocr_rejected")
         logger.warning(
             "Too many files uploaded",
             file_count=len(files),
-            max_allowed=settings.max_files,
+            max_allowed=max_files,
         )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Too many files. Maximum allowed: {settings.max_files}",
+            detail=f"Too many files. Maximum allowed: {max_files}",
         )
 
-    # Validate file sizes
+
+def check_upload_sizes(files: list[UploadFile]) -> None:
+    """Reject requests containing a file above the size limit."""
     for file in files:
         if file.size and file.size > settings.max_file_size:
+            metrics.increment("ocr_rejected")
             logger.warning(
                 "File too large",
                 filename=file.filename,
@@ -50,6 +280,75 @@ async def process_ocr(files: list[UploadFile] = File(...)) -> OCRResponse:
                 detail=f"File {file.filename} is too large. Maximum size: {settings.max_file_size} bytes",
             )
 
+
+@router.post("/", response_model=OCRResponse)
+async def process_ocr(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    profile: str | None = Form(None),
+    lang: str | None = Form(None),
+    use_cls: bool | None = Form(None),
+    text_score: float | None = Form(None),
+    box_thresh: float | None = Form(None),
+    unclip_ratio: float | None = Form(None),
+    max_side_len: int | None = Form(None),
+    cascade: bool | None = Form(None),
+    dedup: bool | None = Form(None),
+    include_lines: bool | None = Form(None),
+) -> Response:
+    """
+    Process one or more images for OCR text extraction.
+
+    Accepts multiple image files and returns extracted text for each.
+    Each file is assigned a UUID for tracking purposes. The optional
+    ``profile`` field selects the ``accurate`` or INT8-quantized ``fast``
+    models and the optional ``lang`` field the recognition language for
+    this request instead of the configured defaults. Engines for other
+    languages and profiles are loaded on first use.
+
+    Pipeline options tune the request: ``use_cls`` skips angle
+    classification for upright inputs, ``text_score``, ``box_thresh`` and
+    ``unclip_ratio`` adjust recognition and detection thresholds, and
+    ``max_side_len`` downscales large images before detection. ``cascade``
+    runs a low-resolution pass and re-recognizes only low-confidence or
+    small regions at full resolution. ``dedup=false`` opts out of the
+    near-duplicate result cache when it is enabled. ``include_lines`` adds
+    each line's text, confidence and box to the results.
+
+    Clients listing ``application/msgpack`` or the columnar
+    ``application/vnd.rapidocr.columnar+msgpack`` format in ``Accept`` get
+    a compact binary body (see :mod:`app.codecs`). Large responses are
+    compressed with zstd or gzip when the client's ``Accept-Encoding``
+    allows it.
+    """
+    start_time = time.time()
+    metrics.increment("ocr_requests")
+
+    with tracer.span("ocr.admission", file_count=len(files)):
+        check_accepting()
+        schedule = resolve_schedule(request)
+        bind_context(schedule)
+        model_profile = resolve_profile(profile)
+        ocr_lang = resolve_lang(lang)
+        options = parse_options(
+            {
+                "use_cls": use_cls,
+                "text_score": text_score,
+                "box_thresh": box_thresh,
+                "unclip_ratio": unclip_ratio,
+                "max_side_len": max_side_len,
+                "cascade": cascade,
+                "dedup": dedup,
+                "include_lines": include_lines,
+            }
+        )
+        check_upload_count(files, settings.max_files)
+        check_upload_sizes(files)
+        costs = check_upload_cost(files, options)
+        request_units, rate_headers = await admit_request(schedule.tenant, costs)
+
+    service_lifecycle.work_started()
+    metrics.adjust_gauge("ocr_requests_in_flight", 1)
     try:
         # Save uploaded files
         file_info_list = await file_manager.save_multiple_files(files)
@@ -61,29 +360,44 @@ async def process_ocr(files: list[UploadFile] = File(...)) -> OCRResponse:
         )
 
         # Process OCR
-        results = await ocr_service.process_multiple_images(file_info_list)
+        results = await ocr_service.process_multiple_images(
+            file_info_list, model_profile, ocr_lang, options
+        )
 
         # Clean up temporary files
         for _file_uuid, file_path, _ in file_info_list:
             file_manager.cleanup_file(file_path)
 
         processing_time = time.time() - start_time
+        metrics.increment("ocr_images", len(results))
+        metrics.observe("ocr_request", processing_time)
 
         logger.info(
             "OCR batch completed",
             file_count=len(results),
             processing_time=processing_time,
             gpu_used=ocr_service.is_gpu_enabled(),
+            model_profile=model_profile,
+            lang=ocr_lang,
         )
 
-        return OCRResponse(
-            results=results,
-            processing_time=processing_time,
-            gpu_used=ocr_service.is_gpu_enabled(),
+        response = await render_response(
+            request,
+            OCRResponse(
+                results=results,
+                processing_time=processing_time,
+                gpu_used=ocr_service.is_gpu_enabled(),
+                model_profile=model_profile,
+                lang=ocr_lang,
+                cost_units=request_units,
+            ),
         )
+        response.headers.update(rate_headers)
+        return response
 
     except Exception as e:
         processing_time = time.time() - start_time
+        metrics.increment("ocr_errors")
 
         logger.error(
             "OCR processing failed",
@@ -96,3 +410,281 @@ async def process_ocr(files: list[UploadFile] = File(...)) -> OCRResponse:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"OCR processing failed: {str(e)}",
         ) from e
+
+    finally:
+        metrics.adjust_gauge("ocr_requests_in_flight", -1)
+        cost_budget.release(request_units)
+        service_lifecycle.work_finished()
+
+
+@router.post("/sequence")
+async def process_sequence(
+    request: Request,
+    frames: list[UploadFile] = File(...),
+    profile: str | None = Form(None),
+    lang: str | None = Form(None),
+    use_cls: bool | None = Form(None),
+    text_score: float | None = Form(None),
+    box_thresh: float | None = Form(None),
+    unclip_ratio: float | None = Form(None),
+    max_side_len: int | None = Form(None),
+) -> StreamingResponse:
+    """
+    Process successive frames of a video or image sequence.
+
+    Frames are processed in upload order. Each frame is compared with the
+    previous ones and only changed regions are recognized again; the rest
+    of the text is reused. The response streams one JSON line per frame
+    (``application/x-ndjson``) with the lines added and removed by that
+    frame, as soon as the frame is processed. Accepts the same model and
+    pipeline options as ``/ocr/``.
+    """
+    metrics.increment("sequence_requests")
+
+    check_accepting()
+    schedule = resolve_schedule(request)
+    model_profile = resolve_profile(profile)
+    ocr_lang = resolve_lang(lang)
+    options = parse_options(
+        {
+            "use_cls": use_cls,
+            "text_score": text_score,
+            "box_thresh": box_thresh,
+            "unclip_ratio": unclip_ratio,
+            "max_side_len": max_side_len,
+        }
+    )
+    check_upload_count(frames, settings.sequence_max_frames)
+    check_upload_sizes(frames)
+    costs = check_upload_cost(frames, options)
+
+    # Read frames before responding; uploads may be closed once the handler returns
+    contents = [(frame.filename or "unknown", await frame.read()) for frame in frames]
+    sequence = ocr_service.create_sequence()
+    request_units, rate_headers = await admit_request(schedule.tenant, costs)
+    # Count the sequence from admission, so a drain waits for the body to run
+    service_lifecycle.work_started()
+
+    logger.info(
+        "Processing frame sequence",
+        frame_count=len(contents),
+        model_profile=model_profile,
+        lang=ocr_lang,
+    )
+
+    async def stream() -> AsyncIterator[str]:
+        bind_context(schedule)
+        start_time = time.time()
+        metrics.adjust_gauge("ocr_requests_in_flight", 1)
+        try:
+            for index, (filename, content) in enumerate(contents):
+                delta = await ocr_service.process_frame(
+                    sequence, index, content, filename, model_profile, ocr_lang, options
+                )
+                yield delta.model_dump_json() + "\n"
+        finally:
+            metrics.adjust_gauge("ocr_requests_in_flight", -1)
+            processing_time = time.time() - start_time
+            metrics.observe("sequence_request", processing_time)
+            logger.info(
+                "Frame sequence completed",
+                frame_count=len(contents),
+                processing_time=processing_time,
+            )
+
+    return ReservedStreamingResponse(
+        stream(),
+        request_units,
+        media_type="application/x-ndjson",
+        headers=rate_headers,
+    )
+
+
+@router.websocket("/ws")
+async def ocr_websocket(
+    websocket: WebSocket,
+    profile: str | None = None,
+    lang: str | None = None,
+    use_cls: bool | None = None,
+    text_score: float | None = None,
+    box_thresh: float | None = None,
+    unclip_ratio: float | None = None,
+    max_side_len: int | None = None,
+    cascade: bool | None = None,
+    dedup: bool | None = None,
+    include_lines: bool | None = None,
+) -> None:
+    """
+    Run OCR on image frames sent over a persistent WebSocket connection.
+
+    Model and pipeline options are fixed per connection through the same
+    query parameters as the ``/ocr/`` form fields. After a
+    :class:`StreamSession` message, the client sends binary messages made of
+    a 4-byte big-endian frame id followed by the encoded image. Frames are
+    decoded from memory and processed concurrently on the shared engine
+    pool; each produces a :class:`StreamResult` text message carrying its id,
+    in completion order. Once ``WS_MAX_IN_FLIGHT`` frames are in flight the
+    server stops reading, so a fast client is slowed down by TCP
+    backpressure instead of queueing unbounded work. Each frame reserves
+    its cost in the in-flight budget and takes rate limit tokens like a
+    request; frames refused either way are rejected without closing the
+    connection.
+
+    While the service drains, new sessions are refused with close code
+    1013 and frames of open sessions are rejected, so clients reconnect to
+    another instance.
+    """
+    if not service_lifecycle.admits_work():
+        raise WebSocketException(
+            code=status.WS_1013_TRY_AGAIN_LATER, reason="Service is draining"
+        )
+    try:
+        schedule = resolve_schedule(websocket)
+        bind_context(schedule)
+        model_profile = resolve_profile(profile)
+        ocr_lang = resolve_lang(lang)
+        options = parse_options(
+            {
+                "use_cls": use_cls,
+                "text_score": text_score,
+                "box_thresh": box_thresh,
+                "unclip_ratio": unclip_ratio,
+                "max_side_len": max_side_len,
+                "cascade": cascade,
+                "dedup": dedup,
+                "include_lines": include_lines,
+            }
+        )
+    except HTTPException as e:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail)
+        ) from e
+
+    await websocket.accept()
+    session_id = generate_request_id()
+    set_request_context(
+        session_id,
+        method="WEBSOCKET",
+        url=str(websocket.url),
+        client_ip=websocket.client.host if websocket.client else None,
+    )
+    start_time = time.time()
+    frame_count = 0
+    window = asyncio.Semaphore(settings.ws_max_in_flight)
+    send_lock = asyncio.Lock()
+    tasks: set[asyncio.Task[None]] = set()
+
+    metrics.increment("ws_sessions")
+    metrics.adjust_gauge("ws_connections", 1)
+    logger.info("WebSocket session opened", model_profile=model_profile, lang=ocr_lang)
+
+    async def send(message: StreamResult | StreamSession) -> None:
+        async with send_lock:
+            await websocket.send_text(message.model_dump_json())
+
+    async def reject(frame_id: int | None, error: str) -> None:
+        metrics.increment("ws_frames_rejected")
+        logger.warning("Rejected WebSocket frame", frame_id=frame_id, error=error)
+        await send(StreamResult(id=frame_id, processing_time=0.0, error=error))
+
+    async def handle(frame_id: int, content: bytes, units: float) -> None:
+        frame_start = time.time()
+        metrics.adjust_gauge("ocr_requests_in_flight", 1)
+        service_lifecycle.work_started()
+        try:
+            result = await ocr_service.process_image(
+                content,
+                str(uuid4()),
+                f"frame-{frame_id}",
+                model_profile,
+                ocr_lang,
+                options,
+            )
+            processing_time = time.time() - frame_start
+            metrics.increment("ocr_images")
+            metrics.observe("ws_frame", processing_time)
+            await send(
+                StreamResult(
+                    id=frame_id, result=result, processing_time=processing_time
+                )
+            )
+        except Exception as e:
+            # The client may have gone away while the frame was processed
+            logger.debug("Failed to send frame result", frame_id=frame_id, error=str(e))
+        finally:
+            metrics.adjust_gauge("ocr_requests_in_flight", -1)
+            cost_budget.release(units)
+            service_lifecycle.work_finished()
+            window.release()
+
+    try:
+        await send(
+            StreamSession(
+                session=session_id,
+                max_in_flight=settings.ws_max_in_flight,
+                max_frame_bytes=settings.max_file_size,
+                model_profile=model_profile,
+                lang=ocr_lang,
+            )
+        )
+
+        while True:
+            # Stop reading while the window is full
+            await window.acquire()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                window.release()
+                break
+
+            content: bytes | None = message.get("bytes")
+            if content is None or len(content) <= FRAME_HEADER.size:
+                window.release()
+                await reject(None, "Expected a binary frame: 4-byte id and image")
+                continue
+            frame_id: int = FRAME_HEADER.unpack_from(content)[0]
+            if len(content) - FRAME_HEADER.size > settings.max_file_size:
+                window.release()
+                await reject(
+                    frame_id,
+                    f"Frame too large. Maximum size: {settings.max_file_size} bytes",
+                )
+                continue
+
+            if not service_lifecycle.admits_work():
+                window.release()
+                await reject(frame_id, "Service is draining. Reconnect to retry")
+                continue
+
+            image = content[FRAME_HEADER.size :]
+            cost = estimate_cost(image, options.max_side_len)
+            if not cost_budget.fits_request(total_units([cost])):
+                window.release()
+                await reject(
+                    frame_id,
+                    f"Frame cost exceeds the maximum of {cost_budget.max_request:g} "
+                    "megapixel units",
+                )
+                continue
+            try:
+                units, _ = await admit_request(schedule.tenant, [cost])
+            except HTTPException as e:
+                window.release()
+                await reject(frame_id, str(e.detail))
+                continue
+
+            frame_count += 1
+            metrics.increment("ws_frames")
+            task = asyncio.create_task(handle(frame_id, image, units))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    finally:
+        # Let frames in flight finish so their engines are not released mid-run
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        metrics.adjust_gauge("ws_connections", -1)
+        logger.info(
+            "WebSocket session closed",
+            frame_count=frame_count,
+            duration=time.time() - start_time,
+        )
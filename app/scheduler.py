@@ -0,0 +1,403 @@
+"""Priority classes and weighted fair queuing in front of the OCR engines.
+
+Every engine call takes a slot of its engine pool from the scheduler
+first. Each pool has its own slots, one per engine by default, so calls to
+an extra language or profile neither starve nor are starved by calls to the
+default engine. While a pool's slots are free, its calls go straight
+through. Once they are all taken, waiting calls are granted in this order:
+
+1. Priority classes are strict: a waiting call of a higher class is always
+   granted before one of a lower class.
+2. Within a class, tenants share the slots by start-time fair queuing. Each
+   call is tagged with a virtual start time, and the smallest tag is granted
+   first. A tenant that keeps many calls queued therefore takes turns with
+   a tenant sending one call at a time instead of running ahead of it, in
+   proportion to the tenants' weights.
+3. A tenant already holding its concurrency cap is skipped until one of its
+   calls completes.
+
+Tenants are identified by an API key header, hashed so keys never appear in
+stats or logs, or by client IP when the header is absent.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, NamedTuple
+
+from .config import settings
+from .logging_config import LoggingMixin
+from .metrics import metrics
+
+
+class ScheduleContext(NamedTuple):
+    """Who an engine call is made for and how urgently."""
+
+    tenant: str
+    priority: str
+    weight: float = 1.0
+
+
+DEFAULT_CONTEXT = ScheduleContext("anonymous", settings.scheduler_default_priority)
+
+# Pool of engine calls that do not name one
+DEFAULT_POOL = "default"
+
+# Context of the request being served; engine calls inherit it
+schedule_context: ContextVar[ScheduleContext] = ContextVar(
+    "schedule_context", default=DEFAULT_CONTEXT
+)
+
+
+def tenant_id(api_key: str | None, client_ip: str | None) -> str:
+    """Get a stable tenant identifier that does not reveal the API key."""
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    return f"ip:{client_ip or 'unknown'}"
+
+
+def client_address(headers: Mapping[str, str], peer: str | None) -> str | None:
+    """
+    Get a request's client IP, looking through trusted proxies.
+
+    Requests from ``SCHEDULER_TRUSTED_PROXIES``, such as a dispatcher, are
+    attributed to the nearest untrusted address in ``X-Forwarded-For``.
+    Other peers' headers are ignored, so clients cannot pick their tenant.
+    """
+    trusted = settings.scheduler_trusted_proxies
+    if peer is None or peer not in trusted:
+        return peer
+    forwarded = [
+        address.strip()
+        for address in headers.get("X-Forwarded-For", "").split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if address not in trusted:
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def resolve_context(
+    headers: Mapping[str, str], client_ip: str | None
+) -> ScheduleContext:
+    """
+    Build the schedule context of a request from its headers.
+
+    ``client_ip`` is the connection's peer; see :func:`client_address`.
+
+    Raises:
+        ValueError: If the priority header names an unknown class
+    """
+    priority = headers.get(settings.scheduler_priority_header)
+    priority = (priority or settings.scheduler_default_priority).strip().lower()
+    if priority not in settings.scheduler_priority_classes:
+        raise ValueError(
+            f"Unknown priority class: {priority}. "
+            f"Available classes: {', '.join(settings.scheduler_priority_classes)}"
+        )
+    api_key = headers.get(settings.scheduler_tenant_header)
+    weight = settings.scheduler_tenant_weights.get(api_key or "", 1.0)
+    return ScheduleContext(
+        tenant_id(api_key, client_address(headers, client_ip)), priority, weight
+    )
+
+
+def bind_context(context: ScheduleContext) -> None:
+    """Schedule the current request's engine calls under a context."""
+    schedule_context.set(context)
+
+
+class Ticket:
+    """A call waiting for a slot."""
+
+    __slots__ = ("context", "start_tag", "cost", "pool", "future", "enqueued_at")
+
+    def __init__(
+        self,
+        context: ScheduleContext,
+        start_tag: float,
+        cost: float,
+        pool: str,
+        future: asyncio.Future[None],
+    ) -> None:
+        self.context = context
+        self.start_tag = start_tag
+        self.cost = cost
+        self.pool = pool
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class TenantState:
+    """Slots held, queued calls and the fair queuing tag of a tenant."""
+
+    __slots__ = ("active", "queues", "finish_tags", "granted", "wait_time")
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.queues: dict[str, deque[Ticket]] = {}
+        # Virtual finish time of the tenant's latest call in each class
+        self.finish_tags: dict[str, float] = {}
+        self.granted = 0
+        self.wait_time = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class FairScheduler(LoggingMixin):
+    """Grants engine slots by priority class, fair share and tenant caps."""
+
+    def __init__(
+        self,
+        capacity: int,
+        priorities: list[str],
+        tenant_max_concurrency: int = 0,
+    ) -> None:
+        super().__init__()
+        # Slots of each pool that was not given its own size
+        self.capacity = max(1, capacity)
+        self.priorities = list(priorities)
+        self.tenant_max_concurrency = tenant_max_concurrency
+        self._in_use = 0
+        self._capacities: dict[str, int] = {}
+        self._pool_in_use: dict[str, int] = {}
+        self._tenants: dict[str, TenantState] = {}
+        # Virtual time of each class: the start tag of the last granted call
+        self._virtual_time = dict.fromkeys(self.priorities, 0.0)
+        self._granted = dict.fromkeys(self.priorities, 0)
+        self._waited = dict.fromkeys(self.priorities, 0)
+        self._wait_time = dict.fromkeys(self.priorities, 0.0)
+
+    def resize(self, capacity: int, pool: str | None = None) -> None:
+        """
+        Change the number of slots, granting waiting calls if it grew.
+
+        Args:
+            capacity: Number of slots
+            pool: Pool to size (default: every pool without its own size)
+        """
+        if pool is None:
+            self.capacity = max(1, capacity)
+        else:
+            self._capacities[pool] = max(1, capacity)
+        self._dispatch()
+
+    def pool_capacity(self, pool: str) -> int:
+        """Number of slots of a pool."""
+        return self._capacities.get(pool, self.capacity)
+
+    def _has_room(self, pool: str) -> bool:
+        return self._pool_in_use.get(pool, 0) < self.pool_capacity(pool)
+
+    @property
+    def in_use(self) -> int:
+        """Number of slots held across all pools."""
+        return self._in_use
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a slot."""
+        return sum(state.queued for state in self._tenants.values())
+
+    def _tenant(self, name: str) -> TenantState:
+        state = self._tenants.get(name)
+        if state is None:
+            state = self._tenants[name] = TenantState()
+        return state
+
+    def _tag(self, context: ScheduleContext, cost: float) -> float:
+        """Assign the next start tag of a tenant's call within its class."""
+        state = self._tenant(context.tenant)
+        start_tag = max(
+            self._virtual_time[context.priority],
+            state.finish_tags.get(context.priority, 0.0),
+        )
+        state.finish_tags[context.priority] = start_tag + cost / max(
+            context.weight, 1e-6
+        )
+        return start_tag
+
+    def _under_cap(self, state: TenantState) -> bool:
+        cap = self.tenant_max_concurrency
+        return cap <= 0 or state.active < cap
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        context: ScheduleContext | None = None,
+        cost: float = 1.0,
+        pool: str = DEFAULT_POOL,
+    ) -> AsyncIterator[None]:
+        """
+        Hold an engine slot for the duration of the context.
+
+        Args:
+            context: Tenant and priority (default: the current request's)
+            cost: Relative amount of engine work, for fair sharing
+            pool: Engine pool the call runs on
+        """
+        context = context or schedule_context.get()
+        if context.priority not in self._virtual_time:
+            context = context._replace(priority=self.priorities[-1])
+        state = self._tenant(context.tenant)
+        ticket = Ticket(
+            context,
+            self._tag(context, cost),
+            cost,
+            pool,
+            asyncio.get_running_loop().create_future(),
+        )
+        state.queues.setdefault(context.priority, deque()).append(ticket)
+        # Free slots are granted right away, so only contended calls wait
+        self._dispatch()
+        if not ticket.future.done():
+            self._waited[context.priority] += 1
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just before the caller gave up
+                self._release(context, pool)
+            else:
+                self._discard(ticket)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(context, pool)
+
+    def _grant(
+        self,
+        ticket: Ticket,
+        state: TenantState,
+        wait_time: float,
+    ) -> None:
+        context = ticket.context
+        self._in_use += 1
+        self._pool_in_use[ticket.pool] = self._pool_in_use.get(ticket.pool, 0) + 1
+        state.active += 1
+        state.granted += 1
+        state.wait_time += wait_time
+        self._virtual_time[context.priority] = ticket.start_tag
+        self._granted[context.priority] += 1
+        self._wait_time[context.priority] += wait_time
+        metrics.observe("scheduler_wait", wait_time)
+
+    def _release(self, context: ScheduleContext, pool: str) -> None:
+        self._in_use -= 1
+        self._pool_in_use[pool] -= 1
+        if not self._pool_in_use[pool]:
+            del self._pool_in_use[pool]
+        state = self._tenants[context.tenant]
+        state.active -= 1
+        self._forget_if_idle(context.tenant, state)
+        self._dispatch()
+
+    def _discard(self, ticket: Ticket) -> None:
+        """Remove a waiting ticket whose caller was cancelled."""
+        state = self._tenants.get(ticket.context.tenant)
+        if state is None:
+            return
+        queue = state.queues.get(ticket.context.priority)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del state.queues[ticket.context.priority]
+        self._forget_if_idle(ticket.context.tenant, state)
+
+    def _forget_if_idle(self, name: str, state: TenantState) -> None:
+        """Drop tenants without work so the table only holds active tenants."""
+        if state.active == 0 and not state.queues:
+            del self._tenants[name]
+
+    def _next_ticket(self) -> tuple[TenantState, deque[Ticket], Ticket] | None:
+        """Find the waiting call to grant next, if any tenant may run."""
+        for priority in self.priorities:
+            best: tuple[TenantState, deque[Ticket], Ticket] | None = None
+            for state in self._tenants.values():
+                queue = state.queues.get(priority)
+                if not queue or not self._under_cap(state):
+                    continue
+                # The tenant's oldest call on a pool with a free slot
+                ticket = next((t for t in queue if self._has_room(t.pool)), None)
+                if ticket is None:
+                    continue
+                if best is None or ticket.start_tag < best[2].start_tag:
+                    best = (state, queue, ticket)
+            if best is not None:
+                return best
+        return None
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting calls."""
+        while True:
+            found = self._next_ticket()
+            if found is None:
+                return
+            state, queue, ticket = found
+            queue.remove(ticket)
+            if not queue:
+                del state.queues[ticket.context.priority]
+            if ticket.future.done():
+                continue
+            self._grant(ticket, state, time.perf_counter() - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get slot usage, queues and waits per class and tenant."""
+        return {
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "pools": {
+                pool: {
+                    "capacity": self.pool_capacity(pool),
+                    "in_use": self._pool_in_use.get(pool, 0),
+                }
+                for pool in sorted({*self._capacities, *self._pool_in_use})
+            },
+            "queue_depth": self.queue_depth,
+            "tenant_max_concurrency": self.tenant_max_concurrency,
+            "classes": {
+                priority: {
+                    "queued": sum(
+                        len(state.queues.get(priority, ()))
+                        for state in self._tenants.values()
+                    ),
+                    "granted": self._granted[priority],
+                    "waited": self._waited[priority],
+                    "mean_wait": (
+                        self._wait_time[priority] / self._granted[priority]
+                        if self._granted[priority]
+                        else 0.0
+                    ),
+                }
+                for priority in self.priorities
+            },
+            "tenants": {
+                name: {
+                    "active": state.active,
+                    "queued": state.queued,
+                    "granted": state.granted,
+                    "mean_wait": (
+                        state.wait_time / state.granted if state.granted else 0.0
+                    ),
+                }
+                for name, state in self._tenants.items()
+            },
+        }
+
+
+# Global scheduler instance; the OCR service sizes each pool's slots
+scheduler = FairScheduler(
+    capacity=settings.scheduler_concurrency or settings.ocr_pool_size,
+    priorities=settings.scheduler_priority_classes,
+    tenant_max_concurrency=settings.scheduler_tenant_max_concurrency,
+)
@@ -0,0 +1,208 @@
+"""Fast encoding and negotiated format and compression of API responses."""
+
+import asyncio
+import gzip
+import time
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from .codecs import (
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MEDIA_TYPE_ALIASES,
+    MSGPACK_MEDIA_TYPE,
+    available_media_types,
+    encode_response,
+)
+from .config import settings
+from .metrics import metrics
+from .models import OCRResponse
+from .tracing import tracer
+
+# Metric names of the response formats
+RESPONSE_FORMATS = {
+    JSON_MEDIA_TYPE: "json",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    COLUMNAR_MEDIA_TYPE: "columnar",
+}
+
+# Bodies at least this large are compressed in a worker thread, since both
+# codecs release the GIL and compressing them takes milliseconds
+THREAD_COMPRESSION_SIZE = 64 * 1024
+
+try:
+    import orjson
+except ImportError:  # Optional "performance" extra
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # Optional "performance" extra
+    zstandard = None  # type: ignore[assignment]
+
+
+def json_encoder_name() -> str:
+    """Get the JSON encoder in use: ``orjson`` or ``pydantic``."""
+    return "orjson" if orjson is not None else "pydantic"
+
+
+def available_encodings() -> list[str]:
+    """Get the supported content codings in server preference order."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def encode_json(model: BaseModel) -> bytes:
+    """
+    Serialize a response model to JSON bytes.
+
+    Uses orjson when installed and pydantic's own serializer otherwise;
+    both are several times faster than FastAPI's ``jsonable_encoder`` and
+    ``json.dumps`` path.
+    """
+    if orjson is not None:
+        return orjson.dumps(model.model_dump())
+    return model.model_dump_json().encode()
+
+
+def parse_quality_values(header: str) -> dict[str, float]:
+    """Get the quality value of each item of an Accept or Accept-Encoding header."""
+    qualities = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the client's highest-rated supported coding, preferring zstd on ties."""
+    if not accept_encoding:
+        return None
+    qualities = parse_quality_values(accept_encoding)
+    best, best_quality = None, 0.0
+    for coding in available_encodings():
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def choose_media_type(accept: str | None) -> str:
+    """
+    Pick the response format from an Accept header.
+
+    JSON also matches wildcards, while binary formats are only sent to
+    clients that list them explicitly. Ties go to the more compact format,
+    and JSON is the fallback when nothing listed is supported.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    qualities: dict[str, float] = {}
+    for media_type, quality in parse_quality_values(accept).items():
+        media_type = MEDIA_TYPE_ALIASES.get(media_type, media_type)
+        qualities[media_type] = max(quality, qualities.get(media_type, 0.0))
+    best, best_quality = JSON_MEDIA_TYPE, 0.0
+    for media_type in available_media_types():
+        quality = qualities.get(media_type, 0.0)
+        if media_type == JSON_MEDIA_TYPE:
+            quality = max(
+                quality, qualities.get("application/*", 0.0), qualities.get("*/*", 0.0)
+            )
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with a supported content coding."""
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=settings.response_zstd_level).compress(
+            body
+        )
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.response_gzip_level, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+async def render_response(
+    request: Request, model: BaseModel, status_code: int = 200
+) -> Response:
+    """
+    Encode a response model in the negotiated format, compressing it when
+    the client accepts it.
+
+    Only ``OCRResponse`` bodies have binary formats; other models are
+    always JSON. Bodies smaller than ``RESPONSE_COMPRESSION_MIN_SIZE`` are
+    sent as is, since compressing them costs more than it saves.
+    Serialization and compression times are recorded as the
+    ``response_serialize`` and ``response_compress`` timings.
+    """
+    media_type = JSON_MEDIA_TYPE
+    if isinstance(model, OCRResponse):
+        media_type = choose_media_type(request.headers.get("accept"))
+
+    start_time = time.perf_counter()
+    with tracer.span("response.serialize", media_type=media_type) as span:
+        if isinstance(model, OCRResponse) and media_type != JSON_MEDIA_TYPE:
+            body = encode_response(model, media_type)
+        else:
+            body = encode_json(model)
+        if span is not None:
+            span.set_attribute("bytes", len(body))
+    metrics.observe("response_serialize", time.perf_counter() - start_time)
+    metrics.increment(f"responses_{RESPONSE_FORMATS[media_type]}")
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encoding = None
+    if (
+        settings.response_compression_enabled
+        and len(body) >= settings.response_compression_min_size
+    ):
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+
+    if encoding is not None:
+        start_time = time.perf_counter()
+        with tracer.span("response.compress", encoding=encoding) as span:
+            if len(body) >= THREAD_COMPRESSION_SIZE:
+                compressed = await asyncio.to_thread(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            if span is not None:
+                span.set_attribute("bytes", len(compressed))
+        metrics.observe("response_compress", time.perf_counter() - start_time)
+        metrics.increment("response_bytes_uncompressed", len(body))
+        metrics.increment("response_bytes_compressed", len(compressed))
+        metrics.increment(f"responses_{encoding}")
+        body = compressed
+        headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def get_serialization_info() -> dict[str, Any]:
+    """Get the response encoder and compression settings for the stats endpoint."""
+    return {
+        "json_encoder": json_encoder_name(),
+        "media_types": available_media_types(),
+        "compression_enabled": settings.response_compression_enabled,
+        "encodings": available_encodings(),
+        "min_size": settings.response_compression_min_size,
+        "gzip_level": settings.response_gzip_level,
+        "zstd_level": settings.response_zstd_level,
+    }
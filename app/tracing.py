@@ -0,0 +1,493 @@
+"""Lightweight request tracing with sampled, pluggable span exporters."""
+
+import json
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from .config import settings
+from .logging_config import LoggingMixin
+
+# Spans kept per trace; later spans of a runaway trace are dropped
+MAX_SPANS_PER_TRACE = 512
+
+# Finished traces exported per exporter call
+EXPORT_BATCH_SIZE = 64
+
+AttributeValue = str | int | float | bool
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        attributes: dict[str, AttributeValue],
+        start_ns: int | None = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, or 0 while the span is open."""
+        return max(0, self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        """Attach a value to the span."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the span as a JSON-serializable record."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """Finished spans of one request, exported when its root span ends."""
+
+    def __init__(self, trace_id: str, sampled: bool, root: Span) -> None:
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.root = root
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        # The root span's block, plus streaming bodies still adding spans
+        self._holds = 1
+
+    def add(self, span: Span) -> None:
+        """Keep a finished span, up to ``MAX_SPANS_PER_TRACE``."""
+        with self._lock:
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+
+    def hold(self) -> None:
+        """Keep the root span open past its block."""
+        with self._lock:
+            self._holds += 1
+
+    def release(self) -> bool:
+        """Drop a hold; True once the root span may end."""
+        with self._lock:
+            self._holds -= 1
+            return self._holds == 0
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(ABC):
+    """Destination for finished traces."""
+
+    name = "none"
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Write a batch of finished spans."""
+
+    def shutdown(self) -> None:  # noqa: B027 - optional hook
+        """Release exporter resources; a no-op for exporters holding none."""
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a local file."""
+
+    name = "jsonl"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        """Append the spans as JSON lines."""
+        lines = "".join(
+            json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans
+        )
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def _otlp_value(value: AttributeValue) -> dict[str, Any]:
+    """Encode an attribute value as an OTLP/JSON ``AnyValue``."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, AttributeValue]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)} for key, value in attributes.items()
+    ]
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    """Encode a span as an OTLP/JSON ``Span``."""
+    return {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent_id or "",
+        "name": span.name,
+        # SPAN_KIND_SERVER for request roots, SPAN_KIND_INTERNAL otherwise
+        "kind": 2 if span.parent_id is None else 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": (
+            {"code": 2, "message": span.error}
+            if span.error is not None
+            else {"code": 0}
+        ),
+    }
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts spans to an OpenTelemetry collector using OTLP/HTTP with JSON.
+
+    Uses only the standard library, so any OTLP receiver (the OpenTelemetry
+    Collector, Jaeger, Tempo) can ingest traces without extra dependencies.
+    """
+
+    name = "otlp"
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def encode(self, spans: list[Span]) -> dict[str, Any]:
+        """Build an ``ExportTraceServiceRequest`` document."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.tracing"},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        """POST the spans to the collector."""
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.encode(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class Tracer(LoggingMixin):
+    """Records span trees per request and exports them in the background.
+
+    A trace is started for each request with the request ID as its trace ID,
+    and spans opened anywhere below it (including worker threads started
+    with ``asyncio.to_thread``, which copy the context) become its children.
+    Spans are buffered until the root span ends. The trace is then exported
+    if it was head-sampled at ``sample_rate`` or if the request took at least
+    ``slow_threshold`` seconds, so slow outliers are kept even at low sample
+    rates. Streaming responses hold the trace open until their body is
+    sent, so work done while streaming is part of the request. Exports run on a daemon thread through a bounded queue; when the
+    queue is full, traces are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter | None,
+        sample_rate: float = 1.0,
+        slow_threshold: float = 0.0,
+        queue_size: int = 1000,
+    ) -> None:
+        super().__init__()
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self._queue: queue.Queue[Trace | None] = queue.Queue(maxsize=queue_size)
+        self._worker: threading.Thread | None = None
+        self._started = 0
+        self._exported = 0
+        self._spans_exported = 0
+        self._dropped = 0
+        self._export_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether traces are recorded at all."""
+        return self.exporter is not None
+
+    @contextmanager
+    def start_trace(
+        self, name: str, trace_id: str, **attributes: AttributeValue
+    ) -> Iterator[Span | None]:
+        """Open the root span of a request's trace."""
+        sampled = self.enabled and random.random() < self.sample_rate
+        if not sampled and not (self.enabled and self.slow_threshold > 0):
+            yield None
+            return
+
+        self._started += 1
+        root = Span(name, trace_id, None, attributes)
+        trace = Trace(trace_id, sampled, root)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._release(trace)
+
+    def hold_trace(self) -> Callable[[], None] | None:
+        """
+        Keep the current trace open after its root span's block exits.
+
+        Returns:
+            A callable ending the hold, or None outside a trace
+        """
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        trace.hold()
+        return partial(self._release, trace)
+
+    def _release(self, trace: Trace) -> None:
+        """End the root span and export the trace once nothing holds it."""
+        if not trace.release():
+            return
+        root = trace.root
+        root.end_ns = time.time_ns()
+        trace.add(root)
+        if trace.sampled or root.duration >= self.slow_threshold:
+            self._enqueue(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: AttributeValue) -> Iterator[Span | None]:
+        """Open a child of the current span, or do nothing outside a trace."""
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+        parent = _current_span.get()
+        with self._span(
+            trace, name, parent.span_id if parent else None, attributes
+        ) as span:
+            yield span
+
+    @contextmanager
+    def _span(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: str | None,
+        attributes: dict[str, AttributeValue],
+    ) -> Iterator[Span]:
+        span = Span(name, trace.trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            trace.add(span)
+
+    def record_span(
+        self, name: str, start_ns: int, end_ns: int, **attributes: AttributeValue
+    ) -> None:
+        """Add an already finished child of the current span, e.g. a library timing."""
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace.trace_id,
+            parent.span_id if parent else None,
+            attributes,
+            start_ns=start_ns,
+        )
+        span.end_ns = end_ns
+        trace.add(span)
+
+    def _enqueue(self, trace: Trace) -> None:
+        """Hand a finished trace to the export thread."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self._dropped += 1
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._export_loop, name="trace-exporter", daemon=True
+            )
+            self._worker.start()
+
+    def _export_loop(self) -> None:
+        """Export queued traces in batches until the shutdown sentinel."""
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [trace for trace in batch if trace is not None]
+            if traces:
+                self._export(traces)
+            for _ in batch:
+                self._queue.task_done()
+            if None in batch:
+                return
+
+    def _export(self, traces: list[Trace]) -> None:
+        assert self.exporter is not None
+        spans = [span for trace in traces for span in trace.spans]
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            self._export_errors += 1
+            self.log_warning(
+                "Failed to export traces",
+                exporter=self.exporter.name,
+                trace_count=len(traces),
+                error=str(e),
+            )
+        else:
+            self._exported += len(traces)
+            self._spans_exported += len(spans)
+
+    def flush(self) -> None:
+        """Wait until every queued trace has been exported."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.join()
+
+    def shutdown(self) -> None:
+        """Export queued traces and stop the export thread."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        self._worker = None
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get sampling settings and export counters for the stats endpoint."""
+        return {
+            "enabled": self.enabled,
+            "exporter": self.exporter.name if self.exporter else None,
+            "sample_rate": self.sample_rate,
+            "slow_threshold": self.slow_threshold,
+            "traces_started": self._started,
+            "traces_exported": self._exported,
+            "spans_exported": self._spans_exported,
+            "traces_dropped": self._dropped,
+            "export_errors": self._export_errors,
+            "queue_depth": self._queue.qsize(),
+        }
+
+
+def record_stage_spans(result: Any) -> None:
+    """
+    Add det, cls and rec spans from the stage timings of a RapidOCR result.
+
+    RapidOCR runs the stages back to back and reports each one's duration,
+    so the spans are laid end to end ending now; stages that did not run
+    are skipped.
+    """
+    elapse_list = getattr(result, "elapse_list", None)
+    if not elapse_list:
+        return
+    durations = [
+        (name, int(elapse * 1e9))
+        for name, elapse in zip(
+            ("ocr.det", "ocr.cls", "ocr.rec"), elapse_list, strict=False
+        )
+        if elapse is not None
+    ]
+    start_ns = time.time_ns() - sum(duration for _, duration in durations)
+    for name, duration in durations:
+        tracer.record_span(name, start_ns, start_ns + duration)
+        start_ns += duration
+
+
+def create_exporter() -> SpanExporter | None:
+    """Build the exporter selected by ``TRACING_EXPORTER``."""
+    if not settings.tracing_enabled:
+        return None
+    if settings.tracing_exporter == "otlp":
+        return OTLPHttpSpanExporter(
+            settings.tracing_otlp_endpoint, settings.tracing_service_name
+        )
+    if settings.tracing_exporter == "jsonl":
+        return JsonlSpanExporter(settings.tracing_jsonl_path)
+    raise ValueError(f"Unknown tracing exporter: {settings.tracing_exporter}")
+
+
+# Global tracer instance
+tracer = Tracer(
+    create_exporter(),
+    sample_rate=settings.tracing_sample_rate,
+    slow_threshold=settings.tracing_slow_threshold,
+    queue_size=settings.tracing_queue_size,
+)
@@ -0,0 +1,36 @@
+"""Synthetic warmup images for priming OCR engines before serving traffic."""
+
+from typing import Any
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Text drawn on warmup images so detection, classification and recognition all run
+WARMUP_TEXT = "RapidOCR warmup 0123456789 ABCDEFGHIJ"
+
+
+def make_synthetic_image(long_side: int) -> np.ndarray:
+    """Create a landscape page with rows of printed text at the given size."""
+    width = max(long_side, 64)
+    height = max(width * 3 // 4, 48)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+
+    font_size = max(12, width // 40)
+    font = ImageFont.load_default(size=font_size)
+    line_height = font_size * 2
+    for row, y in enumerate(range(line_height // 2, height - font_size, line_height)):
+        draw.text((font_size, y), f"{row} {WARMUP_TEXT}", fill="black", font=font)
+
+    return np.asarray(image)
+
+
+def make_warmup_images(sizes: list[int]) -> list[np.ndarray]:
+    """Create one synthetic image per configured size."""
+    return [make_synthetic_image(size) for size in sizes]
+
+
+def warm_engine(engine: Any, images: list[np.ndarray]) -> None:
+    """Run every warmup image through an engine, discarding the results."""
+    for image in images:
+        engine(image)
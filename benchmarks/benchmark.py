@@ -0,0 +1,163 @@
+"""Compare OCR model profiles on the bundled evaluation set.
+
+Each profile runs in its own process so the reported memory only covers the
+engine it loads. For every profile the script reports request latency, the
+resident memory taken by the loaded models and the character accuracy
+against ``eval_set/labels.json``, together with the deltas to the
+``accurate`` profile.
+
+Usage:
+    uv run python benchmarks/benchmark.py [--profiles accurate fast] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+EVAL_SET_DIR = BENCHMARK_DIR / "eval_set"
+PROJECT_ROOT = BENCHMARK_DIR.parent
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Get the Levenshtein distance between two strings."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def normalize_text(text: str) -> str:
+    """Drop whitespace so line splitting differences are not counted as errors."""
+    return "".join(text.split())
+
+
+def char_accuracy(predictions: dict[str, str], labels: dict[str, str]) -> float:
+    """Get 1 - character error rate over the whole evaluation set."""
+    errors = 0
+    total = 0
+    for name, label in labels.items():
+        expected = normalize_text(label)
+        errors += edit_distance(normalize_text(predictions.get(name, "")), expected)
+        total += len(expected)
+    return max(0.0, 1.0 - errors / total) if total else 0.0
+
+
+def run_profile(profile: str, repeat: int) -> dict[str, Any]:
+    """Load one profile in this process and measure it on the evaluation set."""
+    os.environ["OCR_MODEL_PROFILE"] = profile
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    import rapidocr  # noqa: F401  # Exclude library import cost from model memory
+
+    from app.engine_pool import get_process_rss
+
+    rss_before = get_process_rss()
+    load_start = time.time()
+
+    from app.ocr_service import ocr_service
+
+    asyncio.run(ocr_service.warmup())
+    load_time = time.time() - load_start
+    rss_loaded = get_process_rss()
+
+    labels = json.loads((EVAL_SET_DIR / "labels.json").read_text(encoding="utf-8"))
+    latencies: list[float] = []
+    predictions: dict[str, str] = {}
+
+    async def measure() -> None:
+        for _ in range(repeat):
+            for name in labels:
+                start = time.perf_counter()
+                result = await ocr_service.process_image(
+                    EVAL_SET_DIR / name, name, name, profile
+                )
+                latencies.append(time.perf_counter() - start)
+                predictions[name] = result.Context
+
+    asyncio.run(measure())
+
+    return {
+        "profile": profile,
+        "load_time": load_time,
+        "model_memory_mb": (rss_loaded - rss_before) / (1024 * 1024),
+        "peak_rss_mb": get_process_rss() / (1024 * 1024),
+        "latency_mean_ms": statistics.mean(latencies) * 1000,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "char_accuracy": char_accuracy(predictions, labels),
+        "predictions": predictions,
+    }
+
+
+def run_in_subprocess(profile: str, repeat: int) -> dict[str, Any]:
+    """Run a single profile benchmark in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, __file__, "--worker", profile, "--repeat", str(repeat)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PROJECT_ROOT,
+    )
+    result: dict[str, Any] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result
+
+
+def print_report(results: list[dict[str, Any]]) -> None:
+    """Print profile results with deltas relative to the first profile."""
+    baseline = results[0]
+    header = (
+        f"{'profile':<10} {'mean ms':>9} {'p50 ms':>9} {'speedup':>8} "
+        f"{'mem MB':>8} {'Δ mem':>8} {'accuracy':>9} {'Δ acc':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        speedup = baseline["latency_mean_ms"] / result["latency_mean_ms"]
+        memory_delta = result["model_memory_mb"] - baseline["model_memory_mb"]
+        accuracy_delta = result["char_accuracy"] - baseline["char_accuracy"]
+        print(
+            f"{result['profile']:<10} {result['latency_mean_ms']:>9.1f} "
+            f"{result['latency_p50_ms']:>9.1f} {speedup:>7.2f}x "
+            f"{result['model_memory_mb']:>8.1f} {memory_delta:>+8.1f} "
+            f"{result['char_accuracy']:>9.2%} {accuracy_delta * 100:>+7.2f}pp"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["accurate", "fast"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print raw results")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_profile(args.worker, args.repeat), ensure_ascii=False))
+        return
+
+    results = [run_in_subprocess(profile, args.repeat) for profile in args.profiles]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compare engine pool throughput with and without CPU pinning.
+
+Each configuration runs in its own process: the service is loaded with
+``CPU_AFFINITY_ENABLED`` on or off and the bundled evaluation set is sent
+through the engine pool with enough concurrent requests to keep every worker
+busy. The script reports throughput, latency percentiles and the planned
+worker placement, so the effect of NUMA-local core sets can be compared on a
+given host. On single-socket machines the gain comes only from avoiding
+thread migration and oversubscription; on multi-socket hosts it also covers
+cross-socket memory traffic.
+
+Usage:
+    uv run python benchmarks/cpu_affinity.py [--pool-size 4] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+EVAL_SET_DIR = BENCHMARK_DIR / "eval_set"
+PROJECT_ROOT = BENCHMARK_DIR.parent
+
+
+def run_configuration(pinned: bool, pool_size: int, repeat: int) -> dict[str, Any]:
+    """Load the service in this process and saturate its engine pool."""
+    os.environ["CPU_AFFINITY_ENABLED"] = "true" if pinned else "false"
+    os.environ["OCR_POOL_SIZE"] = str(pool_size)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("NEAR_DUPLICATE_ENABLED", "false")
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    from app.cpu_topology import cpu_placement
+    from app.ocr_service import ocr_service
+
+    labels = json.loads((EVAL_SET_DIR / "labels.json").read_text(encoding="utf-8"))
+    names = list(labels) * repeat
+    latencies: list[float] = []
+
+    async def measure(name: str) -> None:
+        start = time.perf_counter()
+        await ocr_service.process_image(EVAL_SET_DIR / name, name, name)
+        latencies.append(time.perf_counter() - start)
+
+    async def saturate() -> float:
+        await ocr_service.warmup()
+        start = time.perf_counter()
+        # Two requests per worker keep the pool busy without unbounded queueing
+        limit = asyncio.Semaphore(pool_size * 2)
+
+        async def bounded(name: str) -> None:
+            async with limit:
+                await measure(name)
+
+        await asyncio.gather(*(bounded(name) for name in names))
+        return time.perf_counter() - start
+
+    wall_time = asyncio.run(saturate())
+    latencies.sort()
+
+    return {
+        "pinned": pinned,
+        "pool_size": pool_size,
+        "images": len(latencies),
+        "throughput": len(latencies) / wall_time,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "topology": cpu_placement.get_stats(),
+    }
+
+
+def run_in_subprocess(pinned: bool, pool_size: int, repeat: int) -> dict[str, Any]:
+    """Run a single configuration in a fresh interpreter."""
+    args = [sys.executable, __file__, "--pool-size", str(pool_size)]
+    args += ["--repeat", str(repeat), "--worker", "pinned" if pinned else "unpinned"]
+    completed = subprocess.run(
+        args, capture_output=True, text=True, check=True, cwd=PROJECT_ROOT
+    )
+    result: dict[str, Any] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result
+
+
+def print_report(results: list[dict[str, Any]]) -> None:
+    """Print each configuration with its speedup over the unpinned baseline."""
+    baseline = results[0]
+    topology = results[-1]["topology"]
+    print(f"NUMA nodes: {len(topology['numa_nodes'])}, CPUs: {topology['cpu_count']}")
+    for pool, workers in topology["pools"].items():
+        for worker in workers:
+            print(
+                f"  {pool} worker {worker['worker_id']}: node {worker['node']} "
+                f"cpus {worker['cpus']}"
+            )
+    header = (
+        f"{'placement':<10} {'workers':>8} {'img/s':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'speedup':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        speedup = result["throughput"] / baseline["throughput"]
+        print(
+            f"{'pinned' if result['pinned'] else 'unpinned':<10} "
+            f"{result['pool_size']:>8} {result['throughput']:>8.2f} "
+            f"{result['latency_p50_ms']:>9.1f} {result['latency_p95_ms']:>9.1f} "
+            f"{speedup:>7.2f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print raw results")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_configuration(args.worker == "pinned", args.pool_size, args.repeat)
+        print(json.dumps(result))
+        return
+
+    results = [
+        run_in_subprocess(pinned, args.pool_size, args.repeat)
+        for pinned in (False, True)
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
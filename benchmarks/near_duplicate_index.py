@@ -0,0 +1,97 @@
+"""Measure near-duplicate cache lookups against a large number of entries.
+
+Fills a cache with random fingerprints and reports insert throughput, the
+lookup latency for misses and for near-duplicate hits, and the memory the
+entries take. Random hashes spread evenly over the index buckets; real
+scans cluster around templates, so expect larger buckets in production.
+
+Usage:
+    uv run python benchmarks/near_duplicate_index.py [--entries 1000000]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.engine_pool import get_process_rss  # noqa: E402
+from app.near_duplicate import Fingerprint, NearDuplicateCache  # noqa: E402
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    """Flip ``count`` random bits of a 64-bit hash."""
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--max-distance", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cache = NearDuplicateCache(
+        max_entries=args.entries,
+        max_distance=args.max_distance,
+        verify_max_ratio=0.1,
+        aspect_tolerance=0.02,
+        ttl=86400,
+    )
+    fingerprints = [
+        Fingerprint(rng.getrandbits(64), rng.getrandbits(256), 1.414)
+        for _ in range(args.entries)
+    ]
+
+    rss_before = get_process_rss()
+    start_time = time.perf_counter()
+    for number, fingerprint in enumerate(fingerprints):
+        cache.insert("ch|accurate", fingerprint, "text", str(number))
+    insert_time = time.perf_counter() - start_time
+    memory_mb = (get_process_rss() - rss_before) / (1024 * 1024)
+
+    def measure(queries: list[Fingerprint]) -> tuple[float, float, int]:
+        latencies = []
+        hits = 0
+        for query in queries:
+            lookup_start = time.perf_counter()
+            hits += cache.lookup("ch|accurate", query) is not None
+            latencies.append((time.perf_counter() - lookup_start) * 1e6)
+        latencies.sort()
+        return (
+            statistics.median(latencies),
+            latencies[int(len(latencies) * 0.99)],
+            hits,
+        )
+
+    misses = [
+        Fingerprint(rng.getrandbits(64), rng.getrandbits(256), 1.414)
+        for _ in range(args.queries)
+    ]
+    near = [
+        fingerprint._replace(
+            hash=flip_bits(fingerprint.hash, rng.randint(0, args.max_distance), rng)
+        )
+        for fingerprint in rng.sample(fingerprints, args.queries)
+    ]
+
+    print(
+        f"{args.entries} entries: insert {args.entries / insert_time:,.0f}/s, "
+        f"~{memory_mb:.0f} MB"
+    )
+    for label, queries in (("miss", misses), ("near-duplicate", near)):
+        p50, p99, hits = measure(queries)
+        print(
+            f"{label:>15} lookup: p50 {p50:.1f} us, p99 {p99:.1f} us, "
+            f"hits {hits}/{len(queries)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
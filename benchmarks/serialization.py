@@ -0,0 +1,191 @@
+"""Compare response encoders and compression settings on synthetic OCR results.
+
+For responses of increasing size (pages x lines per page) the script
+reports the time FastAPI's default ``jsonable_encoder`` + ``json.dumps``
+path, pydantic's ``model_dump_json`` and orjson take to serialize an
+``OCRResponse``, and for each gzip and zstd level the compression ratio
+and CPU time. With msgpack installed it then compares the size and
+encode/decode time of the JSON, MessagePack and columnar formats for the
+same responses with per-line boxes.
+
+Usage:
+    uv run --extra performance python benchmarks/serialization.py
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.codecs import (  # noqa: E402
+    COLUMNAR_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    decode_response,
+    encode_response,
+)
+from app.models import OCRResponse, OCRResult, TextLineResult  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def make_response(pages: int, lines: int, with_lines: bool = False) -> OCRResponse:
+    """Create a response shaped like a multi-page document scan."""
+    rng = random.Random(0)
+
+    def page_lines(page: int) -> list[TextLineResult]:
+        return [
+            TextLineResult(
+                text=f"第 {line} 行：發票號碼 AB-{rng.randrange(10**8):08d} "
+                f"金額 NT$ {rng.randrange(100000)} 頁 {page}",
+                score=rng.uniform(0.6, 1.0),
+                box=[
+                    [40.0, 30.0 * line],
+                    [840.0, 30.0 * line],
+                    [840.0, 30.0 * line + 24],
+                    [40.0, 30.0 * line + 24],
+                ],
+            )
+            for line in range(lines)
+        ]
+
+    def page_result(page: int) -> OCRResult:
+        text_lines = page_lines(page)
+        return OCRResult(
+            FileName=f"page-{page:03d}.png",
+            UUID=f"550e8400-e29b-41d4-a716-{page:012d}",
+            Context="\n".join(line.text for line in text_lines),
+            Lines=text_lines if with_lines else None,
+        )
+
+    return OCRResponse(
+        results=[page_result(page) for page in range(pages)],
+        processing_time=1.23,
+        gpu_used=False,
+        model_profile="accurate",
+        lang="ch",
+    )
+
+
+def measure(func: Callable[[], bytes], min_time: float = 0.2) -> float:
+    """Get the mean seconds per call."""
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= min_time:
+            return elapsed / number
+        number *= 2
+
+
+def compare_formats(response: OCRResponse) -> None:
+    """Print the size and encode/decode time of each response format."""
+    json_body = response.model_dump_json().encode()
+    formats: dict[str, tuple[Callable[[], bytes], Callable[[bytes], Any]]] = {
+        "json": (
+            lambda: orjson.dumps(response.model_dump()) if orjson else json_body,
+            lambda body: decode_response(body, "application/json"),
+        )
+    }
+    for name, media_type in (
+        ("msgpack", MSGPACK_MEDIA_TYPE),
+        ("columnar", COLUMNAR_MEDIA_TYPE),
+    ):
+        formats[name] = (
+            lambda m=media_type: encode_response(response, m),
+            lambda body, m=media_type: decode_response(body, m),
+        )
+
+    for name, (encode, decode) in formats.items():
+        body = encode()
+        encode_seconds = measure(encode)
+        decode_seconds = measure(lambda body=body, decode=decode: decode(body))
+        print(
+            f"  {name:>8}: {len(body) / 1024:8.1f} KiB "
+            f"({len(body) / len(json_body):4.0%} of JSON), "
+            f"encode {encode_seconds * 1e3:7.2f} ms, decode {decode_seconds * 1e3:7.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", default=["1x20", "10x100", "50x200"], help="PAGESxLINES"
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        pages, lines = (int(value) for value in size.split("x"))
+        response = make_response(pages, lines)
+
+        encoders: dict[str, Callable[[], bytes]] = {
+            "fastapi": lambda r=response: json.dumps(
+                jsonable_encoder(r), ensure_ascii=False, separators=(",", ":")
+            ).encode(),
+            "pydantic": lambda r=response: r.model_dump_json().encode(),
+        }
+        if orjson is not None:
+            encoders["orjson"] = lambda r=response: orjson.dumps(r.model_dump())
+
+        body = encoders["pydantic"]()
+        print(f"\n{size}: {len(body) / 1024:.1f} KiB JSON")
+        baseline = measure(encoders["fastapi"])
+        for name, encoder in encoders.items():
+            seconds = measure(encoder)
+            print(
+                f"  encode {name:>8}: {seconds * 1e6:9.1f} us "
+                f"({baseline / seconds:4.1f}x vs fastapi)"
+            )
+
+        compressors: dict[str, Callable[[], bytes]] = {
+            f"gzip-{level}": lambda level=level, body=body: gzip.compress(
+                body, compresslevel=level, mtime=0
+            )
+            for level in (1, 6, 9)
+        }
+        if zstandard is not None:
+            for level in (1, 3, 9):
+                compressor = zstandard.ZstdCompressor(level=level)
+                compressors[f"zstd-{level}"] = lambda c=compressor, body=body: (
+                    c.compress(body)
+                )
+
+        for name, compressor in compressors.items():
+            seconds = measure(compressor)
+            ratio = len(body) / len(compressor())
+            throughput = len(body) / seconds / 1024 / 1024
+            print(
+                f"  {name:>8}: ratio {ratio:5.1f}x, {seconds * 1e6:9.1f} us "
+                f"({throughput:6.0f} MiB/s)"
+            )
+
+    if msgpack is None:
+        return
+    for size in args.sizes:
+        pages, lines = (int(value) for value in size.split("x"))
+        print(f"\n{size} with line boxes:")
+        compare_formats(make_response(pages, lines, with_lines=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Add the src directory to the Python path for imports
@@ -13,3 +14,5 @@ os.environ["LOG_LEVEL"] = "DEBUG"
 os.environ["TEMP_DIR"] = "test_temp"
 os.environ["MAX_FILES"] = "5"  # Lower limit for testing
 os.environ["CLEANUP_INTERVAL"] = "60"  # Shorter interval for testing
+os.environ["WARMUP_SIZES"] = "[320]"  # Single small warmup image for testing
+os.environ["MODEL_CACHE_DIR"] = tempfile.mkdtemp(prefix="rapidocr-model-cache-")
@@ -0,0 +1,227 @@
+"""Tests for startup autotuning of pool size and intra-op threads."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.autotune import (
+    Autotuner,
+    TuningCandidate,
+    TuningMeasurement,
+    benchmark_candidate,
+    candidate_configs,
+    fingerprint_key,
+    host_fingerprint,
+    select_best,
+)
+from app.cpu_topology import (
+    NumaNode,
+    affinity_supported,
+    available_cpus,
+    plan_placement,
+)
+
+
+class FakeEngine:
+    """Stand-in engine whose latency shrinks with its intra-op threads."""
+
+    def __init__(self, threads: int) -> None:
+        self.threads = threads
+
+    def __call__(self, image: np.ndarray) -> None:
+        time.sleep(0.004 / self.threads)
+
+
+class EngineFactory:
+    """Counts the engines built for each thread count."""
+
+    def __init__(self) -> None:
+        self.built: list[int] = []
+
+    def __call__(self, threads: int) -> FakeEngine:
+        self.built.append(threads)
+        return FakeEngine(threads)
+
+
+def make_image(long_side: int) -> np.ndarray:
+    """Create a blank synthetic image."""
+    return np.zeros((long_side // 2, long_side, 3), dtype=np.uint8)
+
+
+def make_measurement(
+    pool_size: int, threads: int, throughput: float, p95_latency: float
+) -> TuningMeasurement:
+    """Create a measurement with the given results."""
+    return TuningMeasurement(
+        TuningCandidate(pool_size, threads), 10, throughput, p95_latency, p95_latency
+    )
+
+
+def make_autotuner(cache_path: Path, **kwargs: Any) -> Autotuner:
+    """Create an autotuner with small fixed candidates."""
+    options: dict[str, Any] = {
+        "latency_target": 0.0,
+        "pool_sizes": [1, 2],
+        "thread_counts": [1],
+        "image_sizes": [64],
+        "rounds": 2,
+        **kwargs,
+    }
+    return Autotuner(cache_path, **options)
+
+
+class TestCandidates:
+    """Test candidate generation and selection."""
+
+    def test_automatic_candidates_share_cpus(self) -> None:
+        """Test that automatic candidates split the CPUs evenly between engines."""
+        assert candidate_configs(8, [], []) == [
+            TuningCandidate(1, 8),
+            TuningCandidate(2, 4),
+            TuningCandidate(4, 2),
+            TuningCandidate(8, 1),
+        ]
+
+    def test_oversubscribed_candidates_are_skipped(self) -> None:
+        """Test that pools needing more threads than CPUs are not tried."""
+        candidates = candidate_configs(4, [1, 2, 4], [2, 4])
+
+        assert candidates == [
+            TuningCandidate(1, 2),
+            TuningCandidate(1, 4),
+            TuningCandidate(2, 2),
+        ]
+
+    def test_select_best_under_latency_target(self) -> None:
+        """Test that the fastest candidate meeting the latency target wins."""
+        measurements = [
+            make_measurement(1, 4, throughput=5.0, p95_latency=0.2),
+            make_measurement(2, 2, throughput=8.0, p95_latency=0.4),
+            make_measurement(4, 1, throughput=9.0, p95_latency=0.9),
+        ]
+
+        assert select_best(measurements, 0.5).candidate == TuningCandidate(2, 2)
+        assert select_best(measurements, 0.0).candidate == TuningCandidate(4, 1)
+
+    def test_select_best_falls_back_to_lowest_latency(self) -> None:
+        """Test that the lowest-latency candidate wins when none meets the target."""
+        measurements = [
+            make_measurement(1, 4, throughput=5.0, p95_latency=0.3),
+            make_measurement(2, 2, throughput=8.0, p95_latency=0.4),
+        ]
+
+        assert select_best(measurements, 0.1).candidate == TuningCandidate(1, 4)
+
+    def test_fingerprint_depends_on_configuration(self) -> None:
+        """Test that changed tuning inputs produce a different cache key."""
+        providers = ["CPUExecutionProvider"]
+
+        assert fingerprint_key(host_fingerprint(providers, lang="ch")) == (
+            fingerprint_key(host_fingerprint(providers, lang="ch"))
+        )
+        assert fingerprint_key(host_fingerprint(providers, lang="ch")) != (
+            fingerprint_key(host_fingerprint(providers, lang="en"))
+        )
+
+
+class TestAutotuner:
+    """Test benchmarking and the per-host decision cache."""
+
+    @pytest.fixture(autouse=True)
+    def four_cpus(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Make every candidate fit regardless of the test machine."""
+        monkeypatch.setattr("app.autotune.available_cpus", lambda: 4)
+
+    def test_tune_benchmarks_and_caches(self, tmp_path: Path) -> None:
+        """Test that a first run benchmarks every candidate and saves the decision."""
+        cache_path = tmp_path / "autotune.json"
+        factory = EngineFactory()
+
+        decision = make_autotuner(cache_path).tune(
+            ["CPUExecutionProvider"], factory, make_image
+        )
+
+        assert decision["source"] == "benchmark"
+        assert decision["pool_size"] == 2
+        assert decision["meets_target"] is True
+        assert len(decision["measurements"]) == 2
+        # One engine for the single-engine pool, two for the pair
+        assert factory.built == [1, 1, 1]
+        cached = json.loads(cache_path.read_text())
+        assert cached["decisions"][decision["key"]]["pool_size"] == 2
+
+    def test_cached_decision_skips_benchmark(self, tmp_path: Path) -> None:
+        """Test that a later start on the same host reuses the decision."""
+        cache_path = tmp_path / "autotune.json"
+        first = make_autotuner(cache_path).tune(
+            ["CPUExecutionProvider"], EngineFactory(), make_image
+        )
+        factory = EngineFactory()
+        autotuner = make_autotuner(cache_path)
+
+        decision = autotuner.tune(["CPUExecutionProvider"], factory, make_image)
+
+        assert decision["source"] == "cache"
+        assert decision["key"] == first["key"]
+        assert factory.built == []
+        stats = autotuner.get_stats()
+        assert stats["applied"] is True
+        assert stats["pool_size"] == first["pool_size"]
+
+    def test_force_and_changed_settings_benchmark_again(self, tmp_path: Path) -> None:
+        """Test that forcing or changing the candidates invalidates the cache."""
+        cache_path = tmp_path / "autotune.json"
+        make_autotuner(cache_path).tune(
+            ["CPUExecutionProvider"], EngineFactory(), make_image
+        )
+
+        forced = make_autotuner(cache_path, force=True).tune(
+            ["CPUExecutionProvider"], EngineFactory(), make_image
+        )
+        changed = make_autotuner(cache_path, pool_sizes=[1]).tune(
+            ["CPUExecutionProvider"], EngineFactory(), make_image
+        )
+
+        assert forced["source"] == "benchmark"
+        assert changed["source"] == "benchmark"
+        assert changed["pool_size"] == 1
+        assert len(json.loads(cache_path.read_text())["decisions"]) == 2
+
+    def test_corrupt_cache_is_ignored(self, tmp_path: Path) -> None:
+        """Test that an unreadable cache file leads to a fresh benchmark."""
+        cache_path = tmp_path / "autotune.json"
+        cache_path.write_text("{not json")
+
+        decision = make_autotuner(cache_path).tune(
+            ["CPUExecutionProvider"], EngineFactory(), make_image
+        )
+
+        assert decision["source"] == "benchmark"
+
+    @pytest.mark.skipif(not affinity_supported(), reason="CPU affinity unsupported")
+    def test_benchmark_uses_worker_placement(self) -> None:
+        """Test that candidates run pinned, with threads capped to the core set."""
+        cpu = min(available_cpus())
+        placements = plan_placement([NumaNode(0, (cpu,))], 1)
+        affinities: list[set[int]] = []
+        threads: list[int] = []
+        before = os.sched_getaffinity(0)
+
+        def factory(thread_count: int) -> Any:
+            threads.append(thread_count)
+            affinities.append(os.sched_getaffinity(0))
+            return lambda image: affinities.append(os.sched_getaffinity(0))
+
+        measurement = benchmark_candidate(
+            TuningCandidate(1, 4), factory, [make_image(64)], 1, placements
+        )
+
+        assert measurement.images == 1
+        assert threads == [1]
+        assert all(affinity == {cpu} for affinity in affinities)
+        assert os.sched_getaffinity(0) == before
@@ -0,0 +1,89 @@
+"""Tests for coarse-to-fine cascade OCR."""
+
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from app.cascade import crop_region, run_cascade, select_refinements
+
+
+def make_box(x: float, y: float, width: float, height: float) -> list[list[float]]:
+    """Create an axis-aligned text quadrilateral."""
+    return [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+
+
+class FakeCascadeEngine:
+    """Stand-in for RapidOCR returning fixed coarse and refinement readings."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    def __call__(self, image: Image.Image, **kwargs: Any) -> SimpleNamespace:
+        self.calls.append({"size": image.size, **kwargs})
+        if not kwargs["use_det"]:
+            return SimpleNamespace(txts=("fine print",), scores=(0.97,))
+        return SimpleNamespace(
+            boxes=np.array(
+                [make_box(10, 10, 200, 30), make_box(10, 60, 200, 6)], dtype=float
+            ),
+            txts=("Heading", "f1ne pr1nt"),
+            scores=(0.99, 0.40),
+        )
+
+
+class TestCascade:
+    """Test region selection, cropping and result merging."""
+
+    def test_select_refinements(self) -> None:
+        """Test that low-confidence and undersized regions are selected."""
+        boxes = np.array(
+            [
+                make_box(0, 0, 100, 30),
+                make_box(0, 40, 100, 30),
+                make_box(0, 80, 100, 8),
+            ],
+            dtype=float,
+        )
+
+        assert select_refinements(boxes, [0.99, 0.5, 0.99], 0.9, 16) == [1, 2]
+
+    def test_crop_region_maps_to_full_resolution(self) -> None:
+        """Test that coarse boxes are scaled up and padded within the image."""
+        image = Image.new("RGB", (1000, 500), "white")
+
+        crop = crop_region(image, np.array(make_box(10, 10, 100, 20)), 0.5)
+
+        # 200x40 at full resolution plus 10px padding on each side
+        assert crop.size == (220, 60)
+
+    def test_run_cascade_refines_hard_regions(self) -> None:
+        """Test that only hard regions are re-recognized at full resolution."""
+        engine = FakeCascadeEngine()
+        image = Image.new("RGB", (2000, 1000), "white")
+        kwargs = {"use_det": True, "use_rec": True, "text_score": 0.5}
+
+        lines, info = run_cascade(engine, image, kwargs, 1000, 0.9, 16)
+
+        assert lines == ["Heading", "fine print"]
+        assert info.scale == 0.5
+        assert info.regions == 2
+        assert info.refined_regions == 1
+        assert engine.calls[0]["size"] == (1000, 500)
+        assert engine.calls[0]["text_score"] == 0.0
+        assert engine.calls[1]["use_det"] is False
+
+    def test_small_images_skip_refinement(self) -> None:
+        """Test that images already within the coarse size run a single pass."""
+        engine = FakeCascadeEngine()
+        image = Image.new("RGB", (800, 400), "white")
+        kwargs = {"use_det": True, "use_rec": True, "text_score": 0.5}
+
+        lines, info = run_cascade(engine, image, kwargs, 1000, 0.9, 16)
+
+        # The weak line is dropped by the request's text_score instead
+        assert lines == ["Heading"]
+        assert info.scale == 1.0
+        assert info.refined_regions == 0
+        assert len(engine.calls) == 1
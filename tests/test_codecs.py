@@ -0,0 +1,136 @@
+"""Tests for the binary response formats and Accept negotiation."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app import codecs
+from app.codecs import (
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    decode_response,
+    encode_response,
+)
+from app.models import (
+    CascadeInfo,
+    CostInfo,
+    DuplicateInfo,
+    OCRResponse,
+    OCRResult,
+    TextLineResult,
+)
+from app.serialization import choose_media_type, encode_json
+
+pytestmark = pytest.mark.skipif(codecs.msgpack is None, reason="msgpack missing")
+
+
+def make_response() -> OCRResponse:
+    """Create a response mixing results with, without and with empty lines."""
+    lines = [
+        TextLineResult(
+            text=f"第 {i} 行",
+            score=0.5 + i / 4,
+            box=[
+                [10.0, 20.0 * i],
+                [90.5, 20.0 * i],
+                [90.5, 20.0 * i + 16],
+                [10.0, 20.0 * i + 16],
+            ],
+        )
+        for i in range(3)
+    ]
+    return OCRResponse(
+        results=[
+            OCRResult(
+                FileName="a.png",
+                UUID="uuid-a",
+                Context="\n".join(line.text for line in lines),
+                Lines=lines,
+                Cascade=CascadeInfo(
+                    scale=0.5,
+                    coarse_time=0.1,
+                    refine_time=0.2,
+                    regions=3,
+                    refined_regions=1,
+                ),
+            ),
+            OCRResult(
+                FileName="b.png",
+                UUID="uuid-b",
+                Context="第 0 行",
+                Duplicate=DuplicateInfo(
+                    source_uuid="uuid-a", distance=2, similarity=0.97
+                ),
+                Cost=CostInfo(width=1600, height=1200, megapixels=1.92, units=1.92),
+            ),
+            OCRResult(FileName="a.png", UUID="uuid-c", Context="", Lines=[]),
+        ],
+        processing_time=1.5,
+        gpu_used=False,
+        model_profile="accurate",
+        lang="ch",
+        cost_units=2.12,
+    )
+
+
+class TestCodecs:
+    """Test encoding and decoding round trips."""
+
+    @pytest.mark.parametrize(
+        "media_type", [JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE]
+    )
+    def test_round_trip(self, media_type: str) -> None:
+        """Test that every format decodes back to the same response."""
+        response = make_response()
+        if media_type == JSON_MEDIA_TYPE:
+            body = encode_json(response)
+        else:
+            body = encode_response(response, media_type)
+
+        # Values chosen to be exact in float32
+        assert decode_response(body, media_type) == response
+
+    def test_columnar_is_compact(self) -> None:
+        """Test that repeated strings and line boxes shrink the columnar body."""
+        response = make_response()
+        response.results *= 50
+
+        columnar = encode_response(response, COLUMNAR_MEDIA_TYPE)
+
+        assert len(columnar) < len(encode_json(response)) / 3
+        assert decode_response(columnar, COLUMNAR_MEDIA_TYPE) == response
+
+    def test_columnar_rejects_other_documents(self) -> None:
+        """Test that plain MessagePack is not mistaken for the columnar layout."""
+        body = encode_response(make_response(), MSGPACK_MEDIA_TYPE)
+
+        with pytest.raises(ValueError, match="columnar"):
+            decode_response(body, COLUMNAR_MEDIA_TYPE)
+
+
+class TestMediaTypeNegotiation:
+    """Test Accept header handling."""
+
+    def test_binary_formats_are_opt_in(self) -> None:
+        """Test that wildcards and missing headers get JSON."""
+        assert choose_media_type(None) == JSON_MEDIA_TYPE
+        assert choose_media_type("*/*") == JSON_MEDIA_TYPE
+        assert choose_media_type("text/html") == JSON_MEDIA_TYPE
+        assert choose_media_type("application/x-msgpack") == MSGPACK_MEDIA_TYPE
+
+    def test_quality_values(self) -> None:
+        """Test that formats are chosen by quality with ties going to columnar."""
+        assert (
+            choose_media_type(f"{MSGPACK_MEDIA_TYPE}, {COLUMNAR_MEDIA_TYPE}")
+            == COLUMNAR_MEDIA_TYPE
+        )
+        assert (
+            choose_media_type(f"{MSGPACK_MEDIA_TYPE};q=0.5, application/json")
+            == JSON_MEDIA_TYPE
+        )
+
+    def test_json_without_msgpack(self) -> None:
+        """Test that binary requests fall back to JSON when msgpack is missing."""
+        with patch("app.codecs.msgpack", None):
+            assert choose_media_type(MSGPACK_MEDIA_TYPE) == JSON_MEDIA_TYPE
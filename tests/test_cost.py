@@ -0,0 +1,91 @@
+"""Tests for header-only image cost estimates and the cost budget."""
+
+import io
+
+from PIL import Image
+
+from app.config import settings
+from app.cost import (
+    CostBudget,
+    cost_units,
+    estimate_cost,
+    total_megapixels,
+    total_units,
+)
+
+
+def encode_image(size: tuple[int, int], format: str = "PNG") -> bytes:
+    """Encode a blank image of the given size."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "white").save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class TestCostEstimates:
+    """Test cases for image cost estimates."""
+
+    def test_cost_grows_with_pixels(self) -> None:
+        """Test that cost is megapixels with a floor for small images."""
+        assert cost_units(2000, 1000) == 2.0
+        assert cost_units(8000, 6000) == 48.0
+        assert cost_units(10, 10) == settings.cost_min_units
+
+    def test_downscaling_reduces_cost(self) -> None:
+        """Test that cost counts the pixels left after max_side_len."""
+        assert cost_units(4000, 2000, max_side_len=2000) == 2.0
+        assert cost_units(1000, 500, max_side_len=2000) == 0.5
+
+    def test_estimate_from_header(self) -> None:
+        """Test that bytes and streams are measured and streams rewound."""
+        content = encode_image((1600, 1200), "JPEG")
+        cost = estimate_cost(content)
+        assert cost is not None
+        assert (cost.width, cost.height) == (1600, 1200)
+        assert cost.megapixels == 1.92
+
+        stream = io.BytesIO(content)
+        assert estimate_cost(stream, max_side_len=800) is not None
+        assert stream.tell() == 0
+        assert stream.read() == content
+
+    def test_unreadable_image(self) -> None:
+        """Test that unreadable images have no estimate and count the minimum."""
+        stream = io.BytesIO(b"not an image")
+        assert estimate_cost(stream) is None
+        assert stream.tell() == 0
+
+        costs = [None, estimate_cost(encode_image((2000, 1000)))]
+        assert total_units(costs) == settings.cost_min_units + 2.0
+        assert total_megapixels(costs) == 2.0
+
+
+class TestCostBudget:
+    """Test cases for cost-based admission."""
+
+    def test_request_limit(self) -> None:
+        """Test the per-request cost limit; 0 disables it."""
+        assert CostBudget(max_request=10.0, max_in_flight=0.0).fits_request(10.0)
+        assert not CostBudget(max_request=10.0, max_in_flight=0.0).fits_request(10.5)
+        assert CostBudget(max_request=0.0, max_in_flight=0.0).fits_request(1000.0)
+
+    def test_in_flight_budget(self) -> None:
+        """Test that requests are shed while in-flight work fills the budget."""
+        budget = CostBudget(max_request=0.0, max_in_flight=10.0)
+        assert budget.try_admit(6.0)
+        assert not budget.try_admit(5.0)
+        assert budget.try_admit(4.0)
+
+        budget.release(6.0)
+        budget.release(4.0)
+        assert budget.in_flight == 0.0
+
+        stats = budget.get_stats()
+        assert stats["admitted"] == 2
+        assert stats["rejected"] == 1
+        assert stats["mean_request_units"] == 5.0
+
+    def test_oversized_request_runs_alone(self) -> None:
+        """Test that a request above the whole budget is admitted when idle."""
+        budget = CostBudget(max_request=0.0, max_in_flight=10.0)
+        assert budget.try_admit(50.0)
+        assert not budget.try_admit(1.0)
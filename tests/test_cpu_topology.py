@@ -0,0 +1,126 @@
+"""Tests for CPU topology discovery and engine worker placement."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from app.cpu_topology import (
+    CpuPlacement,
+    NumaNode,
+    affinity_supported,
+    available_cpus,
+    parse_cpu_list,
+    pinned,
+    plan_placement,
+    read_numa_nodes,
+)
+
+TWO_SOCKETS = [NumaNode(0, (0, 1, 2, 3)), NumaNode(1, (4, 5, 6, 7))]
+
+
+def write_node(root: Path, node_id: int, cpulist: str) -> None:
+    """Create a sysfs-like NUMA node directory."""
+    node_dir = root / f"node{node_id}"
+    node_dir.mkdir(parents=True)
+    (node_dir / "cpulist").write_text(f"{cpulist}\n")
+
+
+class TestTopology:
+    """Test parsing of the sysfs NUMA topology."""
+
+    def test_parse_cpu_list(self) -> None:
+        """Test that ranges and single CPUs are expanded."""
+        assert parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+        assert parse_cpu_list("") == []
+
+    def test_read_numa_nodes(self, tmp_path: Path) -> None:
+        """Test that nodes are read in order and limited to the allowed CPUs."""
+        write_node(tmp_path, 10, "8-11")
+        write_node(tmp_path, 1, "4-7")
+        write_node(tmp_path, 0, "0-3")
+
+        nodes = read_numa_nodes({0, 1, 4, 5, 6, 7}, tmp_path)
+
+        assert nodes == [NumaNode(0, (0, 1)), NumaNode(1, (4, 5, 6, 7))]
+
+    def test_missing_topology_is_one_node(self, tmp_path: Path) -> None:
+        """Test that hosts without sysfs NUMA nodes get a single node."""
+        assert read_numa_nodes({0, 1, 2}, tmp_path / "missing") == [
+            NumaNode(0, (0, 1, 2))
+        ]
+
+
+class TestPlacement:
+    """Test splitting CPUs into per-worker core sets."""
+
+    def test_workers_spread_across_nodes(self) -> None:
+        """Test that workers alternate between sockets with equal core sets."""
+        placements = plan_placement(TWO_SOCKETS, 2)
+
+        assert [(p.node_id, sorted(p.cpus)) for p in placements] == [
+            (0, [0, 1, 2, 3]),
+            (1, [4, 5, 6, 7]),
+        ]
+
+    def test_core_sets_do_not_cross_nodes(self) -> None:
+        """Test that the core count shrinks until every worker fits in a node."""
+        placements = plan_placement(TWO_SOCKETS, 3)
+
+        assert [(p.node_id, sorted(p.cpus)) for p in placements] == [
+            (0, [0, 1]),
+            (1, [4, 5]),
+            (0, [2, 3]),
+        ]
+
+    def test_cores_per_worker_limit(self) -> None:
+        """Test that a configured core count caps each core set."""
+        placements = plan_placement(TWO_SOCKETS, 2, cores_per_worker=1)
+
+        assert [sorted(p.cpus) for p in placements] == [[0], [4]]
+
+    def test_more_workers_than_cpus_share_cores(self) -> None:
+        """Test that core sets only repeat once every CPU is taken."""
+        placements = plan_placement([NumaNode(0, (0, 1))], 3)
+
+        assert [sorted(p.cpus) for p in placements] == [[0], [1], [0]]
+
+    def test_intra_op_threads_match_core_sets(self) -> None:
+        """Test that intra-op threads never exceed a worker's cores."""
+        placements = plan_placement(TWO_SOCKETS, 2)
+
+        assert CpuPlacement.intra_op_threads(placements, -1) == 4
+        assert CpuPlacement.intra_op_threads(placements, 2) == 2
+        assert CpuPlacement.intra_op_threads(placements, 16) == 4
+
+    def test_disabled_placement_plans_nothing(self) -> None:
+        """Test that no core sets are planned unless pinning is enabled."""
+        placement = CpuPlacement(enabled=False, cpus=[])
+
+        assert placement.plan(2) == []
+        assert placement.get_stats()["pools"] == {}
+
+
+@pytest.mark.skipif(not affinity_supported(), reason="CPU affinity unsupported")
+class TestPinning:
+    """Test pinning the calling thread to a core set."""
+
+    def test_pinned_restores_affinity(self) -> None:
+        """Test that the previous affinity is restored after the context."""
+        before = os.sched_getaffinity(0)
+        cpu = min(available_cpus())
+
+        with pinned(frozenset({cpu})):
+            assert os.sched_getaffinity(0) == {cpu}
+
+        assert os.sched_getaffinity(0) == before
+
+    def test_enabled_placement_reports_topology(self) -> None:
+        """Test that planned core sets appear in the stats."""
+        placement = CpuPlacement(enabled=True, cpus=[min(available_cpus())])
+
+        placements = placement.plan(1, name="ch:accurate")
+
+        stats = placement.get_stats()
+        assert stats["enabled"] is True
+        assert stats["pools"]["ch:accurate"][0]["cpus"] == sorted(placements[0].cpus)
@@ -0,0 +1,343 @@
+"""Tests for dispatcher mode, with local app instances as backends."""
+
+import asyncio
+import io
+from collections.abc import AsyncIterator
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from PIL import Image
+
+from app.dispatcher import Backend, Dispatcher, DispatchError, Upload, split_batch
+from app.lifecycle import ServiceLifecycle
+from app.main import app
+from app.routers import dispatch
+
+
+def create_upload(name: str, color: str = "white") -> Upload:
+    """Create a small PNG upload."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 50), color).save(buffer, format="PNG")
+    return Upload(name, buffer.getvalue(), "image/png")
+
+
+def create_failing_backend(status_code: int) -> FastAPI:
+    """Create a backend that reports ready and fails every OCR request."""
+    backend = FastAPI()
+
+    @backend.get("/health/ready")
+    async def ready() -> dict[str, object]:
+        return {"ready": True, "reason": None, "queue_depth": 0, "in_flight": 0}
+
+    @backend.post("/ocr/")
+    async def ocr() -> None:
+        raise HTTPException(status_code=status_code, detail="backend failure")
+
+    return backend
+
+
+def create_malformed_backend() -> FastAPI:
+    """Create a backend whose readiness report has no usable queue depth."""
+    backend = FastAPI()
+
+    @backend.get("/health/ready")
+    async def ready() -> dict[str, object]:
+        return {"ready": True, "reason": None, "queue_depth": None, "in_flight": 0}
+
+    return backend
+
+
+def create_limited_backend() -> FastAPI:
+    """Create a ready backend that rate limits every OCR request."""
+    backend = FastAPI()
+
+    @backend.get("/health/ready")
+    async def ready() -> dict[str, object]:
+        return {"ready": True, "reason": None, "queue_depth": 0, "in_flight": 0}
+
+    @backend.post("/ocr/")
+    async def ocr(request: Request) -> None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for {request.headers['X-Forwarded-For']}",
+            headers={"Retry-After": "3", "X-RateLimit-Limit-Requests": "1"},
+        )
+
+    return backend
+
+
+def refuse_connection(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("Connection refused", request=request)
+
+
+def create_dispatcher(backends: list[str], batch_size: int = 10) -> Dispatcher:
+    """Create a dispatcher that does not poll during the test."""
+    return Dispatcher(
+        backends, batch_size=batch_size, retries=2, timeout=30.0, poll_interval=60.0
+    )
+
+
+@pytest.fixture
+def ready_lifecycle() -> ServiceLifecycle:
+    """Report the local service instance as warmed up."""
+    lifecycle = ServiceLifecycle()
+    lifecycle.mark_warmup_complete(duration=0.1)
+    return lifecycle
+
+
+@pytest.fixture
+async def client(ready_lifecycle: ServiceLifecycle) -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP client routing backend hosts to local app instances."""
+    mounts = {
+        "http://good-a": httpx.ASGITransport(app=app),
+        "http://good-b": httpx.ASGITransport(app=app),
+        "http://failing": httpx.ASGITransport(app=create_failing_backend(503)),
+        "http://broken": httpx.ASGITransport(app=create_failing_backend(500)),
+        "http://limited": httpx.ASGITransport(app=create_limited_backend()),
+        "http://malformed": httpx.ASGITransport(app=create_malformed_backend()),
+        "http://down": httpx.MockTransport(refuse_connection),
+    }
+    with patch("app.routers.health.service_lifecycle", ready_lifecycle):
+        async with httpx.AsyncClient(mounts=mounts, timeout=30.0) as http_client:
+            yield http_client
+
+
+class TestBatching:
+    """Test cases for batch splitting and backend choice."""
+
+    def test_split_batch(self) -> None:
+        """Test that images are spread over backends within the batch size."""
+        assert split_batch(0, 2, 10) == []
+        assert split_batch(5, 2, 10) == [range(0, 3), range(3, 5)]
+        assert split_batch(25, 1, 10) == [range(0, 10), range(10, 20), range(20, 25)]
+        assert split_batch(3, 0, 10) == [range(0, 3)]
+
+    def test_choose_least_loaded(self) -> None:
+        """Test that the backend with the fewest outstanding images is chosen."""
+        dispatcher = create_dispatcher(["http://a", "http://b", "http://c"])
+        a, b, c = dispatcher.backends
+        for backend in dispatcher.backends:
+            backend.ready = True
+        a.outstanding = 4
+        b.queue_depth = 2
+        c.outstanding = 1
+
+        assert dispatcher.choose() is c
+        assert dispatcher.choose(exclude={c.url}) is b
+        c.ready = False
+        b.queue_depth = 5
+        assert dispatcher.choose() is a
+
+    def test_choose_ties_in_turn(self) -> None:
+        """Test that equally loaded backends are chosen in turn."""
+        dispatcher = create_dispatcher(["http://a", "http://b"])
+        for backend in dispatcher.backends:
+            backend.ready = True
+
+        chosen = [dispatcher.choose() for _ in range(4)]
+        assert [backend.url for backend in chosen if backend is not None] == [
+            "http://a",
+            "http://b",
+            "http://a",
+            "http://b",
+        ]
+        assert create_dispatcher(["http://a"]).choose() is None
+
+    def test_backend_load(self) -> None:
+        """Test that load counts outstanding and queued images."""
+        backend = Backend("http://a/")
+        backend.outstanding, backend.queue_depth = 3, 2
+
+        assert backend.url == "http://a"
+        assert backend.load == 5
+
+
+class TestDispatcher:
+    """Test cases for forwarding OCR work to local backends."""
+
+    async def test_poll_readiness(self, client: httpx.AsyncClient) -> None:
+        """Test that backend readiness and failures are picked up by polling."""
+        dispatcher = create_dispatcher(["http://good-a", "http://down"])
+        await dispatcher.start(client)
+        try:
+            good, down = dispatcher.backends
+            assert good.ready and good.reason is None
+            assert not down.ready and down.reason == "unreachable"
+            assert dispatcher.get_load()["available_workers"] == 1
+        finally:
+            await dispatcher.stop()
+
+    async def test_poll_malformed_report(self, client: httpx.AsyncClient) -> None:
+        """Test that a malformed report marks its backend and polling goes on."""
+        dispatcher = Dispatcher(
+            ["http://malformed", "http://good-a"],
+            batch_size=10,
+            retries=2,
+            timeout=30.0,
+            poll_interval=0.01,
+        )
+        await dispatcher.start(client)
+        try:
+            malformed, good = dispatcher.backends
+            assert not malformed.ready and malformed.reason == "invalid_report"
+            # A backend marked unavailable comes back on a later poll
+            good.mark_unavailable("unavailable")
+            for _ in range(100):
+                if good.ready:
+                    break
+                await asyncio.sleep(0.01)
+            assert good.ready
+            assert dispatcher._poller is not None and not dispatcher._poller.done()
+        finally:
+            await dispatcher.stop()
+
+    async def test_dispatch_splits_batch(self, client: httpx.AsyncClient) -> None:
+        """Test that a batch is split across backends and kept in order."""
+        dispatcher = create_dispatcher(["http://good-a", "http://good-b"], batch_size=2)
+        uploads = [create_upload(f"{i}.png") for i in range(5)]
+        await dispatcher.start(client)
+        try:
+            response = await dispatcher.dispatch(uploads, {}, {})
+        finally:
+            await dispatcher.stop()
+
+        assert [result.FileName for result in response.results] == [
+            upload.filename for upload in uploads
+        ]
+        assert response.cost_units is not None
+        stats = dispatcher.get_stats()
+        assert stats["batches"] == 3
+        assert sum(backend["images"] for backend in stats["backends"]) == 5
+        assert all(backend["images"] > 0 for backend in stats["backends"])
+        assert all(backend["outstanding_images"] == 0 for backend in stats["backends"])
+
+    @pytest.mark.parametrize(
+        "failing", ["http://failing", "http://broken", "http://down"]
+    )
+    async def test_dispatch_retries(
+        self, client: httpx.AsyncClient, failing: str
+    ) -> None:
+        """Test that a batch failing on one backend is retried on another."""
+        dispatcher = create_dispatcher([failing, "http://good-a"])
+        await dispatcher.start(client)
+        try:
+            # Send the first batch to the failing backend despite its poll
+            dispatcher.backends[0].ready = True
+            response = await dispatcher.dispatch([create_upload("a.png")], {}, {})
+        finally:
+            await dispatcher.stop()
+
+        assert len(response.results) == 1
+        stats = dispatcher.get_stats()
+        assert stats["retried_batches"] == 1
+        assert stats["backends"][0]["failures"] == 1
+        # 503 and unreachable backends get no work until polled ready again
+        assert dispatcher.backends[0].ready is (failing == "http://broken")
+
+    async def test_dispatch_client_error(self, client: httpx.AsyncClient) -> None:
+        """Test that invalid requests are returned without retrying."""
+        dispatcher = create_dispatcher(["http://good-a", "http://good-b"])
+        await dispatcher.start(client)
+        try:
+            with pytest.raises(DispatchError) as exc_info:
+                await dispatcher.dispatch(
+                    [create_upload("a.png")], {"profile": "unknown"}, {}
+                )
+        finally:
+            await dispatcher.stop()
+
+        assert exc_info.value.status_code == 400
+        assert dispatcher.get_stats()["retried_batches"] == 0
+
+    async def test_dispatch_no_backend(self, client: httpx.AsyncClient) -> None:
+        """Test that a request fails when every backend failed or is down."""
+        dispatcher = create_dispatcher(["http://failing", "http://down"])
+        await dispatcher.start(client)
+        try:
+            dispatcher.backends[0].ready = True
+            with pytest.raises(DispatchError) as exc_info:
+                await dispatcher.dispatch([create_upload("a.png")], {}, {})
+        finally:
+            await dispatcher.stop()
+
+        assert exc_info.value.status_code == 503
+        assert dispatcher.get_stats()["failed_requests"] == 1
+
+
+class TestDispatchEndpoint:
+    """Test cases for the OCR endpoint of dispatcher mode."""
+
+    async def test_dispatch_endpoint(self, client: httpx.AsyncClient) -> None:
+        """Test that the endpoint forwards uploads and options to backends."""
+        dispatcher = create_dispatcher(["http://good-a", "http://good-b"])
+        front = FastAPI()
+        front.include_router(dispatch.router)
+        await dispatcher.start(client)
+        try:
+            with patch("app.routers.dispatch.dispatcher", dispatcher):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=front), base_url="http://front"
+                ) as front_client:
+                    response = await front_client.post(
+                        "/ocr/",
+                        files=[
+                            (
+                                "files",
+                                ("a.png", create_upload("a").content, "image/png"),
+                            ),
+                            (
+                                "files",
+                                ("b.png", create_upload("b").content, "image/png"),
+                            ),
+                        ],
+                        data={"use_cls": "false"},
+                    )
+                    invalid = await front_client.post(
+                        "/ocr/",
+                        files={"files": ("a.png", b"", "image/png")},
+                        data={"lang": "klingon"},
+                    )
+        finally:
+            await dispatcher.stop()
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [result["FileName"] for result in data["results"]] == ["a.png", "b.png"]
+        assert invalid.status_code == 400
+
+    async def test_dispatch_endpoint_rate_limited(
+        self, client: httpx.AsyncClient
+    ) -> None:
+        """Test that the client IP is forwarded and rejections keep headers."""
+        dispatcher = create_dispatcher(["http://limited"])
+        front = FastAPI()
+        front.include_router(dispatch.router)
+        await dispatcher.start(client)
+        try:
+            with patch("app.routers.dispatch.dispatcher", dispatcher):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(
+                        app=front, client=("203.0.113.7", 123)
+                    ),
+                    base_url="http://front",
+                ) as front_client:
+                    response = await front_client.post(
+                        "/ocr/",
+                        files={"files": ("a.png", create_upload("a").content)},
+                        headers={"X-Forwarded-For": "198.51.100.1"},
+                    )
+        finally:
+            await dispatcher.stop()
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+        assert response.headers["X-RateLimit-Limit-Requests"] == "1"
+        assert response.json()["detail"].endswith("198.51.100.1, 203.0.113.7")
+
+    def test_form_fields(self) -> None:
+        """Test that set form fields are encoded like a client would send them."""
+        assert dispatch.form_fields(
+            {"use_cls": False, "text_score": 0.5, "lang": None}
+        ) == {"use_cls": "false", "text_score": "0.5"}
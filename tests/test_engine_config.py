@@ -0,0 +1,85 @@
+"""Tests for mapping settings onto RapidOCR engine parameters."""
+
+from unittest.mock import patch
+
+import pytest
+from rapidocr.utils.typings import ModelType
+
+from app.engine_config import (
+    CPU_PROVIDER,
+    CUDA_PROVIDER,
+    build_engine_params,
+    describe_params,
+    resolve_providers,
+)
+from app.ocr_service import ocr_service
+
+CUDA_CONFIG = {
+    "use_cuda": True,
+    "use_cpu": False,
+    "providers": [CUDA_PROVIDER, CPU_PROVIDER],
+}
+
+
+class TestEngineConfig:
+    """Test provider resolution and engine parameter building."""
+
+    def test_cpu_config(self) -> None:
+        """Test that a CPU-only GPU config resolves to the CPU provider."""
+        assert resolve_providers({"use_cpu": True}) == [CPU_PROVIDER]
+
+    def test_unavailable_gpu_provider_dropped(self) -> None:
+        """Test that providers missing from this ORT build fall back to CPU."""
+        with patch(
+            "app.engine_config.ort.get_available_providers",
+            return_value=[CPU_PROVIDER],
+        ):
+            assert resolve_providers(CUDA_CONFIG) == [CPU_PROVIDER]
+
+    def test_gpu_provider_used_when_available(self) -> None:
+        """Test that the GPU detector's providers are honored."""
+        with patch(
+            "app.engine_config.ort.get_available_providers",
+            return_value=[CUDA_PROVIDER, CPU_PROVIDER],
+        ):
+            assert resolve_providers(CUDA_CONFIG) == [CUDA_PROVIDER, CPU_PROVIDER]
+
+            with patch("app.engine_config.settings.ocr_use_gpu", False):
+                assert resolve_providers(CUDA_CONFIG) == [CPU_PROVIDER]
+
+    def test_cuda_session_tuning(self) -> None:
+        """Test that CUDA providers enable CUDA and its tuning parameters."""
+        with (
+            patch("app.engine_config.settings.ocr_intra_op_threads", 2),
+            patch("app.engine_config.settings.ocr_cuda_device_id", 1),
+        ):
+            params = build_engine_params([CUDA_PROVIDER, CPU_PROVIDER])
+
+        assert params["EngineConfig.onnxruntime.use_cuda"] is True
+        assert params["EngineConfig.onnxruntime.cuda_ep_cfg.device_id"] == 1
+        assert params["EngineConfig.onnxruntime.intra_op_num_threads"] == 2
+
+    def test_model_selection(self) -> None:
+        """Test that det/rec model selection maps onto RapidOCR enums."""
+        with patch("app.engine_config.settings.ocr_det_model_type", "server"):
+            params = build_engine_params([CPU_PROVIDER])
+
+        assert params["Det.model_type"] is ModelType.SERVER
+        assert describe_params(params)["Det.model_type"] == "server"
+        assert "EngineConfig.onnxruntime.use_cuda" not in params
+
+    def test_invalid_model_type(self) -> None:
+        """Test that an unknown model type is rejected."""
+        with (
+            patch("app.engine_config.settings.ocr_rec_model_type", "huge"),
+            pytest.raises(ValueError),
+        ):
+            build_engine_params([CPU_PROVIDER])
+
+    def test_engine_info_reports_effective_config(self) -> None:
+        """Test that the effective configuration is reported by the service."""
+        info = ocr_service.get_engine_info()
+
+        assert info["providers"][-1] == CPU_PROVIDER
+        params = info["engine_config"]["params"]
+        assert "EngineConfig.onnxruntime.intra_op_num_threads" in params
@@ -0,0 +1,116 @@
+"""Tests for the OCR engine pool and worker recycling."""
+
+import asyncio
+import os
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from app.cpu_topology import (
+    NumaNode,
+    affinity_supported,
+    available_cpus,
+    plan_placement,
+)
+from app.engine_pool import EnginePool, get_process_rss
+
+
+class FakeEngine:
+    """Stand-in for RapidOCR that records how often it was called."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, image: Any) -> str:
+        self.calls += 1
+        return f"text:{image}"
+
+
+class TestEnginePool:
+    """Test engine pool scheduling, counters and recycling."""
+
+    def test_process_rss(self) -> None:
+        """Test that the process RSS can be read."""
+        assert get_process_rss() > 0
+
+    async def test_run_counts_images(self) -> None:
+        """Test that running work on the pool counts processed images."""
+        pool = EnginePool(2, FakeEngine)
+
+        results = await asyncio.gather(
+            *(pool.run(lambda engine, i=i: engine(i)) for i in range(4))
+        )
+
+        assert results == [f"text:{i}" for i in range(4)]
+        stats = pool.get_stats()
+        assert stats["size"] == 2
+        assert stats["idle"] == 2
+        assert sum(w["images_processed"] for w in stats["workers"]) == 4
+
+    @pytest.mark.skipif(not affinity_supported(), reason="CPU affinity unsupported")
+    async def test_pinned_workers(self) -> None:
+        """Test that engines are built and called on their worker's core set."""
+        cpu = min(available_cpus())
+        placements = plan_placement([NumaNode(0, (cpu,))], 1)
+        pool = EnginePool(
+            1, lambda: {"built_on": os.sched_getaffinity(0)}, placements=placements
+        )
+
+        called_on = await pool.run(lambda engine: os.sched_getaffinity(0))
+
+        assert pool.workers[0].engine["built_on"] == {cpu}
+        assert called_on == {cpu}
+        assert pool.get_stats()["workers"][0]["cpus"] == [cpu]
+
+    async def test_recycle_after_max_images(self) -> None:
+        """Test that a worker is rebuilt once it reaches the image limit."""
+        with patch("app.engine_pool.settings.engine_max_images", 2):
+            pool = EnginePool(1, FakeEngine)
+            first_engine = pool._workers[0].engine
+
+            await pool.run(lambda engine: engine("a"))
+            await pool.run(lambda engine: engine("b"))
+            # The next acquire waits until the drained worker is rebuilt
+            await pool.run(lambda engine: engine("c"))
+
+        stats = pool.get_stats()
+        assert stats["recycle_count"] == 1
+        assert stats["recycle_events"][0]["reason"] == "max_images"
+        assert stats["workers"][0]["generation"] == 2
+        assert stats["workers"][0]["images_processed"] == 1
+        assert pool._workers[0].engine is not first_engine
+
+    async def test_recycle_after_rss_growth(self) -> None:
+        """Test that RSS growth beyond the threshold triggers a recycle."""
+        with patch("app.engine_pool.settings.engine_max_rss_growth_mb", 1):
+            pool = EnginePool(1, FakeEngine)
+            pool.shift_rss_baseline(-2 * 1024 * 1024)
+
+            await pool.run(lambda engine: engine("a"))
+            async with pool.acquire():
+                pass
+
+        stats = pool.get_stats()
+        assert stats["recycle_count"] == 1
+        assert stats["recycle_events"][0]["reason"] == "rss_growth"
+        assert stats["memory_trend"]
+
+    async def test_rss_growth_recycles_one_worker(self) -> None:
+        """Test that RSS growth recycles only the busiest worker of a pool."""
+        with patch("app.engine_pool.settings.engine_max_rss_growth_mb", 1):
+            pool = EnginePool(3, FakeEngine)
+            pool.workers[1].images_processed = 5
+            pool.shift_rss_baseline(-2 * 1024 * 1024)
+
+            # Workers are used in turn; only worker 1 is recycled on release
+            for i in range(6):
+                await pool.run(lambda engine, i=i: engine(i))
+            await pool.run_on_all(lambda engine: None)
+
+        stats = pool.get_stats()
+        assert stats["recycle_count"] == 1
+        assert stats["recycle_events"][0]["worker_id"] == 1
+        assert [w["generation"] for w in stats["workers"]] == [1, 2, 1]
+        assert stats["rss_recycle_target"] is None
+        assert stats["rss_growth_mb"] < 1
@@ -0,0 +1,84 @@
+"""Tests for the LRU engine registry."""
+
+from typing import Any
+from unittest.mock import patch
+
+from app.engine_pool import EnginePool
+from app.engine_registry import EngineKey, EngineRegistry
+from tests.test_engine_pool import FakeEngine
+
+MB = 1024 * 1024
+
+
+class FakeMemory:
+    """Process RSS stand-in that grows by a fixed amount per engine load."""
+
+    def __init__(self, per_load: int) -> None:
+        self.rss = 500 * MB
+        self.per_load = per_load
+        self.loaded: list[EngineKey] = []
+
+    def __call__(self) -> int:
+        return self.rss
+
+    async def load(self, key: EngineKey) -> tuple[EnginePool, dict[str, Any]]:
+        self.rss += self.per_load
+        self.loaded.append(key)
+        return EnginePool(1, FakeEngine), {"model_cache": {"status": "disabled"}}
+
+
+class TestEngineRegistry:
+    """Test lazy loading, LRU eviction and load metrics."""
+
+    async def test_lazy_load_and_hit(self) -> None:
+        """Test that an engine is loaded once and then served from the registry."""
+        memory = FakeMemory(100 * MB)
+        registry = EngineRegistry(memory.load, memory_budget_mb=0)
+
+        with patch("app.engine_registry.get_process_rss", memory):
+            first = await registry.get(("en", "accurate"))
+            second = await registry.get(("en", "accurate"))
+
+        assert first is second
+        assert memory.loaded == [("en", "accurate")]
+        entry = registry.get_stats()["entries"][0]
+        assert entry["lang"] == "en"
+        assert entry["uses"] == 2
+        assert entry["memory_mb"] == 100
+        assert entry["model_cache"] == {"status": "disabled"}
+
+    async def test_lru_eviction_under_budget(self) -> None:
+        """Test that the least recently used engine is evicted to fit the budget."""
+        memory = FakeMemory(100 * MB)
+        registry = EngineRegistry(memory.load, memory_budget_mb=250)
+
+        with patch("app.engine_registry.get_process_rss", memory):
+            await registry.get(("ch", "accurate"))
+            await registry.get(("en", "accurate"))
+            # Touch "ch" so "en" becomes the least recently used entry
+            await registry.get(("ch", "accurate"))
+            await registry.get(("japan", "accurate"))
+
+        assert ("en", "accurate") not in registry
+        assert ("ch", "accurate") in registry
+        assert ("japan", "accurate") in registry
+        stats = registry.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["total_memory_mb"] == 200
+
+    async def test_pinned_and_busy_entries_are_kept(self) -> None:
+        """Test that pinned and in-use engines are never evicted."""
+        memory = FakeMemory(100 * MB)
+        registry = EngineRegistry(memory.load, memory_budget_mb=150)
+        registry.register(
+            ("ch", "accurate"), EnginePool(1, FakeEngine), 100 * MB, pinned=True
+        )
+
+        with patch("app.engine_registry.get_process_rss", memory):
+            busy_pool = await registry.get(("en", "accurate"))
+            async with busy_pool.acquire():
+                await registry.get(("japan", "accurate"))
+
+        assert ("ch", "accurate") in registry
+        assert ("en", "accurate") in registry
+        assert registry.get_stats()["evictions"] == 0
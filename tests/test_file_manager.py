@@ -0,0 +1,125 @@
+"""Tests for temporary file tracking and cleanup."""
+
+import io
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import UploadFile
+
+from app.file_manager import SHARD_PREFIX_LENGTH, FileManager
+
+
+def make_upload(content: bytes = b"image-bytes", name: str = "test.png") -> UploadFile:
+    """Create an in-memory upload file."""
+    return UploadFile(file=io.BytesIO(content), filename=name)
+
+
+class TestFileManager:
+    """Test the expiry index, sharding and O(1) counters."""
+
+    async def test_save_uses_shard_and_counters(self, tmp_path: Path) -> None:
+        """Test that uploads land in a shard directory and update counters."""
+        with patch("app.file_manager.settings.temp_dir", tmp_path):
+            manager = FileManager()
+
+        file_uuid, file_path = await manager.save_upload_file(make_upload())
+
+        assert file_path.parent.name == file_uuid[:SHARD_PREFIX_LENGTH]
+        info = manager.get_temp_dir_info()
+        assert info["file_count"] == 1
+        assert info["total_size_bytes"] == len(b"image-bytes")
+
+        assert manager.cleanup_file(file_path)
+        info = manager.get_temp_dir_info()
+        assert info["file_count"] == 0
+        assert info["total_size_bytes"] == 0
+
+    async def test_cleanup_only_expired(self, tmp_path: Path) -> None:
+        """Test that cleanup removes expired files and keeps fresh ones."""
+        with patch("app.file_manager.settings.temp_dir", tmp_path):
+            manager = FileManager()
+
+        with patch("app.file_manager.settings.file_retention", -1):
+            _, expired_path = await manager.save_upload_file(make_upload())
+        _, fresh_path = await manager.save_upload_file(make_upload())
+
+        assert await manager.cleanup_old_files() == 1
+        assert not expired_path.exists()
+        assert fresh_path.exists()
+        assert manager.get_temp_dir_info()["file_count"] == 1
+
+    async def test_cleanup_skips_already_removed(self, tmp_path: Path) -> None:
+        """Test that files removed after processing leave only stale entries."""
+        with patch("app.file_manager.settings.temp_dir", tmp_path):
+            manager = FileManager()
+
+        with patch("app.file_manager.settings.file_retention", -1):
+            _, file_path = await manager.save_upload_file(make_upload())
+        manager.cleanup_file(file_path)
+
+        assert await manager.cleanup_old_files() == 0
+        assert manager.get_temp_dir_info()["expiry_index_size"] == 0
+
+    async def test_index_rebuilt_at_startup(self, tmp_path: Path) -> None:
+        """Test that leftover flat and sharded files are indexed on startup."""
+        (tmp_path / "legacy.png").write_bytes(b"12345")
+        shard = tmp_path / "ab"
+        shard.mkdir()
+        old_file = shard / "abcdef.png"
+        old_file.write_bytes(b"123")
+        old_time = time.time() - 10_000
+        os.utime(old_file, (old_time, old_time))
+
+        with patch("app.file_manager.settings.temp_dir", tmp_path):
+            manager = FileManager()
+
+        info = manager.get_temp_dir_info()
+        assert info["file_count"] == 2
+        assert info["total_size_bytes"] == 8
+
+        assert await manager.cleanup_old_files() == 1
+        assert not old_file.exists()
+        assert manager.get_temp_dir_info()["total_size_bytes"] == 5
+
+    def test_index_skips_files_removed_mid_scan(self, tmp_path: Path) -> None:
+        """Test that a file vanishing during the scan does not stop indexing."""
+        shard = tmp_path / "ab"
+        shard.mkdir()
+        for name in ("a.png", "b.png", "c.png"):
+            (shard / name).write_bytes(b"123")
+        is_file = Path.is_file
+
+        def vanishing_is_file(path: Path) -> bool:
+            found = is_file(path)
+            if path.name == "b.png":
+                # Removed by a concurrent cleanup between listing and stat
+                path.unlink()
+            return found
+
+        with (
+            patch("app.file_manager.settings.temp_dir", tmp_path),
+            patch.object(Path, "is_file", vanishing_is_file),
+        ):
+            manager = FileManager()
+
+        info = manager.get_temp_dir_info()
+        assert info["file_count"] == 2
+        assert info["total_size_bytes"] == 6
+
+    async def test_save_recreates_removed_shard(self, tmp_path: Path) -> None:
+        """Test that a shard removed externally is created again on save."""
+        with patch("app.file_manager.settings.temp_dir", tmp_path):
+            manager = FileManager()
+        _, first_path = await manager.save_upload_file(make_upload())
+        first_path.unlink()
+        first_path.parent.rmdir()
+
+        with patch(
+            "app.file_manager.uuid4", return_value=first_path.stem[:2] + "-other"
+        ):
+            _, second_path = await manager.save_upload_file(make_upload())
+
+        assert second_path.parent == first_path.parent
+        assert second_path.exists()
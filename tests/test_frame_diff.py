@@ -0,0 +1,156 @@
+"""Tests for frame-differencing sequence OCR."""
+
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.frame_diff import (
+    DET_MIN_SIDE,
+    FrameSequence,
+    TextLine,
+    changed_boxes,
+    changed_tiles,
+    expand_regions,
+    text_delta,
+)
+
+
+class FakeLineEngine:
+    """Stand-in for RapidOCR that reads dark bars as lines named by their width."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    def __call__(self, image: Image.Image, **kwargs: Any) -> SimpleNamespace:
+        self.calls.append({"size": image.size, **kwargs})
+        if not kwargs["use_det"]:
+            return SimpleNamespace(txts=("edited",), scores=(0.99,))
+
+        dark = np.asarray(image.convert("L")) < 128
+        rows = np.flatnonzero(dark.any(axis=1))
+        boxes, txts = [], []
+        # Split dark rows into contiguous bands, one line per band
+        for band in np.split(rows, np.flatnonzero(np.diff(rows) > 1) + 1):
+            if not len(band):
+                continue
+            cols = np.flatnonzero(dark[band].any(axis=0))
+            x0, x1, y0, y1 = cols[0], cols[-1] + 1, band[0], band[-1] + 1
+            boxes.append([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+            txts.append(f"w{x1 - x0}")
+        return SimpleNamespace(
+            boxes=np.array(boxes, dtype=float) if boxes else None,
+            txts=tuple(txts),
+            scores=tuple(0.99 for _ in txts),
+        )
+
+
+def make_frame(bars: list[tuple[int, int, int, int]]) -> Image.Image:
+    """Draw dark bars standing in for text lines on a blank frame."""
+    image = Image.new("RGB", (640, 480), "white")
+    draw = ImageDraw.Draw(image)
+    for bar in bars:
+        draw.rectangle(bar, fill="black")
+    return image
+
+
+KWARGS = {"use_det": True, "use_rec": True, "text_score": 0.5}
+BARS = [(40, 40, 299, 69), (40, 120, 239, 149)]
+
+
+def process(
+    sequence: FrameSequence, engine: FakeLineEngine, image: Image.Image
+) -> tuple[str, list[str], list[str]]:
+    """Plan and apply one frame."""
+    plan = sequence.plan(image)
+    added, removed = sequence.apply(engine, image, plan, KWARGS)
+    return plan.mode, added, removed
+
+
+class TestDifferencing:
+    """Test change detection and region bookkeeping."""
+
+    def test_changed_boxes_are_pixel_precise(self) -> None:
+        """Test that regions hug the changed pixels rather than whole tiles."""
+        changed = np.zeros((64, 64), dtype=bool)
+        changed[20:24, 5:30] = True
+
+        mask = changed_tiles(changed)
+
+        assert mask.sum() == 2
+        assert changed_boxes(changed, mask) == [(5, 20, 30, 24)]
+
+    def test_expand_regions(self) -> None:
+        """Test that regions grow over touched lines and overlapping ones merge."""
+        lines = [
+            TextLine((0, 0, 100, 20), "a", 1.0),
+            TextLine((0, 50, 100, 70), "b", 1.0),
+        ]
+
+        regions = expand_regions([(90, 5, 120, 15), (110, 10, 130, 60)], lines)
+
+        assert regions == [(0, 0, 130, 70)]
+
+    def test_text_delta(self) -> None:
+        """Test that deltas count repeated lines and keep reading order."""
+        before = [TextLine((0, y, 1, y + 1), text, 1.0) for y, text in enumerate("aab")]
+        after = [TextLine((0, y, 1, y + 1), text, 1.0) for y, text in enumerate("acb")]
+
+        assert text_delta(before, after) == (["c"], ["a"])
+
+
+class TestFrameSequence:
+    """Test full, partial and unchanged frame handling."""
+
+    def test_first_frame_and_unchanged_frames(self) -> None:
+        """Test that unchanged frames reuse every line without the engine."""
+        sequence = FrameSequence()
+        engine = FakeLineEngine()
+
+        assert process(sequence, engine, make_frame(BARS)) == (
+            "full",
+            ["w260", "w200"],
+            [],
+        )
+        plan = sequence.plan(make_frame(BARS))
+        assert plan.mode == "unchanged"
+        assert sequence.apply(None, make_frame(BARS), plan, KWARGS) == ([], [])
+        assert len(engine.calls) == 1
+
+    def test_in_place_edit_skips_detection(self) -> None:
+        """Test that an edit within one line is recognized without detection."""
+        sequence = FrameSequence()
+        engine = FakeLineEngine()
+        process(sequence, engine, make_frame(BARS))
+
+        edited = make_frame(BARS)
+        ImageDraw.Draw(edited).rectangle((100, 125, 139, 144), fill="white")
+
+        assert process(sequence, engine, edited) == ("partial", ["edited"], ["w200"])
+        assert engine.calls[-1]["use_det"] is False
+        assert [line.text for line in sequence.lines] == ["w260", "edited"]
+
+    def test_new_line_is_detected_on_padded_crop(self) -> None:
+        """Test that new text runs detection on a crop padded to detector size."""
+        sequence = FrameSequence()
+        engine = FakeLineEngine()
+        process(sequence, engine, make_frame(BARS))
+
+        frame = make_frame([*BARS, (40, 300, 199, 329)])
+
+        assert process(sequence, engine, frame) == ("partial", ["w160"], [])
+        assert engine.calls[-1]["use_det"] is True
+        assert min(engine.calls[-1]["size"]) >= DET_MIN_SIDE
+        assert sequence.lines[-1].box[1] == 300
+
+    def test_full_refresh_triggers(self) -> None:
+        """Test that size changes and the keyframe interval force full OCR."""
+        sequence = FrameSequence(keyframe_interval=2)
+        engine = FakeLineEngine()
+        process(sequence, engine, make_frame(BARS))
+
+        assert sequence.plan(make_frame(BARS)).mode == "unchanged"
+        process(sequence, engine, make_frame(BARS))
+        assert sequence.plan(make_frame(BARS)).mode == "full"
+        assert sequence.plan(make_frame(BARS).resize((320, 240))).mode == "full"
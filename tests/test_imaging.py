@@ -0,0 +1,30 @@
+"""Tests for image loading helpers."""
+
+from pathlib import Path
+
+from PIL import Image
+
+from app.imaging import load_image
+
+
+class TestLoadImage:
+    """Test loading and downscaling images before OCR."""
+
+    def test_keeps_size_without_limit(self, tmp_path: Path) -> None:
+        """Test that images are loaded at full size by default."""
+        path = tmp_path / "page.png"
+        Image.new("L", (1200, 800), "white").save(path)
+
+        image = load_image(path)
+
+        assert image.size == (1200, 800)
+        assert image.mode == "RGB"
+
+    def test_downscales_longest_side(self, tmp_path: Path) -> None:
+        """Test that the longest side is bounded and the aspect ratio kept."""
+        path = tmp_path / "page.jpg"
+        Image.new("RGB", (3000, 1500), "white").save(path)
+
+        image = load_image(path, max_side_len=1000)
+
+        assert image.size == (1000, 500)
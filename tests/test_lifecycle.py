@@ -0,0 +1,115 @@
+"""Tests for graceful drain of the service."""
+
+import asyncio
+import signal
+import time
+from types import FrameType
+
+from app.lifecycle import ServiceLifecycle
+
+
+def ready_lifecycle() -> ServiceLifecycle:
+    """Create a lifecycle that has finished starting up."""
+    lifecycle = ServiceLifecycle()
+    lifecycle.mark_warmup_skipped()
+    return lifecycle
+
+
+class TestDrain:
+    """Test cases for draining in-flight work."""
+
+    def test_drain_flips_readiness_and_refuses_work(self) -> None:
+        """Test that a drain fails readiness and refuses new work."""
+        lifecycle = ready_lifecycle()
+        assert lifecycle.admits_work()
+
+        assert lifecycle.begin_drain("test")
+        assert not lifecycle.begin_drain("again")
+        assert lifecycle.get_readiness() == (False, "draining")
+        assert not lifecycle.admits_work()
+        assert lifecycle.get_drain_info()["rejected"] == 1
+
+    def test_grace_period_admits_work(self) -> None:
+        """Test that work is admitted until the grace period ends."""
+        lifecycle = ready_lifecycle()
+        lifecycle.begin_drain("test", grace_period=60.0)
+
+        assert lifecycle.get_readiness() == (False, "draining")
+        assert lifecycle.admits_work()
+
+    async def test_drain_waits_for_in_flight_work(self) -> None:
+        """Test that a drain returns once admitted work has finished."""
+        lifecycle = ready_lifecycle()
+        lifecycle.work_started()
+        lifecycle.work_started()
+
+        async def finish_later() -> None:
+            await asyncio.sleep(0.1)
+            lifecycle.work_finished()
+            lifecycle.work_finished()
+
+        finisher = asyncio.create_task(finish_later())
+        report = await lifecycle.drain(timeout=5.0, reason="test")
+        await finisher
+
+        assert report["state"] == "drained"
+        assert report["in_flight_at_start"] == 2
+        assert report["completed"] == 2
+        assert report["abandoned"] == 0
+
+    async def test_drain_deadline(self) -> None:
+        """Test that work still running at the deadline is reported abandoned."""
+        lifecycle = ready_lifecycle()
+        lifecycle.work_started()
+
+        start = time.perf_counter()
+        report = await lifecycle.drain(timeout=0.1, reason="test")
+
+        assert time.perf_counter() - start < 1.0
+        assert report["abandoned"] == 1
+        assert report["completed"] == 0
+
+    async def test_resume(self) -> None:
+        """Test that a drained instance can return to rotation."""
+        lifecycle = ready_lifecycle()
+        await lifecycle.drain(timeout=0.0, reason="test")
+        lifecycle.resume()
+
+        assert lifecycle.get_readiness() == (True, None)
+        assert lifecycle.admits_work()
+        assert lifecycle.get_drain_info() == {"state": "serving", "in_flight": 0}
+
+
+class TestSigtermDrain:
+    """Test cases for draining on SIGTERM."""
+
+    async def test_sigterm_drains_before_previous_handler(self) -> None:
+        """Test that SIGTERM reaches the previous handler only after the drain."""
+        lifecycle = ready_lifecycle()
+        lifecycle.work_started()
+        received: list[str] = []
+
+        def server_handler(signum: int, frame: FrameType | None) -> None:
+            received.append(lifecycle.get_drain_info()["state"])
+
+        original = signal.signal(signal.SIGTERM, server_handler)
+        try:
+            assert lifecycle.install_signal_handler(timeout=5.0, grace_period=0.0)
+            signal.raise_signal(signal.SIGTERM)
+            await asyncio.sleep(0.1)
+
+            assert lifecycle.get_readiness() == (False, "draining")
+            assert received == []
+
+            lifecycle.work_finished()
+            for _ in range(50):
+                if received:
+                    break
+                await asyncio.sleep(0.05)
+
+            assert received == ["drained"]
+            assert lifecycle.get_drain_info()["reason"] == "sigterm"
+            assert signal.getsignal(signal.SIGTERM) is server_handler
+        finally:
+            lifecycle.restore_signal_handler()
+            signal.signal(signal.SIGTERM, original)
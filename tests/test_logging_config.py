@@ -0,0 +1,93 @@
+"""Tests for the background log writer and event sampling."""
+
+import logging
+import queue
+from unittest.mock import patch
+
+import pytest
+import structlog
+
+from app.logging_config import BoundedQueueHandler, EventSampler
+
+
+def make_record(level: int, message: str) -> logging.LogRecord:
+    """Create a log record at a level."""
+    return logging.LogRecord("test", level, __file__, 0, message, None, None)
+
+
+def queued_messages(log_queue: queue.Queue[logging.LogRecord]) -> list[str]:
+    """Drain a queue and get the message of each record."""
+    messages = []
+    while not log_queue.empty():
+        messages.append(log_queue.get_nowait().getMessage())
+    return messages
+
+
+class TestBoundedQueueHandler:
+    """Test the drop policies of the bounded log queue."""
+
+    def test_drop_newest(self) -> None:
+        """Test that new INFO records are dropped when the queue is full."""
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue, "drop_newest")
+
+        for index in range(4):
+            handler.handle(make_record(logging.INFO, f"info {index}"))
+
+        assert queued_messages(log_queue) == ["info 0", "info 1"]
+        stats = handler.get_stats()
+        assert stats["dropped"] == 2
+        assert stats["dropped_by_level"] == {"INFO": 2}
+
+    def test_drop_oldest(self) -> None:
+        """Test that the oldest records make room for new ones."""
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue, "drop_oldest")
+
+        for index in range(4):
+            handler.handle(make_record(logging.INFO, f"info {index}"))
+
+        assert queued_messages(log_queue) == ["info 2", "info 3"]
+        assert handler.get_stats()["dropped"] == 2
+
+    def test_errors_evict_older_records(self) -> None:
+        """Test that errors are kept even under the drop_newest policy."""
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue, "drop_newest")
+
+        handler.handle(make_record(logging.INFO, "info 0"))
+        handler.handle(make_record(logging.INFO, "info 1"))
+        handler.handle(make_record(logging.ERROR, "error"))
+
+        assert queued_messages(log_queue) == ["info 1", "error"]
+        assert handler.get_stats()["dropped_by_level"] == {"INFO": 1}
+
+
+class TestEventSampler:
+    """Test per-event sampling."""
+
+    def test_sampling_by_event(self) -> None:
+        """Test that configured INFO events are thinned and counted."""
+        sampler = EventSampler({"Processing image": 0.25})
+
+        kept = 0
+        with patch("app.logging_config.random.random", side_effect=[0.1, 0.5] * 4):
+            for _ in range(8):
+                try:
+                    sampler(None, "info", {"event": "Processing image"})
+                    kept += 1
+                except structlog.DropEvent:
+                    pass
+
+        assert kept == 4
+        assert sampler.get_stats() == {"Processing image": 4}
+
+    def test_warnings_and_other_events_are_kept(self) -> None:
+        """Test that unlisted events and warnings are never sampled out."""
+        sampler = EventSampler({"Processing image": 0.0})
+
+        event = {"event": "Processing image"}
+        assert sampler(None, "warning", event) is event
+        assert sampler(None, "info", {"event": "Request completed"})
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "info", event)
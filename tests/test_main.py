@@ -1,14 +1,41 @@
 """Test suite for the RapidOCR FastAPI service."""
 
 import io
+import json
+import struct
+import threading
+import time
+from collections.abc import AsyncIterator
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
+from fastapi.websockets import WebSocketDisconnect
 from PIL import Image
-
+from starlette.requests import ClientDisconnect
+from starlette.types import Message, Receive, Scope, Send
+
+from app import codecs
+from app.codecs import decode_response
+from app.cost import cost_budget
+from app.engine_config import INTRA_OP_THREADS_KEY
+from app.lifecycle import ServiceLifecycle, service_lifecycle
 from app.main import app
+from app.model_cache import quantization_available
+from app.near_duplicate import NearDuplicateCache
+from app.ocr_service import OCRService, ocr_service
+from app.profiling import profiler
+from app.rate_limit import (
+    MEGAPIXELS,
+    REQUESTS,
+    BucketLimit,
+    MemoryBucketStore,
+    RateLimiter,
+)
+from app.routers.ocr import ReservedStreamingResponse
+from app.tracing import tracer
+from tests.test_tracing import CollectingExporter
 
 # Create test client
 client = TestClient(app)
@@ -57,6 +84,70 @@ class TestHealthEndpoints:
         assert "ocr_engine" in data
         assert "file_management" in data
         assert "configuration" in data
+        assert "dropped" in data["logging"]
+        assert data["autotune"]["applied"] is False
+        assert data["cpu_topology"]["numa_nodes"]
+
+    def test_liveness_endpoint(self) -> None:
+        """Test the constant-time liveness probe."""
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "alive"
+        assert data["uptime"] >= 0
+
+    def test_readiness_queue_full(self) -> None:
+        """Test that readiness reports not-ready when the engine queue is full."""
+        lifecycle = ServiceLifecycle()
+        lifecycle.mark_warmup_skipped()
+
+        with (
+            patch("app.routers.health.service_lifecycle", lifecycle),
+            patch("app.routers.health.settings.readiness_max_queue_depth", -1),
+        ):
+            response = client.get("/health/ready")
+
+        assert response.status_code == 503
+        data = response.json()
+        assert data["reason"] == "queue_full"
+        assert data["queue_depth"] == 0
+
+    def test_stats_counters(self) -> None:
+        """Test that stats reflect incrementally maintained counters."""
+        before = client.get("/health/stats").json()
+        client.post(
+            "/ocr", files={"files": ("test.png", create_test_image(), "image/png")}
+        )
+        after = client.get("/health/stats").json()
+
+        counters = after["requests"]["counters"]
+        assert counters["ocr_images"] >= 1
+        assert after["requests"]["timings"]["ocr_request"]["count"] >= 1
+        assert (
+            after["file_management"]["file_count"]
+            == before["file_management"]["file_count"]
+        )
+
+    def test_readiness_before_warmup(self) -> None:
+        """Test that readiness reports not-ready until warmup completes."""
+        with patch("app.routers.health.service_lifecycle", ServiceLifecycle()):
+            response = client.get("/health/ready")
+
+        assert response.status_code == 503
+        data = response.json()
+        assert data["ready"] is False
+        assert data["reason"] == "warming_up"
+
+    def test_readiness_after_warmup(self) -> None:
+        """Test that the lifespan warmup opens the readiness gate."""
+        with TestClient(app) as lifespan_client:
+            response = lifespan_client.get("/health/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ready"] is True
+        assert data["warmup"]["state"] == "complete"
+        assert data["warmup"]["duration"] > 0
 
 
 class TestOCREndpoints:
@@ -110,6 +201,460 @@ class TestOCREndpoints:
         assert "test1.png" in filenames
         assert "test2.png" in filenames
 
+    def test_ocr_unknown_profile(self) -> None:
+        """Test that an unknown model profile is rejected."""
+        response = client.post(
+            "/ocr",
+            files={"files": ("test.png", create_test_image(), "image/png")},
+            data={"profile": "unknown"},
+        )
+
+        assert response.status_code == 400
+        assert "Unsupported model profile" in response.json()["detail"]
+
+    @pytest.mark.skipif(
+        not quantization_available(), reason="onnx is required for quantization"
+    )
+    def test_ocr_fast_profile(self) -> None:
+        """Test that a request can select the INT8-quantized profile."""
+        with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+            response = client.post(
+                "/ocr",
+                files={"files": ("test_image.jpg", f, "image/jpeg")},
+                data={"profile": "fast"},
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["model_profile"] == "fast"
+        assert "Hello World" in data["results"][0]["Context"]
+
+        registry = client.get("/health/stats").json()["ocr_engine"]["registry"]
+        entry = next(e for e in registry["entries"] if e["profile"] == "fast")
+        assert entry["model_cache"]["quantized"] is True
+
+    def test_ocr_language_selection(self) -> None:
+        """Test that a request can select another recognition language."""
+        with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+            response = client.post(
+                "/ocr",
+                files={"files": ("test_image.jpg", f, "image/jpeg")},
+                data={"lang": "en"},
+            )
+
+        assert response.status_code == 200
+        assert response.json()["lang"] == "en"
+        assert "Hello World" in response.json()["results"][0]["Context"]
+
+        stats = client.get("/health/stats").json()
+        entries = stats["ocr_engine"]["registry"]["entries"]
+        assert any(e["lang"] == "en" for e in entries)
+        assert stats["requests"]["timings"]["engine_load"]["count"] >= 1
+
+    def test_ocr_unsupported_language(self) -> None:
+        """Test that an unknown recognition language is rejected."""
+        response = client.post(
+            "/ocr",
+            files={"files": ("test.png", create_test_image(), "image/png")},
+            data={"lang": "klingon"},
+        )
+
+        assert response.status_code == 400
+        assert "Unsupported language" in response.json()["detail"]
+
+    def test_ocr_pipeline_options(self) -> None:
+        """Test OCR with angle classification off and a bounded image size."""
+        with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+            response = client.post(
+                "/ocr",
+                files={"files": ("test_image.jpg", f, "image/jpeg")},
+                data={"use_cls": "false", "box_thresh": "0.6", "max_side_len": "400"},
+            )
+
+        assert response.status_code == 200
+        assert "Hello World" in response.json()["results"][0]["Context"]
+
+    def test_ocr_cascade(self) -> None:
+        """Test that cascade mode reports per-pass statistics."""
+        with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+            response = client.post(
+                "/ocr",
+                files={"files": ("test_image.jpg", f, "image/jpeg")},
+                data={"cascade": "true"},
+            )
+
+        assert response.status_code == 200
+        result = response.json()["results"][0]
+        assert "Hello World" in result["Context"]
+        assert result["Cascade"]["regions"] >= 3
+        assert result["Cascade"]["coarse_time"] > 0
+
+    def test_ocr_near_duplicate(self) -> None:
+        """Test that a re-uploaded image is served from the near-duplicate cache."""
+        cache = NearDuplicateCache(100, 4, 0.1, 0.02, 3600)
+        responses = []
+        with patch.object(ocr_service, "_near_duplicates", cache):
+            for dedup in ("true", "true", "false"):
+                with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+                    responses.append(
+                        client.post(
+                            "/ocr",
+                            files={"files": ("test_image.jpg", f, "image/jpeg")},
+                            data={"dedup": dedup},
+                        )
+                    )
+
+        first, second, opted_out = (r.json()["results"][0] for r in responses)
+        assert first["Duplicate"] is None
+        assert second["Duplicate"]["source_uuid"] == first["UUID"]
+        assert second["Duplicate"]["similarity"] == 1.0
+        assert second["Context"] == first["Context"]
+        assert opted_out["Duplicate"] is None
+        assert cache.get_stats()["hits"] == 1
+
+    def test_ocr_sequence(self) -> None:
+        """Test that a repeated frame streams an empty delta."""
+        content = (Path("test_temp") / "test_image.jpg").read_bytes()
+        response = client.post(
+            "/ocr/sequence",
+            files=[
+                ("frames", ("frame0.jpg", content, "image/jpeg")),
+                ("frames", ("frame1.jpg", content, "image/jpeg")),
+            ],
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        first, second = (json.loads(line) for line in response.text.splitlines())
+        assert first["mode"] == "full"
+        assert "Hello World!" in first["added"]
+        assert second["mode"] == "unchanged"
+        assert second["added"] == second["removed"] == []
+        assert second["line_count"] == first["line_count"]
+
+    def test_ocr_sequence_too_many_frames(self) -> None:
+        """Test that sequences above the frame limit are rejected."""
+        with patch("app.routers.ocr.settings.sequence_max_frames", 1):
+            response = client.post(
+                "/ocr/sequence",
+                files=[
+                    ("frames", ("a.png", create_test_image(), "image/png")),
+                    ("frames", ("b.png", create_test_image(), "image/png")),
+                ],
+            )
+
+        assert response.status_code == 400
+
+    async def test_ocr_sequence_disconnect_releases_cost(self) -> None:
+        """Test that a stream the client never reads ends its admitted work."""
+
+        async def body() -> AsyncIterator[str]:
+            yield "{}\n"
+
+        async def receive() -> Message:
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            raise OSError("client disconnected")
+
+        in_flight = service_lifecycle.in_flight
+        assert cost_budget.try_admit(2.0)
+        service_lifecycle.work_started()
+        response = ReservedStreamingResponse(body(), 2.0)
+        with pytest.raises(ClientDisconnect):
+            await response(
+                {"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send
+            )
+
+        assert cost_budget.in_flight == 0.0
+        assert service_lifecycle.in_flight == in_flight
+
+    def test_ocr_sequence_counted_from_admission(self) -> None:
+        """Test that a drain sees an admitted sequence before its body runs."""
+        in_flight = service_lifecycle.in_flight
+        seen: list[int] = []
+        send_response = ReservedStreamingResponse.__call__
+
+        async def record(
+            response: ReservedStreamingResponse,
+            scope: Scope,
+            receive: Receive,
+            send: Send,
+        ) -> None:
+            seen.append(service_lifecycle.in_flight)
+            await send_response(response, scope, receive, send)
+
+        with patch.object(ReservedStreamingResponse, "__call__", record):
+            response = client.post(
+                "/ocr/sequence",
+                files={"frames": ("a.png", create_test_image(), "image/png")},
+            )
+
+        assert response.status_code == 200
+        assert seen == [in_flight + 1]
+        assert service_lifecycle.in_flight == in_flight
+
+    def test_ocr_websocket(self) -> None:
+        """Test that pipelined binary frames are answered with their ids."""
+        content = (Path("test_temp") / "test_image.jpg").read_bytes()
+        with client.websocket_connect("/ocr/ws?lang=ch&use_cls=false") as websocket:
+            session = websocket.receive_json()
+            for frame_id in (7, 8):
+                websocket.send_bytes(struct.pack(">I", frame_id) + content)
+            websocket.send_bytes(b"\x00\x01")
+            messages = [websocket.receive_json() for _ in range(3)]
+
+        assert session["max_in_flight"] >= 1
+        assert session["lang"] == "ch"
+        results = {m["id"]: m for m in messages if m["error"] is None}
+        assert set(results) == {7, 8}
+        assert "Hello World" in results[7]["result"]["Context"]
+        rejected = [m for m in messages if m["error"] is not None]
+        assert len(rejected) == 1
+        assert rejected[0]["id"] is None
+        assert cost_budget.in_flight == 0.0
+
+    def test_ocr_websocket_cost_budget(self) -> None:
+        """Test that frames over the in-flight cost budget are rejected."""
+        image = create_test_image().getvalue()
+        with (
+            patch.object(cost_budget, "max_in_flight", 1.0),
+            patch.object(cost_budget, "_in_flight", 1.0),
+            client.websocket_connect("/ocr/ws") as websocket,
+        ):
+            websocket.receive_json()
+            websocket.send_bytes(struct.pack(">I", 3) + image)
+            message = websocket.receive_json()
+            assert cost_budget.in_flight == 1.0
+
+        assert message["id"] == 3
+        assert "capacity" in message["error"]
+
+    def test_ocr_websocket_invalid_options(self) -> None:
+        """Test that a session with unsupported options is refused."""
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect("/ocr/ws?lang=klingon") as websocket:
+                websocket.receive_json()
+
+        assert exc_info.value.code == 1008
+
+    def test_ocr_compressed_response(self) -> None:
+        """Test that OCR responses are compressed when the client accepts it."""
+        with (
+            open(Path("test_temp") / "test_image.jpg", "rb") as f,
+            patch("app.serialization.settings.response_compression_min_size", 0),
+        ):
+            response = client.post(
+                "/ocr",
+                files={"files": ("test_image.jpg", f, "image/jpeg")},
+                headers={"Accept-Encoding": "gzip"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Hello World" in response.json()["results"][0]["Context"]
+
+    @pytest.mark.skipif(codecs.msgpack is None, reason="msgpack missing")
+    def test_ocr_msgpack_lines(self) -> None:
+        """Test that line boxes can be requested and returned as MessagePack."""
+        with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+            response = client.post(
+                "/ocr",
+                files={"files": ("test_image.jpg", f, "image/jpeg")},
+                data={"include_lines": "true"},
+                headers={"Accept": "application/msgpack"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/msgpack"
+        result = decode_response(response.content, "application/msgpack").results[0]
+        assert result.Lines
+        assert any("Hello World" in line.text for line in result.Lines)
+        assert all(len(line.box) == 4 for line in result.Lines)
+
+    def test_ocr_priority_class(self) -> None:
+        """Test that requests are scheduled under their priority class."""
+        before = client.get("/health/stats").json()["scheduler"]["classes"]
+        response = client.post(
+            "/ocr/",
+            files={"files": ("test.png", create_test_image(), "image/png")},
+            headers={"X-Priority": "interactive", "X-API-Key": "tenant-a"},
+        )
+        after = client.get("/health/stats").json()["scheduler"]["classes"]
+
+        assert response.status_code == 200
+        assert after["interactive"]["granted"] == before["interactive"]["granted"] + 1
+
+    def test_ocr_unknown_priority_class(self) -> None:
+        """Test that an unknown priority class is rejected."""
+        response = client.post(
+            "/ocr/",
+            files={"files": ("test.png", create_test_image(), "image/png")},
+            headers={"X-Priority": "urgent"},
+        )
+
+        assert response.status_code == 400
+        assert "Unknown priority class" in response.json()["detail"]
+
+    def test_ocr_cost_metadata(self) -> None:
+        """Test that results report the cost estimated from image headers."""
+        response = client.post(
+            "/ocr/",
+            files={
+                "files": ("test.png", create_test_image(size=(1000, 400)), "image/png")
+            },
+            data={"max_side_len": "500"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        cost = data["results"][0]["Cost"]
+        assert (cost["width"], cost["height"]) == (1000, 400)
+        assert cost["megapixels"] == 0.4
+        assert cost["units"] == 0.1
+        assert data["cost_units"] == 0.1
+
+    def test_ocr_cost_limit(self) -> None:
+        """Test that requests costing more than the per-request limit are rejected."""
+        with patch.object(cost_budget, "max_request", 1.0):
+            response = client.post(
+                "/ocr/",
+                files={
+                    "files": (
+                        "test.png",
+                        create_test_image(size=(2000, 1000)),
+                        "image/png",
+                    )
+                },
+            )
+
+        assert response.status_code == 413
+        assert "Request cost" in response.json()["detail"]
+
+    def test_ocr_rate_limited(self) -> None:
+        """Test that a client over its rate limit gets 429 with reset headers."""
+        limiter = RateLimiter(
+            True,
+            [BucketLimit(REQUESTS, 0.01, 1.0), BucketLimit(MEGAPIXELS, 1.0, 10.0)],
+            MemoryBucketStore(100),
+        )
+        headers = {"X-API-Key": "rate-limited-tenant"}
+        with patch("app.routers.ocr.rate_limiter", limiter):
+            first = client.post(
+                "/ocr/",
+                files={"files": ("test.png", create_test_image(), "image/png")},
+                headers=headers,
+            )
+            second = client.post(
+                "/ocr/",
+                files={"files": ("test.png", create_test_image(), "image/png")},
+                headers=headers,
+            )
+
+        assert first.status_code == 200
+        assert first.headers["X-RateLimit-Remaining-Requests"] == "0.000"
+        assert float(first.headers["X-RateLimit-Remaining-Megapixels"]) == (
+            pytest.approx(10.0 - 0.005)
+        )
+        assert second.status_code == 429
+        assert 1 < int(second.headers["Retry-After"]) <= 100
+        assert second.headers["X-RateLimit-Limit-Requests"] == "1"
+        assert "requests" in second.json()["detail"]
+
+    def test_ocr_admission_before_rate_limit(self) -> None:
+        """Test that refused requests neither spend tokens nor hold cost."""
+        limiter = RateLimiter(
+            True, [BucketLimit(REQUESTS, 0.01, 1.0)], MemoryBucketStore(100)
+        )
+        headers = {"X-API-Key": "admission-tenant"}
+        upload = {"files": ("test.png", create_test_image(), "image/png")}
+        with (
+            patch("app.routers.ocr.rate_limiter", limiter),
+            patch.object(cost_budget, "max_in_flight", 1.0),
+            patch.object(cost_budget, "_in_flight", 1.0),
+        ):
+            at_capacity = client.post("/ocr/", files=upload, headers=headers)
+        with patch("app.routers.ocr.rate_limiter", limiter):
+            first = client.post("/ocr/", files=upload, headers=headers)
+            limited = client.post("/ocr/", files=upload, headers=headers)
+
+        assert at_capacity.status_code == 503
+        assert first.status_code == 200
+        assert limited.status_code == 429
+        assert cost_budget.in_flight == 0.0
+
+    def test_ocr_request_trace(self) -> None:
+        """Test that an OCR request is traced from upload to serialization."""
+        exporter = CollectingExporter()
+        with (
+            patch.object(tracer, "exporter", exporter),
+            patch.object(tracer, "sample_rate", 1.0),
+        ):
+            with open(Path("test_temp") / "test_image.jpg", "rb") as f:
+                response = client.post(
+                    "/ocr/", files={"files": ("test_image.jpg", f, "image/jpeg")}
+                )
+            tracer.flush()
+
+        assert response.status_code == 200
+        spans = {span.name: span for span in exporter.spans}
+        root = spans["POST /ocr/"]
+        assert root.trace_id == response.headers["X-Request-ID"].replace("-", "")
+        assert root.attributes["http.status_code"] == 200
+        for name in (
+            "ocr.admission",
+            "upload.save",
+            "ocr.image",
+            "engine.wait",
+            "ocr.engine",
+            "ocr.det",
+            "ocr.rec",
+            "response.serialize",
+        ):
+            assert name in spans
+        assert spans["ocr.det"].parent_id == spans["ocr.engine"].span_id
+
+    def test_ocr_sequence_trace(self) -> None:
+        """Test that a sequence trace ends after its streamed frames."""
+        content = (Path("test_temp") / "test_image.jpg").read_bytes()
+        exporter = CollectingExporter()
+        with (
+            patch.object(tracer, "exporter", exporter),
+            patch.object(tracer, "sample_rate", 1.0),
+        ):
+            response = client.post(
+                "/ocr/sequence",
+                files=[
+                    ("frames", ("frame0.jpg", content, "image/jpeg")),
+                    ("frames", ("frame1.jpg", content, "image/jpeg")),
+                ],
+            )
+            tracer.flush()
+
+        assert response.status_code == 200
+        root = next(s for s in exporter.spans if s.name == "POST /ocr/sequence")
+        frames = [
+            s for s in exporter.spans if s.trace_id == root.trace_id and s is not root
+        ]
+        names = [span.name for span in frames]
+        assert names.count("ocr.frame") == 2
+        assert {"image.decode", "engine.wait", "ocr.engine"} <= set(names)
+        assert all(span.end_ns <= root.end_ns for span in frames)
+        assert exporter.spans.index(root) == len(exporter.spans) - 1
+
+    def test_ocr_invalid_options(self) -> None:
+        """Test that out-of-range pipeline options are rejected."""
+        response = client.post(
+            "/ocr",
+            files={"files": ("test.png", create_test_image(), "image/png")},
+            data={"text_score": "1.5", "max_side_len": "4"},
+        )
+
+        assert response.status_code == 400
+        detail = response.json()["detail"]
+        assert "text_score" in detail
+        assert "max_side_len" in detail
+
     def test_ocr_no_files(self) -> None:
         """Test OCR endpoint with no files."""
         response = client.post("/ocr")
@@ -147,6 +692,129 @@ class TestOCREndpoints:
             assert response.status_code in [200, 413]
 
 
+class TestAdminEndpoints:
+    """Test admin authentication and the profiling endpoint."""
+
+    def test_admin_disabled_without_token(self) -> None:
+        """Test that admin endpoints are closed while ADMIN_TOKEN is empty."""
+        with patch("app.routers.admin.settings.admin_token", ""):
+            response = client.post("/admin/profile", params={"duration": 0.1})
+
+        assert response.status_code == 403
+
+    def test_admin_rejects_wrong_token(self) -> None:
+        """Test that a wrong token is rejected before profiling starts."""
+        with patch("app.routers.admin.settings.admin_token", "secret"):
+            response = client.post(
+                "/admin/profile",
+                params={"duration": 0.1},
+                headers={"Authorization": "Bearer wrong"},
+            )
+
+        assert response.status_code == 401
+        assert not profiler.active
+
+    def test_profile_ocr_request(self) -> None:
+        """Test that a profile covers an OCR request made while recording."""
+        responses = []
+
+        def record() -> None:
+            responses.append(
+                client.post(
+                    "/admin/profile",
+                    params={"mode": "cprofile", "requests": 1, "format": "text"},
+                    headers={"X-Admin-Token": "secret"},
+                )
+            )
+
+        with patch("app.routers.admin.settings.admin_token", "secret"):
+            thread = threading.Thread(target=record)
+            thread.start()
+            deadline = time.monotonic() + 10
+            while not profiler.active and time.monotonic() < deadline:
+                time.sleep(0.01)
+            client.post(
+                "/ocr", files={"files": ("test.png", create_test_image(), "image/png")}
+            )
+            thread.join(timeout=30)
+
+        response = responses[0]
+        assert response.status_code == 200
+        assert response.headers["x-profile-calls"] == "1"
+        assert "cumulative" in response.text
+
+    def test_profile_invalid_format(self) -> None:
+        """Test that formats a mode does not produce are rejected."""
+        with patch("app.routers.admin.settings.admin_token", "secret"):
+            response = client.post(
+                "/admin/profile",
+                params={"mode": "sampling", "format": "pstats"},
+                headers={"X-Admin-Token": "secret"},
+            )
+
+        assert response.status_code == 400
+
+    def test_admin_drain(self) -> None:
+        """Test that a drain takes the instance out of rotation until resumed."""
+        lifecycle = ServiceLifecycle()
+        lifecycle.mark_warmup_skipped()
+        headers = {"X-Admin-Token": "secret"}
+
+        with (
+            patch("app.routers.admin.settings.admin_token", "secret"),
+            patch("app.routers.admin.service_lifecycle", lifecycle),
+            patch("app.routers.health.service_lifecycle", lifecycle),
+            patch("app.routers.ocr.service_lifecycle", lifecycle),
+        ):
+            drained = client.post(
+                "/admin/drain", params={"timeout": 0}, headers=headers
+            )
+            ready = client.get("/health/ready")
+            rejected = client.post(
+                "/ocr/",
+                files={"files": ("test.png", create_test_image(), "image/png")},
+            )
+            status = client.get("/admin/drain", headers=headers).json()
+            resumed = client.delete("/admin/drain", headers=headers)
+            accepted = client.post(
+                "/ocr/",
+                files={"files": ("test.png", create_test_image(), "image/png")},
+            )
+
+        assert drained.status_code == 200
+        assert drained.json()["state"] == "drained"
+        assert drained.json()["reason"] == "admin"
+        assert ready.status_code == 503
+        assert ready.json()["reason"] == "draining"
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "1"
+        assert status["rejected"] == 1
+        assert resumed.json() == {"state": "serving", "in_flight": 0}
+        assert accepted.status_code == 200
+
+
+class TestStartup:
+    """Test the startup sequence of the OCR service."""
+
+    async def test_autotuned_pool_footprint(self) -> None:
+        """Test that only the rebuilt pool counts toward the default footprint."""
+        service = OCRService()
+        threads = service._engine_params[INTRA_OP_THREADS_KEY]
+        decision = {"pool_size": 1, "intra_op_threads": threads + 1}
+        mb = 1024 * 1024
+        # Before the rebuild, then after warmup
+        rss = iter([900 * mb, 1000 * mb])
+        with (
+            patch("app.ocr_service.autotuner.tune", return_value=decision),
+            patch("app.ocr_service.get_process_rss", lambda: next(rss)),
+        ):
+            await service.autotune()
+            warmup_duration = await service.warmup()
+            service.complete_startup(warmup_duration)
+
+        assert service._registry.get_memory(service.default_key) == 100 * mb
+
+
 class TestRequestLogging:
     """Test request logging and tracking."""
 
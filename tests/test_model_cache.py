@@ -0,0 +1,87 @@
+"""Tests for the persisted optimized-model cache."""
+
+from pathlib import Path
+
+import pytest
+from rapidocr import RapidOCR
+
+from app.model_cache import ModelCache, loaded_model_paths, quantization_available
+from app.warmup import make_synthetic_image
+
+PROVIDER = "CPUExecutionProvider"
+
+
+class TestModelCache:
+    """Test saving and loading optimized ONNX models."""
+
+    def test_populate_and_lookup(self, tmp_path: Path) -> None:
+        """Test that cached optimized models produce the same OCR output."""
+        image = make_synthetic_image(320)
+        engine = RapidOCR()
+        expected = engine(image).txts
+
+        cache = ModelCache(tmp_path)
+        key = cache.config_key({}, PROVIDER)
+        assert cache.lookup(key) is None
+
+        model_paths = loaded_model_paths(engine)
+        assert set(model_paths) == {"det", "cls", "rec"}
+        cache.populate(key, model_paths, PROVIDER)
+        cache.record_cold_start(key, 1.5)
+
+        # A fresh cache instance reads the persisted manifest
+        reloaded = ModelCache(tmp_path)
+        params = reloaded.lookup(key)
+        assert params is not None
+        assert set(params) == {"Det.model_path", "Cls.model_path", "Rec.model_path"}
+        assert all(Path(path).parent == tmp_path for path in params.values())
+        assert reloaded.get_cold_start(key) == 1.5
+
+        cached_engine = RapidOCR(params=params)
+        assert cached_engine(image).txts == expected
+
+    @pytest.mark.skipif(
+        not quantization_available(), reason="onnx is required for quantization"
+    )
+    def test_populate_quantized(self, tmp_path: Path) -> None:
+        """Test that INT8-quantized models are cached and still recognize text."""
+        engine = RapidOCR()
+        engine(make_synthetic_image(320))
+
+        cache = ModelCache(tmp_path)
+        key = cache.config_key({"profile": "fast"}, PROVIDER)
+        entry = cache.populate(key, loaded_model_paths(engine), PROVIDER, quantize=True)
+        assert entry["quantized"] is True
+
+        params = cache.lookup(key)
+        assert params is not None
+        assert all("-int8-" in Path(path).name for path in params.values())
+
+        quantized_engine = RapidOCR(params=params)
+        assert quantized_engine(make_synthetic_image(960)).txts
+
+    def test_stale_source_is_a_miss(self, tmp_path: Path) -> None:
+        """Test that a changed source model invalidates the cache entry."""
+        source = tmp_path / "model.onnx"
+        source.write_bytes(b"original")
+        (tmp_path / "det-optimized.onnx").write_bytes(b"optimized")
+
+        cache = ModelCache(tmp_path / "cache")
+        cache._manifest["key"] = {
+            "models": {
+                "det": {
+                    "source": str(source),
+                    "sha256": "0" * 64,
+                    "optimized": "../det-optimized.onnx",
+                }
+            }
+        }
+
+        assert cache.lookup("key") is None
+
+    def test_config_key_depends_on_provider(self, tmp_path: Path) -> None:
+        """Test that different providers get different cache entries."""
+        cache = ModelCache(tmp_path)
+        assert cache.config_key({}, PROVIDER) != cache.config_key(
+            {}, "CUDAExecutionProvider"
+        )
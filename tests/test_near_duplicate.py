@@ -0,0 +1,179 @@
+"""Tests for the perceptual-hash near-duplicate cache."""
+
+import io
+import random
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from app.near_duplicate import (
+    Fingerprint,
+    MultiIndexHashIndex,
+    NearDuplicateCache,
+    image_fingerprint,
+)
+
+SAMPLE = Path("test_temp") / "test_image.jpg"
+
+
+def make_cache(**overrides: float) -> NearDuplicateCache:
+    """Create a cache with the default safeguard thresholds."""
+    options = {
+        "max_entries": 100,
+        "max_distance": 4,
+        "verify_max_ratio": 0.1,
+        "aspect_tolerance": 0.02,
+        "ttl": 3600,
+        **overrides,
+    }
+    return NearDuplicateCache(**options)
+
+
+def rescan(path: Path, tmp_path: Path, scale: float, quality: int) -> Path:
+    """Re-encode an image as a resized, lossy JPEG."""
+    with Image.open(path) as image:
+        resized = image.convert("RGB").resize(
+            (round(image.width * scale), round(image.height * scale))
+        )
+    target = tmp_path / f"rescan-{scale}-{quality}.jpg"
+    resized.save(target, quality=quality)
+    return target
+
+
+class TestFingerprint:
+    """Test perceptual hash stability."""
+
+    def test_rescans_stay_within_thresholds(self, tmp_path: Path) -> None:
+        """Test that re-encoding and rescaling barely change the hashes."""
+        original = image_fingerprint(SAMPLE)
+        cache = make_cache()
+        cache.insert("ns", original, "text", "source")
+
+        for scale, quality in ((1.0, 60), (0.75, 80), (2.0, 90)):
+            fingerprint = image_fingerprint(rescan(SAMPLE, tmp_path, scale, quality))
+            assert (fingerprint.hash ^ original.hash).bit_count() <= 4
+            assert cache.lookup("ns", fingerprint) is not None
+
+    def test_different_documents_differ(self) -> None:
+        """Test that unrelated documents are far apart."""
+        first = image_fingerprint(SAMPLE)
+        second = image_fingerprint(Path("test_temp") / "ocr_zh_sample2.png")
+
+        assert (first.hash ^ second.hash).bit_count() > 4
+        assert first.aspect_ratio != second.aspect_ratio
+
+
+class TestMultiIndexHashIndex:
+    """Test Hamming-radius candidate search."""
+
+    def test_candidates_cover_radius(self) -> None:
+        """Test that every hash within the radius is a candidate."""
+        rng = random.Random(0)
+        index = MultiIndexHashIndex(max_distance=4)
+        base = rng.getrandbits(64)
+        for entry_id in range(200):
+            flipped = rng.sample(range(64), rng.randint(0, 4))
+            value = base
+            for bit in flipped:
+                value ^= 1 << bit
+            index.add(entry_id, value)
+
+        assert index.candidates(base) == set(range(200))
+        assert set(index.search(base)) == set(range(200))
+
+    def test_remove(self) -> None:
+        """Test that removed entries are no longer candidates."""
+        index = MultiIndexHashIndex(max_distance=2)
+        index.add(1, 0xABCD)
+        index.remove(1, 0xABCD)
+
+        assert index.candidates(0xABCD) == set()
+
+    def test_lookup_scales_to_large_caches(self) -> None:
+        """Test that lookups only compare a handful of random entries."""
+        rng = random.Random(1)
+        cache = make_cache(max_entries=20000)
+        for number in range(20000):
+            fingerprint = Fingerprint(rng.getrandbits(64), rng.getrandbits(256), 1.0)
+            cache.insert("ns", fingerprint, str(number), str(number))
+        query = Fingerprint(rng.getrandbits(64), 0, 1.0)
+
+        start_time = time.perf_counter()
+        for _ in range(100):
+            cache.lookup("ns", query)
+        elapsed = (time.perf_counter() - start_time) / 100
+
+        assert len(cache._index.candidates(query.hash)) < 100
+        assert elapsed < 0.005
+
+
+class TestNearDuplicateCache:
+    """Test lookup safeguards, eviction and expiry."""
+
+    fingerprint = Fingerprint(hash=0xF0F0, verify_hash=(1 << 64) - 1, aspect_ratio=1.5)
+
+    def test_hit_reports_distance(self) -> None:
+        """Test that a close match returns the cached text and its distance."""
+        cache = make_cache()
+        cache.insert("ns", self.fingerprint, "cached text", "source")
+
+        match = cache.lookup("ns", self.fingerprint._replace(hash=0xF0F3))
+
+        assert match is not None
+        assert match[0].text == "cached text"
+        assert match[1] == 2
+        assert cache.get_stats()["hits"] == 1
+
+    def test_namespace_mismatch(self) -> None:
+        """Test that results are not shared across languages or options."""
+        cache = make_cache()
+        cache.insert("en|accurate", self.fingerprint, "text", "source")
+
+        assert cache.lookup("ch|accurate", self.fingerprint) is None
+
+    def test_verification_rejects(self) -> None:
+        """Test that aspect ratio and verification hash guard index matches."""
+        cache = make_cache()
+        cache.insert("ns", self.fingerprint, "text", "source")
+
+        assert cache.lookup("ns", self.fingerprint._replace(aspect_ratio=1.0)) is None
+        assert cache.lookup("ns", self.fingerprint._replace(verify_hash=0)) is None
+        assert cache.get_stats()["rejected"] == 2
+
+    def test_lru_eviction(self) -> None:
+        """Test that the least recently used entry is evicted first."""
+        cache = make_cache(max_entries=2)
+        first = self.fingerprint
+        second = self.fingerprint._replace(hash=0x0F0F0000)
+        cache.insert("ns", first, "first", "1")
+        cache.insert("ns", second, "second", "2")
+        cache.lookup("ns", first)
+        cache.insert("ns", self.fingerprint._replace(hash=0xFF << 40), "third", "3")
+
+        assert len(cache) == 2
+        assert cache.lookup("ns", first) is not None
+        assert cache.lookup("ns", second) is None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self) -> None:
+        """Test that expired entries are dropped on lookup."""
+        cache = make_cache(ttl=60)
+        cache.insert("ns", self.fingerprint, "text", "source")
+
+        with patch("app.near_duplicate.time.time", return_value=time.time() + 120):
+            assert cache.lookup("ns", self.fingerprint) is None
+        assert len(cache) == 0
+
+
+def test_png_and_jpeg_of_same_page_match(tmp_path: Path) -> None:
+    """Test that a format change alone is served from the cache."""
+    with Image.open(SAMPLE) as image:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+    (tmp_path / "page.png").write_bytes(buffer.getvalue())
+    cache = make_cache()
+    cache.insert("ns", image_fingerprint(SAMPLE), "text", "source")
+
+    assert cache.lookup("ns", image_fingerprint(tmp_path / "page.png")) is not None
@@ -0,0 +1,120 @@
+"""Tests for on-demand hot-path profiling."""
+
+import asyncio
+import cProfile
+import marshal
+import threading
+import time
+
+import pytest
+
+from app.profiling import CProfileSession, Profiler, SamplingSession
+
+
+def busy_work(seconds: float) -> int:
+    """Spin in Python code for a while."""
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+async def record_with_call(
+    profiler: Profiler, session: CProfileSession | SamplingSession
+) -> None:
+    """Record a session while one hot-path call runs in a worker thread."""
+    recording = asyncio.create_task(profiler.record(session))
+    while not profiler.active:
+        await asyncio.sleep(0.001)
+    await asyncio.to_thread(profiler.call, busy_work, 0.2)
+    await recording
+
+
+class TestProfiler:
+    """Test session bounds and profile output."""
+
+    async def test_sampling_collapsed_stacks(self) -> None:
+        """Test that hot-path threads are sampled into collapsed stacks."""
+        profiler = Profiler()
+        session = SamplingSession(duration=10, max_calls=1, interval=0.001)
+
+        await record_with_call(profiler, session)
+
+        content, media_type = session.render("collapsed")
+        lines = content.decode().splitlines()
+        assert media_type.startswith("text/plain")
+        assert session.calls == 1
+        assert session.samples > 0
+        assert any("busy_work (test_profiling.py" in line for line in lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+    async def test_cprofile_formats(self) -> None:
+        """Test that cProfile sessions dump pstats data and text reports."""
+        profiler = Profiler()
+        session = CProfileSession(duration=10, max_calls=1)
+
+        await record_with_call(profiler, session)
+
+        dump, media_type = session.render("pstats")
+        functions = {name for _, _, name in marshal.loads(dump)}
+        assert media_type == "application/octet-stream"
+        assert "busy_work" in functions
+        report, _ = session.render("text")
+        assert b"busy_work" in report
+
+    def test_cprofile_concurrent_calls(self) -> None:
+        """Test that concurrent hot-path calls share the session's profiler."""
+        session = CProfileSession(duration=10, max_calls=None)
+        errors: list[Exception] = []
+
+        def run() -> None:
+            try:
+                session.call(busy_work, 0.1)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        session.stop()
+
+        assert errors == []
+        assert session.calls == 3
+        dump, _ = session.render("pstats")
+        assert "busy_work" in {name for _, _, name in marshal.loads(dump)}
+
+    def test_cprofile_with_other_profiler(self) -> None:
+        """Test that calls run unprofiled while another profiler is active."""
+        session = CProfileSession(duration=10, max_calls=None)
+        other = cProfile.Profile()
+        other.enable()
+        try:
+            assert session.call(sum, [1, 2]) == 3
+        finally:
+            other.disable()
+        session.stop()
+
+        assert session.calls == 0
+        assert session.unprofiled_calls == 1
+        report, _ = session.render("text")
+        assert b"1 calls ran unprofiled" in report
+
+    async def test_duration_bound_and_single_session(self) -> None:
+        """Test that sessions end after their duration and never overlap."""
+        profiler = Profiler()
+        recording = asyncio.create_task(
+            profiler.record(CProfileSession(duration=0.1, max_calls=None))
+        )
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(RuntimeError):
+            await profiler.record(SamplingSession(1, None, 0.01))
+        session = await recording
+
+        assert session.calls == 0
+        assert not profiler.active
+        assert profiler.call(sum, [1, 2]) == 3
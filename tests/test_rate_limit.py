@@ -0,0 +1,189 @@
+"""Tests for per-client token-bucket rate limits."""
+
+from pathlib import Path
+
+import pytest
+
+from app.rate_limit import (
+    MEGAPIXELS,
+    REQUESTS,
+    BucketLimit,
+    BucketState,
+    MemoryBucketStore,
+    RateLimiter,
+    SqliteBucketStore,
+    evaluate,
+    rate_limit_headers,
+    refill,
+)
+
+REQUEST_LIMIT = BucketLimit(REQUESTS, rate=1.0, burst=2.0)
+MEGAPIXEL_LIMIT = BucketLimit(MEGAPIXELS, rate=2.0, burst=10.0)
+LIMITS = [REQUEST_LIMIT, MEGAPIXEL_LIMIT]
+
+
+def costs(megapixels: float = 0.0) -> dict[str, float]:
+    """Get the costs of one request."""
+    return {REQUESTS: 1.0, MEGAPIXELS: megapixels}
+
+
+class TestBuckets:
+    """Test cases for token-bucket arithmetic."""
+
+    def test_refill(self) -> None:
+        """Test that buckets start full and refill up to their burst."""
+        assert refill(None, REQUEST_LIMIT, 100.0) == 2.0
+        assert refill(BucketState(0.5, 100.0), REQUEST_LIMIT, 101.0) == 1.5
+        assert refill(BucketState(0.5, 100.0), REQUEST_LIMIT, 110.0) == 2.0
+
+    def test_burst_then_limited(self) -> None:
+        """Test that a client may burst and then waits for the refill."""
+        states: dict[str, BucketState] = {}
+        for _ in range(2):
+            decision, states = evaluate(states, LIMITS, costs(), 100.0)
+            assert decision.allowed
+
+        decision, rejected_states = evaluate(states, LIMITS, costs(), 100.0)
+        assert not decision.allowed
+        assert decision.limited_by == REQUESTS
+        assert decision.retry_after == pytest.approx(1.0)
+        # A rejected request takes no tokens
+        assert rejected_states[REQUESTS].tokens == pytest.approx(0.0)
+
+        decision, _ = evaluate(states, LIMITS, costs(), 101.0)
+        assert decision.allowed
+
+    def test_limited_by_slowest_bucket(self) -> None:
+        """Test that the retry time comes from the bucket that needs longest."""
+        states = {
+            REQUESTS: BucketState(0.0, 100.0),
+            MEGAPIXELS: BucketState(0.0, 100.0),
+        }
+        decision, _ = evaluate(states, LIMITS, costs(megapixels=6.0), 100.0)
+
+        assert not decision.allowed
+        assert decision.limited_by == MEGAPIXELS
+        assert decision.retry_after == pytest.approx(3.0)
+
+    def test_cost_above_burst_goes_into_debt(self) -> None:
+        """Test that an oversized request is admitted from a full bucket."""
+        decision, states = evaluate({}, LIMITS, costs(megapixels=30.0), 100.0)
+
+        assert decision.allowed
+        assert states[MEGAPIXELS].tokens == pytest.approx(-20.0)
+        status = decision.buckets[1]
+        assert status.remaining == 0.0
+        assert status.reset_after == pytest.approx(15.0)
+
+        decision, _ = evaluate(states, LIMITS, costs(megapixels=1.0), 101.0)
+        assert not decision.allowed
+        assert decision.retry_after == pytest.approx(9.5)
+
+    def test_headers(self) -> None:
+        """Test the rate limit headers of admitted and rejected requests."""
+        decision, states = evaluate({}, LIMITS, costs(megapixels=4.0), 100.0)
+        headers = rate_limit_headers(decision)
+
+        assert headers["X-RateLimit-Limit-Requests"] == "2"
+        assert headers["X-RateLimit-Remaining-Requests"] == "1.000"
+        assert headers["X-RateLimit-Reset-Requests"] == "1.000"
+        assert headers["X-RateLimit-Remaining-Megapixels"] == "6.000"
+        assert headers["X-RateLimit-Reset-Megapixels"] == "2.000"
+        assert "Retry-After" not in headers
+
+        states[REQUESTS] = BucketState(0.0, 100.0)
+        decision, _ = evaluate(states, LIMITS, costs(), 100.5)
+        assert rate_limit_headers(decision)["Retry-After"] == "1"
+
+
+class TestStores:
+    """Test cases for bucket stores."""
+
+    def test_memory_store_evicts_least_recent_clients(self) -> None:
+        """Test that the memory store keeps the most recently seen clients."""
+        store = MemoryBucketStore(max_clients=2)
+        for client in ("a", "b", "a", "c"):
+            store.check(client, LIMITS, costs(), 100.0)
+
+        assert len(store) == 2
+        # "b" was evicted, so it starts again with a full bucket
+        decision = store.check("b", LIMITS, costs(), 100.0)
+        assert decision.buckets[0].remaining == 1.0
+
+    def test_sqlite_store_is_shared(self, tmp_path: Path) -> None:
+        """Test that stores on the same file share their buckets."""
+        path = tmp_path / "rate_limits.sqlite3"
+        first = SqliteBucketStore(path)
+        second = SqliteBucketStore(path)
+
+        assert first.check("client", LIMITS, costs(), 100.0).allowed
+        assert second.check("client", LIMITS, costs(), 100.0).allowed
+        decision = first.check("client", LIMITS, costs(), 100.0)
+
+        assert not decision.allowed
+        assert len(second) == 1
+
+    def test_sqlite_store_prune(self, tmp_path: Path) -> None:
+        """Test that refilled buckets are pruned from the shared store."""
+        store = SqliteBucketStore(tmp_path / "rate_limits.sqlite3")
+        store.check("idle", LIMITS, costs(), 100.0)
+        store.check("active", LIMITS, costs(), 200.0)
+
+        # Both of the idle client's buckets, and the active one's full bucket
+        assert store.prune(now=200.0, limits=LIMITS) == 3
+        assert len(store) == 1
+        assert store.prune(now=200.0, limits=[REQUEST_LIMIT]) == 0
+
+    def test_sqlite_store_keeps_debt(self, tmp_path: Path) -> None:
+        """Test that a bucket in debt is kept until the debt is paid back."""
+        store = SqliteBucketStore(tmp_path / "rate_limits.sqlite3")
+        store.check("client", LIMITS, costs(megapixels=30.0), 100.0)
+
+        # 20 megapixels of debt take 15 s to refill to the burst of 10
+        assert store.prune(now=110.0, limits=LIMITS) == 1
+        assert len(store) == 1
+        assert store.prune(now=115.0, limits=LIMITS) == 1
+        assert len(store) == 0
+
+    def test_sqlite_store_prune_keeps_limit(self, tmp_path: Path) -> None:
+        """Test that pruning a bucket in debt does not forgive the debt."""
+        store = SqliteBucketStore(tmp_path / "rate_limits.sqlite3")
+        store.check("client", LIMITS, costs(megapixels=30.0), 100.0)
+        store.prune(now=110.0, limits=LIMITS)
+
+        assert not store.check("client", LIMITS, costs(5.0), 110.0).allowed
+
+
+class TestRateLimiter:
+    """Test cases for the rate limiter."""
+
+    async def test_limits_per_client(self) -> None:
+        """Test that clients have separate buckets and rejections are counted."""
+        limiter = RateLimiter(True, LIMITS, MemoryBucketStore(100))
+        for _ in range(2):
+            assert (await limiter.check("a")).allowed
+        assert not (await limiter.check("a")).allowed
+        assert (await limiter.check("b")).allowed
+
+        stats = await limiter.get_stats()
+        assert stats["checked"] == 4
+        assert stats["limited"] == {REQUESTS: 1, MEGAPIXELS: 0}
+        assert stats["clients"] == 2
+
+    async def test_sqlite_stats(self, tmp_path: Path) -> None:
+        """Test that clients of the shared store are counted for stats."""
+        limiter = RateLimiter(
+            True, LIMITS, SqliteBucketStore(tmp_path / "rate_limits.sqlite3")
+        )
+        await limiter.check("a")
+
+        assert (await limiter.get_stats())["clients"] == 1
+
+    def test_zero_rate_disables_bucket(self) -> None:
+        """Test that buckets with a rate of 0 are not enforced."""
+        limiter = RateLimiter(
+            True, [BucketLimit(REQUESTS, 0.0, 1.0)], MemoryBucketStore(100)
+        )
+
+        assert not limiter.enabled
+        assert limiter.limits == []
@@ -0,0 +1,222 @@
+"""Tests for priority classes and fair scheduling of engine calls."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.scheduler import (
+    FairScheduler,
+    ScheduleContext,
+    resolve_context,
+    tenant_id,
+)
+
+PRIORITIES = ["interactive", "normal", "bulk"]
+
+
+def context(
+    tenant: str, priority: str = "normal", weight: float = 1.0
+) -> ScheduleContext:
+    """Create a schedule context."""
+    return ScheduleContext(tenant, priority, weight)
+
+
+async def enter(
+    scheduler: FairScheduler, call_context: ScheduleContext, pool: str = "default"
+) -> None:
+    """Take and immediately release a slot."""
+    async with scheduler.slot(call_context, pool=pool):
+        pass
+
+
+async def run_contended(
+    scheduler: FairScheduler, contexts: list[ScheduleContext]
+) -> list[str]:
+    """Queue calls behind a held slot and return the tenants in grant order."""
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with scheduler.slot(context("holder")):
+            await release.wait()
+
+    async def call(call_context: ScheduleContext) -> None:
+        async with scheduler.slot(call_context):
+            order.append(call_context.tenant)
+            await asyncio.sleep(0)
+
+    holders = [asyncio.create_task(hold()) for _ in range(scheduler.capacity)]
+    await asyncio.sleep(0)
+    calls = []
+    for call_context in contexts:
+        calls.append(asyncio.create_task(call(call_context)))
+        await asyncio.sleep(0)
+    assert scheduler.queue_depth == len(contexts)
+
+    release.set()
+    await asyncio.gather(*holders, *calls)
+    return order
+
+
+class TestFairScheduler:
+    """Test slot grants by priority, fair share and tenant caps."""
+
+    async def test_free_slots_are_granted_immediately(self) -> None:
+        """Test that uncontended calls do not wait."""
+        scheduler = FairScheduler(2, PRIORITIES)
+
+        async with scheduler.slot(context("a")), scheduler.slot(context("b")):
+            assert scheduler.in_use == 2
+
+        stats = scheduler.get_stats()
+        assert scheduler.in_use == 0
+        assert stats["classes"]["normal"]["granted"] == 2
+        assert stats["classes"]["normal"]["waited"] == 0
+        assert stats["tenants"] == {}
+
+    async def test_higher_priority_goes_first(self) -> None:
+        """Test that an interactive call overtakes queued bulk calls."""
+        scheduler = FairScheduler(1, PRIORITIES)
+
+        order = await run_contended(
+            scheduler,
+            [
+                context("bulk", "bulk"),
+                context("bulk", "bulk"),
+                context("ui", "interactive"),
+            ],
+        )
+
+        assert order == ["ui", "bulk", "bulk"]
+
+    async def test_tenants_take_turns(self) -> None:
+        """Test that a tenant with many queued calls cannot run ahead of another."""
+        scheduler = FairScheduler(1, PRIORITIES)
+
+        order = await run_contended(scheduler, [context("a")] * 4 + [context("b")] * 2)
+
+        assert order == ["a", "b", "a", "b", "a", "a"]
+
+    async def test_weights_share_slots_proportionally(self) -> None:
+        """Test that a tenant with twice the weight gets twice the turns."""
+        scheduler = FairScheduler(1, PRIORITIES)
+
+        order = await run_contended(
+            scheduler, [context("heavy", weight=2.0)] * 4 + [context("light")] * 2
+        )
+
+        assert order[:3].count("heavy") == 2
+        assert order[:6].count("light") == 2
+
+    async def test_tenant_concurrency_cap(self) -> None:
+        """Test that a tenant at its cap is skipped while others run."""
+        scheduler = FairScheduler(3, PRIORITIES, tenant_max_concurrency=1)
+        entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with scheduler.slot(context("bulk")):
+                entered.set()
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await entered.wait()
+        waiting = asyncio.create_task(enter(scheduler, context("bulk")))
+        await asyncio.sleep(0)
+
+        # A free slot is left, but only another tenant may take it
+        assert scheduler.queue_depth == 1
+        async with scheduler.slot(context("ui")):
+            assert scheduler.in_use == 2
+
+        release.set()
+        await asyncio.gather(holder, waiting)
+        assert scheduler.in_use == 0
+
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        """Test that a caller cancelled while waiting gives up its place."""
+        scheduler = FairScheduler(1, PRIORITIES)
+
+        async with scheduler.slot(context("a")):
+            waiting = asyncio.create_task(enter(scheduler, context("b")))
+            await asyncio.sleep(0)
+            assert scheduler.queue_depth == 1
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            assert scheduler.queue_depth == 0
+
+        assert scheduler.in_use == 0
+        assert scheduler.get_stats()["tenants"] == {}
+
+    async def test_resize_grants_waiting_calls(self) -> None:
+        """Test that growing the scheduler releases queued calls."""
+        scheduler = FairScheduler(1, PRIORITIES)
+
+        async with scheduler.slot(context("a")):
+            waiting = asyncio.create_task(enter(scheduler, context("b")))
+            await asyncio.sleep(0)
+            scheduler.resize(2)
+            await asyncio.wait_for(waiting, 1.0)
+
+    async def test_pools_have_own_slots(self) -> None:
+        """Test that a full pool does not hold up calls to another pool."""
+        scheduler = FairScheduler(1, PRIORITIES)
+        scheduler.resize(2, pool="en:default")
+
+        async with scheduler.slot(context("a")):
+            blocked = asyncio.create_task(enter(scheduler, context("b")))
+            async with scheduler.slot(context("c"), pool="en:default"):
+                # Queued behind the default pool, yet granted right away
+                await asyncio.wait_for(
+                    enter(scheduler, context("d"), pool="en:default"), 1.0
+                )
+                stats = scheduler.get_stats()
+                assert stats["in_use"] == 2
+                assert stats["pools"]["en:default"] == {"capacity": 2, "in_use": 1}
+                assert not blocked.done()
+        await asyncio.wait_for(blocked, 1.0)
+        assert scheduler.get_stats()["pools"] == {
+            "en:default": {"capacity": 2, "in_use": 0}
+        }
+
+
+class TestScheduleContext:
+    """Test resolving priority classes and tenants from request headers."""
+
+    def test_defaults(self) -> None:
+        """Test that requests without headers are normal priority per client IP."""
+        resolved = resolve_context({}, "10.0.0.1")
+
+        assert resolved == ScheduleContext("ip:10.0.0.1", "normal", 1.0)
+
+    def test_priority_and_api_key(self) -> None:
+        """Test that the priority header and hashed API key are used."""
+        resolved = resolve_context(
+            {"X-Priority": "Interactive", "X-API-Key": "secret"}, "10.0.0.1"
+        )
+
+        assert resolved.priority == "interactive"
+        assert resolved.tenant == tenant_id("secret", None)
+        assert "secret" not in resolved.tenant
+
+    def test_unknown_priority(self) -> None:
+        """Test that an unknown priority class is rejected."""
+        with pytest.raises(ValueError, match="Unknown priority class"):
+            resolve_context({"X-Priority": "urgent"}, None)
+
+    def test_forwarded_client(self) -> None:
+        """Test that only trusted proxies may name the client IP."""
+        headers = {"X-Forwarded-For": "198.51.100.1, 203.0.113.7, 10.0.0.6"}
+        with patch(
+            "app.scheduler.settings.scheduler_trusted_proxies",
+            ["10.0.0.5", "10.0.0.6"],
+        ):
+            forwarded = resolve_context(headers, "10.0.0.5")
+            direct = resolve_context({}, "10.0.0.5")
+            spoofed = resolve_context(headers, "192.0.2.9")
+
+        assert forwarded.tenant == "ip:203.0.113.7"
+        assert direct.tenant == "ip:10.0.0.5"
+        assert spoofed.tenant == "ip:192.0.2.9"
@@ -0,0 +1,96 @@
+"""Tests for response encoding and compression negotiation."""
+
+import gzip
+import json
+from unittest.mock import patch
+
+import pytest
+from starlette.requests import Request
+
+from app import serialization
+from app.models import OCRResponse, OCRResult
+from app.serialization import choose_encoding, encode_json, render_response
+
+
+def make_response(lines: int) -> OCRResponse:
+    """Create an OCR response with a multi-line result."""
+    text = "\n".join(f"第 {i} 行 line {i}" for i in range(lines))
+    return OCRResponse(
+        results=[OCRResult(FileName="page.png", UUID="uuid", Context=text)],
+        processing_time=0.5,
+        gpu_used=False,
+        model_profile="accurate",
+        lang="ch",
+    )
+
+
+def make_request(accept_encoding: str | None) -> Request:
+    """Create a request carrying an Accept-Encoding header."""
+    headers = []
+    if accept_encoding is not None:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({"type": "http", "headers": headers})
+
+
+class TestNegotiation:
+    """Test Accept-Encoding parsing."""
+
+    def test_quality_values(self) -> None:
+        """Test that codings are chosen by quality and refused with q=0."""
+        assert choose_encoding("gzip, zstd;q=0") == "gzip"
+        assert choose_encoding("identity") is None
+        assert choose_encoding("br") is None
+        assert choose_encoding(None) is None
+        assert choose_encoding("gzip;q=0") is None
+
+    @pytest.mark.skipif(serialization.zstandard is None, reason="zstandard missing")
+    def test_prefers_zstd(self) -> None:
+        """Test that zstd wins ties and loses to a better-rated gzip."""
+        assert choose_encoding("gzip, deflate, zstd") == "zstd"
+        assert choose_encoding("*") == "zstd"
+        assert choose_encoding("zstd;q=0.5, gzip") == "gzip"
+
+
+class TestRenderResponse:
+    """Test response encoding and the compression threshold."""
+
+    def test_encoders_agree(self) -> None:
+        """Test that the orjson and pydantic encoders produce the same document."""
+        response = make_response(5)
+        with patch("app.serialization.orjson", None):
+            fallback = encode_json(response)
+
+        assert json.loads(encode_json(response)) == json.loads(fallback)
+        assert json.loads(fallback) == response.model_dump()
+
+    async def test_small_bodies_are_not_compressed(self) -> None:
+        """Test that bodies below the threshold are sent as is."""
+        response = await render_response(make_request("gzip"), make_response(1))
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+        assert json.loads(response.body)["lang"] == "ch"
+
+    async def test_gzip(self) -> None:
+        """Test that large bodies are gzip-compressed when accepted."""
+        response = await render_response(make_request("gzip"), make_response(500))
+
+        assert response.headers["content-encoding"] == "gzip"
+        document = json.loads(gzip.decompress(response.body))
+        assert document["results"][0]["Context"].startswith("第 0 行")
+
+    @pytest.mark.skipif(serialization.zstandard is None, reason="zstandard missing")
+    async def test_zstd(self) -> None:
+        """Test that large bodies are zstd-compressed when accepted."""
+        response = await render_response(make_request("zstd, gzip"), make_response(500))
+
+        assert response.headers["content-encoding"] == "zstd"
+        body = serialization.zstandard.ZstdDecompressor().decompress(response.body)
+        assert len(body) > len(response.body) * 3
+
+    async def test_compression_disabled(self) -> None:
+        """Test that compression can be turned off."""
+        with patch("app.serialization.settings.response_compression_enabled", False):
+            response = await render_response(make_request("gzip"), make_response(500))
+
+        assert "content-encoding" not in response.headers
@@ -0,0 +1,195 @@
+"""Tests for request tracing, sampling and span exporters."""
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.tracing import (
+    JsonlSpanExporter,
+    OTLPHttpSpanExporter,
+    Span,
+    SpanExporter,
+    Tracer,
+)
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+
+
+class CollectingExporter(SpanExporter):
+    """Exporter keeping every exported span in memory."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    """Stand-in OTLP collector recording the posted requests."""
+
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append((self.path, json.loads(body)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def collector() -> Iterator[str]:
+    """Run a local HTTP server and yield its OTLP traces endpoint."""
+    CollectorHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CollectorHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/traces"
+    server.shutdown()
+    server.server_close()
+
+
+class TestTracer:
+    """Test span trees and sampling decisions."""
+
+    async def test_span_tree(self) -> None:
+        """Test that spans nest across awaits and worker threads."""
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter, sample_rate=1.0)
+
+        def work() -> None:
+            with tracer.span("thread.work"):
+                tracer.record_span("library.stage", 1, 2)
+
+        with tracer.start_trace("POST /ocr/", TRACE_ID, **{"http.method": "POST"}):
+            with tracer.span("upload.save", bytes=10):
+                await asyncio.sleep(0)
+            await asyncio.to_thread(work)
+        tracer.flush()
+
+        spans = {span.name: span for span in exporter.spans}
+        root = spans["POST /ocr/"]
+        assert root.parent_id is None
+        assert root.attributes == {"http.method": "POST"}
+        assert {span.trace_id for span in exporter.spans} == {TRACE_ID}
+        assert spans["upload.save"].parent_id == root.span_id
+        assert spans["thread.work"].parent_id == root.span_id
+        assert spans["library.stage"].parent_id == spans["thread.work"].span_id
+        assert tracer.get_stats()["traces_exported"] == 1
+
+    def test_errors_are_recorded(self) -> None:
+        """Test that an exception marks its span and propagates."""
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter, sample_rate=1.0)
+
+        with pytest.raises(ValueError), tracer.start_trace("root", TRACE_ID):
+            with tracer.span("failing"):
+                raise ValueError("bad image")
+        tracer.flush()
+
+        errors = {span.name: span.error for span in exporter.spans}
+        assert errors["failing"] == "ValueError: bad image"
+
+    def test_unsampled_fast_traces_are_not_exported(self) -> None:
+        """Test that only sampled or slow requests are exported."""
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter, sample_rate=0.0, slow_threshold=0.05)
+
+        with tracer.start_trace("fast", TRACE_ID):
+            pass
+        with tracer.start_trace("slow", TRACE_ID):
+            time.sleep(0.06)
+        tracer.flush()
+
+        assert [span.name for span in exporter.spans] == ["slow"]
+
+    def test_spans_outside_a_trace_are_ignored(self) -> None:
+        """Test that instrumentation is a no-op without an active trace."""
+        tracer = Tracer(CollectingExporter(), sample_rate=1.0)
+
+        with tracer.span("orphan") as span:
+            assert span is None
+        tracer.record_span("orphan", 1, 2)
+
+        assert tracer.get_stats()["traces_started"] == 0
+
+
+class TestExporters:
+    """Test the JSONL and OTLP exporters."""
+
+    def test_jsonl_exporter(self, tmp_path: Path) -> None:
+        """Test that spans are appended as JSON lines."""
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(JsonlSpanExporter(path), sample_rate=1.0)
+
+        for _ in range(2):
+            with tracer.start_trace("root", TRACE_ID), tracer.span("child"):
+                pass
+        tracer.shutdown()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record["name"] for record in records] == [
+            "child",
+            "root",
+            "child",
+            "root",
+        ]
+        assert records[0]["parent_id"] == records[1]["span_id"]
+
+    def test_otlp_exporter(self, collector: str) -> None:
+        """Test that spans are posted as an OTLP/JSON export request."""
+        tracer = Tracer(OTLPHttpSpanExporter(collector, "rapidocr-test"), 1.0)
+
+        with tracer.start_trace("root", TRACE_ID, **{"http.status_code": 200}):
+            with tracer.span("child", ratio=0.5, cached=False):
+                pass
+        tracer.shutdown()
+
+        assert len(CollectorHandler.requests) == 1
+        path, document = CollectorHandler.requests[0]
+        assert path == "/v1/traces"
+        resource_spans = document["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "rapidocr-test"}}
+        ]
+        spans = {
+            span["name"]: span for span in resource_spans["scopeSpans"][0]["spans"]
+        }
+        assert spans["root"]["traceId"] == TRACE_ID
+        assert spans["root"]["kind"] == 2
+        assert spans["root"]["attributes"] == [
+            {"key": "http.status_code", "value": {"intValue": "200"}}
+        ]
+        assert spans["child"]["parentSpanId"] == spans["root"]["spanId"]
+        assert {"key": "cached", "value": {"boolValue": False}} in spans["child"][
+            "attributes"
+        ]
+        assert int(spans["root"]["endTimeUnixNano"]) >= int(
+            spans["root"]["startTimeUnixNano"]
+        )
+
+    def test_export_failures_are_counted(self) -> None:
+        """Test that an unreachable collector does not break requests."""
+        tracer = Tracer(
+            OTLPHttpSpanExporter("http://127.0.0.1:9/v1/traces", "test", 0.5), 1.0
+        )
+
+        with tracer.start_trace("root", TRACE_ID):
+            pass
+        tracer.shutdown()
+
+        assert tracer.get_stats()["export_errors"] == 1